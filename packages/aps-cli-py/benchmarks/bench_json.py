@@ -0,0 +1,93 @@
+"""Microbenchmark: AG-007 JSON validation vs `json.loads` on the repository corpus.
+
+Usage: python benchmarks/bench_json.py [--repeat N]
+
+Collects every inline JSON value and `JSON<<` block body from the prompts and skill
+assets in the repository, plus one synthetic multi-megabyte block, then times
+`validate_json_value` (fast path), `scan_json_value` (validate-only fallback),
+`parse_json_value` (full APS decode) and `json.loads` (plain JSON only).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from aps_cli.jsonvalue import (  # noqa: E402
+    HAVE_ACCELERATED_DECODER,
+    JsonValueError,
+    parse_json_value,
+    scan_json_value,
+    validate_json_value,
+)
+from aps_cli.parser import parse_document  # noqa: E402
+
+
+def corpus() -> list[str]:
+    values: list[str] = []
+    for path in sorted(ROOT.glob("**/*.md")):
+        if "node_modules" in path.parts:
+            continue
+        doc = parse_document(path.read_text(encoding="utf-8"), str(path))
+        for const in doc.constants:
+            if const.block_type == "JSON" and const.end_line is not None:
+                values.append(const.body(doc.text))
+            elif const.value.startswith(("{", "[")):
+                values.append(const.value)
+        for proc in doc.processes:
+            for stmt in proc.statements:
+                values.extend(p.value for p in stmt.params if p.value.startswith(("{", "[")))
+    return values
+
+
+def synthetic_block(n: int = 20000) -> str:
+    rows = ",\n".join(
+        f'  {{"id": {i}, "name": "item-{i}", "tags": ["a", "b"], "score": {i}.5, "ok": true}}'
+        for i in range(n)
+    )
+    return "[\n" + rows + "\n]"
+
+
+def _loads_all(values: list[str]) -> None:
+    for v in values:
+        try:
+            json.loads(v)
+        except ValueError:
+            pass  # APS-only syntax (constant symbols): json cannot validate it
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    valid = []
+    for v in corpus():
+        try:
+            parse_json_value(v)
+        except JsonValueError:
+            continue  # invalid values (AG-007 findings) are not part of the timing
+        valid.append(v)
+    suites = {"corpus": valid, "synthetic": [synthetic_block()]}
+    print(f"accelerated decoder: {'yes' if HAVE_ACCELERATED_DECODER else 'no'}")
+    for name, values in suites.items():
+        size = sum(len(v) for v in values)
+        print(f"\n{name}: {len(values)} value(s), {size / 1024:.0f} KiB")
+        for label, fn in (
+            ("json.loads", lambda: _loads_all(values)),
+            ("validate_json_value", lambda: [validate_json_value(v) for v in values]),
+            ("scan_json_value", lambda: [scan_json_value(v) for v in values]),
+            ("parse_json_value", lambda: [parse_json_value(v) for v in values]),
+        ):
+            best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+            print(f"  {label:<20} {best * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: AG-021 STE checks on a large `<instructions ste="true">` corpus.
+
+Usage: python benchmarks/bench_ste.py [--lines N] [--repeat N]
+
+Builds an instruction section from the `<instructions>` lines of the repository's
+prompts (repeated up to `--lines`), then times the cold dictionary load, `check_line`
+over every line, and the full `aps lint` path (parse plus all rules).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from itertools import cycle, islice
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from aps_cli.lint import lint_text  # noqa: E402
+from aps_cli.ste import load_ste_checker  # noqa: E402
+
+FALLBACK = [
+    "Read the file and write a short summary of the changes.",
+    "You MUST select an appropriate workflow mode from the user request.",
+    "If the `<TASK>` is not clear, ask one question and stop.",
+]
+
+
+def instruction_lines() -> list[str]:
+    lines: list[str] = []
+    for path in sorted(ROOT.glob(".github/**/*.md")):
+        inside = False
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.startswith("<instructions"):
+                inside = True
+            elif line.startswith("</instructions>"):
+                inside = False
+            elif inside and line.strip():
+                lines.append(line)
+    return lines or FALLBACK
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lines = list(islice(cycle(instruction_lines()), args.lines))
+    text = '<instructions ste="true">\n' + "\n".join(lines) + "\n</instructions>\n"
+
+    load = timeit.timeit(lambda: load_ste_checker.__wrapped__(), number=1)
+    checker = load_ste_checker()
+    print(f"corpus: {len(lines)} lines, {len(text) / 1e6:.2f} MB; dictionary: {len(checker.words)} words")
+    print(f"  {'dictionary load':<20} {load * 1e3:8.2f} ms")
+
+    def check() -> int:
+        fresh = load_ste_checker.__wrapped__()
+        return sum(1 for line in lines for _ in fresh.check_line(line))
+
+    findings = check()
+    for label, fn in (("check_line (cold)", check), ("aps lint", lambda: lint_text(text))):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"  {label:<20} {best * 1e3:8.2f} ms")
+    print(f"  {findings} finding(s)")
+
+
+if __name__ == "__main__":
+    main()
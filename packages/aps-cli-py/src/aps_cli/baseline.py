@@ -0,0 +1,178 @@
+"""Diagnostic baselines: suppress known findings so only new ones fail CI.
+
+A finding's fingerprint is `<code>:<hash>`, where the hash covers the file path
+(relative to the baseline's directory, so it does not depend on where `aps` runs), the
+code, the logical location (enclosing `<process id>`, `<format id>` or section) and the
+source line with whitespace collapsed. Line numbers are deliberately excluded, so
+findings survive edits elsewhere in the file. The baseline stores a count per
+fingerprint (identical lines in one process are distinct findings) as sorted JSON,
+one entry per line, which keeps updates to minimal diffs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .core import atomic_write_text
+from .diagnostics import Diagnostic
+from .parser import ATTR_RE, SECTION_ORDER, TAG_RE
+
+BASELINE_VERSION = 1
+
+# Tags whose `id` names a logical location.
+_ID_BLOCKS = ("process", "format")
+
+
+def logical_locations(lines: list[str]) -> list[str]:
+    """Logical location of every line (index 0 is unused; lines are 1-based).
+
+    A single tag scan rather than a full parse: only lines starting with `<` are matched.
+    """
+    out = ["document"]
+    section: Optional[str] = None
+    block: Optional[str] = None
+    for raw in lines:
+        here = block or (f"section:{section}" if section else "document")
+        stripped = raw.strip()
+        tag = TAG_RE.match(stripped) if stripped.startswith("<") else None
+        if tag is not None:
+            name, closing = tag.group("name"), bool(tag.group("close"))
+            if section is None:
+                if name in SECTION_ORDER and not closing:
+                    section = name
+                    here = f"section:{name}"
+            elif closing and name == section:
+                section = block = None
+            elif name in _ID_BLOCKS:
+                if closing:
+                    block = None
+                else:
+                    ident = dict(ATTR_RE.findall(tag.group("attrs"))).get("id", "")
+                    block = here = f"{name}:{ident}"
+        out.append(here)
+    return out
+
+
+def _logical_path(file: Optional[str], root: Optional[Path] = None) -> str:
+    """`file` relative to `root` (the current directory by default), with `/` separators."""
+    if file is None:
+        return "<input>"
+    base = os.path.abspath(root if root is not None else os.curdir)
+    try:
+        rel = os.path.relpath(os.path.abspath(file), base)
+    except ValueError:  # another drive on Windows
+        rel = os.path.abspath(file)
+    return Path(rel).as_posix()
+
+
+def fingerprint(
+    diagnostic: Diagnostic, lines: list[str], locations: list[str], root: Optional[Path] = None
+) -> str:
+    """Line-number-independent identity of a finding; paths are taken relative to `root`."""
+    line = lines[diagnostic.line - 1] if 0 < diagnostic.line <= len(lines) else ""
+    location = locations[diagnostic.line] if diagnostic.line < len(locations) else "document"
+    key = "\0".join(
+        (_logical_path(diagnostic.file, root), diagnostic.code, location, " ".join(line.split()))
+    )
+    return f"{diagnostic.code}:{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+def file_fingerprints(
+    diagnostics: list[Diagnostic], text: str, root: Optional[Path] = None
+) -> list[str]:
+    """Fingerprints of one file's diagnostics, given that file's text."""
+    lines = text.replace("\r\n", "\n").split("\n")
+    locations = logical_locations(lines)
+    return [fingerprint(d, lines, locations, root) for d in diagnostics]
+
+
+def _read(file: Optional[str]) -> str:
+    if file is None:
+        return ""
+    try:
+        return Path(file).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def fingerprint_all(diagnostics: Iterable[Diagnostic], root: Optional[Path] = None) -> list[str]:
+    """Fingerprints of diagnostics from any number of files (each file is read once)."""
+    by_file: dict[Optional[str], list[int]] = {}
+    items = list(diagnostics)
+    for idx, d in enumerate(items):
+        by_file.setdefault(d.file, []).append(idx)
+    out = [""] * len(items)
+    for file, indexes in by_file.items():
+        prints = file_fingerprints([items[i] for i in indexes], _read(file), root)
+        for idx, fp in zip(indexes, prints):
+            out[idx] = fp
+    return out
+
+
+@dataclass
+class Baseline:
+    """Multiset of accepted finding fingerprints."""
+
+    fingerprints: Counter[str] = field(default_factory=Counter)
+
+    @classmethod
+    def load(cls, path: Path) -> "Baseline":
+        """Load a baseline; a missing file is an empty baseline.
+
+        Raises:
+            ValueError: The file is not a baseline of a supported version.
+        """
+        try:
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return cls()
+        data = json.loads(text)
+        if not isinstance(data, dict) or data.get("version") != BASELINE_VERSION:
+            raise ValueError(f"{path} is not an aps baseline (version {BASELINE_VERSION})")
+        return cls(Counter({k: int(v) for k, v in data.get("fingerprints", {}).items()}))
+
+    def save(self, path: Path) -> bool:
+        """Write the baseline if its content changed; returns True if written."""
+        data = {
+            "version": BASELINE_VERSION,
+            "fingerprints": {k: self.fingerprints[k] for k in sorted(self.fingerprints)},
+        }
+        text = json.dumps(data, indent=1) + "\n"
+        try:
+            if path.read_text(encoding="utf-8") == text:
+                return False
+        except OSError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, text)
+        return True
+
+    def suppressor(self, root: Optional[Path] = None) -> "BaselineFilter":
+        """A filter for findings fingerprinted relative to `root` (the baseline's directory)."""
+        return BaselineFilter(Counter(self.fingerprints), root)
+
+
+class BaselineFilter:
+    """Consumes baseline entries as matching findings are seen."""
+
+    def __init__(self, remaining: Counter[str], root: Optional[Path] = None) -> None:
+        self.remaining = remaining
+        self.root = root
+        self.suppressed = 0
+
+    def new_findings(self, diagnostics: list[Diagnostic]) -> list[Diagnostic]:
+        """Drop findings covered by the baseline; return the rest in order."""
+        out = []
+        for d, fp in zip(diagnostics, fingerprint_all(diagnostics, self.root)):
+            if self.remaining[fp] > 0:
+                self.remaining[fp] -= 1
+                self.suppressed += 1
+            else:
+                out.append(d)
+        return out
@@ -0,0 +1,344 @@
+"""Process call graph: RUN resolution, signatures, recursion and reachability.
+
+The graph is built in one pass over the processes of one or more documents. Process ids
+are interned to dense integers through a hash index, so resolving a RUN target is a dict
+lookup; cycles are the strongly connected components found by an iterative Tarjan
+traversal, and unreachable processes come from a breadth-first walk. Every analysis is
+O(V + E). `to_json` / `to_dot` export the graph for tooling.
+
+Entry points are the `<trigger target>` processes; a document set without triggers uses
+every process that no RUN calls.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .diagnostics import Diagnostic, make_diagnostic
+from .jsonvalue import NUMBER_RE, SYMBOL_RE
+from .parser import (
+    Constant,
+    Document,
+    Param,
+    Process,
+    Statement,
+    parse_document,
+    split_top_level,
+)
+from .spec import load_token_catalog
+
+# Declared argument types whose literal values can be checked statically.
+STRING_LITERAL_RE = re.compile(r'^"(?:[^"\\]|\\.)*"$')
+BOOLEAN_LITERALS = frozenset({"true", "false"})
+
+
+@dataclass(frozen=True)
+class Argument:
+    """One `name: Type` entry of a `<process args="...">` signature."""
+
+    name: str
+    type: str
+    column: int
+
+
+@dataclass
+class ProcessNode:
+    """A process definition in the graph."""
+
+    id: str
+    file: Optional[str]
+    line: int
+    process: Process
+    # None when the process declares no `args` attribute (signature unknown).
+    signature: Optional[list[Argument]] = None
+
+
+@dataclass(frozen=True)
+class CallSite:
+    """A `RUN` statement (or trigger) and the process index it resolved to."""
+
+    caller: Optional[int]
+    target: str
+    resolved: Optional[int]
+    file: Optional[str]
+    line: int
+    column: int
+    statement: Optional[Statement] = None
+
+
+def parse_signature(proc: Process) -> Optional[list[Argument]]:
+    """Arguments declared by `args="a: Type, ..."` (None if the attribute is absent)."""
+    if "args" not in proc.attrs:
+        return None
+    base = proc.attr_columns["args"]
+    out: list[Argument] = []
+    for part, offset in split_top_level(proc.attrs["args"]):
+        name, _, type_ = part.partition(":")
+        out.append(Argument(name.strip(), type_.strip(), base + offset))
+    return out
+
+
+@dataclass
+class CallGraph:
+    """Processes as dense integer nodes with RUN edges between them."""
+
+    nodes: list[ProcessNode] = field(default_factory=list)
+    index: dict[str, int] = field(default_factory=dict)
+    calls: list[CallSite] = field(default_factory=list)
+    triggers: list[CallSite] = field(default_factory=list)
+    edges: list[list[int]] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, documents: Iterable[Document]) -> "CallGraph":
+        """Index every process, then resolve every RUN and trigger target."""
+        graph = cls()
+        docs = list(documents)
+        for doc in docs:
+            for proc in doc.processes:
+                if proc.id and proc.id not in graph.index:
+                    graph.index[proc.id] = len(graph.nodes)
+                    graph.nodes.append(
+                        ProcessNode(proc.id, doc.path, proc.line, proc, parse_signature(proc))
+                    )
+        # Per-caller dicts de-duplicate targets in O(1) and keep first-call order.
+        targets: list[dict[int, None]] = [{} for _ in graph.nodes]
+        for doc in docs:
+            for proc in doc.processes:
+                caller = graph.index.get(proc.id)
+                if caller is not None and graph.nodes[caller].process is not proc:
+                    caller = None  # duplicate id: its calls do not belong to the indexed node
+                for stmt in proc.statements:
+                    if stmt.keyword != "RUN" or stmt.target is None or not stmt.target_backticked:
+                        continue
+                    target = graph.index.get(stmt.target.name)
+                    graph.calls.append(
+                        CallSite(
+                            caller,
+                            stmt.target.name,
+                            target,
+                            doc.path,
+                            stmt.line,
+                            stmt.target.column,
+                            stmt,
+                        )
+                    )
+                    if caller is not None and target is not None:
+                        targets[caller][target] = None
+            for trigger in doc.triggers:
+                if "target" in trigger.attrs:
+                    name = trigger.attrs["target"]
+                    graph.triggers.append(
+                        CallSite(
+                            None,
+                            name,
+                            graph.index.get(name),
+                            doc.path,
+                            trigger.line,
+                            trigger.attr_columns["target"],
+                        )
+                    )
+        graph.edges = [list(t) for t in targets]
+        return graph
+
+    def missing(self) -> Iterator[CallSite]:
+        """RUN and trigger targets that no indexed process defines."""
+        for site in (*self.calls, *self.triggers):
+            if site.resolved is None:
+                yield site
+
+    def missing_diagnostics(self) -> list[Diagnostic]:
+        """AG-004 for every unresolved RUN or trigger target, in file/line order."""
+        out = [
+            make_diagnostic(
+                "AG-004",
+                f"No process '{site.target}' is defined in the checked files.",
+                site.line,
+                site.column,
+                len(site.target),
+                file=site.file,
+            )
+            for site in self.missing()
+        ]
+        out.sort(key=lambda d: (d.file or "", d.line, d.column))
+        return out
+
+    def components(self) -> list[list[int]]:
+        """Strongly connected components (Tarjan, iterative), in reverse topological order."""
+        n = len(self.nodes)
+        order = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack: list[int] = []
+        out: list[list[int]] = []
+        counter = 0
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                v, i = work.pop()
+                if i == 0:
+                    order[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = True
+                else:
+                    low[v] = min(low[v], low[self.edges[v][i - 1]])
+                descended = False
+                while i < len(self.edges[v]):
+                    w = self.edges[v][i]
+                    i += 1
+                    if order[w] == -1:
+                        work.append((v, i))
+                        work.append((w, 0))
+                        descended = True
+                        break
+                    if on_stack[w]:
+                        low[v] = min(low[v], order[w])
+                if descended:
+                    continue
+                if low[v] == order[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component.append(w)
+                        if w == v:
+                            break
+                    out.append(sorted(component))
+        return out
+
+    def cycles(self) -> list[list[str]]:
+        """Recursive process groups (components with a cycle, including self-calls)."""
+        out = []
+        for component in self.components():
+            v = component[0]
+            if len(component) > 1 or v in self.edges[v]:
+                out.append([self.nodes[i].id for i in component])
+        return sorted(out)
+
+    def entry_points(self) -> list[int]:
+        if self.triggers:
+            return sorted({t.resolved for t in self.triggers if t.resolved is not None})
+        called = {w for targets in self.edges for w in targets}
+        return [v for v in range(len(self.nodes)) if v not in called]
+
+    def reachable(self, roots: Optional[list[int]] = None) -> set[int]:
+        seen = set(self.entry_points() if roots is None else roots)
+        queue = deque(seen)
+        while queue:
+            for w in self.edges[queue.popleft()]:
+                if w not in seen:
+                    seen.add(w)
+                    queue.append(w)
+        return seen
+
+    def unreachable(self) -> list[str]:
+        """Processes no entry point can reach."""
+        seen = self.reachable()
+        return [node.id for v, node in enumerate(self.nodes) if v not in seen]
+
+    def to_json(self) -> dict:
+        return {
+            "processes": [
+                {
+                    "id": node.id,
+                    "file": node.file,
+                    "line": node.line,
+                    "calls": [self.nodes[w].id for w in self.edges[v]],
+                }
+                for v, node in enumerate(self.nodes)
+            ],
+            "entryPoints": [self.nodes[v].id for v in self.entry_points()],
+            "missing": sorted({site.target for site in self.missing()}),
+            "cycles": self.cycles(),
+            "unreachable": self.unreachable(),
+        }
+
+    def to_dot(self) -> str:
+        entries = set(self.entry_points())
+        lines = ["digraph processes {", "  node [shape=box];"]
+        for v, node in enumerate(self.nodes):
+            style = ", style=bold" if v in entries else ""
+            lines.append(f"  {json.dumps(node.id)} [label={json.dumps(node.id)}{style}];")
+        for v, targets in enumerate(self.edges):
+            for w in targets:
+                lines.append(f"  {json.dumps(self.nodes[v].id)} -> {json.dumps(self.nodes[w].id)};")
+        for name in sorted({site.target for site in self.missing()}):
+            lines.append(f"  {json.dumps(name)} [style=dashed];")
+        for site in self.missing():
+            if site.caller is not None:
+                lines.append(
+                    f"  {json.dumps(self.nodes[site.caller].id)} -> {json.dumps(site.target)} [style=dashed];"
+                )
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+def literal_type(value: str, constants: dict[str, Constant]) -> Optional[str]:
+    """Static type of a RUN argument value, resolving constant references one level."""
+    if STRING_LITERAL_RE.match(value):
+        return "String"
+    if value in BOOLEAN_LITERALS:
+        return "Boolean"
+    if NUMBER_RE.fullmatch(value):
+        return "Number"
+    if value.startswith(("{", "[")):
+        return "JSON"
+    if SYMBOL_RE.fullmatch(value) and value in constants:
+        const = constants[value]
+        if const.block_type:
+            return const.block_type if const.block_type == "JSON" else "String"
+        return literal_type(const.value, {})
+    return None
+
+
+def type_compatible(declared: str, actual: str) -> bool:
+    if declared == "JSON":
+        return actual in ("JSON", "String", "Number", "Boolean")
+    if declared in ("String", "Number", "Boolean"):
+        return actual == declared
+    return True  # engine-defined types are not checked statically
+
+
+def signature_mismatches(
+    site: CallSite,
+    node: ProcessNode,
+    defaults: dict[str, object],
+    constants: dict[str, Constant],
+) -> Iterator[tuple[str, Optional[Param]]]:
+    """AG-044 findings for one resolved RUN: (message, offending param or None)."""
+    if node.signature is None or site.statement is None:
+        return
+    params: list[Param] = site.statement.params
+    declared = {a.name: a for a in node.signature}
+    given = {p.key for p in params}
+    for p in params:
+        arg = declared.get(p.key)
+        if arg is None:
+            yield f"Process '{node.id}' has no argument '{p.key}'.", p
+            continue
+        actual = literal_type(p.value, constants)
+        if actual is not None and arg.type and not type_compatible(arg.type, actual):
+            yield f"Argument '{p.key}' of '{node.id}' expects {arg.type}, got {actual}.", p
+    missing = [a.name for a in node.signature if a.name not in given and a.name not in defaults]
+    if missing:
+        yield f"RUN `{node.id}` is missing argument(s): {', '.join(missing)}.", None
+
+
+def load_call_graph(paths: Iterable[Path]) -> CallGraph:
+    """Parse prompt files and build one graph across all of them.
+
+    Raises:
+        OSError: A file cannot be read.
+        UnicodeDecodeError: A file is not valid UTF-8.
+    """
+    tokens = load_token_catalog()
+    return CallGraph.build(
+        parse_document(p.read_text(encoding="utf-8"), path=str(p), tokens=tokens) for p in paths
+    )
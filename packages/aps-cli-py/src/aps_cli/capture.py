@@ -0,0 +1,231 @@
+"""`CAPTURE ... map:` paths: compilation, validation (AG-028) and bulk evaluation.
+
+`<path>` is engine-defined in APS v1.0; this module accepts the two portable forms
+proposed in ROADMAP.md and used by prompts in the wild:
+
+- dotted paths: `content`, `items[0].name`, `meta["odd key"]`, optionally rooted at `$`;
+- JSON Pointer (RFC 6901): `/items/0/name`, with `~0`/`~1` escapes.
+
+A trailing `?` marks the path optional (a missing value leaves the symbol unchanged).
+
+`compile_path` turns a path string into a `CapturePath` whose segments are pre-split and
+pre-unescaped; compiled paths are cached, so a path seen once is never parsed again.
+`CaptureProgram` merges all paths of one `CAPTURE` into a segment trie and evaluates them
+against a tool output in a single traversal: shared prefixes are walked once.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Optional
+
+from .parser import CAPTURE_RE, Statement, split_top_level
+
+NAME_RE = re.compile(r"[A-Za-z_$][A-Za-z0-9_$-]*")
+INDEX_RE = re.compile(r"\[(0|[1-9][0-9]*)\]")
+QUOTED_KEY_RE = re.compile(r'\["((?:[^"\\]|\\.)*)"\]')
+ARRAY_INDEX_RE = re.compile(r"0|[1-9][0-9]*")
+# JSONPath features with no single-value meaning.
+UNSUPPORTED = ("*", "..", "[*", "[?", "[-", "[:")
+# `"<path>"→SYMBOL` (references/05-grammar.md, CaptureStmt).
+MAP_ENTRY_RE = re.compile(r'^"(?P<path>(?:[^"\\]|\\.)*)"→(?P<sym>\S+)$')
+
+
+class CapturePathError(ValueError):
+    """Invalid capture path or a value that cannot be captured (AG-028)."""
+
+    def __init__(self, message: str, offset: int = 0) -> None:
+        super().__init__(message)
+        self.offset = offset
+
+
+@dataclass(frozen=True)
+class Segment:
+    """One path step: an object key, and the array index it denotes (if any)."""
+
+    key: str
+    index: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class CapturePath:
+    source: str
+    segments: tuple[Segment, ...]
+    optional: bool = False
+
+
+def _segment(key: str) -> Segment:
+    return Segment(key, int(key) if ARRAY_INDEX_RE.fullmatch(key) else None)
+
+
+def _compile_pointer(path: str) -> tuple[Segment, ...]:
+    segments = []
+    offset = 1
+    for raw in path[1:].split("/"):
+        tilde = raw.find("~")
+        while tilde >= 0:
+            if raw[tilde + 1 : tilde + 2] not in ("0", "1"):
+                raise CapturePathError("Invalid JSON Pointer escape; use ~0 or ~1", offset + tilde)
+            tilde = raw.find("~", tilde + 2)
+        segments.append(_segment(raw.replace("~1", "/").replace("~0", "~")))
+        offset += len(raw) + 1
+    return tuple(segments)
+
+
+def _compile_dotted(path: str) -> tuple[Segment, ...]:
+    segments: list[Segment] = []
+    pos = 0
+    if path.startswith("$"):
+        pos = 1
+        if pos < len(path) and path[pos] not in ".[":
+            raise CapturePathError("Expected '.' or '[' after '$'", pos)
+    expect_name = pos == 0
+    while pos < len(path) or expect_name:
+        if path.startswith(UNSUPPORTED, pos):
+            raise CapturePathError("Wildcards, filters and slices are not supported", pos)
+        if expect_name:
+            m = NAME_RE.match(path, pos)
+            if m is None:
+                raise CapturePathError("Expected a field name", pos)
+            segments.append(Segment(m.group()))
+            pos = m.end()
+            expect_name = False
+            continue
+        ch = path[pos]
+        if ch == ".":
+            pos += 1
+            expect_name = True
+        elif m := INDEX_RE.match(path, pos):
+            segments.append(Segment(m.group(1), int(m.group(1))))
+            pos = m.end()
+        elif m := QUOTED_KEY_RE.match(path, pos):
+            try:
+                key = json.loads(f'"{m.group(1)}"')
+            except ValueError:
+                raise CapturePathError("Invalid escape in quoted key", pos) from None
+            segments.append(_segment(key))
+            pos = m.end()
+        else:
+            raise CapturePathError(f"Unexpected character {ch!r}", pos)
+    return tuple(segments)
+
+
+@lru_cache(maxsize=4096)
+def compile_path(text: str) -> CapturePath:
+    """Compile (and cache) one capture path.
+
+    Raises:
+        CapturePathError: The path is not a valid dotted path or JSON Pointer.
+    """
+    optional = text.endswith("?")
+    path = text[:-1] if optional else text
+    if not path:
+        raise CapturePathError("Empty capture path")
+    segments = _compile_pointer(path) if path.startswith("/") else _compile_dotted(path)
+    return CapturePath(text, segments, optional)
+
+
+@dataclass(frozen=True)
+class MapEntry:
+    """One `"<path>"→SYMBOL` pair and the 1-based column of its opening quote."""
+
+    path: CapturePath
+    symbol: str
+    column: int
+
+
+def parse_capture_map(text: str, column: int) -> list[MapEntry]:
+    """Parse a `map:` list starting at the given 1-based column.
+
+    Raises:
+        CapturePathError: An entry is malformed or its path is invalid; `offset` is
+            relative to `text`.
+    """
+    entries = []
+    for part, offset in split_top_level(text):
+        m = MAP_ENTRY_RE.match(part)
+        if m is None:
+            raise CapturePathError('Malformed map entry; expected "<path>"→SYMBOL', offset)
+        try:
+            path = compile_path(json.loads(f'"{m.group("path")}"'))
+        except CapturePathError as e:
+            raise CapturePathError(str(e), offset + 1 + e.offset) from None
+        except ValueError:
+            raise CapturePathError("Invalid escape in capture path", offset + 1) from None
+        entries.append(MapEntry(path, m.group("sym"), column + offset))
+    return entries
+
+
+def statement_map(stmt: Statement) -> Optional[tuple[str, int]]:
+    """The raw `map:` text of a CAPTURE statement and its 1-based column, if any."""
+    m = CAPTURE_RE.match(stmt.text)
+    if m is None or m.group("map") is None:
+        return None
+    return m.group("map"), stmt.column + m.start("map")
+
+
+_MISSING = object()
+
+
+@dataclass
+class _Node:
+    children: dict[Segment, "_Node"] = field(default_factory=dict)
+    # Symbols bound to the value at this node, with the path that requested it.
+    targets: list[tuple[str, CapturePath]] = field(default_factory=list)
+
+
+class CaptureProgram:
+    """All paths of one CAPTURE, merged into a trie and evaluated in one traversal."""
+
+    def __init__(self, entries: list[MapEntry]) -> None:
+        self.entries = entries
+        self.root = _Node()
+        for entry in entries:
+            node = self.root
+            for seg in entry.path.segments:
+                node = node.children.setdefault(seg, _Node())
+            node.targets.append((entry.symbol, entry.path))
+
+    @classmethod
+    def from_statement(cls, stmt: Statement) -> Optional["CaptureProgram"]:
+        """Compile a CAPTURE statement's map (None without one)."""
+        raw = statement_map(stmt)
+        return None if raw is None else _program(raw[0])
+
+    def evaluate(self, output: Any) -> dict[str, Any]:
+        """Bind every mapped symbol from a decoded tool output.
+
+        Optional paths that do not resolve are left out of the result.
+
+        Raises:
+            CapturePathError: A required path does not resolve.
+        """
+        values: dict[str, Any] = {}
+        stack = [(self.root, output)]
+        while stack:
+            node, value = stack.pop()
+            for symbol, path in node.targets:
+                if value is _MISSING:
+                    if not path.optional:
+                        raise CapturePathError(f"Path {path.source!r} not found for {symbol}")
+                else:
+                    values[symbol] = value
+            for seg, child in node.children.items():
+                stack.append((child, _step(value, seg)))
+        return values
+
+
+def _step(value: Any, seg: Segment) -> Any:
+    if isinstance(value, dict):
+        return value.get(seg.key, _MISSING)
+    if isinstance(value, list) and seg.index is not None and seg.index < len(value):
+        return value[seg.index]
+    return _MISSING
+
+
+@lru_cache(maxsize=1024)
+def _program(map_text: str) -> CaptureProgram:
+    return CaptureProgram(parse_capture_map(map_text, 1))
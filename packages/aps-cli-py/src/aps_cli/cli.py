@@ -2,9 +2,13 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+import signal
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Iterable, Iterator, Literal, Optional
 
 import questionary
 import typer
@@ -15,12 +19,14 @@ from . import __version__
 from .core import (
     AdapterDetection,
     Platform,
+    build_doctor_report,
     compute_skill_destinations,
+    convention_globs,
     copy_dir,
     copy_template_tree,
     default_personal_skill_path,
-    default_project_skill_path,
     detect_adapters,
+    detect_platforms,
     ensure_dir,
     find_repo_root,
     format_detection_label,
@@ -34,6 +40,7 @@ from .core import (
     sort_platforms_for_ui,
     SKILL_ID,
 )
+from .report import REPORT_FORMATS, make_reporter
 
 app = typer.Typer(add_completion=False)
 console = Console()
@@ -142,6 +149,7 @@ class InitPlan:
     payload_skill_dir: Path
     skills: list[PlannedSkillInstall]
     templates: list[PlannedPlatformTemplates]
+    profile: str = "canonical"
 
 
 def _plan_platform_templates(
@@ -212,6 +220,10 @@ def _render_plan(plan: InitPlan, force: bool) -> str:
             lines.append(f"  - {p}")
     lines.append("")
 
+    if plan.profile != "canonical":
+        lines.append(f"Skill profile: {plan.profile}")
+        lines.append("")
+
     lines.append("Skill install destinations:")
     for s in plan.skills:
         status = (
@@ -269,8 +281,17 @@ def init(
     dry_run: bool = typer.Option(
         False, "--dry-run", help="Print the plan only, do not write files"
     ),
+    profile: str = typer.Option(
+        "canonical",
+        "--profile",
+        help="Skill payload profile: canonical (as shipped) or minimal (comments/blank runs stripped)",
+    ),
 ):
     """Install APS into a repo (.github/skills/...) or as a personal skill (~/.copilot/skills/...)."""
+    from .compile import COMPILE_PROFILES, minimize_tree
+
+    if profile not in COMPILE_PROFILES:
+        raise typer.BadParameter(f"Unknown profile: {profile} (expected one of {', '.join(COMPILE_PROFILES)})")
 
     payload_skill_dir = resolve_payload_skill_dir()
     repo_root = find_repo_root(Path.cwd())
@@ -414,6 +435,7 @@ def init(
         payload_skill_dir=payload_skill_dir,
         skills=skills,
         templates=templates,
+        profile=profile,
     )
 
     if dry_run:
@@ -452,6 +474,9 @@ def init(
         ensure_dir(s.dst.parent)
         copy_dir(payload_skill_dir, s.dst)
         console.print(f"Installed APS skill -> {s.dst}")
+        if profile == "minimal":
+            before, after = minimize_tree(s.dst)
+            console.print(f"  minimal profile: ~{before} -> ~{after} tokens")
 
     # Copy templates
     for t in templates:
@@ -491,69 +516,18 @@ def doctor(
     json_out: bool = typer.Option(False, "--json", help="Output JSON format"),
 ):
     """Check APS installation status + basic platform detection."""
-    workspace_root = pick_workspace_root(root)
+    from .daemon import call_daemon
 
-    payload_skill_dir = resolve_payload_skill_dir()
-    platforms = sort_platforms_for_ui(load_platforms(payload_skill_dir))
-    detected_adapters = (
-        detect_adapters(workspace_root, platforms) if workspace_root else None
-    )
-
-    # Build installations list matching Node structure
-    installations: list[dict] = []
-
-    if workspace_root:
-        repo_skill = default_project_skill_path(workspace_root, claude=False)
-        repo_skill_claude = default_project_skill_path(workspace_root, claude=True)
-        installations.append(
-            {
-                "scope": "repo",
-                "path": str(repo_skill),
-                "installed": (repo_skill / "SKILL.md").exists(),
-            }
-        )
-        installations.append(
-            {
-                "scope": "repo (claude)",
-                "path": str(repo_skill_claude),
-                "installed": (repo_skill_claude / "SKILL.md").exists(),
-            }
-        )
+    workspace_root = pick_workspace_root(root)
 
-    personal_skill = default_personal_skill_path(claude=False)
-    personal_skill_claude = default_personal_skill_path(claude=True)
-    installations.append(
-        {
-            "scope": "personal",
-            "path": str(personal_skill),
-            "installed": (personal_skill / "SKILL.md").exists(),
-        }
-    )
-    installations.append(
-        {
-            "scope": "personal (claude)",
-            "path": str(personal_skill_claude),
-            "installed": (personal_skill_claude / "SKILL.md").exists(),
-        }
+    result = call_daemon(
+        "doctor", {"workspace_root": str(workspace_root) if workspace_root else None}
     )
-
-    # Format detected_adapters for JSON output
-    adapters_out = None
-    if detected_adapters:
-        adapters_out = {
-            pid: {
-                "platformId": det.platform_id,
-                "detected": det.detected,
-                "reasons": list(det.reasons),
-            }
-            for pid, det in detected_adapters.items()
-        }
-
-    result = {
-        "workspace_root": str(workspace_root) if workspace_root else None,
-        "detected_adapters": adapters_out,
-        "installations": installations,
-    }
+    if result is None:
+        payload_skill_dir = resolve_payload_skill_dir()
+        platforms = sort_platforms_for_ui(load_platforms(payload_skill_dir))
+        result = build_doctor_report(workspace_root, platforms)
+    detected_adapters = result["detected_adapters"]
 
     if json_out:
         # Match Node: print raw JSON to stdout (no Rich formatting).
@@ -565,17 +539,17 @@ def doctor(
     console.print(f"Workspace root: {workspace_root or '(not detected)'}")
 
     if detected_adapters:
-        detected = [d for d in detected_adapters.values() if d.detected]
+        detected = [d for d in detected_adapters.values() if d["detected"]]
         if detected:
             console.print(
-                f"Detected adapters: {', '.join(d.platform_id for d in detected)}"
+                f"Detected adapters: {', '.join(d['platformId'] for d in detected)}"
             )
         else:
             console.print("Detected adapters: (none)")
     console.print("")
 
     console.print("Installed skills:")
-    for inst in installations:
+    for inst in result["installations"]:
         status = "✓" if inst["installed"] else "✗"
         console.print(f"- {inst['scope']}: {inst['path']} {status}")
 
@@ -598,6 +572,668 @@ def platforms():
     console.print(table)
 
 
+@app.command()
+def lint(
+    paths: Optional[list[str]] = typer.Argument(
+        None, help="Prompt files or directories to lint (defaults to the current directory)"
+    ),
+    json_out: bool = typer.Option(False, "--json", help="Output JSON format"),
+    output_format: str = typer.Option(
+        "text", "--format", help=f"Output format: {'|'.join(REPORT_FORMATS)}"
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="Parallel worker processes (defaults to CPU count)"
+    ),
+    changed_from: Optional[str] = typer.Option(
+        None,
+        "--changed-from",
+        help="Incremental: re-lint files changed since this git ref and their dependents",
+    ),
+    changed: Optional[list[str]] = typer.Option(
+        None,
+        "--changed",
+        help="Incremental: re-lint this changed file and its dependents (repeatable)",
+    ),
+    graph: Optional[str] = typer.Option(
+        None,
+        "--graph",
+        help="Dependency graph file for incremental runs (defaults to the APS cache)",
+    ),
+    watch: bool = typer.Option(
+        False,
+        "--watch",
+        help="Keep running and re-lint files on save (defaults to platform fileConventions paths)",
+    ),
+    baseline: Optional[str] = typer.Option(
+        None, "--baseline", help="Suppress findings recorded in this baseline file"
+    ),
+    update_baseline: bool = typer.Option(
+        False, "--update-baseline", help="Record all current findings in the --baseline file"
+    ),
+    workspace: bool = typer.Option(
+        False,
+        "--workspace",
+        help="Treat formats/processes used by any checked file as used (AG-W01)",
+    ),
+):
+    """Lint APS prompt files and report AG-* diagnostics."""
+    from .baseline import Baseline, fingerprint_all
+    from .daemon import call_daemon
+    from .depgraph import default_graph_path, git_changed_files, lint_incremental
+    from .diagnostics import Diagnostic
+    from .lint import LintResult, collect_lint_targets, lint_paths
+    from .usage import WorkspaceUsage, drop_shared_uses
+
+    if update_baseline and baseline is None:
+        raise typer.BadParameter("--update-baseline requires --baseline FILE")
+    if watch:
+        if changed_from is not None or changed:
+            raise typer.BadParameter("--watch cannot be combined with --changed/--changed-from")
+        if baseline is not None:
+            raise typer.BadParameter("--watch cannot be combined with --baseline")
+        _watch_lint(paths, json_out)
+        return
+
+    report_format = "json" if json_out else output_format
+    if report_format not in REPORT_FORMATS:
+        raise typer.BadParameter(f"--format must be one of: {', '.join(REPORT_FORMATS)}")
+
+    targets = collect_lint_targets([Path(p).expanduser() for p in (paths or ["."])])
+
+    results: Iterable[LintResult]
+    skipped = None
+    if changed_from is not None or changed:
+        changed_files = [Path(p).expanduser() for p in (changed or [])]
+        explicit = set(changed_files)
+        if changed_from is not None:
+            try:
+                changed_files += git_changed_files(changed_from, Path.cwd())
+            except RuntimeError as e:
+                raise typer.BadParameter(f"--changed-from {changed_from}: {e}")
+        graph_path = Path(graph).expanduser() if graph else default_graph_path(Path.cwd())
+        result = lint_incremental(targets, changed_files, graph_path, workspace)
+        for p in result.ignored:
+            if p in explicit:
+                typer.echo(f"warning: --changed {p} is not a lint target or signatures file", err=True)
+        results = [*result.failed, LintResult(path=str(Path.cwd()), diagnostics=result.diagnostics)]
+        skipped = len(result.skipped)
+    else:
+        served = call_daemon("lint", {"cwd": str(Path.cwd()), "paths": [str(t) for t in targets]})
+        if served is not None:
+            results = [
+                LintResult(
+                    path=r["path"],
+                    diagnostics=[Diagnostic.from_dict(d) for d in r["diagnostics"]],
+                    error=r["error"],
+                )
+                for r in served["results"]
+            ]
+        else:
+            results = lint_paths(targets, jobs)
+        if workspace:
+            usage = WorkspaceUsage.from_paths(targets)
+            results = (
+                replace(r, diagnostics=drop_shared_uses(r.diagnostics, usage))
+                for r in results
+            )
+
+    baseline_path = Path(baseline).expanduser() if baseline else None
+    suppressor = None
+    recorded: Counter[str] = Counter()
+    if baseline_path is not None and not update_baseline:
+        try:
+            suppressor = Baseline.load(baseline_path).suppressor(baseline_path.parent)
+        except ValueError as e:
+            raise typer.BadParameter(f"--baseline: {e}")
+
+    errors = warnings = failed = 0
+    previous = signal.signal(signal.SIGTERM, _raise_interrupt)
+    try:
+        with make_reporter(report_format, sys.stdout) as reporter:
+            for r in results:
+                if r.error is not None:
+                    failed += 1
+                    typer.echo(f"error: cannot lint {r.path}: {r.error}", err=True)
+                    continue
+                found = r.diagnostics
+                if update_baseline and baseline_path is not None:
+                    recorded.update(fingerprint_all(found, baseline_path.parent))
+                elif suppressor is not None:
+                    found = suppressor.new_findings(found)
+                for d in found:
+                    reporter.emit(d)
+                    if d.severity == "error":
+                        errors += 1
+                    else:
+                        warnings += 1
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    if report_format == "text":
+        typer.echo(
+            f"{len(targets)} file(s) checked: {errors} error(s), {warnings} warning(s)",
+            err=True,
+        )
+    if skipped is not None:
+        typer.echo(
+            f"{len(targets) - skipped - failed} file(s) re-linted, {skipped} skipped (unaffected)",
+            err=True,
+        )
+    if suppressor is not None:
+        typer.echo(f"{suppressor.suppressed} known finding(s) suppressed by baseline", err=True)
+    if update_baseline and baseline_path is not None:
+        written = Baseline(recorded).save(baseline_path)
+        state = "updated" if written else "unchanged"
+        typer.echo(f"Baseline {state}: {sum(recorded.values())} finding(s) in {baseline_path}", err=True)
+        if failed:
+            raise typer.Exit(code=1)
+        return
+
+    if errors or failed:
+        raise typer.Exit(code=1)
+
+
+def _raise_interrupt(signum: int, frame: object) -> None:
+    # CI cancellation sends SIGTERM; unwind like Ctrl-C so reporters finish their output.
+    raise KeyboardInterrupt
+
+
+def _watch_lint(paths: Optional[list[str]], json_out: bool) -> None:
+    from .watch import LintWatcher, WatchUpdate, convention_scanner, paths_scanner
+
+    if paths:
+        scan = paths_scanner([Path(p).expanduser() for p in paths])
+    else:
+        root = pick_workspace_root(None) or Path.cwd()
+        globs = convention_globs(load_platforms(resolve_payload_skill_dir()))
+        scan = convention_scanner(root, globs)
+        typer.echo(f"Watching {root} ({', '.join(globs)})", err=True)
+
+    watcher = LintWatcher(scan)
+
+    def report(update: WatchUpdate) -> None:
+        for path, error in update.errors:
+            typer.echo(f"error: cannot read {path}: {error}", err=True)
+        diagnostics = watcher.diagnostics(update.changed)
+        if json_out:
+            typer.echo(json.dumps([d.to_dict() for d in diagnostics]))
+        else:
+            for d in diagnostics:
+                typer.echo(d.format())
+        errors = sum(1 for d in watcher.diagnostics() if d.severity == "error")
+        typer.echo(
+            f"[watch] {len(update.changed)} file(s) re-checked in {update.elapsed_ms:.0f} ms; "
+            f"{len(watcher.files)} watched, {errors} error(s) total",
+            err=True,
+        )
+
+    try:
+        watcher.run(report)
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def fmt(
+    paths: Optional[list[str]] = typer.Argument(
+        None, help="Prompt files or directories to format (defaults to the current directory)"
+    ),
+    check: bool = typer.Option(
+        False, "--check", help="Do not write; exit 1 if any file would be reformatted"
+    ),
+    diff: bool = typer.Option(False, "--diff", help="Do not write; print a unified diff"),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="Parallel worker processes (defaults to CPU count)"
+    ),
+):
+    """Rewrite APS prompt files into canonical form."""
+    from .daemon import call_daemon
+    from .fmt import FormatResult, format_paths
+    from .lint import collect_lint_targets
+
+    targets = collect_lint_targets([Path(p).expanduser() for p in (paths or ["."])])
+    mode = "diff" if diff else "check" if check else "write"
+    served = call_daemon(
+        "fmt", {"cwd": str(Path.cwd()), "paths": [str(t) for t in targets], "mode": mode}
+    )
+    if served is not None:
+        results = [FormatResult(**r) for r in served["results"]]
+    else:
+        results = format_paths(targets, mode, jobs)
+
+    changed = 0
+    failed = 0
+    for r in results:
+        if r.error:
+            failed += 1
+            typer.echo(f"error: cannot format {r.path}: {r.error}", err=True)
+        elif r.changed:
+            changed += 1
+            if r.diff:
+                typer.echo(r.diff, nl=False)
+            elif mode == "write":
+                typer.echo(f"reformatted {r.path}", err=True)
+            else:
+                typer.echo(f"would reformat {r.path}", err=True)
+
+    verb = "reformatted" if mode == "write" else "would be reformatted"
+    typer.echo(
+        f"{changed} file(s) {verb}, {len(results) - changed - failed} file(s) unchanged",
+        err=True,
+    )
+
+    if failed or (changed and mode != "write"):
+        raise typer.Exit(code=1)
+
+
+@app.command("compile")
+def compile_cmd(
+    src: str = typer.Argument(..., help="Prompt file or directory to compile"),
+    output: str = typer.Option(..., "--output", "-o", help="Output file or directory"),
+    manifest: Optional[str] = typer.Option(
+        None, "--manifest", help="Write a JSON manifest of input/output hashes to this path"
+    ),
+    cache_dir: Optional[str] = typer.Option(
+        None, "--cache-dir", help="Build cache directory (defaults to $APS_CACHE_DIR or ~/.cache/aps)"
+    ),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Do not read or write the build cache"),
+    profile: str = typer.Option(
+        "canonical",
+        "--profile",
+        help="canonical (normalized form) or minimal (also strips comments and unreferenced definitions)",
+    ),
+):
+    """Compile APS prompts into their deterministic normalized form."""
+    from .compile import (
+        COMPILE_PROFILES,
+        BuildCache,
+        CompileOptions,
+        compile_paths,
+        write_manifest,
+    )
+
+    src_path = Path(src).expanduser()
+    if not src_path.exists():
+        raise typer.BadParameter(f"Source not found: {src}")
+    if profile not in COMPILE_PROFILES:
+        raise typer.BadParameter(f"Unknown profile: {profile} (expected one of {', '.join(COMPILE_PROFILES)})")
+
+    options = CompileOptions(profile=profile)  # type: ignore[arg-type]
+    cache = None if no_cache else BuildCache(Path(cache_dir).expanduser() if cache_dir else None)
+    results = compile_paths(src_path, Path(output).expanduser(), options, cache)
+
+    failed = 0
+    for r in results:
+        if not r.ok:
+            failed += 1
+            if r.error is not None:
+                typer.echo(f"error: cannot compile {r.source}: {r.error}", err=True)
+            for d in r.diagnostics:
+                typer.echo(d.format())
+        elif r.changed:
+            typer.echo(f"compiled {r.source} -> {r.output}", err=True)
+
+    if manifest:
+        write_manifest(Path(manifest).expanduser(), results, options)
+
+    cached = sum(1 for r in results if r.cached)
+    typer.echo(
+        f"{len(results) - failed} file(s) compiled ({cached} from cache), {failed} failed",
+        err=True,
+    )
+    if profile == "minimal":
+        before = sum(r.source_tokens for r in results if r.ok)
+        after = sum(r.output_tokens for r in results if r.ok)
+        saved = 100 * (before - after) // before if before else 0
+        typer.echo(f"estimated tokens: ~{before} -> ~{after} ({saved}% saved)", err=True)
+
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def graph(
+    paths: Optional[list[str]] = typer.Argument(
+        None, help="Prompt files or directories (defaults to the current directory)"
+    ),
+    output_format: str = typer.Option("json", "--format", help="Output format: json|dot"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Write to this file"),
+):
+    """Export the process call graph and report RUN targets missing across all files."""
+    from .callgraph import load_call_graph
+    from .lint import collect_lint_targets
+
+    if output_format not in ("json", "dot"):
+        raise typer.BadParameter("--format must be one of: json, dot")
+    targets = collect_lint_targets([Path(p).expanduser() for p in (paths or ["."])])
+    try:
+        call_graph = load_call_graph(targets)
+    except (OSError, UnicodeDecodeError) as e:
+        typer.echo(f"error: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    if output_format == "dot":
+        rendered = call_graph.to_dot()
+    else:
+        rendered = json.dumps(call_graph.to_json(), indent=2) + "\n"
+    if output:
+        Path(output).expanduser().write_text(rendered, encoding="utf-8")
+    else:
+        typer.echo(rendered, nl=False)
+
+    missing = call_graph.missing_diagnostics()
+    for d in missing:
+        typer.echo(d.format(), err=True)
+    for cycle in call_graph.cycles():
+        typer.echo(f"recursion: {' -> '.join(cycle)}", err=True)
+    for pid in call_graph.unreachable():
+        typer.echo(f"unreachable: {pid}", err=True)
+    if missing:
+        raise typer.Exit(code=1)
+
+
+@app.command("check-tools")
+def check_tools(
+    paths: Optional[list[str]] = typer.Argument(
+        None, help="Prompt files or directories (defaults to the current directory)"
+    ),
+    platform: Optional[list[str]] = typer.Option(
+        None,
+        "--platform",
+        help="Platform whose tool registry to check against (repeatable; defaults to detected platforms, else all)",
+    ),
+):
+    """Check USE/CAPTURE tool names and `tools:` frontmatter against platform tool registries.
+
+    Frontmatter entries are checked against the platforms whose file conventions the file
+    follows (all selected platforms when none does). predefinedTools.json files that
+    apply to the checked prompts are validated too.
+    """
+    from .frontmatter import FrontmatterError, frontmatter_kind, parse_frontmatter, split_header
+    from .lint import collect_lint_targets
+    from .parser import parse_document
+    from .signatures import load_signatures, signature_files
+    from .tools import document_tool_references, frontmatter_tool_references, load_tool_index
+
+    try:
+        index = load_tool_index()
+    except ValueError as e:
+        typer.echo(f"error: {e}", err=True)
+        raise typer.Exit(code=2)
+    selected = _normalize_platform_args(platform)
+    if selected:
+        unknown = [pid for pid in selected if pid not in index.platforms]
+        if unknown:
+            raise typer.BadParameter(f"--platform: no tool registry for {', '.join(unknown)}")
+    else:
+        root = find_repo_root(Path.cwd())
+        detected = detect_platforms(root, resolve_payload_skill_dir()) if root else []
+        selected = [pid for pid in detected if pid in index.platforms] or sorted(index.platforms)
+
+    conventions = {
+        p.platform_id: convention_globs([p]) for p in load_platforms(resolve_payload_skill_dir())
+    }
+    targets = collect_lint_targets([Path(p).expanduser() for p in (paths or ["."])])
+    unknown_count = failed = 0
+    signature_errors: set[str] = set()
+    for target in targets:
+        try:
+            text = target.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            failed += 1
+            typer.echo(f"error: cannot check {target}: {e}", err=True)
+            continue
+        doc = parse_document(text, path=str(target))
+        signatures = load_signatures(signature_files(target))
+        for error in signatures.errors if signatures else ():
+            if error not in signature_errors:
+                signature_errors.add(error)
+                typer.echo(f"error: {error}", err=True)
+        refs = [(ref, selected) for ref in document_tool_references(doc)]
+        try:
+            header = split_header(text)
+        except FrontmatterError:
+            header = None  # reported by `aps check-frontmatter`
+        if header is not None:
+            owners = [
+                pid
+                for pid in selected
+                if any(target.resolve().match(g) for g in conventions.get(pid, ()))
+            ]
+            fm = parse_frontmatter(header, str(target), frontmatter_kind(target))
+            refs[:0] = [(ref, owners or selected) for ref in frontmatter_tool_references(fm)]
+        for ref, platforms in refs:
+            for res in index.resolve(ref.name, platforms):
+                where = f"{target}:{ref.line}:{ref.column}: {res.platform}:"
+                if res.status == "renamed":
+                    typer.echo(f"{where} tool '{res.name}' is now '{res.suggestion}'")
+                elif res.status == "unknown":
+                    unknown_count += 1
+                    hint = f" (did you mean '{res.suggestion}'?)" if res.suggestion else ""
+                    typer.echo(f"{where} unknown tool '{res.name}'{hint}")
+    if signature_errors or failed:
+        raise typer.Exit(code=2)
+    if unknown_count:
+        raise typer.Exit(code=1)
+
+
+@app.command("check-frontmatter")
+def check_frontmatter(
+    paths: Optional[list[str]] = typer.Argument(
+        None, help="Files or directories (defaults to the current directory)"
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="Concurrent file reads (defaults to CPU count + 4, at most 32)"
+    ),
+):
+    """Validate agent, prompt, instructions and skill frontmatter against the adapter conventions.
+
+    Only the frontmatter of each file is read. Directories are searched for files that follow
+    a convention (`*.agent.md`, `*.prompt.md`, `*.instructions.md`, `SKILL.md`,
+    `.claude/agents/*.md`, `.claude/rules/*.md`).
+    """
+    from .frontmatter import collect_frontmatter_targets, read_frontmatters
+
+    targets = collect_frontmatter_targets([Path(p).expanduser() for p in (paths or ["."])])
+    problems = 0
+    try:
+        for fm in read_frontmatters(targets, jobs):
+            for issue in fm.issues:
+                problems += 1
+                typer.echo(f"{fm.path}:{issue.line}:{issue.column}: {fm.kind or 'frontmatter'}: {issue.message}")
+    except OSError as e:
+        typer.echo(f"error: {e}", err=True)
+        raise typer.Exit(code=2)
+    typer.echo(f"{len(targets)} file(s) checked: {problems} problem(s)", err=True)
+    if problems:
+        raise typer.Exit(code=1)
+
+
+def _iter_output_sources(sources: list[str], jsonl: bool) -> Iterator[tuple[str, str]]:
+    from .contract import read_records
+
+    for source in sources:
+        if source == "-":
+            if jsonl:
+                yield from read_records("<stdin>", sys.stdin)
+            else:
+                yield "<stdin>", sys.stdin.read()
+            continue
+        path = Path(source).expanduser()
+        files = sorted(f for f in path.rglob("*") if f.is_file()) if path.is_dir() else [path]
+        for f in files:
+            if jsonl:
+                with f.open(encoding="utf-8") as fh:
+                    yield from read_records(str(f), fh)
+            else:
+                yield str(f), f.read_text(encoding="utf-8")
+
+
+@app.command("check-output")
+def check_output(
+    outputs: Optional[list[str]] = typer.Argument(
+        None, help="Output files or directories to check ('-' or none: read stdin)"
+    ),
+    format_id: str = typer.Option(..., "--format", help="Format id the outputs must render"),
+    formats: Optional[list[str]] = typer.Option(
+        None,
+        "--formats",
+        help="Prompt or format files/directories defining the format (defaults to the bundled assets/formats)",
+    ),
+    jsonl: bool = typer.Option(
+        False, "--jsonl", help='Inputs are JSONL: one output per line (a string or {"id", "output"})'
+    ),
+    report_format: str = typer.Option(
+        "text", "--report", help=f"Report format: {'|'.join(REPORT_FORMATS)}"
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="Parallel worker processes (defaults to CPU count)"
+    ),
+):
+    """Validate rendered outputs against a compiled <format> contract (AG-036/AG-040)."""
+    from .contract import check_outputs, load_contract
+
+    if report_format not in REPORT_FORMATS:
+        raise typer.BadParameter(f"--report must be one of: {', '.join(REPORT_FORMATS)}")
+    if formats:
+        sources = [Path(p).expanduser() for p in formats]
+    else:
+        sources = [resolve_payload_skill_dir() / "assets" / "formats"]
+    try:
+        contract = load_contract(format_id, sources)
+    except ValueError as e:
+        raise typer.BadParameter(f"--format {format_id}: {e}")
+    for d in contract.problems:
+        typer.echo(d.format(), err=True)
+
+    checked = failed = 0
+    try:
+        with make_reporter(report_format, sys.stdout) as reporter:
+            for found in check_outputs(contract, _iter_output_sources(outputs or ["-"], jsonl), jobs):
+                checked += 1
+                failed += bool(found)
+                for d in found:
+                    reporter.emit(d)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        typer.echo(f"error: {e}", err=True)
+        raise typer.Exit(code=2)
+
+    typer.echo(f"{checked} output(s) checked against {format_id}: {failed} failed", err=True)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def _redaction_pairs(sources: list[Path], output: Optional[Path]) -> list[tuple[Path, Path]]:
+    """(source, destination) pairs; without `output`, files are rewritten in place."""
+    pairs: list[tuple[Path, Path]] = []
+    for src in sources:
+        files = sorted(f for f in src.rglob("*") if f.is_file()) if src.is_dir() else [src]
+        for f in files:
+            if output is None:
+                dst = f
+            elif src.is_dir():
+                dst = output / src.name / f.relative_to(src)
+            elif len(sources) == 1 and not output.is_dir():
+                dst = output
+            else:
+                dst = output / f.name
+            pairs.append((f, dst))
+    return pairs
+
+
+@app.command()
+def redact(
+    inputs: Optional[list[str]] = typer.Argument(
+        None, help="Files or directories to redact ('-' or none: stdin to stdout)"
+    ),
+    output: Optional[str] = typer.Option(
+        None, "--output", "-o", help="Output file, or directory for several inputs"
+    ),
+    in_place: bool = typer.Option(False, "--in-place", help="Rewrite the input files"),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="Parallel worker processes (defaults to CPU count)"
+    ),
+):
+    """Replace secrets and PII with [REDACTED] (AG-032), streaming input in chunks."""
+    from .redact import RedactionStats, default_redactor, redact_files
+
+    sources = inputs or ["-"]
+    if in_place and output:
+        raise typer.BadParameter("--in-place and --output are mutually exclusive")
+    started = time.perf_counter()
+    total = RedactionStats()
+    try:
+        if sources == ["-"]:
+            if in_place:
+                raise typer.BadParameter("--in-place needs input files")
+            if output:
+                with Path(output).expanduser().open("wb") as dst:
+                    total = default_redactor().stream(sys.stdin.buffer, dst)
+            else:
+                total = default_redactor().stream(sys.stdin.buffer, sys.stdout.buffer)
+                sys.stdout.buffer.flush()
+        else:
+            paths = [Path(p).expanduser() for p in sources]
+            if "-" in sources:
+                raise typer.BadParameter("'-' cannot be combined with other inputs")
+            if not in_place and not output:
+                if len(paths) != 1 or paths[0].is_dir():
+                    raise typer.BadParameter("several inputs need --output DIR or --in-place")
+                with paths[0].open("rb") as src:
+                    total = default_redactor().stream(src, sys.stdout.buffer)
+                sys.stdout.buffer.flush()
+            else:
+                out = Path(output).expanduser() if output else None
+                for stats in redact_files(_redaction_pairs(paths, out), jobs):
+                    total.merge(stats)
+    except OSError as e:
+        typer.echo(f"error: {e}", err=True)
+        raise typer.Exit(code=2)
+
+    elapsed = time.perf_counter() - started
+    mb = total.bytes / 1e6
+    rate = mb / elapsed if elapsed > 0 else 0.0
+    typer.echo(f"{total.redactions} redaction(s) in {mb:.1f} MB ({rate:.1f} MB/s)", err=True)
+
+
+@app.command()
+def serve(
+    socket_path: Optional[str] = typer.Option(
+        None, "--socket", help="Unix socket path (defaults to $APS_DAEMON_SOCKET or the APS cache)"
+    ),
+    stop: bool = typer.Option(False, "--stop", help="Stop a running daemon and exit"),
+):
+    """Run a background daemon that answers doctor/lint/fmt for faster repeated runs."""
+    from .daemon import DaemonError, default_socket_path, stop_daemon
+    from .daemon import serve as serve_daemon
+
+    path = Path(socket_path).expanduser() if socket_path else default_socket_path()
+    if stop:
+        if not stop_daemon(path):
+            typer.echo(f"No daemon listening on {path}", err=True)
+            raise typer.Exit(code=1)
+        typer.echo(f"Stopped daemon on {path}", err=True)
+        return
+
+    try:
+        serve_daemon(path, on_ready=lambda p: typer.echo(f"aps daemon listening on {p}", err=True))
+    except DaemonError as e:
+        typer.echo(f"error: {e}", err=True)
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def lsp(
+    stdio: bool = typer.Option(True, "--stdio", help="Communicate over stdin/stdout (default)"),
+):
+    """Run the APS language server (diagnostics, go-to-definition) for editors."""
+    from .lsp import serve_stdio
+
+    raise typer.Exit(code=serve_stdio())
+
+
 @app.command()
 def version():
     """Print CLI version."""
@@ -0,0 +1,431 @@
+"""APS compiler: emits the deterministic normalized form of a prompt for host consumption.
+
+Compilation = NFC normalization + `aps fmt` canonical layout + canonical JSON block
+constants, and refuses prompts with lint errors. The `minimal` profile additionally
+strips comments, collapses runs of blank lines and drops constants/formats that nothing
+uses. Format bodies, block constants and `<input>` are literal text and kept verbatim.
+
+Outputs are stored in a content-addressed cache keyed by source bytes, spec
+version/revision, compile options and CLI version, so unchanged sources are served
+without re-parsing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Literal, Optional
+
+from . import __version__
+from .core import atomic_write_text, default_cache_dir
+from .diagnostics import Diagnostic, make_diagnostic
+from .fmt import PADDED_TAGS, format_text
+from .jsonvalue import JsonValueError, dump_canonical, parse_json_value
+from .lint import collect_lint_targets, lint_document
+from .parser import BLOCK_CLOSE, BLOCK_OPEN_RE, TAG_RE, Document, parse_document
+from .signatures import signature_files, signature_hashes
+from .spec import SPEC_VERSION, TokenCatalog, load_spec_table, load_token_catalog
+from .usage import UsageIndex
+
+CompileProfile = Literal["canonical", "minimal"]
+COMPILE_PROFILES: tuple[str, ...] = ("canonical", "minimal")
+
+MANIFEST_VERSION = 1
+
+# Coarse BPE-like estimate: alphanumeric runs count one token per 4 characters and every
+# other non-space character counts as one token. Only used for before/after reporting.
+TOKEN_ESTIMATE_RE = re.compile(r"[A-Za-z0-9]{1,4}|[^\sA-Za-z0-9]")
+
+FENCE_RE = re.compile(r"^(`{3,}|~{3,})")
+
+
+@dataclass(frozen=True)
+class CompileOptions:
+    """Options that affect compiled output (and therefore the cache key)."""
+
+    profile: CompileProfile = "canonical"
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+class CompileError(Exception):
+    """Raised when a prompt cannot be compiled; carries the blocking diagnostics."""
+
+    def __init__(self, diagnostics: list[Diagnostic]) -> None:
+        super().__init__(f"{len(diagnostics)} error(s)")
+        self.diagnostics = diagnostics
+
+
+@dataclass
+class CompileResult:
+    """Outcome of compiling one source file."""
+
+    source: str
+    output: str
+    source_hash: str
+    cache_key: str
+    output_hash: Optional[str] = None
+    cached: bool = False
+    changed: bool = False
+    source_tokens: int = 0
+    output_tokens: int = 0
+    diagnostics: list[Diagnostic] = field(default_factory=list)
+    # Why the source could not be read or decoded (no diagnostics then).
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.output_hash is not None
+
+    def manifest_entry(self) -> dict:
+        return {
+            "source": self.source,
+            "sourceHash": self.source_hash,
+            "output": self.output,
+            "outputHash": self.output_hash,
+            "cacheKey": self.cache_key,
+            "cached": self.cached,
+        }
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the model token count of `text` (tokenizer-independent)."""
+    return len(TOKEN_ESTIMATE_RE.findall(text))
+
+
+def _canonicalize_json_blocks(doc: Document) -> tuple[list[str], list[Diagnostic]]:
+    lines = list(doc.lines)
+    diagnostics: list[Diagnostic] = []
+    # Bottom-up so earlier line numbers stay valid while bodies are replaced.
+    for const in reversed(doc.constants):
+        if const.block_type != "JSON" or const.end_line is None:
+            continue
+        try:
+            value = parse_json_value(const.body(doc.text))
+        except JsonValueError as e:
+            line, column = doc.source_map.position(const.body_start + e.offset)
+            diagnostics.append(
+                make_diagnostic("AG-007", f"Invalid JSON in {const.name}: {e}", line, column, file=doc.path)
+            )
+            continue
+        lines[const.line : const.end_line - 1] = [dump_canonical(value)]
+    return lines, diagnostics
+
+
+def _is_comment(line: str) -> bool:
+    return line.lstrip().startswith("//")
+
+
+def _padding_tag(line: str) -> Optional[str]:
+    """`open`/`close` for an envelope, format or process tag line, else None."""
+    tag = TAG_RE.match(line.strip()) if line.startswith("<") else None
+    if tag is None or tag.group("name") not in PADDED_TAGS or tag.group("self"):
+        return None
+    return "close" if tag.group("close") else "open"
+
+
+def _verbatim_lines(doc: Document, last: int) -> set[int]:
+    """Line numbers of literal text: block constant and format bodies, `<input>`, front matter."""
+    verbatim: set[int] = set()
+    for const in doc.constants:
+        if const.block_type is not None:
+            verbatim.update(range(const.line + 1, const.end_line or last + 1))
+    for fmt in doc.formats:
+        verbatim.update(range(fmt.line + 1, fmt.end_line or last + 1))
+    user_input = doc.section("input")
+    if user_input is not None:
+        verbatim.update(range(user_input.line + 1, user_input.end_line or last + 1))
+    lines = doc.lines
+    if lines and lines[0] == "---" and "---" in lines[1:]:
+        verbatim.update(range(1, lines.index("---", 1) + 2))
+    return verbatim
+
+
+def _unreferenced_lines(doc: Document, verbatim: set[int], tokens: TokenCatalog) -> set[int]:
+    """Line numbers of `<constants>` entries and formats that nothing else uses.
+
+    Uses are those of AG-W01 (`UsageIndex`), with comments already stripped. Dropping a
+    definition can orphan others (a constant used only by a dropped format), so dropped
+    lines are blanked and the document re-indexed until nothing more is unused. Runtime
+    constants are host inputs and always kept; a generic `<formats>` mention outside the
+    formats section keeps every format.
+    """
+    lines = list(doc.lines)
+    formats = doc.section("formats")
+    keep_formats = formats is None or any(
+        "<formats>" in line
+        for n, line in enumerate(lines, 1)
+        if not formats.line <= n <= (formats.end_line or len(lines))
+    )
+    comments = [n for n, line in enumerate(lines, 1) if n not in verbatim and _is_comment(line)]
+    for n in comments:
+        lines[n - 1] = ""
+    if comments:
+        doc = parse_document("\n".join(lines), path=doc.path, tokens=tokens)
+
+    dropped: set[int] = set()
+    while True:
+        spans: dict[tuple[str, str], range] = {}
+        for const in doc.constants:
+            if const.section == "constants" and (const.block_type is None or const.end_line):
+                key = ("constant", const.name)
+                spans.setdefault(key, range(const.line, (const.end_line or const.line) + 1))
+        if not keep_formats:
+            for f in doc.formats:
+                if f.id and f.end_line:
+                    spans.setdefault(("format", f.id), range(f.line, f.end_line + 1))
+        unused = [
+            spans[(d.kind, d.name)]
+            for d in UsageIndex.from_document(doc).unused()
+            if (d.kind, d.name) in spans
+        ]
+        if not unused:
+            return dropped
+        for span in unused:
+            dropped.update(span)
+            lines[span.start - 1 : span.stop - 1] = [""] * len(span)
+        doc = parse_document("\n".join(lines), path=doc.path, tokens=tokens)
+
+
+def _minimize(doc: Document, tokens: TokenCatalog) -> str:
+    lines = doc.lines[:-1] if doc.lines and doc.lines[-1] == "" else doc.lines
+    verbatim = _verbatim_lines(doc, len(lines))
+    drop = _unreferenced_lines(doc, verbatim, tokens)
+
+    out: list[str] = []
+    blank = False
+    for n, line in enumerate(lines, 1):
+        if n in drop:
+            continue
+        if n not in verbatim:
+            if not line.strip():
+                blank = True  # a run of blank lines becomes one
+                continue
+            if _is_comment(line):
+                continue
+            if (
+                out
+                and out[-1] in ("<constants>", "<formats>")
+                and line.strip() == "</" + out[-1][1:]
+            ):
+                out.pop()
+                continue
+            if blank and out and out[-1] and _padding_tag(out[-1]) != "open":
+                if _padding_tag(line) != "close":
+                    out.append("")
+        blank = False
+        out.append(line)
+    return "\n".join(out) + "\n" if out else ""
+
+
+def compile_text(
+    text: str,
+    path: Optional[str] = None,
+    options: Optional[CompileOptions] = None,
+    tokens: Optional[TokenCatalog] = None,
+) -> str:
+    """Compile prompt text into its normalized form.
+
+    Raises:
+        CompileError: The prompt has lint errors or invalid JSON block constants.
+    """
+    tokens = tokens or load_token_catalog()
+    formatted = format_text(unicodedata.normalize("NFC", text), tokens)
+    doc = parse_document(formatted, path=path, tokens=tokens)
+    # Lint validates JSON blocks (AG-007), so canonicalization only sees valid bodies.
+    errors = [d for d in lint_document(doc, tokens) if d.severity == "error"]
+    if errors:
+        raise CompileError(errors)
+    lines, json_errors = _canonicalize_json_blocks(doc)
+    if json_errors:
+        raise CompileError(json_errors)
+    compiled = "\n".join(lines)
+    if options is not None and options.profile == "minimal":
+        return _minimize(parse_document(compiled, path=path, tokens=tokens), tokens)
+    return compiled
+
+
+def cache_key(
+    source: bytes, options: CompileOptions, signatures: tuple[tuple[str, str], ...] = ()
+) -> str:
+    """Content address of a compiled output.
+
+    `signatures` are the (path, hash) pairs of the prompt's `predefinedTools.json` files
+    (see `signature_hashes`): lint checks USE calls against them, so they decide whether
+    the prompt compiles at all.
+    """
+    h = hashlib.sha256()
+    for part in (
+        sha256_hex(source),
+        SPEC_VERSION,
+        load_spec_table().revision,
+        options.to_json(),
+        __version__,
+        json.dumps(signatures),
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class BuildCache:
+    """Content-addressed store of compiled outputs under `<root>/compile/objects/`."""
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self.root = (root or default_cache_dir()) / "compile" / "objects"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return self._path(key).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def put(self, key: str, text: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, text)
+
+
+def compile_file(
+    src: Path,
+    out: Path,
+    options: Optional[CompileOptions] = None,
+    cache: Optional[BuildCache] = None,
+) -> CompileResult:
+    """Compile one file to `out`; `out` is left untouched when already up to date."""
+    options = options or CompileOptions()
+    try:
+        data = src.read_bytes()
+    except OSError as e:
+        return CompileResult(
+            source=src.as_posix(), output=out.as_posix(), source_hash="", cache_key="", error=str(e)
+        )
+    key = cache_key(data, options, signature_hashes(signature_files(src)))
+    result = CompileResult(
+        source=src.as_posix(), output=out.as_posix(), source_hash=sha256_hex(data), cache_key=key
+    )
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        result.error = str(e)
+        return result
+
+    compiled = cache.get(key) if cache else None
+    result.cached = compiled is not None
+    if compiled is None:
+        try:
+            compiled = compile_text(text, path=str(src), options=options)
+        except CompileError as e:
+            result.diagnostics = e.diagnostics
+            return result
+        if cache:
+            cache.put(key, compiled)
+
+    result.source_tokens = estimate_tokens(text)
+    result.output_tokens = estimate_tokens(compiled)
+    encoded = compiled.encode("utf-8")
+    result.output_hash = sha256_hex(encoded)
+    result.changed = not (out.is_file() and out.read_bytes() == encoded)
+    if result.changed:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(out, compiled)
+    return result
+
+
+def compile_paths(
+    src: Path,
+    out: Path,
+    options: Optional[CompileOptions] = None,
+    cache: Optional[BuildCache] = None,
+) -> list[CompileResult]:
+    """Compile a file, or every prompt under a directory mirroring its layout into `out`."""
+    if src.is_dir():
+        return [
+            compile_file(f, out / f.relative_to(src), options, cache)
+            for f in collect_lint_targets([src])
+        ]
+    if out.is_dir():
+        out = out / src.name
+    return [compile_file(src, out, options, cache)]
+
+
+def write_manifest(path: Path, results: list[CompileResult], options: CompileOptions) -> None:
+    """Write the input -> output hash manifest consumed by downstream build systems."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "specVersion": SPEC_VERSION,
+        "compiler": __version__,
+        "options": asdict(options),
+        "entries": [r.manifest_entry() for r in results if r.ok],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(path, json.dumps(manifest, indent=2) + "\n")
+
+
+def _closes_fence(line: str, fence: str) -> bool:
+    m = FENCE_RE.match(line)
+    return bool(m and m.group(1)[0] == fence[0] and len(m.group(1)) >= len(fence) and line == m.group(1))
+
+
+def minimize_markdown(text: str) -> str:
+    """Minimal-profile rewrite for skill documents and APS examples.
+
+    Strips trailing whitespace, `//` comment lines and single-line HTML comments, and
+    collapses blank-line runs. Fenced code and block constant bodies are kept verbatim.
+    """
+    out: list[str] = []
+    fence: Optional[str] = None
+    in_block = False
+    for raw in text.replace("\r\n", "\n").split("\n"):
+        if in_block:
+            out.append(raw)
+            in_block = raw != BLOCK_CLOSE
+            continue
+        line = raw.rstrip()
+        stripped = line.strip()
+        if fence is not None:
+            out.append(raw)
+            if _closes_fence(stripped, fence):
+                fence = None
+            continue
+        if m := FENCE_RE.match(stripped):
+            fence = m.group(1)
+        elif BLOCK_OPEN_RE.match(stripped):
+            in_block = True
+        elif stripped.startswith("//") or (stripped.startswith("<!--") and stripped.endswith("-->")):
+            continue
+        elif not stripped and (not out or not out[-1]):
+            continue
+        out.append(line)
+    while out and not out[-1]:
+        out.pop()
+    return "\n".join(out) + "\n" if out else ""
+
+
+def minimize_tree(root: Path) -> tuple[int, int]:
+    """Apply `minimize_markdown` to every `.md` file under `root` in place.
+
+    Returns:
+        Estimated (before, after) token totals.
+    """
+    before = after = 0
+    for path in sorted(root.rglob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        minimized = minimize_markdown(text)
+        before += estimate_tokens(text)
+        after += estimate_tokens(minimized)
+        if minimized != text:
+            atomic_write_text(path, minimized)
+    return before, after
@@ -0,0 +1,583 @@
+"""Compiled `<format>` contracts for validating rendered outputs (AG-036/AG-040).
+
+A format body (references/04-schemas-and-types.md) is compiled once into a `Contract`:
+
+- template lines become anchored regexes whose `<PLACEHOLDER>` tokens are named slots
+  (a repeated placeholder must repeat the same value); other `<…>` notes such as
+  `<code line>` match any text;
+- table rows without placeholders are required header rows; rows with placeholders are
+  row templates every following table row must match, column for column;
+- unindented `- …` bullets whose placeholders are all in backticks are prose; each such
+  backticked span is a template line (``- Body is `AG-036 …: <REASON>`.``);
+- `WHERE:` lines become slot validators (type, `one of:`/`∈ { }` choices, `≤ N chars`,
+  `regex:`).
+
+Elements are matched in template order; lines between them are allowed, which is how
+`…` repetition is rendered. A contract whose body and WHERE placeholders disagree still
+compiles and carries its AG-041/AG-042/AG-043 findings (from `placeholders`) in
+`Contract.problems`.
+
+`check_outputs` checks a stream of outputs against one contract in worker processes,
+with a bounded window of batches in flight, like `lint_paths`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import chain, islice
+from pathlib import Path
+from typing import Iterable, Iterator, Literal, Optional
+from urllib.parse import urlsplit
+
+from .diagnostics import Diagnostic, make_diagnostic
+from .jsonvalue import NUMBER_RE
+from .parser import ATTR_RE, TAG_RE
+from .placeholders import PLACEHOLDER_RE, WHERE_DEF_RE, WHERE_MARKER_RE, PlaceholderIndex
+
+# Any `<…>` slot in a template line; non-placeholder notes (`<code line>`) match anything.
+SLOT_RE = re.compile(r"<[^<>\n]+>")
+CODE_SPAN_RE = re.compile(r"`([^`\n]+)`")
+TYPE_RE = re.compile(
+    r"\b(?:is|are)\s+(?:an?\s+)?(?P<type>String|Integer|Number|Boolean|ISO8601|Markdown|URI|Path)s?\b",
+    re.IGNORECASE,
+)
+CHOICE_RE = re.compile(r"(?:\bone of:|∈\s*\{)\s*(?P<values>[^;{}]*)")
+MAX_LENGTH_RE = re.compile(r"(?:≤|<=)\s*(?P<n>[0-9]+)\s*char")
+REGEX_RE = re.compile(r"\bregex:\s*(?P<re>\S+)")
+SEPARATOR_CELL_RE = re.compile(r":?-{3,}:?")
+# Calendar date, optional time and UTC offset; extended (`-`, `:`) or basic separators.
+ISO8601_RE = re.compile(
+    r"(?P<year>[0-9]{4})(?P<ds>-?)(?P<month>[0-9]{2})(?P=ds)(?P<day>[0-9]{2})"
+    r"(?:[T ](?P<hour>[0-9]{2})(?:(?P<ts>:?)(?P<minute>[0-9]{2})"
+    r"(?:(?P=ts)(?P<second>[0-9]{2})(?:[.,][0-9]+)?)?)?"
+    r"(?:Z|[+-](?P<offset>[0-9]{2}(?::?[0-9]{2})?))?)?"
+)
+INTEGER_RE = re.compile(r"-?[0-9]+")
+FENCE_OPEN_RE = re.compile(r"^```format:(?P<id>\S*)\s*$")
+FENCE_CLOSE = "```"
+TYPES = ("String", "Integer", "Number", "Boolean", "ISO8601", "Markdown", "URI", "Path")
+REPETITION = ("…", "...")
+
+ElementKind = Literal["line", "header", "rows"]
+
+
+def _is_iso8601(value: str) -> bool:
+    # An explicit grammar: `datetime.fromisoformat` rejects `Z` and basic forms before 3.11.
+    m = ISO8601_RE.fullmatch(value)
+    if m is None:
+        return False
+    try:
+        datetime(*(int(m.group(g) or 0) for g in ("year", "month", "day", "hour", "minute", "second")))
+    except ValueError:
+        return False
+    offset = m.group("offset")
+    return offset is None or (int(offset[:2]) < 24 and int(offset[-2:]) < 60)
+
+
+def _is_uri(value: str) -> bool:
+    parts = urlsplit(value)
+    return bool(parts.scheme) and bool(parts.netloc or parts.path)
+
+
+_TYPE_CHECKS = {
+    "Integer": lambda v: INTEGER_RE.fullmatch(v) is not None,
+    "Number": lambda v: NUMBER_RE.fullmatch(v) is not None,
+    "Boolean": lambda v: v in ("true", "false"),
+    "ISO8601": _is_iso8601,
+    "URI": _is_uri,
+}
+
+
+@dataclass(frozen=True)
+class Slot:
+    """Constraints on one placeholder, merged from its WHERE lines."""
+
+    name: str
+    type: Optional[str] = None
+    choices: Optional[tuple[str, ...]] = None
+    max_length: Optional[int] = None
+    pattern: Optional[re.Pattern[str]] = None
+
+    def violation(self, value: str) -> Optional[str]:
+        """Why `value` does not satisfy this slot (None if it does)."""
+        if self.type in _TYPE_CHECKS and not _TYPE_CHECKS[self.type](value):
+            return f"<{self.name}> value {value!r} is not {self.type}"
+        if self.choices is not None and value.strip("`") not in self.choices:
+            return f"<{self.name}> value {value!r} is not one of: {', '.join(self.choices)}"
+        if self.max_length is not None and len(value) > self.max_length:
+            return f"<{self.name}> is {len(value)} characters; at most {self.max_length} allowed"
+        if self.pattern is not None and self.pattern.fullmatch(value) is None:
+            return f"<{self.name}> value {value!r} does not match {self.pattern.pattern}"
+        return None
+
+
+def parse_where_line(text: str) -> list[Slot]:
+    """Slots defined by one `- <NAME> …` WHERE line (empty if it defines none)."""
+    m = WHERE_DEF_RE.match(text.strip())
+    if m is None:
+        return []
+    rule = m.group("rule")
+    type_m = TYPE_RE.search(rule)
+    choices = None
+    if choice_m := CHOICE_RE.search(rule):
+        raw = choice_m.group("values").strip().rstrip(".}").strip()
+        values = tuple(
+            v.strip().strip("`\"'") for v in re.split(r",|\bor\b", raw) if v.strip()
+        )
+        # Choices that are themselves templates (`OpenAPI: <PATH>`) are not enumerable.
+        if values and not any("<" in v for v in values):
+            choices = values
+    length_m = MAX_LENGTH_RE.search(rule)
+    pattern = None
+    if regex_m := REGEX_RE.search(rule):
+        try:
+            pattern = re.compile(regex_m.group("re").strip("`"))
+        except re.error:
+            pattern = None
+    slot_type = None
+    if type_m is not None:
+        slot_type = next(t for t in TYPES if t.lower() == type_m.group("type").lower())
+    return [
+        Slot(
+            name,
+            type=slot_type,
+            choices=choices,
+            max_length=int(length_m.group("n")) if length_m else None,
+            pattern=pattern,
+        )
+        for name in PLACEHOLDER_RE.findall(m.group("names"))
+    ]
+
+
+def _merge(a: Slot, b: Slot) -> Slot:
+    return Slot(
+        a.name,
+        type=a.type or b.type,
+        choices=a.choices or b.choices,
+        max_length=a.max_length if a.max_length is not None else b.max_length,
+        pattern=a.pattern or b.pattern,
+    )
+
+
+def _literal(text: str) -> str:
+    return r"\s+".join(re.escape(word) for word in re.split(r"\s+", text))
+
+
+def compile_template(text: str) -> re.Pattern[str]:
+    """Compile one template line; `<PLACEHOLDER>` tokens become named groups."""
+    parts = []
+    seen: set[str] = set()
+    pos = 0
+    for m in SLOT_RE.finditer(text):
+        parts.append(_literal(text[pos : m.start()]))
+        ph = PLACEHOLDER_RE.fullmatch(m.group())
+        if ph is None:
+            parts.append(".+?")
+        elif ph.group(1) in seen:
+            parts.append(f"(?P={ph.group(1)})")
+        else:
+            seen.add(ph.group(1))
+            parts.append(f"(?P<{ph.group(1)}>.+?)")
+        pos = m.end()
+    parts.append(_literal(text[pos:]))
+    return re.compile("".join(parts))
+
+
+def table_cells(line: str) -> list[tuple[str, int]]:
+    """Cells of a `| a | b |` row as (stripped text, 0-based offset in `line`)."""
+    start = line.index("|") + 1
+    end = line.rstrip().rstrip("|")
+    end_pos = len(end) if len(end) >= start else start
+    cells = []
+    pos = start
+    for raw in re.split(r"(?<!\\)\|", line[start:end_pos]):
+        lead = len(raw) - len(raw.lstrip())
+        cells.append((raw.strip(), pos + lead))
+        pos += len(raw) + 1
+    return cells
+
+
+def _is_separator(cells: list[tuple[str, int]]) -> bool:
+    return all(SEPARATOR_CELL_RE.fullmatch(text) for text, _ in cells)
+
+
+@dataclass(frozen=True)
+class Element:
+    """One required part of a contract, in template order.
+
+    `line` elements match a whole output line; `header` elements a table row with
+    exactly `cells`; `rows` elements every following table row, cell by cell.
+    """
+
+    kind: ElementKind
+    template: str
+    line: int
+    pattern: Optional[re.Pattern[str]] = None
+    cells: tuple[str, ...] = ()
+    cell_patterns: tuple[re.Pattern[str], ...] = ()
+
+
+@dataclass
+class Contract:
+    """A compiled `<format>` contract."""
+
+    id: str
+    file: Optional[str] = None
+    line: int = 1
+    elements: list[Element] = field(default_factory=list)
+    slots: dict[str, Slot] = field(default_factory=dict)
+    placeholders: set[str] = field(default_factory=set)
+    # AG-041/AG-042/AG-043 findings in the contract itself.
+    problems: list[Diagnostic] = field(default_factory=list)
+
+    def check(self, text: str, file: Optional[str] = None) -> list[Diagnostic]:
+        """Check one rendered output; diagnostics are positioned in `text`."""
+        lines = text.split("\n")
+        diags: list[Diagnostic] = []
+        body = self._fenced_body(lines, file, diags)
+        if body is None:
+            return diags
+        rows = [(i + 1, line) for i, line in body if line.strip()]
+        end_line = body[-1][0] + 2 if body else len(lines)
+        for lineno, line in rows:
+            for m in PLACEHOLDER_RE.finditer(line):
+                if m.group(1) in self.placeholders:
+                    diags.append(
+                        make_diagnostic(
+                            "AG-036",
+                            f"Placeholder {m.group()} is not resolved.",
+                            lineno,
+                            m.start() + 1,
+                            len(m.group()),
+                            file,
+                        )
+                    )
+        pos = 0
+        for el in self.elements:
+            if el.kind == "rows":
+                pos = self._check_rows(el, rows, pos, file, diags)
+                continue
+            found = next((k for k in range(pos, len(rows)) if self._matches(el, rows[k][1])), None)
+            if found is None and el.kind == "header":
+                table = next((k for k in range(pos, len(rows)) if _is_table_row(rows[k][1])), None)
+                if table is not None:
+                    lineno, line = rows[table]
+                    diags.append(
+                        make_diagnostic(
+                            "AG-036",
+                            f"Table header does not match contract: expected {el.template}",
+                            lineno,
+                            line.index("|") + 1,
+                            len(line.strip()),
+                            file,
+                        )
+                    )
+                    pos = table + 1
+                    continue
+            if found is None:
+                diags.append(
+                    make_diagnostic(
+                        "AG-036",
+                        f"Missing required line matching {el.template!r}.",
+                        end_line,
+                        1,
+                        3,
+                        file,
+                    )
+                )
+                continue
+            lineno, line = rows[found]
+            if el.pattern is not None:
+                m = el.pattern.fullmatch(line.strip())
+                assert m is not None
+                indent = len(line) - len(line.lstrip())
+                self._check_slots(m, lineno, indent, file, diags)
+            pos = found + 1
+        return sorted(diags, key=lambda d: (d.line, d.column, d.code))
+
+    def _fenced_body(
+        self, lines: list[str], file: Optional[str], diags: list[Diagnostic]
+    ) -> Optional[list[tuple[int, str]]]:
+        opens = [i for i, line in enumerate(lines) if line.startswith("```format:")]
+        if not opens:
+            diags.append(
+                make_diagnostic("AG-040", f"Output is not wrapped in a ```format:{self.id} block.", 1, 1, 1, file)
+            )
+            return None
+        first = opens[0]
+        for extra in opens[1:]:
+            diags.append(
+                make_diagnostic("AG-040", "Output contains more than one format block.", extra + 1, 1, 3, file)
+            )
+        m = FENCE_OPEN_RE.match(lines[first])
+        if m is None or m.group("id") != self.id:
+            diags.append(
+                make_diagnostic(
+                    "AG-040",
+                    f"Expected fence label format:{self.id}.",
+                    first + 1,
+                    1,
+                    len(lines[first].rstrip()),
+                    file,
+                )
+            )
+        close = next((i for i in range(len(lines) - 1, first, -1) if lines[i].rstrip() == FENCE_CLOSE), None)
+        if close is None:
+            diags.append(make_diagnostic("AG-040", "Format block is not closed.", first + 1, 1, 3, file))
+            close = len(lines)
+        prose = [i for i in (*range(first), *range(close + 1, len(lines))) if lines[i].strip()]
+        if prose:
+            diags.append(
+                make_diagnostic(
+                    "AG-040",
+                    "Prose outside the format block.",
+                    prose[0] + 1,
+                    1,
+                    len(lines[prose[0]]),
+                    file,
+                )
+            )
+        return [(i, lines[i]) for i in range(first + 1, close)]
+
+    def _matches(self, el: Element, line: str) -> bool:
+        if el.kind == "header":
+            return _is_table_row(line) and tuple(t for t, _ in table_cells(line)) == el.cells
+        assert el.pattern is not None
+        return el.pattern.fullmatch(line.strip()) is not None
+
+    def _check_rows(
+        self,
+        el: Element,
+        rows: list[tuple[int, str]],
+        pos: int,
+        file: Optional[str],
+        diags: list[Diagnostic],
+    ) -> int:
+        while pos < len(rows) and not _is_table_row(rows[pos][1]):
+            pos += 1
+        while pos < len(rows) and _is_table_row(rows[pos][1]):
+            lineno, line = rows[pos]
+            pos += 1
+            cells = table_cells(line)
+            if _is_separator(cells):
+                continue
+            if len(cells) != len(el.cell_patterns):
+                diags.append(
+                    make_diagnostic(
+                        "AG-036",
+                        f"Row has {len(cells)} column(s); expected {len(el.cell_patterns)}.",
+                        lineno,
+                        line.index("|") + 1,
+                        len(line.strip()),
+                        file,
+                    )
+                )
+                continue
+            for (cell, offset), pattern, template in zip(cells, el.cell_patterns, el.cells):
+                m = pattern.fullmatch(cell)
+                if m is None:
+                    diags.append(
+                        make_diagnostic(
+                            "AG-036",
+                            f"Cell {cell!r} does not match {template!r}.",
+                            lineno,
+                            offset + 1,
+                            len(cell),
+                            file,
+                        )
+                    )
+                else:
+                    self._check_slots(m, lineno, offset, file, diags)
+        return pos
+
+    def _check_slots(
+        self, m: re.Match[str], lineno: int, offset: int, file: Optional[str], diags: list[Diagnostic]
+    ) -> None:
+        for name, value in m.groupdict().items():
+            slot = self.slots.get(name)
+            if slot is None or value is None or PLACEHOLDER_RE.search(value):
+                continue
+            problem = slot.violation(value)
+            if problem is not None:
+                diags.append(
+                    make_diagnostic(
+                        "AG-036", f"{problem}.", lineno, offset + m.start(name) + 1, len(value), file
+                    )
+                )
+
+
+def _is_table_row(line: str) -> bool:
+    return line.lstrip().startswith("|")
+
+
+def compile_contract(
+    format_id: str, body: list[tuple[int, str]], file: Optional[str] = None, line: int = 1
+) -> Contract:
+    """Compile a format body given as (1-based line, text) pairs, `WHERE:` included."""
+    contract = Contract(id=format_id, file=file, line=line)
+    where_at = next((i for i, (_, text) in enumerate(body) if WHERE_MARKER_RE.match(text.strip())), len(body))
+    for lineno, text in body[:where_at]:
+        stripped = text.strip()
+        if not stripped or stripped in REPETITION:
+            continue
+        if text.startswith("- ") and not PLACEHOLDER_RE.search(CODE_SPAN_RE.sub("", stripped)):
+            for span in CODE_SPAN_RE.finditer(stripped):
+                if PLACEHOLDER_RE.search(span.group(1)):
+                    contract.elements.append(
+                        Element("line", span.group(1), lineno, pattern=compile_template(span.group(1)))
+                    )
+            continue
+        if _is_table_row(stripped):
+            cells = table_cells(stripped)
+            if _is_separator(cells):
+                continue
+            texts = tuple(t for t, _ in cells)
+            if SLOT_RE.search(stripped):
+                patterns = tuple(compile_template(t) for t in texts)
+                contract.elements.append(Element("rows", stripped, lineno, cells=texts, cell_patterns=patterns))
+            else:
+                contract.elements.append(Element("header", stripped, lineno, cells=texts))
+            continue
+        contract.elements.append(Element("line", stripped, lineno, pattern=compile_template(stripped)))
+
+    index = PlaceholderIndex()
+    names = index.open_format(format_id, line, 1)
+    for lineno, text in body:
+        index.format_line(lineno, text)
+    for lineno, text in body[where_at + 1 :]:
+        for slot in parse_where_line(text):
+            previous = contract.slots.get(slot.name)
+            contract.slots[slot.name] = slot if previous is None else _merge(previous, slot)
+    contract.placeholders = set(names.body) | set(names.definitions)
+    contract.problems = [
+        make_diagnostic(code, message, at_line, column, length, file)
+        for code, message, at_line, column, length in names.problems()
+    ]
+    return contract
+
+
+def find_formats(text: str) -> Iterator[tuple[str, int, list[tuple[int, str]]]]:
+    """Every `<format id="...">` in `text`: (id, 1-based line, body lines)."""
+    lines = text.split("\n")
+    current: Optional[tuple[str, int, list[tuple[int, str]]]] = None
+    for i, line in enumerate(lines, start=1):
+        tag = TAG_RE.match(line.strip())
+        if tag is not None and tag.group("name") == "format":
+            if tag.group("close"):
+                if current is not None:
+                    yield current
+                current = None
+            elif current is None:
+                attrs = dict(ATTR_RE.findall(tag.group("attrs")))
+                current = (attrs.get("id", ""), i, [])
+            continue
+        if current is not None:
+            current[2].append((i, line))
+
+
+def load_contract(format_id: str, paths: Iterable[Path]) -> Contract:
+    """Find and compile a format by id in prompt or format files (directories: `*.md`).
+
+    Raises:
+        ValueError: No file defines the format.
+    """
+    for path in paths:
+        files = sorted(f for f in path.rglob("*.md") if f.is_file()) if path.is_dir() else [path]
+        for f in files:
+            try:
+                text = f.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+            if f'id="{format_id}"' not in text:
+                continue
+            for fid, line, body in find_formats(text):
+                if fid == format_id:
+                    return compile_contract(fid, body, str(f), line)
+    raise ValueError(f"Format not found: {format_id}")
+
+
+def read_records(name: str, lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """JSONL outputs as (name, text), one record per line.
+
+    Records are JSON strings or objects with an `output` field and optional `id`. `lines`
+    may be an open file or `sys.stdin`: each line is parsed as it is read, so memory does
+    not grow with the input.
+
+    Raises:
+        ValueError: A record is not valid.
+    """
+    for n, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ValueError(f"{name}:{n}: invalid JSON record") from None
+        if isinstance(record, dict) and isinstance(record.get("output"), str):
+            yield str(record.get("id", f"{name}:{n}")), record["output"]
+        elif isinstance(record, str):
+            yield f"{name}:{n}", record
+        else:
+            raise ValueError(f'{name}:{n}: expected a string or an object with an "output" string')
+
+
+def read_outputs(name: str, text: str, jsonl: bool) -> Iterator[tuple[str, str]]:
+    """Outputs in one input as (name, text): the whole text, or one per JSONL record.
+
+    Raises:
+        ValueError: A JSONL record is not valid.
+    """
+    if not jsonl:
+        yield name, text
+        return
+    yield from read_records(name, text.split("\n"))
+
+
+_WORKER_CONTRACT: Optional[Contract] = None
+
+
+def _init_worker(contract: Contract) -> None:
+    global _WORKER_CONTRACT
+    _WORKER_CONTRACT = contract
+
+
+def _check_worker(batch: list[tuple[str, str]]) -> list[list[Diagnostic]]:
+    assert _WORKER_CONTRACT is not None
+    return [_WORKER_CONTRACT.check(text, name) for name, text in batch]
+
+
+def check_outputs(
+    contract: Contract, outputs: Iterable[tuple[str, str]], jobs: Optional[int] = None, batch_size: int = 64
+) -> Iterator[list[Diagnostic]]:
+    """Check (name, text) outputs, yielding each output's diagnostics in input order.
+
+    The contract is sent to each worker once; outputs are read lazily and only a bounded
+    window of batches is in flight, so a stream of any length runs in constant memory.
+    Input that fits in one batch is checked in-process: a single batch would run on one
+    worker anyway, after paying for the pool start-up.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    it = iter(outputs)
+    head = list(islice(it, batch_size + 1)) if jobs > 1 else []
+    if jobs <= 1 or len(head) <= batch_size:
+        for name, text in chain(head, it):
+            yield contract.check(text, name)
+        return
+    it = chain(head, it)
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(contract,))
+    pending: deque[Future[list[list[Diagnostic]]]] = deque()
+    try:
+        while batch := list(islice(it, batch_size)):
+            pending.append(pool.submit(_check_worker, batch))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
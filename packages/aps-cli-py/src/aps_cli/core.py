@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import json
 import os
+import re
 import shutil
 import sys
+import tempfile
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Callable, Literal, Optional
@@ -35,6 +37,8 @@ class Platform:
     display_name: str
     adapter_version: Optional[str]
     detection_markers: tuple[DetectionMarker, ...] = field(default_factory=tuple)
+    # Flattened `fileConventions` entries (skills, agents, prompts, instructions)
+    file_conventions: tuple[str, ...] = field(default_factory=tuple)
 
 
 @dataclass(frozen=True)
@@ -216,6 +220,7 @@ def load_platforms(skill_dir: Path) -> list[Platform]:
             display_name = raw.get("displayName", entry.name)
             adapter_version = raw.get("adapterVersion")
             detection_markers: tuple[DetectionMarker, ...] = ()
+            file_conventions: tuple[str, ...] = ()
         else:
             assert manifest is not None
             platform_id = manifest.platform_id
@@ -230,6 +235,21 @@ def load_platforms(skill_dir: Path) -> list[Platform]:
                 )
                 for m in manifest.detection_markers
             )
+            conventions = manifest.file_conventions
+            file_conventions = (
+                tuple(
+                    p
+                    for group in (
+                        conventions.skills,
+                        conventions.agents,
+                        conventions.prompts,
+                        conventions.instructions,
+                    )
+                    for p in group or ()
+                )
+                if conventions
+                else ()
+            )
 
         out.append(
             Platform(
@@ -237,12 +257,35 @@ def load_platforms(skill_dir: Path) -> list[Platform]:
                 display_name=display_name,
                 adapter_version=adapter_version,
                 detection_markers=detection_markers,
+                file_conventions=file_conventions,
             )
         )
 
     return out
 
 
+def convention_globs(platforms: list[Platform]) -> list[str]:
+    """Workspace-relative glob patterns derived from platform `fileConventions`.
+
+    Entries are free-form (`"CLAUDE.md / GEMINI.md (...)"`, `"@docs/guide.md"`,
+    `".github/skills/<skill-id>/SKILL.md"`): annotations are dropped, `<placeholder>`
+    segments become `*`, and home-directory entries are skipped.
+    """
+    out: list[str] = []
+    for platform in platforms:
+        for entry in platform.file_conventions:
+            for raw in entry.split(" (", 1)[0].split(" / "):
+                pattern = raw.strip().lstrip("@")
+                if pattern.startswith("./"):
+                    pattern = pattern[2:]
+                if not pattern or pattern.startswith("~"):
+                    continue
+                pattern = re.sub(r"<[^>]+>", "*", pattern)
+                if pattern not in out:
+                    out.append(pattern)
+    return out
+
+
 def sort_platforms_for_ui(platforms: list[Platform]) -> list[Platform]:
     """Sort platforms with known adapters first in defined order."""
     known_order = {pid: i for i, pid in enumerate(DEFAULT_ADAPTER_ORDER)}
@@ -329,6 +372,96 @@ def copy_dir(src: Path, dst: Path) -> None:
     shutil.copytree(src, dst)
 
 
+def build_doctor_report(workspace_root: Optional[Path], platforms: list[Platform]) -> dict:
+    """Build the `aps doctor --json` payload (installations + adapter detection).
+
+    Args:
+        workspace_root: Workspace to inspect, or None outside a workspace
+        platforms: Platform adapters to detect
+
+    Returns:
+        JSON-serializable report matching the Node CLI structure
+    """
+    detected_adapters = detect_adapters(workspace_root, platforms) if workspace_root else None
+
+    installations: list[dict] = []
+    if workspace_root:
+        repo_skill = default_project_skill_path(workspace_root, claude=False)
+        repo_skill_claude = default_project_skill_path(workspace_root, claude=True)
+        installations.append(
+            {
+                "scope": "repo",
+                "path": str(repo_skill),
+                "installed": (repo_skill / "SKILL.md").exists(),
+            }
+        )
+        installations.append(
+            {
+                "scope": "repo (claude)",
+                "path": str(repo_skill_claude),
+                "installed": (repo_skill_claude / "SKILL.md").exists(),
+            }
+        )
+
+    personal_skill = default_personal_skill_path(claude=False)
+    personal_skill_claude = default_personal_skill_path(claude=True)
+    installations.append(
+        {
+            "scope": "personal",
+            "path": str(personal_skill),
+            "installed": (personal_skill / "SKILL.md").exists(),
+        }
+    )
+    installations.append(
+        {
+            "scope": "personal (claude)",
+            "path": str(personal_skill_claude),
+            "installed": (personal_skill_claude / "SKILL.md").exists(),
+        }
+    )
+
+    adapters_out = None
+    if detected_adapters:
+        adapters_out = {
+            pid: {
+                "platformId": det.platform_id,
+                "detected": det.detected,
+                "reasons": list(det.reasons),
+            }
+            for pid, det in detected_adapters.items()
+        }
+
+    return {
+        "workspace_root": str(workspace_root) if workspace_root else None,
+        "detected_adapters": adapters_out,
+        "installations": installations,
+    }
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write a file atomically (temp file in the same directory + rename)."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as fh:
+            fh.write(text)
+        if path.exists():
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def default_cache_dir() -> Path:
+    """Return the APS cache root (`$APS_CACHE_DIR`, else `$XDG_CACHE_HOME/aps`, else ~/.cache/aps)."""
+    explicit = os.environ.get("APS_CACHE_DIR")
+    if explicit:
+        return Path(explicit).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path.home() / ".cache"
+    return base / "aps"
+
+
 def list_files_recursive(root_dir: Path) -> list[Path]:
     """Recursively list all files in a directory."""
     results: list[Path] = []
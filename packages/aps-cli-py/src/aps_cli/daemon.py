@@ -0,0 +1,247 @@
+"""Opt-in `aps serve` daemon: answers doctor/lint/fmt over a local Unix socket.
+
+The daemon keeps the payload skill dir, platform registry, spec table and per-file lint
+results loaded between invocations. Lint results are keyed by the file's
+`(mtime_ns, size)`, the hashes of its `predefinedTools.json` signatures, the skill
+directory and spec revision, and the caller's workspace. The protocol is JSON-RPC 2.0
+with one newline-terminated request and response per connection. Paths in requests are
+resolved against the caller's `cwd` and echoed back unchanged.
+
+Commands call `call_daemon`, which returns None whenever no daemon is reachable, so the
+CLI silently falls back to in-process execution.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from . import __version__
+from .core import (
+    build_doctor_report,
+    default_cache_dir,
+    find_repo_root,
+    load_platforms,
+    resolve_payload_skill_dir,
+    sort_platforms_for_ui,
+)
+from .fmt import format_paths
+from .lint import LintResult, lint_target
+from .signatures import signature_files, signature_hashes
+from .spec import load_spec_table
+
+SOCKET_ENV = "APS_DAEMON_SOCKET"
+DISABLE_ENV = "APS_NO_DAEMON"
+CLIENT_TIMEOUT = 30.0
+
+# JSON-RPC 2.0 error codes (plus one server-defined code)
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+VERSION_MISMATCH = -32000
+
+
+class DaemonError(RuntimeError):
+    """The daemon could not be started or stopped."""
+
+
+def default_socket_path() -> Path:
+    """`$APS_DAEMON_SOCKET`, else `<cache>/aps-<uid>.sock`."""
+    explicit = os.environ.get(SOCKET_ENV)
+    if explicit:
+        return Path(explicit).expanduser()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return default_cache_dir() / f"aps-{uid}.sock"
+
+
+def _send(path: Path, request: dict, timeout: float) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(path))
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as fh:
+            line = fh.readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection")
+    return json.loads(line)
+
+
+def _call(path: Path, method: str, params: dict, timeout: float) -> Optional[Any]:
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    request = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": method,
+        "params": {**params, "clientVersion": __version__},
+    }
+    try:
+        response = _send(path, request, timeout)
+    except (OSError, ValueError):
+        return None
+    return response.get("result") if "error" not in response else None
+
+
+def call_daemon(
+    method: str,
+    params: Optional[dict] = None,
+    socket_path: Optional[Path] = None,
+    timeout: float = CLIENT_TIMEOUT,
+) -> Optional[Any]:
+    """Invoke `method` on a running daemon; None if unavailable, disabled or failed."""
+    if os.environ.get(DISABLE_ENV):
+        return None
+    return _call(socket_path or default_socket_path(), method, params or {}, timeout)
+
+
+class _LintCache:
+    # Stamp: the file's (mtime_ns, size), the hashes of the predefinedTools.json files
+    # applying to it (AG-044 depends on them) and the caller's `scope`.
+    def __init__(self) -> None:
+        self._entries: dict[Path, tuple[tuple, LintResult]] = {}
+
+    def lint(self, path: Path, scope: tuple[str, ...] = ()) -> LintResult:
+        try:
+            st = path.stat()
+        except OSError as e:
+            self._entries.pop(path, None)
+            return LintResult(path=str(path), error=str(e))
+        stamp = (st.st_mtime_ns, st.st_size, signature_hashes(signature_files(path)), scope)
+        cached = self._entries.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        found = lint_target(path)
+        self._entries[path] = (stamp, found)
+        return found
+
+
+class DaemonState:
+    """Warm state shared by all requests of one daemon process."""
+
+    def __init__(self) -> None:
+        self.payload_skill_dir = resolve_payload_skill_dir()
+        self.platforms = sort_platforms_for_ui(load_platforms(self.payload_skill_dir))
+        self.lint_cache = _LintCache()
+        self.stopping = False
+        self.methods: dict[str, Callable[[dict], Any]] = {
+            "ping": self.ping,
+            "doctor": self.doctor,
+            "lint": self.lint,
+            "fmt": self.fmt,
+            "shutdown": self.shutdown,
+        }
+
+    def ping(self, params: dict) -> dict:
+        return {"version": __version__, "pid": os.getpid()}
+
+    def doctor(self, params: dict) -> dict:
+        root = params.get("workspace_root")
+        return build_doctor_report(Path(root) if root else None, self.platforms)
+
+    def lint(self, params: dict) -> dict:
+        cwd = Path(params["cwd"])
+        # Results also depend on the spec in use and the workspace the caller runs in.
+        scope = (
+            str(self.payload_skill_dir),
+            load_spec_table().revision,
+            str(find_repo_root(cwd) or cwd.resolve()),
+        )
+        results = []
+        for name in params["paths"]:
+            found = self.lint_cache.lint(cwd / name, scope)
+            results.append(
+                {
+                    "path": name,
+                    "diagnostics": [replace(d, file=name).to_dict() for d in found.diagnostics],
+                    "error": found.error,
+                }
+            )
+        return {"results": results}
+
+    def fmt(self, params: dict) -> dict:
+        cwd = Path(params["cwd"])
+        names: list[str] = params["paths"]
+        results = format_paths([cwd / n for n in names], params.get("mode", "write"), 1)
+        return {"results": [{**asdict(r), "path": n} for n, r in zip(names, results)]}
+
+    def shutdown(self, params: dict) -> dict:
+        self.stopping = True
+        return {"stopping": True}
+
+    def dispatch(self, request: dict) -> dict:
+        rid = request.get("id")
+        params = request.get("params") or {}
+        if params.get("clientVersion", __version__) != __version__:
+            # An upgraded CLI must not be answered by an older daemon's code.
+            return _error(rid, VERSION_MISMATCH, f"Daemon runs aps {__version__}")
+        method = self.methods.get(request.get("method", ""))
+        if method is None:
+            return _error(rid, METHOD_NOT_FOUND, f"Unknown method: {request.get('method')}")
+        try:
+            return {"jsonrpc": "2.0", "id": rid, "result": method(params)}
+        except Exception as e:  # noqa: BLE001 - reported to the client, daemon keeps running
+            return _error(rid, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+
+
+def _error(rid: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": rid, "error": {"code": code, "message": message}}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = _error(None, PARSE_ERROR, "Invalid JSON")
+        else:
+            response = self.server.state.dispatch(request)
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.UnixStreamServer):
+    def __init__(self, path: Path, state: DaemonState) -> None:
+        self.state = state
+        super().__init__(str(path), _Handler)
+
+
+def serve(
+    socket_path: Optional[Path] = None, on_ready: Optional[Callable[[Path], None]] = None
+) -> None:
+    """Run the daemon in the foreground until a `shutdown` request arrives.
+
+    Raises:
+        DaemonError: Unix sockets are unsupported or another daemon owns the socket.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("Unix domain sockets are not supported on this platform")
+    path = socket_path or default_socket_path()
+    if path.exists():
+        if _call(path, "ping", {}, 1.0) is not None:
+            raise DaemonError(f"A daemon is already listening on {path}")
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    state = DaemonState()
+    with _Server(path, state) as server:
+        os.chmod(path, 0o600)
+        server.timeout = 0.5
+        if on_ready:
+            on_ready(path)
+        try:
+            while not state.stopping:
+                server.handle_request()
+        finally:
+            path.unlink(missing_ok=True)
+
+
+def stop_daemon(socket_path: Optional[Path] = None) -> bool:
+    """Ask a running daemon to exit; False if none was reachable."""
+    return _call(socket_path or default_socket_path(), "shutdown", {}, 5.0) is not None
@@ -0,0 +1,349 @@
+"""Cross-file dependency graph for incremental linting.
+
+Each linted file is recorded with its content hash and `(mtime_ns, size)`, the names it defines
+(`format:<ID>`, `process:<id>`) and where, the names it references (`format:<ID>`,
+`process:<id>`, `tool:<name>`) and its last diagnostics. Given a set of changed files,
+only those files and the files referencing a name they define (before or after the
+change) are re-linted, transitively; everything else replays its recorded diagnostics.
+Files whose `(mtime_ns, size)` still match the graph are not read at all.
+
+AG-044 results also depend on the `predefinedTools.json` files applying to a prompt, so
+each node records their content hashes; a file is re-linted when that set changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import subprocess
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .core import atomic_write_text, default_cache_dir
+from .diagnostics import Diagnostic
+from .lint import LintResult, lint_document
+from .parser import Document, parse_document
+from .signatures import signature_files, signature_hashes
+from .spec import load_spec_table, load_token_catalog
+from .usage import UsageIndex, WorkspaceUsage, drop_shared_uses
+
+GRAPH_VERSION = 4
+
+# A file modified this recently could change again within the same mtime tick without its
+# stamp changing, so its stamp is not recorded and it is hashed again next run (git's
+# "racy clean" rule).
+RACY_NS = 2_000_000_000
+
+@dataclass
+class FileNode:
+    """Dependency-graph entry for one prompt file."""
+
+    hash: str
+    mtime_ns: int = 0
+    size: int = -1
+    defines: frozenset[str] = frozenset()
+    references: frozenset[str] = frozenset()
+    diagnostics: list[dict] = field(default_factory=list)
+    # (line, column) of each defined format/process name -> `kind:name`
+    shared: dict[tuple[int, int], str] = field(default_factory=dict)
+    # predefinedTools.json path -> sha256 of each signatures file the lint consumed
+    signatures: dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "hash": self.hash,
+            "mtime": self.mtime_ns,
+            "size": self.size,
+            "defines": sorted(self.defines),
+            "references": sorted(self.references),
+            "diagnostics": self.diagnostics,
+            "shared": [[line, column, name] for (line, column), name in sorted(self.shared.items())],
+            "signatures": self.signatures,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FileNode":
+        return cls(
+            hash=data["hash"],
+            mtime_ns=data.get("mtime", 0),
+            size=data.get("size", -1),
+            defines=frozenset(data.get("defines", ())),
+            references=frozenset(data.get("references", ())),
+            diagnostics=list(data.get("diagnostics", ())),
+            shared={(line, column): name for line, column, name in data.get("shared", ())},
+            signatures=dict(data.get("signatures", {})),
+        )
+
+
+def document_symbols(
+    doc: Document, index: Optional[UsageIndex] = None
+) -> tuple[frozenset[str], frozenset[str]]:
+    """Return the (defines, references) name sets of a parsed prompt."""
+    index = index or UsageIndex.from_document(doc)
+    defines = set(index.shared_definitions().values())
+    references = set(index.references)
+    for proc in doc.processes:
+        for stmt in proc.statements:
+            if stmt.target is not None and stmt.keyword in ("USE", "CAPTURE"):
+                references.add(f"tool:{stmt.target.name}")
+    return frozenset(defines), frozenset(references)
+
+
+@dataclass
+class DependencyGraph:
+    """Persisted file -> definitions/references map keyed by resolved path."""
+
+    nodes: dict[str, FileNode] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "DependencyGraph":
+        """Load a graph; a missing, corrupt or outdated file yields an empty graph."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls()
+        if (
+            data.get("version") != GRAPH_VERSION
+            or data.get("specRevision") != load_spec_table().revision
+        ):
+            return cls()
+        return cls(nodes={k: FileNode.from_dict(v) for k, v in data.get("files", {}).items()})
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": GRAPH_VERSION,
+            "specRevision": load_spec_table().revision,
+            "files": {k: self.nodes[k].to_dict() for k in sorted(self.nodes)},
+        }
+        atomic_write_text(path, json.dumps(data, indent=1) + "\n")
+
+    def dependents(self, names: set[str]) -> set[str]:
+        """Files referencing any of `names`, directly or through names those files define.
+
+        Walks the reverse (name -> referencing files) edges to a fixed point.
+        """
+        referrers: dict[str, list[str]] = {}
+        for key, node in self.nodes.items():
+            for name in node.references:
+                referrers.setdefault(name, []).append(key)
+        found: set[str] = set()
+        seen = set(names)
+        pending = list(names)
+        while pending:
+            for key in referrers.get(pending.pop(), ()):
+                if key not in found:
+                    found.add(key)
+                    fresh = self.nodes[key].defines - seen
+                    seen |= fresh
+                    pending.extend(fresh)
+        return found
+
+
+def default_graph_path(root: Path) -> Path:
+    """Per-workspace graph location under the APS cache directory."""
+    digest = hashlib.sha256(str(root.resolve()).encode("utf-8")).hexdigest()[:16]
+    return default_cache_dir() / "lint" / f"graph-{digest}.json"
+
+
+def git_changed_files(ref: str, cwd: Path) -> list[Path]:
+    """Files changed relative to `ref` (working tree, index and untracked).
+
+    Raises:
+        RuntimeError: `cwd` is not in a git work tree or `ref` is unknown.
+    """
+
+    def git(*args: str) -> str:
+        proc = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, check=False
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip() or f"git {' '.join(args)} failed")
+        return proc.stdout
+
+    top = Path(git("rev-parse", "--show-toplevel").strip())
+    names = git("diff", "--name-only", "-z", ref, "--").split("\0")
+    names += git("ls-files", "--others", "--exclude-standard", "-z").split("\0")
+    return sorted({top / n for n in names if n})
+
+
+@dataclass
+class IncrementalLintResult:
+    """Diagnostics for all targets plus which files were actually re-linted."""
+
+    diagnostics: list[Diagnostic]
+    linted: list[Path]
+    skipped: list[Path]
+    # Targets that could not be read or decoded (neither linted nor skipped).
+    failed: list[LintResult] = field(default_factory=list)
+    # Changed paths that are neither targets, known files nor signatures files in use.
+    ignored: list[Path] = field(default_factory=list)
+
+
+def _key(path: Path) -> str:
+    return path.resolve().as_posix()
+
+
+def lint_incremental(
+    targets: list[Path],
+    changed: Optional[Iterable[Path]],
+    graph_path: Path,
+    workspace: bool = False,
+) -> IncrementalLintResult:
+    """Re-lint only the changed files and their dependents; replay the rest.
+
+    Args:
+        targets: Files in scope (as returned by `collect_lint_targets`).
+        changed: Files known to have changed. A `predefinedTools.json` re-lints every
+            target it applies to. Files whose content hash (or whose signatures files'
+            hashes) no longer match the graph are treated as changed too, so a stale list
+            cannot hide edits.
+        graph_path: Location of the persisted dependency graph.
+        workspace: Treat formats/processes used by any target as used (AG-W01), as
+            `aps lint --workspace` does; otherwise results match a plain full lint.
+
+    Returns:
+        Combined diagnostics and the linted/skipped partition of `targets`.
+    """
+    graph = DependencyGraph.load(graph_path)
+    tokens = load_token_catalog()
+    keys = {_key(p): p for p in targets}
+    changed_paths = {_key(p): p for p in changed or ()}
+    changed_keys = set(changed_paths)
+    known = graph.nodes.keys() | keys.keys()
+    used_signatures: set[str] = set()
+    by_directory: dict[Path, dict[str, str]] = {}
+
+    def signatures_of(path: Path) -> dict[str, str]:
+        directory = path.resolve().parent
+        if directory not in by_directory:
+            by_directory[directory] = dict(signature_hashes(signature_files(path)))
+        return by_directory[directory]
+
+    failed: list[LintResult] = []
+    stamps: dict[str, tuple[int, int]] = {}
+    data: dict[str, bytes] = {}
+
+    def read(key: str) -> Optional[bytes]:
+        if key not in data:
+            try:
+                data[key] = keys[key].read_bytes()
+            except OSError as e:
+                failed.append(LintResult(path=str(keys.pop(key)), error=str(e)))
+                graph.nodes.pop(key, None)
+                return None
+        return data[key]
+
+    now = time.time_ns()
+    for key, path in list(keys.items()):
+        try:
+            st = path.stat()
+        except OSError as e:
+            failed.append(LintResult(path=str(keys.pop(key)), error=str(e)))
+            changed_keys.add(key)
+            continue
+        stat = (st.st_mtime_ns, st.st_size)
+        stamps[key] = stat if now - st.st_mtime_ns > RACY_NS else (0, -1)
+        node = graph.nodes.get(key)
+        signatures = signatures_of(path)
+        used_signatures.update(signatures)
+        if node is not None and (
+            node.signatures != signatures or not changed_keys.isdisjoint(signatures)
+        ):
+            changed_keys.add(key)
+            continue
+        if node is not None and (node.mtime_ns, node.size) == stat:
+            continue
+        # Only files whose stat changed are read and hashed.
+        content = read(key)
+        if content is None:
+            changed_keys.add(key)
+        elif node is None or node.hash != hashlib.sha256(content).hexdigest():
+            changed_keys.add(key)
+        else:
+            graph.nodes[key] = replace(node, mtime_ns=stamps[key][0], size=stamps[key][1])
+
+    touched = set()
+    for key in changed_keys:
+        old = graph.nodes.get(key)
+        if old is not None:
+            touched |= old.defines
+        if key not in keys:
+            graph.nodes.pop(key, None)
+
+    docs: dict[str, Document] = {}
+    indexes: dict[str, UsageIndex] = {}
+    for key in sorted(changed_keys & keys.keys()):
+        content = read(key)
+        if content is None:
+            continue
+        try:
+            text = content.decode("utf-8")
+        except UnicodeDecodeError as e:
+            failed.append(LintResult(path=str(keys.pop(key)), error=str(e)))
+            graph.nodes.pop(key, None)
+            continue
+        doc = parse_document(text, path=str(keys[key]), tokens=tokens)
+        docs[key] = doc
+        indexes[key] = UsageIndex.from_document(doc)
+        defines, _ = document_symbols(doc, indexes[key])
+        touched |= defines
+
+    relint = changed_keys | graph.dependents(touched)
+    diagnostics: list[Diagnostic] = []
+    for key in list(keys):
+        if key in relint:
+            doc = docs.get(key)
+            if doc is None:
+                content = read(key)
+                if content is None:
+                    continue
+                try:
+                    text = content.decode("utf-8")
+                except UnicodeDecodeError as e:
+                    failed.append(LintResult(path=str(keys.pop(key)), error=str(e)))
+                    graph.nodes.pop(key, None)
+                    continue
+                doc = parse_document(text, path=str(keys[key]), tokens=tokens)
+            found = lint_document(doc, tokens)
+            index = indexes.get(key) or UsageIndex.from_document(doc)
+            defines, references = document_symbols(doc, index)
+            graph.nodes[key] = FileNode(
+                hash=hashlib.sha256(data[key]).hexdigest(),
+                mtime_ns=stamps[key][0],
+                size=stamps[key][1],
+                defines=defines,
+                references=references,
+                diagnostics=[d.to_dict() for d in found],
+                shared=index.shared_definitions(),
+                signatures=signatures_of(keys[key]),
+            )
+            diagnostics.extend(found)
+        else:
+            diagnostics.extend(
+                replace(Diagnostic.from_dict(d), file=str(keys[key]))
+                for d in graph.nodes[key].diagnostics
+            )
+
+    graph.save(graph_path)
+    if workspace:
+        # The graph covers every target, so formats/processes used from other files are
+        # not reported as unused.
+        usage = WorkspaceUsage(
+            references=set().union(*(graph.nodes[key].references for key in keys)),
+            definitions={str(path): graph.nodes[key].shared for key, path in keys.items()},
+        )
+        diagnostics = drop_shared_uses(diagnostics, usage)
+    return IncrementalLintResult(
+        diagnostics=diagnostics,
+        linted=[p for k, p in keys.items() if k in relint],
+        skipped=[p for k, p in keys.items() if k not in relint],
+        failed=failed,
+        ignored=[
+            p
+            for k, p in changed_paths.items()
+            if k not in known and k not in used_signatures
+        ],
+    )
@@ -0,0 +1,77 @@
+"""Stable diagnostic model shared by lint/fmt/compile output."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+from .spec import load_spec_table
+
+Severity = Literal["error", "warning"]
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    """A single AG-* finding with a 1-based line/column range."""
+
+    code: str
+    message: str
+    line: int
+    column: int
+    end_line: int
+    end_column: int
+    file: Optional[str] = None
+
+    @property
+    def severity(self) -> Severity:
+        """Severity from the spec error catalog (unknown codes: `AG-W*` warn, others error)."""
+        info = load_spec_table().error(self.code)
+        if info is not None:
+            return info.severity
+        return "warning" if self.code.startswith("AG-W") else "error"
+
+    def to_dict(self) -> dict:
+        """Return the JSON diagnostic contract (code, severity, message, file, range)."""
+        return {
+            "code": self.code,
+            "severity": self.severity,
+            "message": self.message,
+            "file": self.file,
+            "range": {
+                "start": {"line": self.line, "column": self.column},
+                "end": {"line": self.end_line, "column": self.end_column},
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Diagnostic":
+        """Inverse of `to_dict` (severity is re-derived from the code)."""
+        start, end = data["range"]["start"], data["range"]["end"]
+        return cls(
+            code=data["code"],
+            message=data["message"],
+            line=start["line"],
+            column=start["column"],
+            end_line=end["line"],
+            end_column=end["column"],
+            file=data.get("file"),
+        )
+
+    def format(self) -> str:
+        """Render as `file:line:column: CODE message`."""
+        return f"{self.file or '<input>'}:{self.line}:{self.column}: {self.code} {self.message}"
+
+
+def make_diagnostic(
+    code: str, message: str, line: int, column: int, length: int = 1, file: Optional[str] = None
+) -> Diagnostic:
+    """Build a single-line diagnostic spanning `length` characters."""
+    return Diagnostic(
+        code=code,
+        message=message,
+        line=line,
+        column=column,
+        end_line=line,
+        end_column=column + max(length, 1),
+        file=file,
+    )
@@ -0,0 +1,178 @@
+"""APS formatter: rewrites prompts into the canonical form mandated by the spec.
+
+Normalizations (see references/02-linting-and-formatting.md):
+- CRLF -> LF, no trailing whitespace, exactly one final newline.
+- Tabs replaced by spaces (AG-011); block constant bodies are preserved verbatim.
+- Exactly one newline after opening / before closing envelope tags.
+- Process statements: one statement per line (AG-030), single inter-token spaces
+  (AG-031) and lexicographic `where:` keys (AG-012).
+"""
+
+from __future__ import annotations
+
+import difflib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal, Optional
+
+from .core import atomic_write_text
+from .parser import BLOCK_CLOSE, BLOCK_OPEN_RE, SECTION_ORDER, TAG_RE, code_spans, parse_statement
+from .spec import TokenCatalog, load_token_catalog
+
+FormatMode = Literal["write", "check", "diff"]
+
+PADDED_TAGS = frozenset(SECTION_ORDER) | {"process", "format"}
+INDENT_WIDTH = 2
+
+
+@dataclass(frozen=True)
+class FormatResult:
+    """Outcome of formatting one file."""
+
+    path: str
+    changed: bool
+    diff: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _replace_tabs(line: str) -> str:
+    body = line.lstrip("\t")
+    indent = " " * (INDENT_WIDTH * (len(line) - len(body)))
+    return indent + body.replace("\t", " ")
+
+
+def split_statements(text: str) -> list[str]:
+    """Split a statement line on `;` outside strings and backtick ids."""
+    cuts = [i for start, end in code_spans(text) for i in range(start, end) if text[i] == ";"]
+    if not cuts:
+        return [text]
+    parts: list[str] = []
+    prev = 0
+    for cut in cuts:
+        parts.append(text[prev:cut])
+        prev = cut + 1
+    parts.append(text[prev:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def collapse_padding(text: str) -> str:
+    """Collapse runs of spaces to one outside strings and backtick ids."""
+    out: list[str] = []
+    prev = 0
+    for start, end in code_spans(text):
+        out.append(text[prev:start])
+        out.append(re.sub(r" {2,}", " ", text[start:end]))
+        prev = end
+    out.append(text[prev:])
+    return "".join(out)
+
+
+def sort_where_params(text: str, tokens: TokenCatalog) -> str:
+    """Rewrite a RUN/USE `where:` list with lexicographic keys and `, ` separators."""
+    stmt = parse_statement(text, 1, 1, tokens)
+    if stmt.keyword not in ("RUN", "USE") or not stmt.params:
+        return text
+    params = stmt.params
+    start, end = params[0].column - 1, params[-1].end_column - 1
+    raw = {id(p): text[p.column - 1 : p.end_column - 1] for p in params}
+    rendered = ", ".join(raw[id(p)] for p in sorted(params, key=lambda p: p.key))
+    return text[:start] + rendered + text[end:]
+
+
+def format_statement(line: str, tokens: TokenCatalog) -> list[str]:
+    """Canonicalize one process-body line; may return several lines."""
+    body = line.lstrip(" ")
+    indent = line[: len(line) - len(body)]
+    return [indent + sort_where_params(collapse_padding(p), tokens) for p in split_statements(body)]
+
+
+def format_text(text: str, tokens: Optional[TokenCatalog] = None) -> str:
+    """Return the canonical form of an APS prompt."""
+    tokens = tokens or load_token_catalog()
+    out: list[str] = []
+    blanks = 0
+    section: Optional[str] = None
+    in_block = False
+    after_open_tag = False
+
+    for raw in text.replace("\r\n", "\n").split("\n"):
+        if in_block:
+            out.append(raw)
+            in_block = raw != BLOCK_CLOSE
+            continue
+
+        line = _replace_tabs(raw.rstrip())
+        stripped = line.strip()
+        if not stripped:
+            blanks += 1
+            continue
+
+        tag = TAG_RE.match(stripped) if stripped.startswith("<") else None
+        padded = bool(tag and tag.group("name") in PADDED_TAGS and not tag.group("self"))
+        closing = padded and bool(tag and tag.group("close"))
+        if not (after_open_tag or closing):
+            out.extend([""] * blanks)
+        blanks = 0
+        after_open_tag = padded and not closing
+
+        if tag and tag.group("name") in SECTION_ORDER:
+            section = None if tag.group("close") else tag.group("name")
+            out.append(line)
+        elif section == "constants" and BLOCK_OPEN_RE.match(stripped):
+            in_block = True
+            out.append(line)
+        elif section == "processes" and not tag and not stripped.startswith("//"):
+            out.extend(format_statement(line, tokens))
+        else:
+            out.append(line)
+
+    if in_block:
+        # Unterminated block constant (AG-045): keep the tail verbatim.
+        return "\n".join(out)
+    return "\n".join(out) + "\n" if out else ""
+
+
+def format_file(path: Path, mode: FormatMode = "write") -> FormatResult:
+    """Format one file; never touches files whose canonical form is byte-identical."""
+    try:
+        original = path.read_bytes()
+        source = original.decode("utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        return FormatResult(path=str(path), changed=False, error=str(e))
+
+    formatted = format_text(source)
+    if formatted.encode("utf-8") == original:
+        return FormatResult(path=str(path), changed=False)
+
+    diff = None
+    if mode == "diff":
+        diff = "".join(
+            difflib.unified_diff(
+                source.splitlines(keepends=True),
+                formatted.splitlines(keepends=True),
+                fromfile=f"{path} (original)",
+                tofile=f"{path} (formatted)",
+            )
+        )
+    elif mode == "write":
+        atomic_write_text(path, formatted)
+    return FormatResult(path=str(path), changed=True, diff=diff)
+
+
+def _format_worker(args: tuple[str, FormatMode]) -> FormatResult:
+    return format_file(Path(args[0]), args[1])
+
+
+def format_paths(
+    paths: list[Path], mode: FormatMode = "write", jobs: Optional[int] = None
+) -> list[FormatResult]:
+    """Format many files, in parallel worker processes when there is more than one."""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(paths) <= 1:
+        return [format_file(p, mode) for p in paths]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        return list(pool.map(_format_worker, [(str(p), mode) for p in paths], chunksize=chunksize))
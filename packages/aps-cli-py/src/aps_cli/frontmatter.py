@@ -0,0 +1,500 @@
+"""Header-only frontmatter reading for agent, prompt, instructions and skill files.
+
+`read_header` reads a file in small buffered blocks only until the closing `---` line
+(and never more than `MAX_HEADER` bytes), so scanning thousands of `.agent.md` files
+costs one read per file whatever the size of the bodies. The header is parsed with the
+YAML subset used by the platform adapters' frontmatter conventions
+(`platforms/*/frontmatter/*.md`):
+
+- mappings (`key: value`) and block sequences (`- item`, `- key: value`) nested by
+  indentation;
+- one-line flow collections (`[a, "b"]`, `{}`);
+- plain, single- and double-quoted scalars, with `true`/`false`, `null`/`~` and
+  numbers resolved as in YAML; `|` and `>` block scalars;
+- `#` comments.
+
+Anchors, aliases, tags and multi-line flow collections are rejected. The mapping is
+validated by a pydantic `TypeAdapter` picked from the file name (`frontmatter_kind`);
+adapters are built once per kind. `read_frontmatters` reads many files concurrently.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Literal, Optional
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from .schemas import AgentFrontmatter, InstructionsFrontmatter, PromptFrontmatter, SkillFrontmatter
+
+DELIMITER = "---"
+READ_SIZE = 4096
+# Frontmatter larger than this is reported as unterminated instead of read further.
+MAX_HEADER = 64 * 1024
+
+Kind = Literal["agent", "prompt", "instructions", "skill"]
+
+_MODELS: dict[str, type[BaseModel]] = {
+    "agent": AgentFrontmatter,
+    "prompt": PromptFrontmatter,
+    "instructions": InstructionsFrontmatter,
+    "skill": SkillFrontmatter,
+}
+_SUFFIX_KINDS: tuple[tuple[str, Kind], ...] = (
+    (".agent.md", "agent"),
+    (".prompt.md", "prompt"),
+    (".instructions.md", "instructions"),
+)
+
+# `\n---` closing line; `\Z` variant only applies once the whole file has been read.
+_CLOSE_RE = re.compile(rb"\n---[ \t]*\r?\n")
+_CLOSE_AT_EOF_RE = re.compile(rb"\n---[ \t]*\r?\Z")
+_CLOSE_TEXT_RE = re.compile(r"\n---[ \t]*\r?(?:\n|\Z)")
+_KEY_RE = re.compile(
+    r"""(?P<key>"(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[^\s\-?:,\[\]{}#&*!|>'"%@`][^:#]*?|-[^\s:#][^:#]*?)"""
+    r"[ \t]*:(?:[ \t]+(?P<value>.*))?"
+)
+_DQ_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+_SQ_RE = re.compile(r"'(?:[^']|'')*'")
+_INT_RE = re.compile(r"[-+]?(?:0|[1-9][0-9]*)")
+_FLOAT_RE = re.compile(r"[-+]?(?:[0-9]+\.[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?")
+# End of a plain scalar inside a flow collection.
+_FLOW_STOP_RE = re.compile(r"[,\]}]|:(?=\s|$)")
+_BLOCK_INDICATORS = ("|", ">", "|-", ">-", "|+", ">+")
+
+
+class FrontmatterError(ValueError):
+    """Unreadable or unsupported frontmatter (1-based position)."""
+
+    def __init__(self, message: str, line: int = 1, column: int = 1) -> None:
+        super().__init__(message)
+        self.line = line
+        self.column = column
+
+
+@dataclass(frozen=True)
+class FrontmatterIssue:
+    """A parse or validation problem (1-based position)."""
+
+    line: int
+    column: int
+    message: str
+
+
+@dataclass
+class Frontmatter:
+    """Parsed and validated frontmatter of one file."""
+
+    path: str
+    kind: Optional[str]
+    # Parsed mapping; None when the file has no frontmatter or it could not be parsed.
+    data: Optional[dict[str, Any]] = None
+    # Validated model (None when validation failed or `kind` is unknown).
+    model: Optional[BaseModel] = None
+    # Header lines (between the delimiters); header line i is file line i + 2.
+    lines: list[str] = field(default_factory=list)
+    # Top-level key -> 1-based line.
+    key_lines: dict[str, int] = field(default_factory=dict)
+    issues: list[FrontmatterIssue] = field(default_factory=list)
+
+
+def frontmatter_kind(path: Path) -> Optional[Kind]:
+    """Infer which frontmatter convention a file follows from its name."""
+    if path.name == "SKILL.md":
+        return "skill"
+    for suffix, kind in _SUFFIX_KINDS:
+        if path.name.endswith(suffix):
+            return kind
+    if path.suffix == ".md" and path.parent.parent.name == ".claude":
+        if path.parent.name == "agents":
+            return "agent"
+        if path.parent.name == "rules":
+            return "instructions"
+    return None
+
+
+@lru_cache(maxsize=None)
+def frontmatter_adapter(kind: Optional[str]) -> TypeAdapter:
+    """The (cached) validator for a frontmatter kind; any mapping when `kind` is None."""
+    return TypeAdapter(_MODELS[kind] if kind is not None else dict[str, Any])
+
+
+def read_header(path: Path, max_bytes: int = MAX_HEADER) -> Optional[str]:
+    """Read the text between the opening and closing `---` lines of a file.
+
+    Returns:
+        The header text (each line newline-terminated), or None when the file does not
+        start with a `---` line.
+
+    Raises:
+        FrontmatterError: The header is not closed within `max_bytes` or not UTF-8.
+        OSError: The file cannot be read.
+    """
+    with path.open("rb") as fh:
+        buf = fh.read(READ_SIZE)
+        if buf.startswith(b"\xef\xbb\xbf"):
+            buf = buf[3:]
+        first = buf.find(b"\n")
+        if first < 0 or buf[:first].rstrip() != DELIMITER.encode():
+            return None
+        scan = first
+        while True:
+            m = _CLOSE_RE.search(buf, scan)
+            if m is not None:
+                break
+            if len(buf) > max_bytes:
+                raise FrontmatterError(f"frontmatter is not closed within {max_bytes} bytes")
+            more = fh.read(READ_SIZE)
+            if not more:
+                m = _CLOSE_AT_EOF_RE.search(buf, scan)
+                if m is None:
+                    raise FrontmatterError("frontmatter has no closing '---' line")
+                break
+            # Rescan from the last newline already seen: the closing line may straddle reads.
+            scan = max(first, buf.rfind(b"\n"))
+            buf += more
+    try:
+        return buf[first + 1 : m.start() + 1].decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise FrontmatterError(f"frontmatter is not UTF-8 ({e.reason})") from None
+
+
+def split_header(text: str) -> Optional[str]:
+    """`read_header` for text already in memory."""
+    text = text.lstrip("\ufeff")
+    first = text.find("\n")
+    if first < 0 or text[:first].rstrip() != DELIMITER:
+        return None
+    m = _CLOSE_TEXT_RE.search(text, first)
+    if m is None:
+        raise FrontmatterError("frontmatter has no closing '---' line")
+    return text[first + 1 : m.start() + 1]
+
+
+def _plain(text: str) -> Any:
+    if text in ("", "~", "null", "Null", "NULL"):
+        return None
+    if text in ("true", "True", "TRUE"):
+        return True
+    if text in ("false", "False", "FALSE"):
+        return False
+    if _INT_RE.fullmatch(text):
+        return int(text)
+    if _FLOAT_RE.fullmatch(text):
+        return float(text)
+    return text
+
+
+class _Parser:
+    """Indentation-driven parser for the frontmatter YAML subset."""
+
+    def __init__(self, lines: list[str], first_line: int) -> None:
+        self.raw = lines
+        self.first_line = first_line
+        # [line number, indent, content] of every non-blank line.
+        self.rows: list[list[Any]] = []
+        for i, raw in enumerate(lines):
+            text = raw.rstrip()
+            content = text.lstrip(" ")
+            if not content:
+                continue
+            if content[0] == "\t":
+                raise FrontmatterError("tab used for indentation", first_line + i, len(text) - len(content) + 1)
+            self.rows.append([first_line + i, len(text) - len(content), content])
+        self.pos = 0
+        self.key_lines: dict[str, int] = {}
+
+    def error(self, row: list[Any], message: str, offset: int = 0) -> FrontmatterError:
+        return FrontmatterError(message, row[0], row[1] + offset + 1)
+
+    def peek(self) -> Optional[list[Any]]:
+        while self.pos < len(self.rows) and self.rows[self.pos][2].startswith("#"):
+            self.pos += 1
+        return self.rows[self.pos] if self.pos < len(self.rows) else None
+
+    def document(self) -> dict[str, Any]:
+        row = self.peek()
+        if row is None:
+            return {}
+        value = self.node(row[1])
+        extra = self.peek()
+        if extra is not None:
+            raise self.error(extra, "unexpected indentation")
+        if not isinstance(value, dict):
+            raise self.error(row, "frontmatter must be a mapping")
+        return value
+
+    def node(self, indent: int) -> Any:
+        row = self.peek()
+        assert row is not None
+        if _is_item(row[2]):
+            return self.sequence(indent)
+        if _is_key(row[2]):
+            return self.mapping(indent)
+        # A value on its own line below its key (`tools:` / `  ['a', 'b']`).
+        self.pos += 1
+        return self.inline(row[2], row, 0)
+
+    def mapping(self, indent: int) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        while (row := self.peek()) is not None and row[1] == indent:
+            if _is_item(row[2]):
+                raise self.error(row, "sequence item where a mapping key was expected")
+            m = _KEY_RE.fullmatch(row[2])
+            if m is None:
+                raise self.error(row, "expected 'key: value'")
+            key = self.scalar(m.group("key"), row, 0)[0]
+            if not isinstance(key, str):
+                key = str(key)
+            if key in out:
+                raise self.error(row, f"duplicate key '{key}'")
+            if indent == 0:
+                self.key_lines[key] = row[0]
+            self.pos += 1
+            out[key] = self.value(row, m.group("value") or "", m.start("value"), indent)
+        if row is not None and row[1] > indent:
+            raise self.error(row, "unexpected indentation")
+        return out
+
+    def sequence(self, indent: int) -> list[Any]:
+        out: list[Any] = []
+        while (row := self.peek()) is not None and row[1] == indent and _is_item(row[2]):
+            rest = row[2][1:].lstrip(" ")
+            offset = len(row[2]) - len(rest)
+            if not rest or rest.startswith("#"):
+                self.pos += 1
+                nxt = self.peek()
+                out.append(self.node(nxt[1]) if nxt is not None and nxt[1] > indent else None)
+            elif _is_key(rest):
+                # `- key: value` opens a mapping whose keys align with `key`.
+                row[1], row[2] = indent + offset, rest
+                out.append(self.mapping(indent + offset))
+            else:
+                self.pos += 1
+                out.append(self.inline(rest, row, offset))
+        if row is not None and row[1] > indent:
+            raise self.error(row, "unexpected indentation")
+        return out
+
+    def value(self, row: list[Any], text: str, offset: int, indent: int) -> Any:
+        if text.split(" #", 1)[0].rstrip() in _BLOCK_INDICATORS:
+            return self.block_scalar(indent, text.split(" #", 1)[0].rstrip())
+        if not text or text.startswith("#"):
+            nxt = self.peek()
+            if nxt is not None and nxt[1] > indent:
+                return self.node(nxt[1])
+            if nxt is not None and nxt[1] == indent and _is_item(nxt[2]):
+                return self.sequence(indent)
+            return None
+        return self.inline(text, row, offset)
+
+    def block_scalar(self, indent: int, indicator: str) -> str:
+        start = self.pos
+        while self.pos < len(self.rows) and self.rows[self.pos][1] > indent:
+            self.pos += 1
+        if start == self.pos:
+            return ""
+        first, last = self.rows[start][0], self.rows[self.pos - 1][0]
+        width = self.rows[start][1]
+        body = [line[width:].rstrip() for line in self.raw[first - self.first_line : last - self.first_line + 1]]
+        if indicator[0] == "|":
+            text = "\n".join(body)
+        else:
+            text = ""
+            for line in body:
+                if not line:
+                    text += "\n"
+                elif text and not text.endswith("\n"):
+                    text += " " + line
+                else:
+                    text += line
+        return text if indicator.endswith("-") else text + "\n"
+
+    def inline(self, text: str, row: list[Any], offset: int) -> Any:
+        value, end = self.scan(text, 0, row, offset, flow=False)
+        rest = text[end:].lstrip()
+        if rest and not rest.startswith("#"):
+            raise self.error(row, "unexpected text after value", offset + len(text) - len(rest))
+        return value
+
+    def scalar(self, text: str, row: list[Any], offset: int) -> tuple[Any, int]:
+        """A complete scalar (mapping keys)."""
+        return self.scan(text, 0, row, offset, flow=True)
+
+    def scan(self, text: str, i: int, row: list[Any], offset: int, flow: bool) -> tuple[Any, int]:
+        """Parse one value starting at `text[i]`; return it and the end offset."""
+        while i < len(text) and text[i] == " ":
+            i += 1
+        if i == len(text):
+            return None, i
+        ch = text[i]
+        if ch == '"':
+            m = _DQ_RE.match(text, i)
+            if m is None:
+                raise self.error(row, "unterminated double-quoted string", offset + i)
+            try:
+                return json.loads(m.group()), m.end()
+            except ValueError:
+                raise self.error(row, "invalid escape in double-quoted string", offset + i) from None
+        if ch == "'":
+            m = _SQ_RE.match(text, i)
+            if m is None:
+                raise self.error(row, "unterminated single-quoted string", offset + i)
+            return m.group()[1:-1].replace("''", "'"), m.end()
+        if ch in "[{":
+            return self.flow(text, i, row, offset)
+        if ch in "&*!":
+            raise self.error(row, "anchors, aliases and tags are not supported", offset + i)
+        end = len(text)
+        comment = text.find(" #", i)
+        if comment >= 0:
+            end = comment
+        if flow:
+            stop = _FLOW_STOP_RE.search(text, i, end)
+            if stop is not None:
+                end = stop.start()
+        return _plain(text[i:end].rstrip()), end
+
+    def flow(self, text: str, i: int, row: list[Any], offset: int) -> tuple[Any, int]:
+        close = "]" if text[i] == "[" else "}"
+        items: list[Any] = []
+        pairs: dict[str, Any] = {}
+        i += 1
+        while True:
+            while i < len(text) and text[i] == " ":
+                i += 1
+            if i == len(text):
+                raise self.error(row, f"unterminated flow collection (expected '{close}' on the same line)", offset + i)
+            if text[i] == close:
+                return (items if close == "]" else pairs), i + 1
+            value, i = self.scan(text, i, row, offset, flow=True)
+            if close == "}":
+                while i < len(text) and text[i] == " ":
+                    i += 1
+                if i == len(text) or text[i] != ":":
+                    raise self.error(row, "expected ':' in flow mapping", offset + i)
+                pairs[str(value)], i = self.scan(text, i + 1, row, offset, flow=True)
+            else:
+                items.append(value)
+            while i < len(text) and text[i] == " ":
+                i += 1
+            if i < len(text) and text[i] == ",":
+                i += 1
+            elif i < len(text) and text[i] != close:
+                raise self.error(row, f"expected ',' or '{close}'", offset + i)
+
+
+def _is_item(text: str) -> bool:
+    return text == "-" or text.startswith("- ")
+
+
+def _is_key(text: str) -> bool:
+    return text[0] not in "[{\"'" and _KEY_RE.fullmatch(text) is not None
+
+
+def parse_yaml_subset(text: str, first_line: int = 1) -> tuple[dict[str, Any], dict[str, int]]:
+    """Parse header text into a mapping and the line of each top-level key.
+
+    Raises:
+        FrontmatterError: The text is outside the supported subset.
+    """
+    parser = _Parser(text.splitlines(), first_line)
+    return parser.document(), parser.key_lines
+
+
+def parse_frontmatter(header: Optional[str], path: str, kind: Optional[str]) -> Frontmatter:
+    """Parse and validate header text (None: the file has no frontmatter).
+
+    A missing header is validated as an empty mapping, so required keys are reported.
+    """
+    result = Frontmatter(path=path, kind=kind)
+    if header is not None:
+        result.lines = header.splitlines()
+        try:
+            result.data, result.key_lines = parse_yaml_subset(header, first_line=2)
+        except FrontmatterError as e:
+            result.issues.append(FrontmatterIssue(e.line, e.column, str(e)))
+            return result
+    try:
+        validated = frontmatter_adapter(kind).validate_python(result.data or {})
+    except ValidationError as e:
+        for err in e.errors():
+            loc = err["loc"]
+            key = str(loc[0]) if loc else ""
+            where = ".".join(str(part) for part in loc)
+            message = f"{where}: {err['msg']}" if where else err["msg"]
+            result.issues.append(FrontmatterIssue(result.key_lines.get(key, 1), 1, message))
+        return result
+    if isinstance(validated, BaseModel):
+        result.model = validated
+    return result
+
+
+def read_frontmatter(path: Path, kind: Optional[str] = None) -> Frontmatter:
+    """Read, parse and validate one file's frontmatter (kind inferred from the name).
+
+    Raises:
+        OSError: The file cannot be read.
+    """
+    kind = kind or frontmatter_kind(path)
+    try:
+        header = read_header(path)
+    except FrontmatterError as e:
+        result = Frontmatter(path=str(path), kind=kind)
+        result.issues.append(FrontmatterIssue(e.line, e.column, str(e)))
+        return result
+    return parse_frontmatter(header, str(path), kind)
+
+
+def read_frontmatters(paths: Iterable[Path], jobs: Optional[int] = None) -> Iterator[Frontmatter]:
+    """Read many files' frontmatter concurrently, yielding results in input order.
+
+    Header reads are small and I/O-bound, so they run on threads rather than worker
+    processes; at most two files per thread are in flight.
+
+    Raises:
+        OSError: A file cannot be read.
+    """
+    jobs = jobs or min(32, (os.cpu_count() or 1) + 4)
+    if jobs <= 1:
+        for path in paths:
+            yield read_frontmatter(path)
+        return
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    pending: deque[Future[Frontmatter]] = deque()
+    try:
+        for path in paths:
+            pending.append(pool.submit(read_frontmatter, path))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def collect_frontmatter_targets(paths: list[Path]) -> list[Path]:
+    """Expand directories into files following a frontmatter convention (sorted, de-duplicated).
+
+    Files named explicitly are always included.
+    """
+    out: list[Path] = []
+    seen: set[Path] = set()
+    for p in paths:
+        candidates = (
+            sorted(f for f in p.rglob("*.md") if f.is_file() and frontmatter_kind(f) is not None)
+            if p.is_dir()
+            else [p]
+        )
+        for f in candidates:
+            if f not in seen:
+                seen.add(f)
+                out.append(f)
+    return out
@@ -0,0 +1,285 @@
+"""APS `JsonValue` parsing and canonical JSON emission.
+
+APS JSON (references/05-grammar.md) is JSON plus bare `UpperSym` constant references,
+so the standard library decoder cannot be used directly. Numbers keep their source
+lexeme so canonicalization never changes a value's spelling.
+
+Validation (AG-007) does not need the value: `validate_json_value` checks plain JSON
+with the C-accelerated `json` scanner when the interpreter has one (objects are
+discarded as soon as their keys are checked) and falls back to `scan_json_value`, a
+validate-only scanner that accepts exactly what `parse_json_value` accepts. Only values a rule inspects (WITH defaults,
+compiled block constants) are decoded with `parse_json_value`.
+"""
+
+from __future__ import annotations
+
+import json
+import json.scanner
+import re
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+# `Number` in references/05-grammar.md, plus JSON exponents.
+NUMBER_RE = re.compile(r"-?[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?")
+SYMBOL_RE = re.compile(r"[A-Z0-9_]{2,24}")
+STRING_RE = re.compile(r'"(?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*"')
+WS_RE = re.compile(r"[ \t\n\r]*")
+
+
+class JsonValueError(ValueError):
+    """Invalid APS JSON value (AG-007)."""
+
+    def __init__(self, message: str, offset: int) -> None:
+        super().__init__(f"{message} at offset {offset}")
+        self.offset = offset
+
+
+@dataclass(frozen=True)
+class Number:
+    """A JSON number preserving its source lexeme."""
+
+    raw: str
+
+
+@dataclass(frozen=True)
+class SymbolRef:
+    """A bare `UpperSym` referencing a constant."""
+
+    name: str
+
+
+JsonValue = Union[None, bool, str, Number, SymbolRef, list, dict]
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+
+    def ws(self) -> None:
+        self.pos = WS_RE.match(self.text, self.pos).end()  # type: ignore[union-attr]
+
+    def fail(self, message: str) -> JsonValueError:
+        return JsonValueError(message, self.pos)
+
+    def value(self) -> Any:
+        self.ws()
+        text, pos = self.text, self.pos
+        if pos >= len(text):
+            raise self.fail("Unexpected end of JSON")
+        ch = text[pos]
+        if ch == "{":
+            return self.obj()
+        if ch == "[":
+            return self.arr()
+        if ch == '"':
+            return self.string()
+        for lit, val in (("true", True), ("false", False), ("null", None)):
+            if text.startswith(lit, pos):
+                self.pos += len(lit)
+                return val
+        # Digit-only UpperSyms overlap with numbers; the longest match wins, ties are numbers.
+        num = NUMBER_RE.match(text, pos)
+        sym = SYMBOL_RE.match(text, pos)
+        if num and (not sym or num.end() >= sym.end()):
+            self.pos = num.end()
+            return Number(num.group())
+        if sym:
+            self.pos = sym.end()
+            return SymbolRef(sym.group())
+        raise self.fail(f"Unexpected character {ch!r}")
+
+    def string(self) -> str:
+        m = STRING_RE.match(self.text, self.pos)
+        if not m:
+            raise self.fail("Invalid string")
+        self.pos = m.end()
+        return json.loads(m.group())
+
+    def obj(self) -> dict:
+        self.pos += 1
+        out: dict = {}
+        self.ws()
+        if self.text.startswith("}", self.pos):
+            self.pos += 1
+            return out
+        while True:
+            self.ws()
+            key = self.string()
+            if key in out:
+                raise self.fail(f"Duplicate key {key!r}")
+            self.ws()
+            if not self.text.startswith(":", self.pos):
+                raise self.fail("Expected ':'")
+            self.pos += 1
+            out[key] = self.value()
+            self.ws()
+            if self.text.startswith(",", self.pos):
+                self.pos += 1
+                continue
+            if self.text.startswith("}", self.pos):
+                self.pos += 1
+                return out
+            raise self.fail("Expected ',' or '}'")
+
+    def arr(self) -> list:
+        self.pos += 1
+        out: list = []
+        self.ws()
+        if self.text.startswith("]", self.pos):
+            self.pos += 1
+            return out
+        while True:
+            out.append(self.value())
+            self.ws()
+            if self.text.startswith(",", self.pos):
+                self.pos += 1
+                continue
+            if self.text.startswith("]", self.pos):
+                self.pos += 1
+                return out
+            raise self.fail("Expected ',' or ']'")
+
+
+def parse_json_value(text: str) -> JsonValue:
+    """Parse an APS `JsonValue`; raises `JsonValueError` on invalid input."""
+    parser = _Parser(text)
+    value = parser.value()
+    parser.ws()
+    if parser.pos != len(text):
+        raise parser.fail("Trailing characters after JSON value")
+    return value
+
+
+# True when the interpreter ships the C `_json` scanner (the accelerated fast path).
+HAVE_ACCELERATED_DECODER = json.scanner.c_make_scanner is not None
+
+
+def _reject(_: str) -> None:
+    raise ValueError
+
+
+def _unique_pairs(pairs: list[tuple[str, Any]]) -> None:
+    # Returning None instead of a dict: validation never materializes objects.
+    if len(pairs) > 1 and len({k for k, _ in pairs}) != len(pairs):
+        raise ValueError
+
+
+# Objects are reduced to None as soon as their keys are checked; number hooks are left
+# to the C scanner (Python callbacks per number cost more than the numbers themselves).
+_FAST_DECODER = json.JSONDecoder(object_pairs_hook=_unique_pairs, parse_constant=_reject)
+
+
+def scan_json_value(text: str) -> None:
+    """Validate an APS `JsonValue` without building it.
+
+    Accepts exactly the inputs `parse_json_value` accepts and raises the same
+    `JsonValueError` (message and offset) otherwise.
+    """
+    n = len(text)
+    # Open containers: a set of seen keys for objects, None for arrays.
+    stack: list[Optional[set[str]]] = []
+    pos = 0
+    expect_value = True
+    while True:
+        if expect_value:
+            pos = WS_RE.match(text, pos).end()  # type: ignore[union-attr]
+            if pos >= n:
+                raise JsonValueError("Unexpected end of JSON", pos)
+            ch = text[pos]
+            if ch == "{" or ch == "[":
+                pos = WS_RE.match(text, pos + 1).end()  # type: ignore[union-attr]
+                close = "}" if ch == "{" else "]"
+                if text.startswith(close, pos):
+                    pos += 1
+                    expect_value = False
+                elif ch == "[":
+                    stack.append(None)
+                    continue
+                else:
+                    keys: set[str] = set()
+                    stack.append(keys)
+                    pos = _scan_key(text, pos, keys)
+                    continue
+            elif ch == '"':
+                m = STRING_RE.match(text, pos)
+                if not m:
+                    raise JsonValueError("Invalid string", pos)
+                pos = m.end()
+            elif text.startswith(("true", "null"), pos):
+                pos += 4
+            elif text.startswith("false", pos):
+                pos += 5
+            else:
+                num = NUMBER_RE.match(text, pos)
+                sym = SYMBOL_RE.match(text, pos)
+                if num and (not sym or num.end() >= sym.end()):
+                    pos = num.end()
+                elif sym:
+                    pos = sym.end()
+                else:
+                    raise JsonValueError(f"Unexpected character {ch!r}", pos)
+            expect_value = False
+
+        # After a value: close containers or move to the next element.
+        pos = WS_RE.match(text, pos).end()  # type: ignore[union-attr]
+        if not stack:
+            if pos != n:
+                raise JsonValueError("Trailing characters after JSON value", pos)
+            return
+        top = stack[-1]
+        close = "]" if top is None else "}"
+        if text.startswith(",", pos):
+            pos += 1
+            if top is not None:
+                pos = _scan_key(text, WS_RE.match(text, pos).end(), top)  # type: ignore[union-attr]
+            expect_value = True
+        elif text.startswith(close, pos):
+            pos += 1
+            stack.pop()
+        else:
+            raise JsonValueError(f"Expected ',' or '{close}'", pos)
+
+
+def _scan_key(text: str, pos: int, keys: set[str]) -> int:
+    """Scan `"key" :` at `pos`; return the offset of the member value."""
+    m = STRING_RE.match(text, pos)
+    if not m:
+        raise JsonValueError("Invalid string", pos)
+    raw = m.group()
+    key = json.loads(raw) if "\\" in raw else raw[1:-1]
+    pos = m.end()
+    if key in keys:
+        raise JsonValueError(f"Duplicate key {key!r}", pos)
+    keys.add(key)
+    pos = WS_RE.match(text, pos).end()  # type: ignore[union-attr]
+    if not text.startswith(":", pos):
+        raise JsonValueError("Expected ':'", pos)
+    return pos + 1
+
+
+def validate_json_value(text: str) -> None:
+    """Raise `JsonValueError` if `text` is not a valid APS `JsonValue` (AG-007)."""
+    if HAVE_ACCELERATED_DECODER:
+        try:
+            _FAST_DECODER.decode(text)
+            return
+        except (ValueError, RecursionError):
+            pass  # APS-only syntax (symbols) or an error: the exact scanner decides.
+    scan_json_value(text)
+
+
+def dump_canonical(value: JsonValue) -> str:
+    """Emit canonical JSON: `: ` and `, ` separators, no inner padding, sorted keys."""
+    if isinstance(value, dict):
+        items = ", ".join(
+            f"{json.dumps(k, ensure_ascii=False)}: {dump_canonical(value[k])}" for k in sorted(value)
+        )
+        return "{" + items + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(dump_canonical(v) for v in value) + "]"
+    if isinstance(value, Number):
+        return value.raw
+    if isinstance(value, SymbolRef):
+        return value.name
+    return json.dumps(value, ensure_ascii=False)
@@ -0,0 +1,657 @@
+"""APS linter: runs AG-* rules over parsed prompt documents."""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from .callgraph import CallGraph, signature_mismatches
+from .capture import CapturePathError, parse_capture_map, statement_map
+from .diagnostics import Diagnostic, make_diagnostic
+from .jsonvalue import JsonValueError, validate_json_value
+from .parser import (
+    BLOCK_TYPES,
+    SET_RE,
+    Document,
+    Ident,
+    Process,
+    code_spans,
+    parse_document,
+    split_top_level,
+)
+from .signatures import SignatureSet, load_signatures, signature_files
+from .spec import TokenCatalog, load_token_catalog
+from .ste import load_ste_checker
+from .symbols import SymbolTable
+from .usage import LineRefsCache, UsageIndex
+
+# `Key = IdLower` in references/05-grammar.md
+KEY_RE = re.compile(r"^[a-z][a-z0-9_-]*$")
+
+PADDING_RE = re.compile(r" {2,}")
+
+# File suffixes considered when a directory is passed to the linter.
+LINT_SUFFIXES: tuple[str, ...] = (".md",)
+
+
+@dataclass
+class LintContext:
+    """Inputs shared by every rule for a single document."""
+
+    document: Document
+    tokens: TokenCatalog
+    # Analyses kept from the previous lint of this document, if it is being re-linted.
+    memo: Optional[DocumentLintCache] = None
+
+    def diag(self, code: str, message: str, line: int, column: int, length: int = 1) -> Diagnostic:
+        return make_diagnostic(code, message, line, column, length, file=self.document.path)
+
+    @cached_property
+    def symbols(self) -> SymbolTable:
+        """Scope-aware symbol table, built once and shared by every rule."""
+        previous = self.memo.symbols if self.memo is not None else None
+        return SymbolTable(self.document, self.tokens.symbol_re, previous)
+
+    @cached_property
+    def usage(self) -> UsageIndex:
+        """Definitions and uses for AG-W01."""
+        line_refs = self.memo.line_refs if self.memo is not None else None
+        return UsageIndex.from_document(self.document, line_refs)
+
+    @cached_property
+    def signatures(self) -> Optional[SignatureSet]:
+        """predefinedTools.json signatures applying to this document, if any."""
+        if self.document.path is None:
+            return None
+        return load_signatures(signature_files(Path(self.document.path)))
+
+    @cached_property
+    def calls(self) -> CallGraph:
+        """Process call graph of this document."""
+        return CallGraph.build([self.document])
+
+    def diag_at(self, code: str, message: str, offset: int, length: int = 1) -> Diagnostic:
+        """Like `diag`, positioned by a code-point offset into the document text."""
+        line, column = self.document.source_map.position(offset)
+        return self.diag(code, message, line, column, length)
+
+
+Rule = Callable[[LintContext], Iterable[Diagnostic]]
+ProcessRule = Callable[[LintContext, Process], Iterable[Diagnostic]]
+
+_RULES: list[Rule] = []
+_PROCESS_RULES: list[ProcessRule] = []
+
+
+def rule(fn: Rule) -> Rule:
+    """Register a document-wide lint rule."""
+    _RULES.append(fn)
+    return fn
+
+
+def process_rule(fn: ProcessRule) -> ProcessRule:
+    """Register a rule that only inspects a single `<process>` (results are cacheable)."""
+    _PROCESS_RULES.append(fn)
+    return fn
+
+
+ProcessKey = tuple[object, ...]
+
+
+def _process_key(proc: Process) -> ProcessKey:
+    # Everything a process rule may look at, with lines relative to the opening tag.
+    return (
+        proc.id,
+        tuple(proc.attrs.items()),
+        tuple(proc.attr_columns.items()),
+        tuple((s.text, s.column, s.line - proc.line) for s in proc.statements),
+    )
+
+
+class ProcessLintCache:
+    """Process-rule diagnostics keyed by process content, reused across re-lints.
+
+    Entries store line numbers relative to the process start, so a process that only
+    moved (lines inserted above it) is served from cache and shifted. Keys are remembered
+    per `Process` object, so processes shared with the previous version of the document
+    (see `patch_document`) are not even re-keyed.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[ProcessKey, list[Diagnostic]] = {}
+        self._live: set[ProcessKey] = set()
+        self._keys: dict[int, tuple[Process, ProcessKey]] = {}
+        self._live_keys: dict[int, tuple[Process, ProcessKey]] = {}
+
+    def _key(self, proc: Process) -> ProcessKey:
+        known = self._keys.get(id(proc))
+        if known is None or known[0] is not proc:
+            known = (proc, _process_key(proc))
+        self._live_keys[id(proc)] = known
+        return known[1]
+
+    def lint(self, ctx: LintContext, proc: Process) -> list[Diagnostic]:
+        key = self._key(proc)
+        self._live.add(key)
+        relative = self._entries.get(key)
+        if relative is None:
+            found = [d for fn in _PROCESS_RULES for d in fn(ctx, proc)]
+            relative = self._entries[key] = [
+                replace(d, line=d.line - proc.line, end_line=d.end_line - proc.line, file=None)
+                for d in found
+            ]
+        return [
+            replace(
+                d,
+                line=d.line + proc.line,
+                end_line=d.end_line + proc.line,
+                file=ctx.document.path,
+            )
+            for d in relative
+        ]
+
+    def prune(self) -> None:
+        """Drop entries not used since the previous prune (call once per re-lint)."""
+        self._entries = {k: v for k, v in self._entries.items() if k in self._live}
+        self._live = set()
+        self._keys, self._live_keys = self._live_keys, {}
+
+
+class DocumentLintCache(ProcessLintCache):
+    """A `ProcessLintCache` that also keeps document-rule analyses between re-lints.
+
+    The symbol table carries over the scopes of unchanged processes to the next lint
+    (see `SymbolTable`), and the AG-W01 usage scan reuses the references of unchanged
+    lines, so a re-lint after a local edit resolves and scans only what the edit touched.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.symbols: Optional[SymbolTable] = None
+        self.line_refs: LineRefsCache = {}
+
+
+def _check_name(
+    ctx: LintContext, kind: str, ident: Ident, line: int, pattern: re.Pattern[str]
+) -> Iterator[Diagnostic]:
+    if ctx.tokens.is_reserved(ident.name):
+        yield ctx.diag(
+            "AG-002",
+            f"Reserved word '{ident.name}' used as {kind}.",
+            line,
+            ident.column,
+            len(ident.name),
+        )
+    elif not pattern.match(ident.name):
+        yield ctx.diag(
+            "AG-003",
+            f"Invalid {kind} '{ident.name}' (expected {pattern.pattern}).",
+            line,
+            ident.column,
+            len(ident.name),
+        )
+
+
+@process_rule
+def check_reserved_and_ids(ctx: LintContext, proc: Process) -> Iterator[Diagnostic]:
+    """AG-002 (ReservedTokenMisuse) and AG-003 (InvalidId)."""
+    tokens = ctx.tokens
+
+    if "id" in proc.attrs:
+        ident = Ident(proc.id, proc.attr_columns["id"])
+        yield from _check_name(ctx, "process id", ident, proc.line, tokens.process_id_re)
+    if "args" in proc.attrs:
+        base = proc.attr_columns["args"]
+        for part, offset in split_top_level(proc.attrs["args"]):
+            ident = Ident(part.split(":", 1)[0].strip(), base + offset)
+            yield from _check_name(ctx, "argument name", ident, proc.line, KEY_RE)
+
+    for stmt in proc.statements:
+        if stmt.target is not None:
+            kind = "process id" if stmt.keyword == "RUN" else "tool name"
+            pattern = tokens.process_id_re if stmt.keyword == "RUN" else tokens.tool_name_re
+            if not stmt.target_backticked:
+                yield ctx.diag(
+                    "AG-003",
+                    f"{kind.capitalize()} '{stmt.target.name}' must be wrapped in backticks.",
+                    stmt.line,
+                    stmt.target.column,
+                    len(stmt.target.name),
+                )
+            else:
+                yield from _check_name(ctx, kind, stmt.target, stmt.line, pattern)
+
+        for param in stmt.params:
+            yield from _check_name(ctx, "key", Ident(param.key, param.column), stmt.line, KEY_RE)
+
+        for sym in stmt.symbols:
+            if tokens.is_reserved(sym.name):
+                yield ctx.diag(
+                    "AG-002",
+                    f"Reserved word '{sym.name}' used as symbol.",
+                    stmt.line,
+                    sym.column,
+                    len(sym.name),
+                )
+
+
+@rule
+def check_tabs(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-011 (TabDetected): tabs are forbidden anywhere in a prompt."""
+    text = ctx.document.text
+    pos = text.find("\t")
+    while pos >= 0:
+        yield ctx.diag_at("AG-011", "Tab character detected.", pos)
+        # One finding per line: resume the search on the next line.
+        eol = text.find("\n", pos)
+        pos = text.find("\t", eol) if eol >= 0 else -1
+
+
+@rule
+def check_block_constants(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-045 (BlockConstantUnterminated) and AG-046 (BlockConstantTypeUnknown).
+
+    Uses only the opening line and the located `>>`; block bodies are never read.
+    """
+    for const in ctx.document.constants:
+        if const.block_type is None:
+            continue
+        opening = ctx.document.lines[const.line - 1]
+        if const.block_type not in BLOCK_TYPES:
+            marker = opening.index("<<")
+            start = marker - len(const.block_type)
+            yield ctx.diag(
+                "AG-046",
+                f"Unknown block type '{const.block_type}' for {const.name}; expected "
+                f"{' or '.join(BLOCK_TYPES)}.",
+                const.line,
+                start + 1,
+                marker + 2 - start,
+            )
+        if const.end_line is None:
+            yield ctx.diag(
+                "AG-045",
+                f"Block constant {const.name} has no closing '>>' line.",
+                const.line,
+                const.column,
+                len(opening) - const.column + 1,
+            )
+
+
+def _is_json(value: str) -> bool:
+    return value.startswith(("{", "["))
+
+
+@rule
+def check_json_constants(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-007 (InvalidJSON) for inline JSON constants and `JSON<<` block bodies."""
+    doc = ctx.document
+    for const in doc.constants:
+        if const.block_type == "JSON" and const.end_line is not None:
+            text, start = const.body(doc.text), const.body_start
+        elif const.block_type is None and _is_json(const.value):
+            raw = doc.lines[const.line - 1].rstrip()
+            text, start = const.value, doc.source_map.offset(const.line, len(raw) - len(const.value) + 1)
+        else:
+            continue
+        try:
+            validate_json_value(text)
+        except JsonValueError as e:
+            yield ctx.diag_at("AG-007", f"Invalid JSON in {const.name}: {e}", start + e.offset)
+
+
+@process_rule
+def check_json_values(ctx: LintContext, proc: Process) -> Iterator[Diagnostic]:
+    """AG-007 (InvalidJSON) for inline JSON in `where:`/`RETURN:` values and `SET`."""
+    for stmt in proc.statements:
+        values: list[tuple[str, int]] = []
+        if stmt.keyword in ("RUN", "USE", "RETURN"):
+            values = [(p.value, p.end_column - len(p.value)) for p in stmt.params]
+        elif stmt.keyword == "SET" and (m := SET_RE.match(stmt.text)):
+            values = [(m.group("value"), stmt.column + m.start("value"))]
+        for value, column in values:
+            if not _is_json(value):
+                continue
+            try:
+                validate_json_value(value)
+            except JsonValueError as e:
+                yield ctx.diag("AG-007", f"Invalid JSON value: {e}", stmt.line, column + e.offset)
+
+
+@process_rule
+def check_capture_maps(ctx: LintContext, proc: Process) -> Iterator[Diagnostic]:
+    """AG-028 (CapturePathError): malformed `map:` entries and invalid paths."""
+    for stmt in proc.statements:
+        if stmt.keyword != "CAPTURE" or (raw := statement_map(stmt)) is None:
+            continue
+        text, column = raw
+        try:
+            entries = parse_capture_map(text, column)
+        except CapturePathError as e:
+            yield ctx.diag("AG-028", f"Invalid CAPTURE map: {e}", stmt.line, column + e.offset)
+            continue
+        captured = {s.name for s in stmt.symbols}
+        for entry in entries:
+            if entry.symbol not in captured:
+                yield ctx.diag(
+                    "AG-028",
+                    f"map: target {entry.symbol} is not captured by this statement.",
+                    stmt.line,
+                    entry.column,
+                    len(entry.path.source) + 3 + len(entry.symbol),
+                )
+
+
+@rule
+def check_symbols(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-001 (UndefinedSymbol), AG-013 (DuplicateSymbol) and AG-023 (WithScopeError)."""
+    table = ctx.symbols
+    issues = list(table.issues)
+    for proc in ctx.document.processes:
+        scope = table.resolve(proc)
+        issues.extend(scope.issues)
+        for use in scope.undefined():
+            name = use.ident.name
+            yield ctx.diag(
+                "AG-001",
+                f"Symbol '{name}' is not defined in <constants>, <runtime> or this process.",
+                use.line,
+                use.ident.column,
+                len(name),
+            )
+    for issue in issues:
+        yield ctx.diag(issue.code, issue.message, issue.line, issue.column, issue.length)
+
+
+@rule
+def check_placeholders(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-006 (UnresolvedPlaceholder) and AG-041/AG-042/AG-043 (format placeholders).
+
+    Everything comes from the placeholder index the parser built; no rule rescans text.
+    """
+    index = ctx.document.placeholders
+    for occ in index.unresolved({c.name for c in ctx.document.constants}):
+        yield ctx.diag(
+            "AG-006",
+            f"Placeholder <{occ.name}> is not a constant, runtime value or WHERE placeholder; "
+            "bind it with SET ... (from <source>).",
+            occ.line,
+            occ.column,
+            occ.length,
+        )
+    for fmt in index.formats.values():
+        for code, message, line, column, length in fmt.problems():
+            yield ctx.diag(code, message, line, column, length)
+
+
+@rule
+def check_calls(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-004 (ProcessIdMismatch) for triggers and AG-044 (ProcessArgsMismatch) for RUN.
+
+    A RUN target missing from this document may live in another file, so only trigger
+    targets are checked here; `aps graph` reports missing RUN targets across files.
+    """
+    graph = ctx.calls
+    for site in graph.triggers:
+        if site.resolved is None:
+            yield ctx.diag(
+                "AG-004",
+                f"Trigger target '{site.target}' is not a process in this document.",
+                site.line,
+                site.column,
+                max(len(site.target), 1),
+            )
+    constants = {c.name: c for c in ctx.document.constants}
+    for site in graph.calls:
+        if site.resolved is None or site.caller is None or site.statement is None:
+            continue
+        node = graph.nodes[site.resolved]
+        defaults = ctx.symbols.resolve(graph.nodes[site.caller].process).defaults.get(site.line, {})
+        for message, where in signature_mismatches(site, node, defaults, constants):
+            if where is None:
+                yield ctx.diag("AG-044", message, site.line, site.column, len(site.target))
+            else:
+                yield ctx.diag("AG-044", message, site.line, where.column, len(where.key))
+
+
+@rule
+def check_unused(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-W01 (SymbolNotUsed): constants, formats and processes nothing refers to."""
+    for d in ctx.usage.unused():
+        yield ctx.diag(
+            "AG-W01",
+            f"{d.kind.capitalize()} '{d.name}' is defined but never used.",
+            d.line,
+            d.column,
+            len(d.name),
+        )
+
+
+@rule
+def check_ste(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-021 (STEValidationFailed): approved words and sentence length in `ste="true"` text.
+
+    Applies to every line of an `<instructions ste="true">` section.
+    """
+    doc = ctx.document
+    for section in doc.sections:
+        if section.name != "instructions" or section.attrs.get("ste") != "true":
+            continue
+        checker = load_ste_checker()
+        end = section.end_line or len(doc.lines) + 1
+        for lineno in range(section.line + 1, end):
+            for f in checker.check_line(doc.lines[lineno - 1]):
+                yield ctx.diag("AG-021", f.message, lineno, f.column + 1, f.length)
+
+
+@process_rule
+def check_statement_layout(ctx: LintContext, proc: Process) -> Iterator[Diagnostic]:
+    """AG-030 (SemicolonDetected) and AG-031 (PaddingWhitespace)."""
+    for stmt in proc.statements:
+        if stmt.text.startswith("//"):
+            continue
+        for start, end in code_spans(stmt.text):
+            segment = stmt.text[start:end]
+            for i, ch in enumerate(segment):
+                if ch == ";":
+                    yield ctx.diag(
+                        "AG-030",
+                        "Semicolon used; terminate statements with a newline.",
+                        stmt.line,
+                        stmt.column + start + i,
+                    )
+            for m in PADDING_RE.finditer(segment):
+                yield ctx.diag(
+                    "AG-031",
+                    "Excess inter-token whitespace; use exactly one space.",
+                    stmt.line,
+                    stmt.column + start + m.start(),
+                    len(m.group()),
+                )
+
+
+@rule
+def check_where_params(ctx: LintContext) -> Iterator[Diagnostic]:
+    """AG-012 (KeyOrder), plus AG-034/AG-044 for tools with predefinedTools.json signatures.
+
+    Key order and the compiled per-key checks run in one pass over each parameter list.
+    Signatures live outside the document, so this is a document rule (process-rule results
+    are cached by process content alone).
+    """
+    signatures = ctx.signatures
+    constants = {c.name: c for c in ctx.document.constants}
+    for proc in ctx.document.processes:
+        for stmt in proc.statements:
+            if stmt.keyword not in ("RUN", "USE"):
+                continue
+            sig = None
+            if stmt.keyword == "USE" and signatures is not None and stmt.target is not None:
+                name = stmt.target.name
+                if name in signatures.collisions:
+                    yield ctx.diag(
+                        "AG-034",
+                        f"Tool '{name}' has conflicting signatures in "
+                        f"{', '.join(signatures.collisions[name])}.",
+                        stmt.line,
+                        stmt.target.column,
+                        len(name),
+                    )
+                sig = signatures.tools.get(name)
+            prev_key: Optional[str] = None
+            ordered = True
+            for param in stmt.params:
+                if ordered and prev_key is not None and param.key < prev_key:
+                    ordered = False
+                    expected = ", ".join(sorted(p.key for p in stmt.params))
+                    yield ctx.diag(
+                        "AG-012",
+                        f"where: keys must be lexicographic (expected {expected}).",
+                        stmt.line,
+                        param.column,
+                        len(param.key),
+                    )
+                prev_key = param.key
+                if sig is None:
+                    continue
+                check = sig.checks.get(param.key)
+                if check is None:
+                    if not sig.additional:
+                        yield ctx.diag(
+                            "AG-044",
+                            f"Tool '{sig.name}' has no parameter '{param.key}'.",
+                            stmt.line,
+                            param.column,
+                            len(param.key),
+                        )
+                elif (message := check(param.value, constants)) is not None:
+                    yield ctx.diag(
+                        "AG-044", f"Tool '{sig.name}': {message}", stmt.line, param.column, len(param.key)
+                    )
+            if sig is not None and stmt.target is not None:
+                given = {p.key for p in stmt.params}
+                missing = [key for key in sig.required if key not in given]
+                if missing:
+                    yield ctx.diag(
+                        "AG-044",
+                        f"USE `{sig.name}` is missing parameter(s): {', '.join(missing)}.",
+                        stmt.line,
+                        stmt.target.column,
+                        len(sig.name),
+                    )
+
+
+def lint_document(
+    document: Document,
+    tokens: Optional[TokenCatalog] = None,
+    cache: Optional[ProcessLintCache] = None,
+) -> list[Diagnostic]:
+    """Run all registered rules and return diagnostics in source order.
+
+    With a `cache`, process rules are only re-run for processes whose content changed;
+    a `DocumentLintCache` also carries document-rule analyses over to the next lint.
+    """
+    memo = cache if isinstance(cache, DocumentLintCache) else None
+    ctx = LintContext(document=document, tokens=tokens or load_token_catalog(), memo=memo)
+    out: list[Diagnostic] = []
+    for fn in _RULES:
+        out.extend(fn(ctx))
+    for proc in document.processes:
+        if cache is not None:
+            out.extend(cache.lint(ctx, proc))
+        else:
+            for pfn in _PROCESS_RULES:
+                out.extend(pfn(ctx, proc))
+    if cache is not None:
+        cache.prune()
+    if memo is not None:
+        memo.symbols = ctx.symbols
+    out.sort(key=lambda d: (d.line, d.column, d.code))
+    return out
+
+
+def lint_text(text: str, path: Optional[str] = None) -> list[Diagnostic]:
+    """Parse and lint prompt text."""
+    tokens = load_token_catalog()
+    return lint_document(parse_document(text, path=path, tokens=tokens), tokens)
+
+
+def lint_file(path: Path) -> list[Diagnostic]:
+    """Lint a single file.
+
+    Raises:
+        OSError: The file cannot be read.
+        UnicodeDecodeError: The file is not UTF-8.
+    """
+    return lint_text(path.read_text(encoding="utf-8"), path=str(path))
+
+
+@dataclass(frozen=True)
+class LintResult:
+    """Outcome of linting one file: its diagnostics, or why it could not be read."""
+
+    path: str
+    diagnostics: list[Diagnostic] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def lint_target(path: Path) -> LintResult:
+    """Lint one file, reporting an unreadable or non-UTF-8 file instead of raising."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        return LintResult(path=str(path), error=str(e))
+    return LintResult(path=str(path), diagnostics=lint_text(text, path=str(path)))
+
+
+def _lint_worker(paths: list[str]) -> list[LintResult]:
+    return [lint_target(Path(p)) for p in paths]
+
+
+def lint_paths(paths: list[Path], jobs: Optional[int] = None) -> Iterator[LintResult]:
+    """Lint many files, yielding each file's result in input order as they finish.
+
+    With more than one job, files are linted in worker processes in small batches, and
+    only a bounded window of batches is in flight, so memory does not grow with corpus size.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(paths) <= 1:
+        for p in paths:
+            yield lint_target(p)
+        return
+    workers = min(jobs, len(paths))
+    size = max(1, min(64, len(paths) // (workers * 4)))
+    batches = iter([str(p) for p in paths[i : i + size]] for i in range(0, len(paths), size))
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending: deque[Future[list[LintResult]]] = deque()
+    try:
+        for batch in batches:
+            pending.append(pool.submit(_lint_worker, batch))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def collect_lint_targets(paths: list[Path]) -> list[Path]:
+    """Expand directories into lintable files (sorted, de-duplicated)."""
+    out: list[Path] = []
+    seen: set[Path] = set()
+    for p in paths:
+        candidates = (
+            sorted(f for f in p.rglob("*") if f.is_file() and f.name.endswith(LINT_SUFFIXES))
+            if p.is_dir()
+            else [p]
+        )
+        for f in candidates:
+            if f not in seen:
+                seen.add(f)
+                out.append(f)
+    return out
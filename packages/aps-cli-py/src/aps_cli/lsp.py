@@ -0,0 +1,478 @@
+"""`aps lsp`: a Language Server Protocol server over stdio.
+
+Open documents are kept as line lists and patched with incremental
+(`TextDocumentSyncKind.Incremental`) edits. Edits are not analyzed one by one: a document
+is re-analyzed once no further message has arrived for `DEBOUNCE` seconds (or before a
+request is answered), so a burst of keystrokes costs one re-parse and one publish.
+
+Re-analysis is incremental. An edit inside one process body is spliced into the previous
+`Document` by `patch_document`, which parses only the edited lines; other edits re-parse
+with the document's statement memo. The re-lint goes through a per-document
+`DocumentLintCache`: process rules only run for edited processes, symbol scopes of
+unchanged processes are carried over, and the unused-definition scan only reads changed
+lines. Diagnostics are pushed with `textDocument/publishDiagnostics`.
+
+Go-to-definition resolves RUN targets to `<process id>` and `format:<ID>` references to
+`<format id>` via a workspace symbol index: files under the workspace root are indexed
+lazily from disk, and open documents override their on-disk contents.
+
+Find-references on a `<PLACEHOLDER>` returns its occurrences in the document straight
+from the parser's placeholder index.
+"""
+
+from __future__ import annotations
+
+import json
+import select
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Optional
+from urllib.parse import unquote, urlparse
+
+from . import __version__
+from .diagnostics import Diagnostic
+from .lint import DocumentLintCache, collect_lint_targets, lint_document
+from .parser import FORMAT_REF_RE, Document, StatementCache, parse_document, patch_document
+from .sourcemap import SourceMap, utf16_to_index
+from .spec import TokenCatalog, load_token_catalog
+
+# JSON-RPC 2.0 error codes used by LSP
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+SERVER_NOT_INITIALIZED = -32002
+
+SYNC_INCREMENTAL = 2
+MESSAGE_ERROR = 1  # window/logMessage MessageType.Error
+SEVERITY = {"error": 1, "warning": 2}
+SYMBOL_KIND = {"process": 12, "format": 23}  # Function, Struct
+# Quiet period (seconds) after the last message before changed documents are analyzed.
+DEBOUNCE = 0.05
+
+
+def uri_to_path(uri: str) -> Path:
+    """Filesystem path of a `file://` URI."""
+    return Path(unquote(urlparse(uri).path))
+
+
+@dataclass
+class TextDocument:
+    """An open document as a list of lines (without terminators)."""
+
+    uri: str
+    lines: list[str]
+    version: int = 0
+
+    @classmethod
+    def from_text(cls, uri: str, text: str, version: int = 0) -> "TextDocument":
+        return cls(uri=uri, lines=text.split("\n"), version=version)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def apply(self, change: dict) -> None:
+        """Apply one `TextDocumentContentChangeEvent` (ranged or full)."""
+        if "range" not in change:
+            self.lines = change["text"].split("\n")
+            return
+        start, end = change["range"]["start"], change["range"]["end"]
+        last = len(self.lines) - 1
+        sl, el = min(start["line"], last), min(end["line"], last)
+        head = self.lines[sl][: utf16_to_index(self.lines[sl], start["character"])]
+        tail = self.lines[el][utf16_to_index(self.lines[el], end["character"]) :]
+        self.lines[sl : el + 1] = (head + change["text"] + tail).split("\n")
+
+
+@dataclass(frozen=True)
+class SymbolDef:
+    """A `<process id>` or `<format id>` definition."""
+
+    kind: str
+    name: str
+    uri: str
+    line: int
+    column: int
+    character: int
+
+    def location(self) -> dict:
+        pos = {"line": self.line - 1, "character": self.character}
+        end = {"line": self.line - 1, "character": self.character + len(self.name)}
+        return {"uri": self.uri, "range": {"start": pos, "end": end}}
+
+
+def document_definitions(doc: Document, uri: str) -> list[SymbolDef]:
+    """Process and format definitions of a parsed document, located at their id value."""
+    out: list[SymbolDef] = []
+    for kind, blocks in (("process", doc.processes), ("format", doc.formats)):
+        for block in blocks:
+            if not block.id or "id" not in block.attr_columns:
+                continue
+            column = block.attr_columns["id"]
+            character = doc.source_map.utf16_column(block.line, column)
+            out.append(SymbolDef(kind, block.id, uri, block.line, column, character))
+    return out
+
+
+def _lsp_position(source_map: SourceMap, line: int, column: int) -> dict:
+    return {"line": line - 1, "character": source_map.utf16_column(line, column)}
+
+
+class SymbolIndex:
+    """Workspace-wide definitions keyed by URI; open documents replace disk entries."""
+
+    def __init__(self, root: Optional[Path], tokens: TokenCatalog) -> None:
+        self.root = root
+        self.tokens = tokens
+        self.by_uri: dict[str, list[SymbolDef]] = {}
+        self._scanned = False
+
+    def _index_file(self, path: Path) -> None:
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            self.by_uri.pop(path.as_uri(), None)
+            return
+        doc = parse_document(text, path=str(path), tokens=self.tokens)
+        self.by_uri[path.as_uri()] = document_definitions(doc, path.as_uri())
+
+    def ensure_scanned(self, open_uris: set[str]) -> None:
+        """Index the workspace root once (skipping documents that are open)."""
+        if self._scanned:
+            return
+        self._scanned = True
+        if self.root is None or not self.root.is_dir():
+            return
+        for path in collect_lint_targets([self.root]):
+            if path.as_uri() not in open_uris:
+                self._index_file(path)
+
+    def update(self, uri: str, defs: list[SymbolDef]) -> None:
+        self.by_uri[uri] = defs
+
+    def revert(self, uri: str) -> None:
+        """Fall back to the on-disk contents of a closed document."""
+        self.by_uri.pop(uri, None)
+        if self._scanned and uri.startswith("file:"):
+            path = uri_to_path(uri)
+            if path.is_file():
+                self._index_file(path)
+
+    def find(self, kind: str, name: str, prefer: Optional[str] = None) -> list[SymbolDef]:
+        """Definitions of `kind:name`, those in `prefer` (the requesting URI) first."""
+        found = [d for defs in self.by_uri.values() for d in defs if (d.kind, d.name) == (kind, name)]
+        return sorted(found, key=lambda d: (d.uri != prefer, d.uri, d.line))
+
+    def search(self, query: str) -> list[SymbolDef]:
+        q = query.lower()
+        return [d for defs in self.by_uri.values() for d in defs if q in d.name.lower()]
+
+
+@dataclass
+class OpenDocument:
+    """Editor buffer plus the caches that make re-analysis incremental."""
+
+    text: TextDocument
+    document: Optional[Document] = None
+    diagnostics: list[Diagnostic] = field(default_factory=list)
+    statements: StatementCache = field(default_factory=dict)
+    lint_cache: DocumentLintCache = field(default_factory=DocumentLintCache)
+
+
+def read_message(stream: BinaryIO) -> Optional[dict]:
+    """Read one `Content-Length` framed JSON-RPC message; None at end of input."""
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.decode("ascii").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    if length is None:
+        return None
+    body = bytearray()
+    while len(body) < length:  # unbuffered streams may return short reads
+        chunk = stream.read(length - len(body))
+        if not chunk:
+            return None
+        body += chunk
+    return json.loads(body.decode("utf-8"))
+
+
+def write_message(stream: BinaryIO, message: dict) -> None:
+    """Write one `Content-Length` framed JSON-RPC message."""
+    body = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    stream.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+    stream.flush()
+
+
+class LanguageServer:
+    """Single-threaded LSP server bound to a pair of binary streams."""
+
+    def __init__(
+        self, reader: BinaryIO, writer: BinaryIO, tokens: Optional[TokenCatalog] = None
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.tokens = tokens or load_token_catalog()
+        self.documents: dict[str, OpenDocument] = {}
+        # Documents changed since they were last analyzed, in order of first change.
+        self.pending: dict[str, None] = {}
+        self.index = SymbolIndex(None, self.tokens)
+        self.initialized = False
+        self.shutdown_requested = False
+        self.requests: dict[str, Callable[[dict], Any]] = {
+            "initialize": self.initialize,
+            "shutdown": self.shutdown,
+            "textDocument/definition": self.definition,
+            "textDocument/references": self.references,
+            "workspace/symbol": self.workspace_symbol,
+        }
+        self.notifications: dict[str, Callable[[dict], None]] = {
+            "textDocument/didOpen": self.did_open,
+            "textDocument/didChange": self.did_change,
+            "textDocument/didClose": self.did_close,
+        }
+
+    # --- lifecycle -----------------------------------------------------------------
+
+    def initialize(self, params: dict) -> dict:
+        root_uri = params.get("rootUri")
+        if not root_uri and params.get("workspaceFolders"):
+            root_uri = params["workspaceFolders"][0]["uri"]
+        root = uri_to_path(root_uri) if root_uri else None
+        self.index = SymbolIndex(root, self.tokens)
+        self.initialized = True
+        return {
+            "capabilities": {
+                "textDocumentSync": {"openClose": True, "change": SYNC_INCREMENTAL},
+                "definitionProvider": True,
+                "referencesProvider": True,
+                "workspaceSymbolProvider": True,
+            },
+            "serverInfo": {"name": "aps", "version": __version__},
+        }
+
+    def shutdown(self, params: dict) -> None:
+        self.shutdown_requested = True
+        return None
+
+    # --- document sync -------------------------------------------------------------
+
+    def did_open(self, params: dict) -> None:
+        item = params["textDocument"]
+        text = TextDocument.from_text(item["uri"], item["text"], item.get("version", 0))
+        self.documents[item["uri"]] = OpenDocument(text)
+        self.pending[item["uri"]] = None
+
+    def did_change(self, params: dict) -> None:
+        uri = params["textDocument"]["uri"]
+        entry = self.documents.get(uri)
+        if entry is None:
+            return
+        for change in params["contentChanges"]:
+            entry.text.apply(change)
+        entry.text.version = params["textDocument"].get("version", entry.text.version)
+        self.pending[uri] = None
+
+    def did_close(self, params: dict) -> None:
+        uri = params["textDocument"]["uri"]
+        self.pending.pop(uri, None)
+        if self.documents.pop(uri, None) is not None:
+            self.index.revert(uri)
+            self._notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": []})
+
+    def flush(self) -> None:
+        """Analyze every changed document and publish its diagnostics."""
+        while self.pending:
+            uri = next(iter(self.pending))
+            del self.pending[uri]
+            try:
+                self._analyze(uri)
+            except Exception as e:  # noqa: BLE001 - logged, server keeps running
+                self._failed(f"Analysis of {uri}", uri, e)
+
+    def _analyze(self, uri: str) -> None:
+        entry = self.documents[uri]
+        path = str(uri_to_path(uri)) if uri.startswith("file:") else uri
+        text = entry.text.text
+        patched = None
+        if entry.document is not None:
+            patched = patch_document(entry.document, text, self.tokens, entry.statements)
+        if patched is not None:
+            doc = patched
+        else:
+            doc = parse_document(text, path=path, tokens=self.tokens, statement_cache=entry.statements)
+        if patched is None or len(entry.statements) > 2 * sum(len(p.statements) for p in doc.processes):
+            # Keep the memo bounded to the statements currently in the buffer.
+            entry.statements = {(s.text, s.column): s for p in doc.processes for s in p.statements}
+        entry.document = doc
+        entry.diagnostics = lint_document(doc, self.tokens, entry.lint_cache)
+        self.index.update(uri, document_definitions(doc, uri))
+        self._notify(
+            "textDocument/publishDiagnostics",
+            {
+                "uri": uri,
+                "version": entry.text.version,
+                "diagnostics": [self._lsp_diagnostic(doc.source_map, d) for d in entry.diagnostics],
+            },
+        )
+
+    @staticmethod
+    def _lsp_diagnostic(source_map: SourceMap, d: Diagnostic) -> dict:
+        return {
+            "range": {
+                "start": _lsp_position(source_map, d.line, d.column),
+                "end": _lsp_position(source_map, d.end_line, d.end_column),
+            },
+            "severity": SEVERITY[d.severity],
+            "code": d.code,
+            "source": "aps",
+            "message": d.message,
+        }
+
+    # --- navigation ----------------------------------------------------------------
+
+    def definition(self, params: dict) -> list[dict]:
+        uri = params["textDocument"]["uri"]
+        entry = self.documents.get(uri)
+        if entry is None or entry.document is None:
+            return []
+        source_map = entry.document.source_map
+        line = params["position"]["line"] + 1
+        if not 0 < line <= len(source_map.lines):
+            return []
+        raw = source_map.line_text(line)
+        column = source_map.column_from_utf16(line, params["position"]["character"])
+
+        ref = self._reference_at(entry.document, raw, line, column)
+        if ref is None:
+            return []
+        self.index.ensure_scanned(set(self.documents))
+        return [d.location() for d in self.index.find(*ref, prefer=uri)]
+
+    def references(self, params: dict) -> list[dict]:
+        uri = params["textDocument"]["uri"]
+        entry = self.documents.get(uri)
+        if entry is None or entry.document is None:
+            return []
+        doc = entry.document
+        line = params["position"]["line"] + 1
+        if not 0 < line <= len(doc.source_map.lines):
+            return []
+        occ = doc.placeholders.at(line, doc.source_map.column_from_utf16(line, params["position"]["character"]))
+        if occ is None:
+            return []
+        include_declaration = params.get("context", {}).get("includeDeclaration", True)
+        return [
+            {
+                "uri": uri,
+                "range": {
+                    "start": _lsp_position(doc.source_map, o.line, o.column),
+                    "end": _lsp_position(doc.source_map, o.line, o.column + o.length),
+                },
+            }
+            for o in doc.placeholders.occurrences[occ.name]
+            if include_declaration or o.role != "definition"
+        ]
+
+    @staticmethod
+    def _reference_at(doc: Document, raw: str, line: int, column: int) -> Optional[tuple[str, str]]:
+        for m in FORMAT_REF_RE.finditer(raw):
+            if m.start() < column <= m.end():
+                return ("format", m.group(1))
+        for proc in doc.processes:
+            for stmt in proc.statements:
+                if stmt.line != line or stmt.keyword != "RUN" or stmt.target is None:
+                    continue
+                start = stmt.target.column
+                if start <= column <= start + len(stmt.target.name):
+                    return ("process", stmt.target.name)
+        return None
+
+    def workspace_symbol(self, params: dict) -> list[dict]:
+        self.index.ensure_scanned(set(self.documents))
+        return [
+            {"name": d.name, "kind": SYMBOL_KIND[d.kind], "location": d.location()}
+            for d in self.index.search(params.get("query", ""))
+        ]
+
+    # --- transport -----------------------------------------------------------------
+
+    def _notify(self, method: str, params: dict) -> None:
+        write_message(self.writer, {"jsonrpc": "2.0", "method": method, "params": params})
+
+    def _respond(self, rid: Any, result: Any = None, error: Optional[dict] = None) -> None:
+        message: dict[str, Any] = {"jsonrpc": "2.0", "id": rid}
+        if error is not None:
+            message["error"] = error
+        else:
+            message["result"] = result
+        write_message(self.writer, message)
+
+    def _failed(self, what: str, uri: Any, error: Exception) -> None:
+        self._notify(
+            "window/logMessage",
+            {"type": MESSAGE_ERROR, "message": f"{what} failed: {type(error).__name__}: {error}"},
+        )
+        if isinstance(uri, str):
+            self._notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": []})
+
+    def handle(self, message: dict) -> None:
+        method = message.get("method", "")
+        params = message.get("params") or {}
+        if "id" not in message:
+            handler = self.notifications.get(method)
+            if handler is not None and self.initialized:
+                try:
+                    handler(params)
+                except Exception as e:  # noqa: BLE001 - logged, server keeps running
+                    self._failed(method, (params.get("textDocument") or {}).get("uri"), e)
+            return
+
+        # Answer from the current buffers, not from before the latest edits.
+        self.flush()
+        rid = message["id"]
+        request = self.requests.get(method)
+        if request is None:
+            self._respond(rid, error={"code": METHOD_NOT_FOUND, "message": f"Unknown method: {method}"})
+        elif not self.initialized and method != "initialize":
+            self._respond(rid, error={"code": SERVER_NOT_INITIALIZED, "message": "Not initialized"})
+        else:
+            try:
+                self._respond(rid, request(params))
+            except Exception as e:  # noqa: BLE001 - reported to the client, server keeps running
+                self._respond(rid, error={"code": INTERNAL_ERROR, "message": f"{type(e).__name__}: {e}"})
+
+    def _input_ready(self, timeout: float) -> bool:
+        """Whether a message arrives within `timeout` seconds.
+
+        Only pollable streams can tell; for others (in-memory streams, pipes on Windows)
+        this is False, so every change is analyzed before the next message is read.
+        """
+        try:
+            return bool(select.select([self.reader], [], [], timeout)[0])
+        except (OSError, ValueError):
+            return False
+
+    def run(self) -> int:
+        """Serve until `exit`; returns the process exit code mandated by the LSP spec."""
+        while True:
+            if self.pending and not self._input_ready(DEBOUNCE):
+                self.flush()
+            message = read_message(self.reader)
+            if message is None:
+                return 1
+            if message.get("method") == "exit":
+                return 0 if self.shutdown_requested else 1
+            self.handle(message)
+
+
+def serve_stdio() -> int:
+    """Run the language server on the process's stdin/stdout."""
+    # Read stdin unbuffered: `select` cannot see input already held in a read buffer.
+    return LanguageServer(sys.stdin.buffer.raw, sys.stdout.buffer).run()
@@ -0,0 +1,535 @@
+"""Line-oriented parser for the APS prompt envelope and process DSL."""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from typing import Iterator, Optional
+
+from .placeholders import PlaceholderIndex
+from .sourcemap import SourceMap
+from .spec import TokenCatalog, load_token_catalog
+
+# Top-level sections in normative order (see references/00-structure.md).
+SECTION_ORDER: tuple[str, ...] = (
+    "instructions",
+    "constants",
+    "formats",
+    "runtime",
+    "triggers",
+    "processes",
+    "input",
+)
+
+TAG_RE = re.compile(r"^<(?P<close>/?)(?P<name>[a-z_]+)(?P<attrs>(?:\s+[A-Za-z_][\w-]*=\"[^\"]*\")*)\s*(?P<self>/?)>\s*$")
+ATTR_RE = re.compile(r"([A-Za-z_][\w-]*)=\"([^\"]*)\"")
+
+RUN_RE = re.compile(r"^RUN\s+(?P<target>\S+)(?:\s+where:\s*(?P<params>.*))?$")
+USE_RE = re.compile(
+    r"^USE\s+(?P<target>\S+)(?:\s+where:\s*(?P<params>.*?))?(?:\s+\((?P<mods>atomic[^)]*)\))?$"
+)
+CAPTURE_RE = re.compile(r"^CAPTURE\s+(?P<syms>.+?)\s+from\s+(?P<target>\S+)(?:\s+map:\s*(?P<map>.*))?$")
+SET_RE = re.compile(r"^SET\s+(?P<sym>\S+)\s*:=\s*(?P<value>.*?)(?:\s+\(from\s+(?P<src>[^)]*)\))?$")
+UNSET_RE = re.compile(r"^UNSET\s+(?P<sym>\S+)")
+RETURN_RE = re.compile(r"^RETURN:\s*(?P<items>.*)$")
+FOREACH_RE = re.compile(r"^FOREACH\s+(?P<var>\S+)\s+IN\s+(?P<sym>[^\s:]+)\s*:\s*$")
+RECOVER_RE = re.compile(r"^RECOVER\s*\(\s*(?P<var>[^)\s]*)\s*\)\s*:\s*$")
+SNAP_RE = re.compile(r"^SNAP\s+\[(?P<syms>[^\]]*)\](?:.*?\sredact=\[(?P<redact>[^\]]*)\])?")
+WITH_RE = re.compile(r"^WITH\s+(?P<defaults>\{.*\})\s*:\s*$")
+
+BLOCK_OPEN_RE = re.compile(r"^(?P<name>[A-Z0-9_]{2,24}):\s*(?P<type>[A-Za-z]*)<<\s*$")
+BLOCK_CLOSE = ">>"
+BLOCK_CLOSE_RE = re.compile(r"^>>$", re.MULTILINE)
+# `<BLOCK_TYPE>`s defined by references/02-linting-and-formatting.md.
+BLOCK_TYPES: tuple[str, ...] = ("JSON", "TEXT")
+CONST_RE = re.compile(r"^(?P<name>[A-Z0-9_]{2,24}):\s+(?P<value>\S.*)$")
+# Fence label demanded by a format reference (references/04-schemas-and-types.md).
+FORMAT_REF_RE = re.compile(r"format:([A-Z0-9_]{2,24})")
+
+
+@dataclass(frozen=True)
+class Ident:
+    """A name occurring in a statement, with its 1-based column."""
+
+    name: str
+    column: int
+
+
+@dataclass(frozen=True)
+class Param:
+    """A `key=value` pair from a `where:` list or `RETURN:` pairs."""
+
+    key: str
+    value: str
+    column: int
+    end_column: int
+
+
+@dataclass
+class Statement:
+    """One non-blank line of a `<process>` body."""
+
+    keyword: str
+    text: str
+    line: int
+    column: int
+    target: Optional[Ident] = None
+    target_backticked: bool = False
+    params: list[Param] = field(default_factory=list)
+    symbols: list[Ident] = field(default_factory=list)
+
+    @property
+    def indent(self) -> int:
+        return self.column - 1
+
+
+@dataclass
+class Process:
+    """A `<process id="...">` block and its statements."""
+
+    id: str
+    attrs: dict[str, str]
+    attr_columns: dict[str, int]
+    line: int
+    end_line: Optional[int] = None
+    statements: list[Statement] = field(default_factory=list)
+
+
+@dataclass
+class Trigger:
+    """A `<trigger ... />` declaration."""
+
+    attrs: dict[str, str]
+    attr_columns: dict[str, int]
+    line: int
+
+
+@dataclass
+class Constant:
+    """A `SYMBOL: VALUE` binding in `<constants>` or `<runtime>`.
+
+    Block constants (`SYMBOL: JSON<<` ... `>>`) have `block_type` set; their body is
+    lines `line + 1` .. `end_line - 1`, i.e. `text[body_start:body_end]` of the document.
+    `end_line` is None when the block is unterminated (the body then runs to EOF).
+    """
+
+    name: str
+    value: str
+    line: int
+    column: int
+    section: str
+    block_type: Optional[str] = None
+    end_line: Optional[int] = None
+    body_start: int = 0
+    body_end: int = 0
+
+    def body(self, text: str) -> str:
+        """Block body sliced from the document text (no per-line joining)."""
+        return text[self.body_start : self.body_end]
+
+
+@dataclass
+class Format:
+    """A `<format id="...">` template in `<formats>`."""
+
+    id: str
+    attrs: dict[str, str]
+    attr_columns: dict[str, int]
+    line: int
+    end_line: Optional[int] = None
+
+
+@dataclass
+class Section:
+    """A top-level envelope section (`attrs` of its opening tag, e.g. `ste="true"`)."""
+
+    name: str
+    line: int
+    end_line: Optional[int] = None
+    attrs: dict[str, str] = field(default_factory=dict)
+    attr_columns: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class Document:
+    """Parsed APS prompt."""
+
+    text: str
+    lines: list[str]
+    path: Optional[str] = None
+    sections: list[Section] = field(default_factory=list)
+    processes: list[Process] = field(default_factory=list)
+    triggers: list[Trigger] = field(default_factory=list)
+    constants: list[Constant] = field(default_factory=list)
+    formats: list[Format] = field(default_factory=list)
+    placeholders: PlaceholderIndex = field(default_factory=PlaceholderIndex, repr=False, compare=False)
+    source_map: SourceMap = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.source_map = SourceMap(self.lines)
+
+    def section(self, name: str) -> Optional[Section]:
+        """Return the first section with the given name."""
+        for s in self.sections:
+            if s.name == name:
+                return s
+        return None
+
+
+def _attrs(raw: str, offset: int) -> tuple[dict[str, str], dict[str, int]]:
+    values: dict[str, str] = {}
+    columns: dict[str, int] = {}
+    for m in ATTR_RE.finditer(raw):
+        values[m.group(1)] = m.group(2)
+        columns[m.group(1)] = offset + m.start(2) + 1
+    return values, columns
+
+
+def split_top_level(text: str, sep: str = ",") -> list[tuple[str, int]]:
+    """Split on `sep` outside quotes/brackets; return (stripped part, offset) pairs."""
+    parts: list[tuple[str, int]] = []
+    depth = 0
+    in_str = False
+    start = 0
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_str:
+            if ch == "\\":
+                i += 1
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch in "{[(":
+            depth += 1
+        elif ch in "}])":
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+
+    out: list[tuple[str, int]] = []
+    offset = 0
+    for raw in parts:
+        stripped = raw.strip()
+        if stripped:
+            out.append((stripped, offset + (len(raw) - len(raw.lstrip()))))
+        offset += len(raw) + len(sep)
+    return out
+
+
+def parse_params(text: str, column: int) -> list[Param]:
+    """Parse `k1=V1, k2=V2` starting at the given 1-based column."""
+    out: list[Param] = []
+    for part, offset in split_top_level(text):
+        key, eq, value = part.partition("=")
+        out.append(
+            Param(
+                key=key.strip() if eq else part,
+                value=value.strip(),
+                column=column + offset,
+                end_column=column + offset + len(part),
+            )
+        )
+    return out
+
+
+def code_spans(text: str) -> list[tuple[int, int]]:
+    """Return `[start, end)` spans of `text` outside double-quoted strings and backtick ids."""
+    spans: list[tuple[int, int]] = []
+    start = 0
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '"' or ch == "`":
+            if i > start:
+                spans.append((start, i))
+            j = i + 1
+            while j < n and text[j] != ch:
+                j += 2 if ch == '"' and text[j] == "\\" else 1
+            i = min(j + 1, n)
+            start = i
+            continue
+        i += 1
+    if start < n:
+        spans.append((start, n))
+    return spans
+
+
+def _idents(text: str, column: int) -> list[Ident]:
+    return [Ident(name=part, column=column + offset) for part, offset in split_top_level(text)]
+
+
+def _set_target(stmt: Statement, raw: str, column: int) -> None:
+    if len(raw) >= 2 and raw.startswith("`") and raw.endswith("`"):
+        stmt.target = Ident(name=raw[1:-1], column=column + 1)
+        stmt.target_backticked = True
+    else:
+        stmt.target = Ident(name=raw, column=column)
+
+
+def parse_statement(text: str, line: int, column: int, tokens: TokenCatalog) -> Statement:
+    """Parse one stripped statement line into a `Statement`."""
+    keyword = tokens.match_keyword(text) or ""
+    stmt = Statement(keyword=keyword, text=text, line=line, column=column)
+
+    def col(m: re.Match[str], group: str) -> int:
+        return column + m.start(group)
+
+    if keyword == "RUN" and (m := RUN_RE.match(text)):
+        _set_target(stmt, m.group("target"), col(m, "target"))
+        if m.group("params"):
+            stmt.params = parse_params(m.group("params"), col(m, "params"))
+    elif keyword == "USE" and (m := USE_RE.match(text)):
+        _set_target(stmt, m.group("target"), col(m, "target"))
+        if m.group("params"):
+            stmt.params = parse_params(m.group("params"), col(m, "params"))
+    elif keyword == "CAPTURE" and (m := CAPTURE_RE.match(text)):
+        _set_target(stmt, m.group("target"), col(m, "target"))
+        stmt.symbols = _idents(m.group("syms"), col(m, "syms"))
+    elif keyword == "SET" and (m := SET_RE.match(text)):
+        stmt.symbols = [Ident(m.group("sym"), col(m, "sym"))]
+    elif keyword == "UNSET" and (m := UNSET_RE.match(text)):
+        stmt.symbols = [Ident(m.group("sym"), col(m, "sym"))]
+    elif keyword == "RETURN" and (m := RETURN_RE.match(text)):
+        items = m.group("items")
+        if "=" in items:
+            stmt.params = parse_params(items, col(m, "items"))
+        else:
+            stmt.symbols = _idents(items, col(m, "items"))
+    elif keyword == "FOREACH" and (m := FOREACH_RE.match(text)):
+        stmt.symbols = [Ident(m.group("var"), col(m, "var")), Ident(m.group("sym"), col(m, "sym"))]
+    elif keyword == "RECOVER" and (m := RECOVER_RE.match(text)):
+        if m.group("var"):
+            stmt.symbols = [Ident(m.group("var"), col(m, "var"))]
+    elif keyword == "SNAP" and (m := SNAP_RE.match(text)):
+        stmt.symbols = _idents(m.group("syms"), col(m, "syms"))
+        if m.group("redact"):
+            stmt.symbols += _idents(m.group("redact"), col(m, "redact"))
+    return stmt
+
+
+StatementCache = dict[tuple[str, int], Statement]
+
+
+def _statement(
+    raw: str, stripped: str, lineno: int, tokens: TokenCatalog, cache: Optional[StatementCache]
+) -> Statement:
+    column = len(raw) - len(raw.lstrip()) + 1
+    if cache is None:
+        return parse_statement(stripped, lineno, column, tokens)
+    cached = cache.get((stripped, column))
+    if cached is None:
+        cached = cache[(stripped, column)] = parse_statement(stripped, lineno, column, tokens)
+    return cached if cached.line == lineno else replace(cached, line=lineno)
+
+
+def _skip(rows: Iterator[object], n: int) -> None:
+    """Advance an iterator by `n` items at C speed."""
+    deque(islice(rows, n), maxlen=0)
+
+
+def _block_constant(doc: Document, m: re.Match[str], lineno: int, column: int) -> Constant:
+    """Locate a block constant's body with one search for its `>>` line."""
+    starts = doc.source_map.starts
+    body_start = starts[lineno] if lineno < len(starts) else len(doc.text)
+    const = Constant(
+        name=m.group("name"),
+        value="",
+        line=lineno,
+        column=column,
+        section="constants",
+        block_type=m.group("type"),
+        body_start=body_start,
+        body_end=len(doc.text),
+    )
+    close = BLOCK_CLOSE_RE.search(doc.text, body_start)
+    if close is not None:
+        const.end_line = doc.source_map.position(close.start())[0]
+        # The body excludes the newline that precedes `>>`.
+        const.body_end = max(body_start, close.start() - 1)
+    return const
+
+
+def parse_document(
+    text: str,
+    path: Optional[str] = None,
+    tokens: Optional[TokenCatalog] = None,
+    statement_cache: Optional[StatementCache] = None,
+) -> Document:
+    """Parse an APS prompt into sections, constants, formats, processes and triggers.
+
+    The parser is tolerant: unknown lines are ignored and unclosed blocks end at EOF.
+    Long-lived callers (editors, watchers) may pass a `statement_cache` that persists
+    across re-parses; statements whose text and column are unchanged are then reused
+    instead of re-parsed.
+    """
+    tokens = tokens or load_token_catalog()
+    text = text.replace("\r\n", "\n")
+    lines = text.split("\n")
+    doc = Document(text=text, lines=lines, path=path)
+
+    section: Optional[Section] = None
+    process: Optional[Process] = None
+    fmt: Optional[Format] = None
+
+    rows = enumerate(lines)
+    for idx, raw in rows:
+        lineno = idx + 1
+        stripped = raw.strip()
+        tag = TAG_RE.match(stripped) if stripped.startswith("<") else None
+        tag_offset = len(raw) - len(raw.lstrip())
+
+        if tag and tag.group("name") in SECTION_ORDER:
+            if tag.group("close"):
+                if section and section.name == tag.group("name"):
+                    section.end_line = lineno
+                    section = None
+                    process = None
+                    fmt = None
+                    doc.placeholders.close_format()
+            elif section is None:
+                attrs, columns = _attrs(tag.group("attrs"), tag_offset + tag.start("attrs"))
+                section = Section(
+                    name=tag.group("name"), line=lineno, attrs=attrs, attr_columns=columns
+                )
+                doc.sections.append(section)
+            continue
+
+        if section is None:
+            continue
+        if fmt is not None and not (tag and tag.group("name") == "format"):
+            doc.placeholders.format_line(lineno, raw)
+        else:
+            doc.placeholders.add(section.name, lineno, raw)
+
+        if section.name == "processes":
+            if tag and tag.group("name") == "process":
+                if tag.group("close"):
+                    if process:
+                        process.end_line = lineno
+                    process = None
+                else:
+                    attrs, columns = _attrs(tag.group("attrs"), tag_offset + tag.start("attrs"))
+                    process = Process(
+                        id=attrs.get("id", ""), attrs=attrs, attr_columns=columns, line=lineno
+                    )
+                    doc.processes.append(process)
+                continue
+            if process is not None and stripped:
+                process.statements.append(_statement(raw, stripped, lineno, tokens, statement_cache))
+        elif section.name == "formats":
+            if tag and tag.group("name") == "format":
+                if tag.group("close"):
+                    if fmt:
+                        fmt.end_line = lineno
+                    fmt = None
+                    doc.placeholders.close_format()
+                elif fmt is None:
+                    attrs, columns = _attrs(tag.group("attrs"), tag_offset + tag.start("attrs"))
+                    fmt = Format(id=attrs.get("id", ""), attrs=attrs, attr_columns=columns, line=lineno)
+                    doc.formats.append(fmt)
+                    doc.placeholders.open_format(fmt.id, lineno, columns.get("id", tag_offset + 1))
+        elif section.name == "triggers":
+            if tag and tag.group("name") == "trigger" and not tag.group("close"):
+                attrs, columns = _attrs(tag.group("attrs"), tag_offset + tag.start("attrs"))
+                doc.triggers.append(Trigger(attrs=attrs, attr_columns=columns, line=lineno))
+        elif section.name in ("constants", "runtime"):
+            column = len(raw) - len(raw.lstrip()) + 1
+            if section.name == "constants" and (m := BLOCK_OPEN_RE.match(stripped)):
+                block = _block_constant(doc, m, lineno, column)
+                doc.constants.append(block)
+                # Resume after the body without visiting its lines.
+                _skip(rows, (block.end_line or len(lines)) - lineno)
+            elif m := CONST_RE.match(stripped):
+                doc.constants.append(
+                    Constant(
+                        name=m.group("name"),
+                        value=m.group("value"),
+                        line=lineno,
+                        column=column,
+                        section=section.name,
+                    )
+                )
+
+    return doc
+
+
+def patch_document(
+    previous: Document,
+    text: str,
+    tokens: Optional[TokenCatalog] = None,
+    statement_cache: Optional[StatementCache] = None,
+) -> Optional[Document]:
+    """Re-parse an edit of `previous` that stays inside one process body.
+
+    Returns what `parse_document(text, previous.path, ...)` would, but only the edited
+    lines are parsed: every other process, section and definition is shared with
+    `previous`. Returns None when the edit is not that local (it adds or removes lines,
+    touches a `<...>` or `>>` line, or could move a block constant's body) and the caller
+    must parse the whole text.
+    """
+    tokens = tokens or load_token_catalog()
+    text = text.replace("\r\n", "\n")
+    lines = text.split("\n")
+    old = previous.lines
+    if len(lines) != len(old):
+        return None
+    n = len(lines)
+    first = 0
+    while first < n and lines[first] == old[first]:
+        first += 1
+    if first == n:
+        return previous
+    last = n - 1
+    while lines[last] == old[last]:
+        last -= 1
+    # 1-based line numbers of the first and last edited line.
+    first, last = first + 1, last + 1
+    for raw in (*old[first - 1 : last], *lines[first - 1 : last]):
+        stripped = raw.strip()
+        if stripped.startswith("<") or stripped == BLOCK_CLOSE:
+            return None
+    if any(c.block_type and (c.end_line is None or c.end_line >= first) for c in previous.constants):
+        return None
+    index = next(
+        (
+            i
+            for i, p in enumerate(previous.processes)
+            if p.line < first and p.end_line is not None and last < p.end_line
+        ),
+        None,
+    )
+    if index is None:
+        return None
+
+    proc = previous.processes[index]
+    kept = {stmt.line: stmt for stmt in proc.statements if not first <= stmt.line <= last}
+    statements = []
+    for lineno in range(proc.line + 1, proc.end_line):
+        if first <= lineno <= last:
+            raw = lines[lineno - 1]
+            if stripped := raw.strip():
+                statements.append(_statement(raw, stripped, lineno, tokens, statement_cache))
+        elif lineno in kept:
+            statements.append(kept[lineno])
+    processes = list(previous.processes)
+    processes[index] = replace(proc, statements=statements)
+    edited = {lineno: lines[lineno - 1] for lineno in range(first, last + 1)}
+    return Document(
+        text=text,
+        lines=lines,
+        path=previous.path,
+        sections=previous.sections,
+        processes=processes,
+        triggers=previous.triggers,
+        constants=previous.constants,
+        formats=previous.formats,
+        placeholders=previous.placeholders.with_lines("processes", edited),
+    )
@@ -0,0 +1,246 @@
+"""Placeholder index: every `<UPPER_SNAKE>` occurrence, and WHERE definitions per format.
+
+The parser feeds each line to a `PlaceholderIndex` as it goes, so the placeholder checks
+never rescan the document:
+
+- AG-041/AG-042 compare a format's body names with its WHERE definitions (set
+  differences);
+- AG-043 findings (`{name}`, `$NAME`, `<Not_Upper_Snake>`) are recorded while scanning
+  format bodies. Angle-bracket tokens only count as placeholders when they contain an
+  uppercase letter or `_`: all-lowercase ones (`<intent>`, `<br/>`) are literal tags;
+- AG-006 looks up placeholders in process statements against `<constants>`, `<runtime>`
+  and WHERE definitions. A `SET ... (from <source>)` names its own source and is always
+  resolved.
+
+The LSP uses `occurrences` for find-references.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, Literal, Optional
+
+PLACEHOLDER_RE = re.compile(r"<([A-Z][A-Z0-9_]*)>")
+# `- <NAME> ...` or `- <A> and <B> ...` (references/04-schemas-and-types.md).
+WHERE_DEF_RE = re.compile(
+    r"^-\s*(?P<names><[A-Z][A-Z0-9_]*>(?:\s*(?:,|and)\s*<[A-Z][A-Z0-9_]*>)*)\s*(?P<rule>.*)$"
+)
+WHERE_MARKER_RE = re.compile(r"^where\s*:", re.IGNORECASE)
+WHERE = "WHERE:"
+SOURCED_SET_RE = re.compile(r"^SET\s.*\(from\s+[^)]*\)\s*$")
+# Non-`<UPPER_SNAKE>` placeholder notations (AG-043).
+STYLE_RES = (
+    re.compile(r"(?<!\$)\{\{?\s*[A-Za-z_][A-Za-z0-9_]*\s*\}\}?"),
+    re.compile(r"\$\{?[A-Z][A-Z0-9_]*\}?"),
+    re.compile(r"<(?!/)[^<>\s][^<>\n]*>"),
+)
+# Inline HTML that may legitimately appear in a markdown template.
+HTML_TAGS = frozenset(
+    "a b br code del details div em hr i img kbd li ol p pre span strong sub summary sup "
+    "table td th tr u ul".split()
+)
+
+Role = Literal["text", "body", "definition", "rule"]
+
+
+@dataclass(frozen=True)
+class Occurrence:
+    """One `<NAME>` token; `column` is the 1-based column of `<`."""
+
+    name: str
+    line: int
+    column: int
+    section: str
+    role: Role = "text"
+    format: Optional[str] = None
+    # A `SET ... (from <source>)` statement that resolves the placeholder itself.
+    sourced: bool = False
+
+    @property
+    def length(self) -> int:
+        return len(self.name) + 2
+
+
+@dataclass(frozen=True)
+class StyleError:
+    """A placeholder written in a forbidden notation (AG-043)."""
+
+    text: str
+    line: int
+    column: int
+
+
+@dataclass
+class FormatPlaceholders:
+    """Placeholder use and WHERE definitions of one `<format>`."""
+
+    id: str
+    line: int
+    column: int
+    body: dict[str, Occurrence] = field(default_factory=dict)
+    definitions: dict[str, Occurrence] = field(default_factory=dict)
+    # Names mentioned in WHERE rule text (`sequential from 1 to <ITEM_COUNT>`).
+    referenced: set[str] = field(default_factory=set)
+    where_line: Optional[int] = None
+    # Lines whose `WHERE:` marker is lowercase or followed by inline text (AG-041).
+    bad_where: list[tuple[int, int, int]] = field(default_factory=list)
+    style_errors: list[StyleError] = field(default_factory=list)
+
+    def undefined(self) -> list[Occurrence]:
+        """First body occurrence of each placeholder WHERE does not define."""
+        return [occ for name, occ in self.body.items() if name not in self.definitions]
+
+    def unused(self) -> list[Occurrence]:
+        """WHERE definitions of placeholders neither the body nor another rule uses."""
+        used = self.body.keys() | self.referenced
+        return [occ for name, occ in self.definitions.items() if name not in used]
+
+    def problems(self) -> Iterator[tuple[str, str, int, int, int]]:
+        """AG-041/AG-042/AG-043 findings as (code, message, line, column, length)."""
+        if self.body and self.where_line is None:
+            message = f"Format {self.id} has placeholders but no WHERE: section."
+            yield ("AG-041", message, self.line, self.column, len(self.id))
+        for line, column, length in self.bad_where:
+            yield ("AG-041", "WHERE: must be uppercase and on a line of its own.", line, column, length)
+        if self.where_line is not None:
+            for occ in self.undefined():
+                message = f"Placeholder <{occ.name}> is not defined in WHERE."
+                yield ("AG-042", message, occ.line, occ.column, occ.length)
+            for occ in self.unused():
+                message = f"WHERE defines <{occ.name}>, which the body does not use."
+                yield ("AG-042", message, occ.line, occ.column, occ.length)
+        for err in self.style_errors:
+            message = f"Placeholder {err.text} must be written as <UPPER_SNAKE>."
+            yield ("AG-043", message, err.line, err.column, len(err.text))
+
+
+@dataclass
+class PlaceholderIndex:
+    """Placeholder occurrences of one document, keyed by name."""
+
+    occurrences: dict[str, list[Occurrence]] = field(default_factory=dict)
+    formats: dict[str, FormatPlaceholders] = field(default_factory=dict)
+    _current: Optional[FormatPlaceholders] = field(default=None, repr=False)
+    _lines: dict[int, list[Occurrence]] = field(default_factory=dict, repr=False)
+
+    def add(self, section: str, line: int, raw: str) -> None:
+        """Record the placeholders of a line outside format bodies."""
+        if "<" not in raw:
+            return
+        sourced = section == "processes" and SOURCED_SET_RE.match(raw.strip()) is not None
+        for m in PLACEHOLDER_RE.finditer(raw):
+            self._record(Occurrence(m.group(1), line, m.start() + 1, section, sourced=sourced))
+
+    def open_format(self, format_id: str, line: int, column: int) -> FormatPlaceholders:
+        """Start collecting a format body (the first format with an id wins)."""
+        fmt = FormatPlaceholders(format_id, line, column)
+        self.formats.setdefault(format_id, fmt)
+        self._current = fmt
+        return fmt
+
+    def close_format(self) -> None:
+        self._current = None
+
+    def format_line(self, line: int, raw: str) -> None:
+        """Record one line of the current format body (or its WHERE section)."""
+        fmt = self._current
+        if fmt is None:
+            return
+        stripped = raw.strip()
+        indent = len(raw) - len(raw.lstrip())
+        definition = None
+        if fmt.where_line is None and WHERE_MARKER_RE.match(stripped):
+            fmt.where_line = line
+            if stripped != WHERE:
+                fmt.bad_where.append((line, indent + 1, len(stripped)))
+                # Read an inline definition as if it were on its own line.
+                definition = WHERE_DEF_RE.match(stripped.split(":", 1)[1].strip())
+            else:
+                return
+        elif fmt.where_line is not None:
+            definition = WHERE_DEF_RE.match(stripped)
+
+        # WHERE rule text may describe types (`List<String>`); only the body is checked.
+        if fmt.where_line is None and ("{" in raw or "$" in raw or "<" in raw):
+            for style in STYLE_RES:
+                for m in style.finditer(raw):
+                    if _bad_style(m.group()):
+                        fmt.style_errors.append(StyleError(m.group(), line, m.start() + 1))
+        if "<" not in raw:
+            return
+        names_end = -1
+        if definition is not None:
+            names_end = raw.index(definition.group("names")) + len(definition.group("names"))
+        for m in PLACEHOLDER_RE.finditer(raw):
+            name = m.group(1)
+            role: Role
+            if fmt.where_line is None:
+                role = "body"
+            elif m.end() <= names_end:
+                role = "definition"
+            else:
+                role = "rule"
+            occ = Occurrence(name, line, m.start() + 1, "formats", role, fmt.id)
+            if role == "body":
+                fmt.body.setdefault(name, occ)
+            elif role == "definition":
+                fmt.definitions.setdefault(name, occ)
+            else:
+                fmt.referenced.add(name)
+            self._record(occ)
+
+    def _record(self, occ: Occurrence) -> None:
+        self.occurrences.setdefault(occ.name, []).append(occ)
+        self._lines.setdefault(occ.line, []).append(occ)
+
+    def with_lines(self, section: str, lines: dict[int, str]) -> PlaceholderIndex:
+        """A copy with the given (non-format) lines re-recorded; `self` is unchanged."""
+        index = PlaceholderIndex(dict(self.occurrences), self.formats, None, dict(self._lines))
+        touched = {occ.name for line in lines for occ in index._lines.pop(line, ())}
+        added = PlaceholderIndex()
+        for line, raw in lines.items():
+            added.add(section, line, raw)
+        index._lines.update(added._lines)
+        for name in touched | added.occurrences.keys():
+            occs = [occ for occ in self.occurrences.get(name, ()) if occ.line not in lines]
+            occs += added.occurrences.get(name, ())
+            if occs:
+                occs.sort(key=lambda occ: (occ.line, occ.column))
+                index.occurrences[name] = occs
+            else:
+                index.occurrences.pop(name, None)
+        return index
+
+    def defined(self) -> set[str]:
+        """Every placeholder some format's WHERE section defines."""
+        return {name for fmt in self.formats.values() for name in fmt.definitions}
+
+    def unresolved(self, symbols: set[str]) -> Iterator[Occurrence]:
+        """Process-statement placeholders that neither `symbols` nor WHERE resolves."""
+        known = symbols | self.defined()
+        for name, occs in self.occurrences.items():
+            if name in known:
+                continue
+            for occ in occs:
+                if occ.section == "processes" and not occ.sourced:
+                    yield occ
+
+    def at(self, line: int, column: int) -> Optional[Occurrence]:
+        """The occurrence covering a 1-based position, if any."""
+        for occ in self._lines.get(line, ()):
+            if occ.column <= column < occ.column + occ.length:
+                return occ
+        return None
+
+
+def _bad_style(text: str) -> bool:
+    if text.startswith("<"):
+        inner = text[1:-1]
+        if PLACEHOLDER_RE.fullmatch(text) or ":" in inner or "@" in inner:
+            return False  # valid placeholder, autolink or address
+        tag = inner.partition(" ")[0].rstrip("/")
+        if tag.lower() in HTML_TAGS:
+            return False
+        return any(c.isupper() or c == "_" for c in tag)
+    return True
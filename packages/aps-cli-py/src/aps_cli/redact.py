@@ -0,0 +1,286 @@
+"""Streaming secret/PII redaction (references/06-logging-and-privacy.md, AG-032).
+
+Every rule in `RULES` is merged into one alternation, so a transcript is scanned in a
+single pass whatever the number of rules; rules whose required literals do not occur in
+a chunk are left out of that chunk's alternation (compiled once per rule subset). Input is processed as a stream
+of byte chunks: no rule can match more than `MAX_MATCH` bytes, so only matches
+starting in the last `MAX_MATCH` bytes of a chunk can depend on data not yet read.
+That tail is carried into the next chunk (with a few bytes of context for `\\b`),
+which makes the output independent of where chunk boundaries fall.
+
+Matched values are replaced by `[REDACTED]`. Rules with a `value` group keep their
+prefix (`password=`, `Bearer `) and redact only the value.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+REDACTED = b"[REDACTED]"
+CHUNK_SIZE = 1 << 20
+# Upper bound on the length of any match; every rule's quantifiers are bounded below it.
+MAX_MATCH = 16 * 1024
+# Bytes of already-emitted input kept before the carried tail (for `\b`).
+CONTEXT = 64
+
+
+@dataclass(frozen=True)
+class RedactionRule:
+    """A named pattern; with `value`, only that group of the match is redacted.
+
+    `needs` lists literals of which every match contains at least one (compared against
+    the lowercased input when `fold` is set); rules whose literals are absent from a chunk
+    are left out of that chunk's matcher. An empty `needs` means "always run".
+    """
+
+    name: str
+    pattern: bytes
+    needs: tuple[bytes, ...] = ()
+    fold: bool = False
+    value: bool = False
+
+
+CREDENTIAL_KEYS = (b"password", b"passwd", b"pwd", b"secret", b"api", b"access", b"auth")
+
+RULES: tuple[RedactionRule, ...] = (
+    RedactionRule(
+        "private_key",
+        rb"-----BEGIN [A-Z ]{0,40}PRIVATE KEY-----[\s\S]{0,12000}?-----END [A-Z ]{0,40}PRIVATE KEY-----",
+        (b"PRIVATE KEY-----",),
+    ),
+    RedactionRule(
+        "jwt",
+        rb"\beyJ[A-Za-z0-9_-]{5,1500}\.eyJ[A-Za-z0-9_-]{5,1500}\.[A-Za-z0-9_-]{0,1500}",
+        (b".eyJ",),
+    ),
+    RedactionRule("aws_access_key", rb"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b", (b"AKIA", b"ASIA")),
+    RedactionRule(
+        "github_token",
+        rb"\b(?:gh[pousr]_[A-Za-z0-9]{36,255}|github_pat_[A-Za-z0-9_]{22,255})\b",
+        (b"ghp_", b"gho_", b"ghu_", b"ghs_", b"ghr_", b"github_pat_"),
+    ),
+    RedactionRule("slack_token", rb"\bxox[abposr]-[A-Za-z0-9-]{10,250}", (b"xox",)),
+    RedactionRule("api_key", rb"\bsk-[A-Za-z0-9_-]{20,250}", (b"sk-",)),
+    RedactionRule(
+        "bearer",
+        rb"\b(?i:bearer)[ \t]+(?P<value>[A-Za-z0-9._~+/-]{16,1000}=*)",
+        (b"bearer",),
+        fold=True,
+        value=True,
+    ),
+    RedactionRule(
+        "credential",
+        rb"\b(?i:password|passwd|pwd|secret|api[_-]?key|access[_-]?token|auth[_-]?token|client[_-]?secret)"
+        rb"[\"']?[ \t]*[:=][ \t]*[\"']?(?P<value>[^\s\"',;]{4,512})",
+        CREDENTIAL_KEYS,
+        fold=True,
+        value=True,
+    ),
+    RedactionRule(
+        "email",
+        rb"\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){0,8}\.[A-Za-z]{2,24}\b",
+        (b"@",),
+    ),
+    RedactionRule("ssn", rb"\b[0-9]{3}-[0-9]{2}-[0-9]{4}\b", (b"-",)),
+    # 13-19 digits, plain or in groups of four; confirmed with the Luhn checksum.
+    RedactionRule("card", rb"\b(?:[0-9]{4}[ -][0-9]{4}[ -][0-9]{4}[ -][0-9]{1,7}|[0-9]{13,19})\b"),
+)
+
+
+def _luhn(digits: bytes) -> bool:
+    total = 0
+    for i, ch in enumerate(reversed([c - 48 for c in digits if 48 <= c <= 57])):
+        if i % 2:
+            ch *= 2
+            if ch > 9:
+                ch -= 9
+        total += ch
+    return total % 10 == 0
+
+
+@dataclass
+class RedactionStats:
+    """Bytes read and redactions made, per rule name."""
+
+    bytes: int = 0
+    counts: Counter[str] = field(default_factory=Counter)
+    seconds: float = 0.0
+
+    @property
+    def redactions(self) -> int:
+        return sum(self.counts.values())
+
+    def merge(self, other: "RedactionStats") -> None:
+        self.bytes += other.bytes
+        self.counts.update(other.counts)
+        self.seconds += other.seconds
+
+
+class Redactor:
+    """Combined matchers for a rule set, one per subset of rules a chunk can trigger."""
+
+    def __init__(self, rules: Iterable[RedactionRule] = RULES, replacement: bytes = REDACTED) -> None:
+        self.rules = tuple(rules)
+        self.replacement = replacement
+        # Marker group -> (rule name, name of its value group or None).
+        self._groups: dict[str, tuple[str, Optional[str]]] = {}
+        self._alternatives: list[tuple[bool, bytes]] = []
+        for i, r in enumerate(self.rules):
+            marker = f"r{i}"
+            value_group = f"{marker}v" if r.value else None
+            pattern = r.pattern
+            if value_group:
+                pattern = pattern.replace(b"(?P<value>", f"(?P<{value_group}>".encode())
+            word = pattern.startswith(rb"\b")
+            if word:
+                pattern = pattern[2:]
+            # The empty marker group closes last, so `lastgroup` names the rule; keeping the
+            # alternative's own first token in front lets the engine reject it in one step.
+            self._alternatives.append((word, b"(?:" + pattern + b")(?P<" + marker.encode() + b">)"))
+            self._groups[marker] = (r.name, value_group)
+        self._matchers: dict[int, Optional[re.Pattern[bytes]]] = {}
+
+    def matcher(self, data: bytes) -> Optional[re.Pattern[bytes]]:
+        """The combined regex of the rules whose `needs` occur in `data` (None: no rule can match).
+
+        Rules anchored at a word boundary share a single leading `\\b`, so positions inside
+        words are rejected once instead of once per rule.
+        """
+        folded = None
+        mask = 0
+        for i, r in enumerate(self.rules):
+            if r.fold and folded is None:
+                folded = data.lower()
+            haystack = folded if r.fold else data
+            if not r.needs or any(n in haystack for n in r.needs):
+                mask |= 1 << i
+        if mask not in self._matchers:
+            selected = [alt for i, alt in enumerate(self._alternatives) if mask >> i & 1]
+            parts = [alt for word, alt in selected if not word]
+            words = [alt for word, alt in selected if word]
+            if words:
+                parts.append(rb"\b(?:" + b"|".join(words) + b")")
+            self._matchers[mask] = re.compile(b"|".join(parts)) if parts else None
+        return self._matchers[mask]
+
+    def _scan(self, buf: bytes, pos: int, limit: int, out: list[bytes], counts: Counter[str]) -> int:
+        """Redact matches starting in buf[pos:limit]; return the end of the emitted text."""
+        emitted = pos
+        regex = self.matcher(buf)
+        if regex is None:
+            return emitted
+        for m in regex.finditer(buf, pos):
+            if m.start() >= limit:
+                break
+            group = m.lastgroup
+            assert group is not None
+            name, value_group = self._groups[group]
+            if name == "card" and not _luhn(m.group()):
+                out.append(buf[emitted : m.end()])
+                emitted = m.end()
+                continue
+            start, end = m.span(value_group) if value_group else m.span()
+            out.append(buf[emitted:start])
+            out.append(self.replacement)
+            counts[name] += 1
+            emitted = end
+            if m.end() > end:
+                out.append(buf[end : m.end()])
+                emitted = m.end()
+        return emitted
+
+    def redact(self, data: bytes) -> tuple[bytes, Counter[str]]:
+        """Redact a complete buffer."""
+        out: list[bytes] = []
+        counts: Counter[str] = Counter()
+        emitted = self._scan(data, 0, len(data), out, counts)
+        out.append(data[emitted:])
+        return b"".join(out), counts
+
+    def stream(self, src: BinaryIO, dst: BinaryIO, chunk_size: int = CHUNK_SIZE) -> RedactionStats:
+        """Copy `src` to `dst` with redactions, holding at most one chunk plus a tail."""
+        stats = RedactionStats()
+        started = time.perf_counter()
+        carry = b""
+        pos = 0  # start of the not-yet-emitted part of `carry` (the rest is context)
+        while True:
+            chunk = src.read(chunk_size)
+            stats.bytes += len(chunk)
+            buf = carry + chunk
+            final = not chunk
+            limit = len(buf) if final else max(pos, len(buf) - MAX_MATCH)
+            out: list[bytes] = []
+            emitted = self._scan(buf, pos, limit, out, stats.counts)
+            keep = max(emitted, limit)
+            out.append(buf[emitted:keep])
+            dst.write(b"".join(out))
+            if final:
+                break
+            context = max(0, keep - CONTEXT)
+            carry, pos = buf[context:], keep - context
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+
+_DEFAULT: Optional[Redactor] = None
+
+
+def default_redactor() -> Redactor:
+    """The redactor for `RULES`, compiled once per process."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = Redactor()
+    return _DEFAULT
+
+
+def redact_file(src: Path, dst: Path, chunk_size: int = CHUNK_SIZE) -> RedactionStats:
+    """Stream one file into `dst` (which may be `src`; the file is replaced atomically)."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.", suffix=".tmp")
+    try:
+        with src.open("rb") as fin, os.fdopen(fd, "wb") as fout:
+            stats = default_redactor().stream(fin, fout, chunk_size)
+        if dst.exists():
+            shutil.copymode(dst, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return stats
+
+
+def _redact_worker(src: str, dst: str) -> RedactionStats:
+    return redact_file(Path(src), Path(dst))
+
+
+def redact_files(pairs: list[tuple[Path, Path]], jobs: Optional[int] = None) -> Iterator[RedactionStats]:
+    """Redact (source, destination) files, yielding stats in input order.
+
+    Files are spread over worker processes (each streams its file in constant memory);
+    at most two files per worker are in flight.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(pairs) <= 1:
+        for src, dst in pairs:
+            yield redact_file(src, dst)
+        return
+    pool = ProcessPoolExecutor(max_workers=min(jobs, len(pairs)))
+    pending: deque[Future[RedactionStats]] = deque()
+    try:
+        for src, dst in pairs:
+            pending.append(pool.submit(_redact_worker, str(src), str(dst)))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,193 @@
+"""Streaming diagnostic reporters for `aps lint --format`.
+
+Every reporter writes each diagnostic as soon as it is emitted, so memory use does not
+grow with the number of findings. Document formats (JSON array, SARIF) write their
+closing brackets in `close`, which the context-manager protocol calls even when the run
+is interrupted; an interrupted SARIF log records `executionSuccessful: false`.
+"""
+
+from __future__ import annotations
+
+import json
+import textwrap
+from pathlib import Path
+from typing import Literal, Optional, TextIO
+from urllib.parse import quote
+
+from . import __version__
+from .diagnostics import Diagnostic
+from .spec import load_spec_table
+
+ReportFormat = Literal["text", "json", "jsonl", "sarif", "github"]
+REPORT_FORMATS: tuple[str, ...] = ("text", "json", "jsonl", "sarif", "github")
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+INFORMATION_URI = "https://github.com/chris-buckley/agnostic-prompt-standard"
+
+
+class Reporter:
+    """Base reporter: `start`, any number of `emit`, then `close`."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.count = 0
+
+    def start(self) -> None:
+        pass
+
+    def emit(self, diagnostic: Diagnostic) -> None:
+        self.count += 1
+        self._write(diagnostic)
+
+    def _write(self, diagnostic: Diagnostic) -> None:
+        raise NotImplementedError
+
+    def close(self, complete: bool = True) -> None:
+        """Finish the output; `complete=False` marks an interrupted run."""
+        self.stream.flush()
+
+    def __enter__(self) -> "Reporter":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(complete=exc_type is None)
+
+
+class TextReporter(Reporter):
+    """`file:line:column: CODE message`, one per line."""
+
+    def _write(self, diagnostic: Diagnostic) -> None:
+        self.stream.write(diagnostic.format() + "\n")
+
+
+class JsonReporter(Reporter):
+    """A JSON array of diagnostic objects (same layout as the original `--json`)."""
+
+    def _write(self, diagnostic: Diagnostic) -> None:
+        item = textwrap.indent(json.dumps(diagnostic.to_dict(), indent=2), "  ")
+        self.stream.write(("[\n" if self.count == 1 else ",\n") + item)
+
+    def close(self, complete: bool = True) -> None:
+        self.stream.write("\n]\n" if self.count else "[]\n")
+        super().close(complete)
+
+
+class JsonLinesReporter(Reporter):
+    """One compact JSON diagnostic object per line."""
+
+    def _write(self, diagnostic: Diagnostic) -> None:
+        self.stream.write(json.dumps(diagnostic.to_dict()) + "\n")
+
+
+def _escape_data(value: str) -> str:
+    return value.replace("%", "%25").replace("\r", "%0D").replace("\n", "%0A")
+
+
+def _escape_property(value: str) -> str:
+    return _escape_data(value).replace(":", "%3A").replace(",", "%2C")
+
+
+class GithubReporter(Reporter):
+    """GitHub Actions workflow commands (`::error file=...::message`)."""
+
+    def _write(self, diagnostic: Diagnostic) -> None:
+        d = diagnostic
+        props = [
+            ("file", d.file or "<input>"),
+            ("line", d.line),
+            ("endLine", d.end_line),
+            ("col", d.column),
+            ("endColumn", d.end_column),
+            ("title", d.code),
+        ]
+        rendered = ",".join(f"{k}={_escape_property(str(v))}" for k, v in props)
+        self.stream.write(f"::{d.severity} {rendered}::{_escape_data(d.message)}\n")
+
+
+def _artifact_uri(file: Optional[str]) -> str:
+    """A valid SARIF URI reference: a file URI, or a percent-encoded relative path."""
+    if file is None or file == "<stdin>":
+        return "stdin"
+    path = Path(file)
+    return path.as_uri() if path.is_absolute() else quote(path.as_posix())
+
+
+class SarifReporter(Reporter):
+    """A SARIF 2.1.0 log with one run; results are streamed into `runs[0].results`.
+
+    All catalog rules are written up front so each result can carry its `ruleIndex`.
+    Columns are reported as Unicode code points, matching the diagnostics contract.
+    """
+
+    def start(self) -> None:
+        errors = load_spec_table().errors
+        self._rule_index = {e.code: i for i, e in enumerate(errors)}
+        rules = [
+            {
+                "id": e.code,
+                "name": e.name,
+                "shortDescription": {"text": e.desc},
+                "defaultConfiguration": {"level": e.severity},
+            }
+            for e in errors
+        ]
+        driver = {
+            "name": "aps",
+            "version": __version__,
+            "informationUri": INFORMATION_URI,
+            "rules": rules,
+        }
+        head = json.dumps({"$schema": SARIF_SCHEMA, "version": "2.1.0"})[:-1]
+        run = json.dumps({"tool": {"driver": driver}, "columnKind": "unicodeCodePoints"})[:-1]
+        self.stream.write(f'{head}, "runs": [{run}, "results": [')
+
+    def _write(self, diagnostic: Diagnostic) -> None:
+        d = diagnostic
+        result: dict = {
+            "ruleId": d.code,
+            "level": d.severity,
+            "message": {"text": d.message},
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": _artifact_uri(d.file)},
+                        "region": {
+                            "startLine": d.line,
+                            "startColumn": d.column,
+                            "endLine": d.end_line,
+                            "endColumn": d.end_column,
+                        },
+                    }
+                }
+            ],
+        }
+        if d.code in self._rule_index:
+            result["ruleIndex"] = self._rule_index[d.code]
+        self.stream.write(("\n" if self.count == 1 else ",\n") + json.dumps(result))
+
+    def close(self, complete: bool = True) -> None:
+        invocations = json.dumps([{"executionSuccessful": complete}])
+        self.stream.write(f'], "invocations": {invocations}}}]}}\n')
+        super().close(complete)
+
+
+_REPORTERS: dict[str, type[Reporter]] = {
+    "text": TextReporter,
+    "json": JsonReporter,
+    "jsonl": JsonLinesReporter,
+    "sarif": SarifReporter,
+    "github": GithubReporter,
+}
+
+
+def make_reporter(fmt: ReportFormat, stream: TextIO) -> Reporter:
+    """Instantiate the reporter for an output format name.
+
+    Raises:
+        ValueError: Unknown format.
+    """
+    try:
+        return _REPORTERS[fmt](stream)
+    except KeyError:
+        raise ValueError(f"Unknown report format: {fmt}") from None
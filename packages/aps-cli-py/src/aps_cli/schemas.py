@@ -1,8 +1,8 @@
-"""Pydantic v2 schemas for manifest and skill validation."""
+"""Pydantic v2 schemas for manifest, frontmatter and tool-signature validation."""
 
 from __future__ import annotations
 
-from typing import Optional, Union
+from typing import Literal, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
@@ -106,6 +106,88 @@ class SkillFrontmatter(BaseModel):
     license: Optional[str] = None
 
 
+# `tools: [a, b]` (VS Code) or `tools: A, B` (Claude Code).
+ToolList = Union[list[str], str]
+
+
+class AgentFrontmatter(BaseModel):
+    """Schema for custom agent frontmatter (`*.agent.md`, `.claude/agents/*.md`)."""
+
+    model_config = ConfigDict(populate_by_name=True, extra="allow")
+
+    name: Optional[str] = None
+    description: str = Field(..., min_length=1)
+    argument_hint: Optional[str] = Field(None, alias="argument-hint")
+    tools: Optional[ToolList] = None
+    disallowed_tools: Optional[ToolList] = Field(None, alias="disallowedTools")
+    model: Optional[Union[str, list[str]]] = None
+    infer: Optional[bool] = None
+    target: Optional[str] = None
+    mcp_servers: Optional[list] = Field(None, alias="mcp-servers")
+    handoffs: Optional[list] = None
+    permission_mode: Optional[
+        Literal["default", "acceptEdits", "dontAsk", "bypassPermissions", "plan"]
+    ] = Field(None, alias="permissionMode")
+    skills: Optional[ToolList] = None
+    hooks: Optional[dict] = None
+
+
+class PromptFrontmatter(BaseModel):
+    """Schema for reusable prompt frontmatter (`*.prompt.md`)."""
+
+    model_config = ConfigDict(populate_by_name=True, extra="allow")
+
+    name: Optional[str] = None
+    description: Optional[str] = None
+    argument_hint: Optional[str] = Field(None, alias="argument-hint")
+    agent: Optional[str] = None
+    tools: Optional[ToolList] = None
+    model: Optional[Union[str, list[str]]] = None
+
+
+class InstructionsFrontmatter(BaseModel):
+    """Schema for scoped instructions/rules frontmatter (`*.instructions.md`, `.claude/rules/*.md`)."""
+
+    model_config = ConfigDict(populate_by_name=True, extra="allow")
+
+    apply_to: Optional[str] = Field(None, alias="applyTo")
+    description: Optional[str] = None
+    exclude_agent: Optional[str] = Field(None, alias="excludeAgent")
+    paths: Optional[Union[list[str], str]] = None
+
+
+class ToolParamSpec(BaseModel):
+    """One `where:` parameter of a predefined tool signature."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    type: Optional[str] = None
+    required: bool = False
+    enum: Optional[list[Union[str, int, float, bool, None]]] = Field(None, min_length=1)
+    description: Optional[str] = None
+
+
+class PredefinedTool(BaseModel):
+    """A tool signature from predefinedTools.json."""
+
+    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+
+    name: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    params: dict[str, ToolParamSpec] = Field(default_factory=dict)
+    additional_params: bool = Field(False, alias="additionalParams")
+
+
+class PredefinedTools(BaseModel):
+    """Schema for predefinedTools.json (external tool signatures for lint/IDE help)."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    schema_ref: Optional[str] = Field(None, alias="$schema")
+    version: Optional[str] = None
+    tools: list[PredefinedTool]
+
+
 def parse_platform_manifest(data: dict) -> PlatformManifest:
     """Parse and validate a platform manifest.
 
@@ -167,4 +249,18 @@ def safe_parse_skill_frontmatter(
     try:
         return parse_skill_frontmatter(data), None
     except ValidationError as e:
-        return None, e
\ No newline at end of file
+        return None, e
+
+def parse_predefined_tools(data: dict) -> PredefinedTools:
+    """Parse and validate predefinedTools.json.
+
+    Args:
+        data: Raw file data
+
+    Returns:
+        Validated PredefinedTools
+
+    Raises:
+        ValidationError: If validation fails
+    """
+    return PredefinedTools.model_validate(data)
@@ -0,0 +1,182 @@
+"""Predefined tool signatures (`predefinedTools.json`) compiled into `where:` validators.
+
+`predefinedTools.json` is external to prompts (references/04-schemas-and-types.md). The
+files from the repository root down to a prompt's directory apply to that prompt. Each
+signature is compiled once into per-key checker closures (value kind and enum), plus the
+set of required keys, so a `USE` statement is validated in one pass over its parameter
+list without re-reading the signature. Compiled sets are cached by the sha256 of the
+signature files.
+
+A tool that two signatures define differently (in one file, or in an outer and an inner
+file) is a collision (AG-034) and is not type-checked.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from pydantic import ValidationError
+
+from .callgraph import literal_type, type_compatible
+from .core import find_repo_root
+from .parser import Constant
+from .schemas import PredefinedTool, ToolParamSpec, parse_predefined_tools
+
+SIGNATURES_FILE = "predefinedTools.json"
+INTEGER_RE = re.compile(r"-?[0-9]+")
+
+# (value text, constants) -> problem message, or None when the value is acceptable.
+ValueCheck = Callable[[str, dict[str, Constant]], Optional[str]]
+
+
+@dataclass(frozen=True)
+class ToolSignature:
+    """A compiled signature: one checker per declared key and the required keys."""
+
+    name: str
+    checks: dict[str, ValueCheck]
+    required: tuple[str, ...]
+    additional: bool
+
+
+@dataclass
+class SignatureSet:
+    """Compiled signatures of the files that apply to one prompt."""
+
+    tools: dict[str, ToolSignature] = field(default_factory=dict)
+    # Tool name -> files defining it with conflicting signatures.
+    collisions: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    # Files that could not be read or validated, with the reason.
+    errors: list[str] = field(default_factory=list)
+
+
+def _resolve(value: str, constants: dict[str, Constant]) -> str:
+    const = constants.get(value)
+    return const.value if const is not None and not const.block_type else value
+
+
+def _literal(value: str) -> object:
+    try:
+        decoded = json.loads(value)
+    except ValueError:
+        return value  # bare word
+    return (type(decoded).__name__, decoded)
+
+
+def compile_param(key: str, spec: ToolParamSpec) -> ValueCheck:
+    """Build the checker closure for one parameter."""
+    declared = spec.type
+    enum = None
+    if spec.enum is not None:
+        enum = frozenset((type(v).__name__, v) for v in spec.enum)
+        enum_text = ", ".join(json.dumps(v) for v in spec.enum)
+
+    def check(value: str, constants: dict[str, Constant]) -> Optional[str]:
+        actual = literal_type(value, constants)
+        if actual is None:
+            return None  # runtime symbol or engine-defined value: not checked statically
+        if declared == "Integer":
+            if actual != "Number" or not INTEGER_RE.fullmatch(_resolve(value, constants)):
+                return f"'{key}' expects Integer, got {actual}."
+        elif declared and not type_compatible(declared, actual):
+            return f"'{key}' expects {declared}, got {actual}."
+        if enum is not None and _literal(_resolve(value, constants)) not in enum:
+            return f"'{key}' must be one of: {enum_text}."
+        return None
+
+    return check
+
+
+def compile_signature(tool: PredefinedTool) -> ToolSignature:
+    """Compile one validated signature."""
+    return ToolSignature(
+        name=tool.name,
+        checks={key: compile_param(key, spec) for key, spec in tool.params.items()},
+        required=tuple(sorted(key for key, spec in tool.params.items() if spec.required)),
+        additional=tool.additional_params,
+    )
+
+
+_SETS_BY_HASH: dict[tuple[tuple[str, str], ...], SignatureSet] = {}
+
+
+def _compile_files(files: list[tuple[str, str]]) -> SignatureSet:
+    """Compile (path, text) pairs, outermost first."""
+    result = SignatureSet()
+    seen: dict[str, tuple[str, str]] = {}
+    for path, text in files:
+        try:
+            tools = parse_predefined_tools(json.loads(text)).tools
+        except ValueError as e:  # JSON and pydantic errors
+            reason = e.errors()[0]["msg"] if isinstance(e, ValidationError) else str(e)
+            result.errors.append(f"{path}: {reason}")
+            continue
+        for tool in tools:
+            shape = json.dumps(tool.model_dump(exclude={"description"}), sort_keys=True, default=str)
+            prev = seen.get(tool.name)
+            if prev is not None and prev[1] != shape:
+                files_for = result.collisions.get(tool.name, (prev[0],))
+                result.collisions[tool.name] = (*files_for, path)
+                result.tools.pop(tool.name, None)
+                continue
+            seen[tool.name] = (path, shape)
+            if tool.name not in result.collisions:
+                result.tools[tool.name] = compile_signature(tool)
+    return result
+
+
+def signature_files(prompt: Path) -> list[Path]:
+    """`predefinedTools.json` files applying to a prompt, outermost first.
+
+    The search walks from the prompt's directory up to the repository root (or the
+    filesystem root outside a repository).
+    """
+    start = prompt.resolve().parent
+    stop = find_repo_root(start)
+    found = []
+    for directory in (start, *start.parents):
+        candidate = directory / SIGNATURES_FILE
+        if candidate.is_file():
+            found.append(candidate)
+        if directory == stop:
+            break
+    return found[::-1]
+
+
+def signature_hashes(files: list[Path]) -> tuple[tuple[str, str], ...]:
+    """(path, sha256) of each readable file in `files`: the inputs AG-044 results depend on."""
+    out = []
+    for f in files:
+        try:
+            out.append((str(f), hashlib.sha256(f.read_bytes()).hexdigest()))
+        except OSError:
+            continue
+    return tuple(out)
+
+
+def load_signatures(files: list[Path]) -> Optional[SignatureSet]:
+    """Compiled signatures of `files` (None when there are none).
+
+    Files are read on every call; compilation only happens when their hash changed.
+    """
+    texts = []
+    for f in files:
+        try:
+            texts.append((str(f), f.read_bytes()))
+        except OSError:
+            continue  # removed since it was found
+    if not texts:
+        return None
+    key = tuple((path, hashlib.sha256(data).hexdigest()) for path, data in texts)
+    cached = _SETS_BY_HASH.get(key)
+    if cached is None:
+        cached = _compile_files([(path, data.decode("utf-8", errors="replace")) for path, data in texts])
+        if len(_SETS_BY_HASH) >= 64:
+            _SETS_BY_HASH.clear()
+        _SETS_BY_HASH[key] = cached
+    return cached
@@ -0,0 +1,67 @@
+"""Offset <-> line/column conversion shared by the parser, rules and output formats.
+
+A `SourceMap` is built once per parsed document from its line list. It stores the
+code-point offset at which every line starts, so an offset resolves to a 1-based
+line/column with one `bisect` (O(log n)) instead of a rescan of the text. Columns are
+code points, as in the diagnostics contract; LSP clients count UTF-16 code units, which
+`utf16_column`/`column_from_utf16` convert (ASCII lines take a constant-time path).
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from itertools import accumulate
+
+
+def utf16_length(text: str) -> int:
+    """Number of UTF-16 code units needed to encode `text`."""
+    if text.isascii():
+        return len(text)
+    return len(text) + sum(1 for ch in text if ord(ch) > 0xFFFF)
+
+
+def utf16_to_index(text: str, units: int) -> int:
+    """Code-point index in `text` of a UTF-16 code-unit offset (clamped to the end)."""
+    if text.isascii():
+        return min(max(units, 0), len(text))
+    seen = 0
+    for idx, ch in enumerate(text):
+        if seen >= units:
+            return idx
+        seen += 2 if ord(ch) > 0xFFFF else 1
+    return len(text)
+
+
+class SourceMap:
+    """Line-start offsets of a `\\n`-separated text."""
+
+    __slots__ = ("lines", "starts")
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines = lines
+        self.starts = list(accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+
+    @classmethod
+    def from_text(cls, text: str) -> "SourceMap":
+        return cls(text.split("\n"))
+
+    def position(self, offset: int) -> tuple[int, int]:
+        """1-based (line, column) of a code-point offset into the text."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def offset(self, line: int, column: int) -> int:
+        """Code-point offset of a 1-based line/column."""
+        return self.starts[line - 1] + column - 1
+
+    def line_text(self, line: int) -> str:
+        """Text of a 1-based line ('' past the end)."""
+        return self.lines[line - 1] if 0 < line <= len(self.lines) else ""
+
+    def utf16_column(self, line: int, column: int) -> int:
+        """0-based UTF-16 character of a 1-based line/code-point column (LSP `character`)."""
+        return utf16_length(self.line_text(line)[: column - 1])
+
+    def column_from_utf16(self, line: int, character: int) -> int:
+        """1-based code-point column of an LSP position on a 1-based line."""
+        return utf16_to_index(self.line_text(line), character) + 1
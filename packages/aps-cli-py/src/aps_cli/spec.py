@@ -0,0 +1,230 @@
+"""Machine-readable APS spec atoms shipped in the skill payload (`spec/`).
+
+The CLI reads the precompiled `aps-v1.0.atoms.bin` table produced by
+`tools/extract_spec_atoms.py`. The file is memory-mapped; individual tables are decoded
+on first access and error codes are looked up by binary search, so startup cost does not
+grow with catalog size. Tables are cached per spec revision (sha256 of the JSON atoms).
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import re
+import struct
+import sys
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Iterator, Literal, Optional
+
+from .core import resolve_payload_skill_dir
+
+SPEC_VERSION = "1.0"
+TOKENS_FILE = f"aps-v{SPEC_VERSION}.tokens.json"
+TABLE_FILE = f"aps-v{SPEC_VERSION}.atoms.bin"
+
+# Binary table layout (little-endian). Must match tools/extract_spec_atoms.py.
+BIN_MAGIC = b"APSA"
+BIN_FORMAT = 1
+_HEADER = struct.Struct("<4sHH32s")
+_DIR_ENTRY = struct.Struct("<4sII")
+_STR_REC = struct.Struct("<IH")
+_PAIR_REC = struct.Struct("<IHIH")
+_ERR_REC = struct.Struct("<IHIHIHB")
+
+# Identifier-shaped tokens. Scanning is a single regex pass plus one hash lookup per
+# token, so cost is linear in input size and independent of catalog size.
+IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_-]*")
+
+
+@dataclass(frozen=True)
+class TokenCatalog:
+    """Compiled keyword/reserved-word catalogs and identifier patterns."""
+
+    keywords: frozenset[str]
+    reserved: frozenset[str]
+    modifiers: frozenset[str]
+    symbol_re: re.Pattern[str]
+    process_id_re: re.Pattern[str]
+    tool_name_re: re.Pattern[str]
+    # First word -> multi-word keywords starting with it, longest first ("ELSE" -> ("ELSE IF",))
+    phrases: dict[str, tuple[str, ...]]
+
+    def is_reserved(self, token: str) -> bool:
+        """Check a token against the reserved catalog (case-insensitive; ids/keys are lowercase)."""
+        return token.upper() in self.reserved
+
+    def match_keyword(self, text: str) -> Optional[str]:
+        """Return the statement keyword that `text` starts with, if any."""
+        m = IDENT_RE.match(text)
+        if not m:
+            return None
+        word = m.group()
+        for phrase in self.phrases.get(word, ()):
+            if text.startswith(phrase) and not _continues_ident(text, len(phrase)):
+                return phrase
+        return word if word in self.keywords else None
+
+    def scan_reserved(self, text: str) -> Iterator[tuple[int, str]]:
+        """Yield (offset, token) for every reserved word used as a token in `text`."""
+        reserved = self.reserved
+        for m in IDENT_RE.finditer(text):
+            token = m.group()
+            if token.upper() in reserved:
+                yield m.start(), token
+
+
+def _continues_ident(text: str, pos: int) -> bool:
+    return pos < len(text) and (text[pos].isalnum() or text[pos] in "_-")
+
+
+def compile_token_catalog(data: dict) -> TokenCatalog:
+    """Compile a parsed `aps-v1.0.tokens.json` document into lookup structures."""
+    groups: dict[str, list[str]] = data.get("keywords", {})
+    modifiers = frozenset(groups.get("modifiers", ()))
+    keywords = frozenset(
+        kw for name, values in groups.items() if name != "modifiers" for kw in values
+    )
+
+    phrases: dict[str, list[str]] = {}
+    for kw in keywords:
+        if " " in kw:
+            phrases.setdefault(kw.split(" ", 1)[0], []).append(kw)
+
+    idents: dict[str, str] = data.get("identifiers", {})
+    return TokenCatalog(
+        keywords=keywords,
+        reserved=frozenset(data.get("reserved", ())),
+        modifiers=modifiers,
+        symbol_re=re.compile(idents["symbol"]),
+        process_id_re=re.compile(idents["process_id"]),
+        tool_name_re=re.compile(idents["tool_name"]),
+        phrases={k: tuple(sorted(v, key=len, reverse=True)) for k, v in phrases.items()},
+    )
+
+
+@dataclass(frozen=True)
+class ErrorInfo:
+    """An entry of the AG-* error catalog."""
+
+    code: str
+    name: str
+    desc: str
+    severity: Literal["error", "warning"]
+
+
+class SpecTable:
+    """Read-only view over a precompiled spec atoms table."""
+
+    def __init__(self, buf: bytes | mmap.mmap) -> None:
+        magic, fmt, count, revision = _HEADER.unpack_from(buf, 0)
+        if magic != BIN_MAGIC or fmt != BIN_FORMAT:
+            raise ValueError(f"Unsupported spec atoms table (magic={magic!r}, format={fmt})")
+        self._buf = buf
+        self.revision = revision.hex()
+        self._dir: dict[bytes, tuple[int, int]] = {}
+        for i in range(count):
+            tag, offset, n = _DIR_ENTRY.unpack_from(buf, _HEADER.size + i * _DIR_ENTRY.size)
+            self._dir[tag] = (offset, n)
+        self._pool = self._dir[b"STRS"][0]
+
+    def _str(self, offset: int, length: int) -> str:
+        start = self._pool + offset
+        return sys.intern(bytes(self._buf[start : start + length]).decode("utf-8"))
+
+    def _strings(self, tag: bytes) -> tuple[str, ...]:
+        offset, n = self._dir[tag]
+        return tuple(
+            self._str(*_STR_REC.unpack_from(self._buf, offset + i * _STR_REC.size)) for i in range(n)
+        )
+
+    def _error_at(self, index: int) -> ErrorInfo:
+        offset = self._dir[b"ERRS"][0] + index * _ERR_REC.size
+        c_off, c_len, n_off, n_len, d_off, d_len, warn = _ERR_REC.unpack_from(self._buf, offset)
+        return ErrorInfo(
+            code=self._str(c_off, c_len),
+            name=self._str(n_off, n_len),
+            desc=self._str(d_off, d_len),
+            severity="warning" if warn else "error",
+        )
+
+    def error(self, code: str) -> Optional[ErrorInfo]:
+        """Look up an AG-* code by binary search over the sorted error records."""
+        lo, hi = 0, self._dir[b"ERRS"][1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            info = self._error_at(mid)
+            if info.code == code:
+                return info
+            if info.code < code:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    @cached_property
+    def errors(self) -> tuple[ErrorInfo, ...]:
+        """All catalog entries, sorted by code."""
+        return tuple(self._error_at(i) for i in range(self._dir[b"ERRS"][1]))
+
+    @cached_property
+    def section_order(self) -> tuple[str, ...]:
+        return self._strings(b"SECT")
+
+    @cached_property
+    def executable_sections(self) -> frozenset[str]:
+        return frozenset(self._strings(b"EXEC"))
+
+    @cached_property
+    def tokens(self) -> TokenCatalog:
+        offset, n = self._dir[b"IDNT"]
+        identifiers = {}
+        for i in range(n):
+            k_off, k_len, v_off, v_len = _PAIR_REC.unpack_from(self._buf, offset + i * _PAIR_REC.size)
+            identifiers[self._str(k_off, k_len)] = self._str(v_off, v_len)
+        return compile_token_catalog(
+            {
+                "keywords": {
+                    "all": list(self._strings(b"KWDS")),
+                    "modifiers": list(self._strings(b"MODS")),
+                },
+                "reserved": list(self._strings(b"RSVD")),
+                "identifiers": identifiers,
+            }
+        )
+
+
+def spec_dir(skill_dir: Optional[Path] = None) -> Path:
+    """Return the `spec/` directory of the given (or bundled) skill."""
+    return (skill_dir or resolve_payload_skill_dir()) / "spec"
+
+
+_TABLES_BY_REVISION: dict[str, SpecTable] = {}
+
+
+@lru_cache(maxsize=None)
+def load_spec_table(skill_dir: Optional[Path] = None) -> SpecTable:
+    """Memory-map the spec atoms table, reusing an already-loaded table of the same revision."""
+    path = spec_dir(skill_dir) / TABLE_FILE
+    with path.open("rb") as fh:
+        buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    revision = _HEADER.unpack_from(buf, 0)[3].hex()
+    cached = _TABLES_BY_REVISION.get(revision)
+    if cached is not None:
+        buf.close()
+        return cached
+    table = SpecTable(buf)
+    _TABLES_BY_REVISION[revision] = table
+    return table
+
+
+def load_token_catalog(skill_dir: Optional[Path] = None) -> TokenCatalog:
+    """Return the compiled token catalog (decoded once per spec revision)."""
+    return load_spec_table(skill_dir).tokens
+
+
+def load_token_catalog_json(skill_dir: Optional[Path] = None) -> TokenCatalog:
+    """Compile the token catalog from the human-readable JSON atoms (slow path)."""
+    path = spec_dir(skill_dir) / TOKENS_FILE
+    return compile_token_catalog(json.loads(path.read_text(encoding="utf-8")))
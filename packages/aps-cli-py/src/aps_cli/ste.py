@@ -0,0 +1,131 @@
+"""Simplified Technical English checks for `ste="true"` text (AG-021).
+
+The approved-word dictionary ships with the spec atoms (`aps-v1.0.ste-words.txt`, one
+lowercase base form per line) and is loaded lazily into a frozen set, once per process.
+Each line is tokenized by a single regex pass; every word costs one set lookup (plus a
+few suffix strips for inflected forms, memoized), so checking is linear in the text.
+
+Only prose words are checked: code spans, quoted strings, `<PLACEHOLDER>`s, ALL-CAPS
+symbols and normative terms, capitalized names and tokens containing digits or
+punctuation (paths, ids, numbers) are exempt but still count towards sentence length.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .spec import SPEC_VERSION, spec_dir
+
+WORDS_FILE = f"aps-v{SPEC_VERSION}.ste-words.txt"
+
+# `sentence_limits.procedures` in references/01-vocabulary.md (one directive per line).
+MAX_WORDS = 20
+
+# One token per match: backticked code, a double-quoted literal, a plain word in optional
+# punctuation (`word` group), or any other run of non-space characters.
+TOKEN_RE = re.compile(
+    r'`[^`]*`?|"[^"]*"?'
+    r"|[(\[{']*(?P<word>[A-Za-z]+(?:-[A-Za-z]+)*)[.,;:!?)\]}']*(?![^\s`\"])"
+    r'|[^\s`"]+'
+)
+LIST_MARKER_RE = re.compile(r"\s*(?:[-*+]|[0-9]{1,3}[.)])\s+")
+
+# (suffix to strip, text to append) for regular inflections, tried in order.
+_INFLECTIONS: tuple[tuple[str, str], ...] = (
+    ("ies", "y"),
+    ("ied", "y"),
+    ("es", ""),
+    ("s", ""),
+    ("ed", ""),
+    ("d", ""),
+    ("est", ""),
+    ("st", ""),
+    ("er", ""),
+    ("r", ""),
+)
+
+
+@dataclass(frozen=True)
+class SteFinding:
+    """An STE problem on one line (0-based column)."""
+
+    column: int
+    length: int
+    message: str
+
+
+class SteChecker:
+    """Approved-word and sentence-length checks over single lines."""
+
+    def __init__(self, words: frozenset[str], max_words: int = MAX_WORDS) -> None:
+        self.words = words
+        self.max_words = max_words
+        self._approved: dict[str, bool] = {}
+
+    def approved(self, word: str) -> bool:
+        """Check a lowercase word (or a regular inflection of one) against the dictionary."""
+        known = self._approved.get(word)
+        if known is None:
+            known = self._approved[word] = all(self._lookup(part) for part in word.split("-"))
+        return known
+
+    def _lookup(self, word: str) -> bool:
+        if word in self.words:
+            return True
+        for suffix, repl in _INFLECTIONS:
+            if word.endswith(suffix) and len(word) > len(suffix) + 1:
+                stem = word[: -len(suffix)]
+                if stem + repl in self.words:
+                    return True
+                # stopped -> stop, bigger -> big
+                if suffix in ("ed", "er", "est") and len(stem) > 2 and stem[-1] == stem[-2]:
+                    if stem[:-1] in self.words:
+                        return True
+        return False
+
+    def check_line(self, line: str) -> Iterator[SteFinding]:
+        """Yield findings for one instruction line."""
+        marker = LIST_MARKER_RE.match(line)
+        start = marker.end() if marker else 0
+        approved = self._approved
+        count = 0
+        for m in TOKEN_RE.finditer(line, start):
+            count += 1
+            word = m.group("word")
+            if word is None:
+                continue
+            if not word.islower():
+                if count > 1 or not word.istitle():
+                    continue  # names, symbols, acronyms
+                word = word.lower()
+            ok = approved.get(word)
+            if ok is None:
+                ok = self.approved(word)
+            if not ok:
+                token = m.group("word")
+                yield SteFinding(m.start("word"), len(token), f"'{token}' is not an approved STE word.")
+        if count > self.max_words:
+            end = len(line.rstrip())
+            yield SteFinding(
+                start,
+                max(1, end - start),
+                f"Instruction has {count} words; STE allows at most {self.max_words}.",
+            )
+
+
+def parse_words(text: str) -> frozenset[str]:
+    """Parse a dictionary file (one word per line, `#` comments)."""
+    return frozenset(
+        line.strip().lower() for line in text.splitlines() if line.strip() and not line.startswith("#")
+    )
+
+
+@lru_cache(maxsize=None)
+def load_ste_checker(skill_dir: Optional[Path] = None) -> SteChecker:
+    """The checker for the bundled (or given skill's) dictionary, loaded on first use."""
+    path = spec_dir(skill_dir) / WORDS_FILE
+    return SteChecker(parse_words(path.read_text(encoding="utf-8")))
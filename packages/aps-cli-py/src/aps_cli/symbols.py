@@ -0,0 +1,431 @@
+"""Scope-aware symbol resolution for process bodies (AG-001, AG-013, AG-023).
+
+Scopes follow references/03-agentic-control.md:
+
+- `<constants>`, `<runtime>` and `<format id>` names are document globals.
+- `SET`/`CAPTURE` bind at process scope from that statement on (`UNSET` removes the
+  binding); a `RUN` of a process in the same document binds the symbols it `RETURN`s.
+- Block statements (`WITH`, `FOREACH`, `TRY`, `RECOVER`, `PAR`, `JOIN`, `IF`, ...) open a
+  nested scope that ends at the first statement indented no deeper than the opener.
+  `FOREACH` binds its loop variable and `_INDEX`, `RECOVER` its error variable, and
+  `WITH` its defaults, which shadow those of enclosing `WITH` blocks.
+
+Process-scope bindings live in one plain dict (`UNSET` stores a None tombstone), so a
+lookup is O(1) however many `SET`s precede it. Only the short-lived block scopes are
+`ScopedMap`s: persistent maps where binding a name is O(1) and returns a new map sharing
+the old one, so entering a block is keeping a reference and leaving it is dropping back
+to the saved one, with no dict copying. Their chains hold only block bindings (loop and
+error variables, `WITH` defaults), so they stay as short as the nesting.
+`SymbolTable.resolve` caches one `ProcessScope` per process, so every rule reading it
+shares a single analysis. A table built with the `previous` table of an earlier version of
+the document (the LSP re-lints on every edit) carries over the scopes of processes whose
+text and position are unchanged, as long as the globals and the RETURN exports of every
+process are unchanged too; only edited processes are resolved again.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field, replace
+from typing import Any, Iterator, Mapping, Optional
+
+from .jsonvalue import NUMBER_RE, JsonValueError, parse_json_value
+from .parser import SET_RE, WITH_RE, Document, Ident, Process, Statement, code_spans, split_top_level
+
+# UpperSym tokens in value text; placeholders (`<X>`) and longer words are excluded.
+SYMBOL_TOKEN_RE = re.compile(r"(?<![A-Za-z0-9_<-])[A-Z0-9_]{2,24}(?![A-Za-z0-9_>-])")
+ENUM_RE = re.compile(r"enum\([^)]*\)")
+WHY_RE = re.compile(r"\bwhy:([A-Z0-9_]{2,24})\b")
+JSON_KEY_RE = re.compile(r"^[a-z][a-z0-9_-]*$")
+
+BLOCK_KEYWORDS = frozenset(
+    {"WITH", "PAR", "JOIN", "TRY", "FOREACH", "RECOVER"}
+    | {"IF", "ELSE IF", "ELSE", "GIVEN", "WHEN", "THEN"}
+)
+# Origins that may not be rebound by SET/CAPTURE.
+READ_ONLY = frozenset({"constant", "format"})
+INDEX_SYMBOL = "_INDEX"
+# `SET ... (from SOURCE)` sources that are not symbols.
+SET_SOURCES = frozenset({"INP", "Agent Inference"})
+
+
+@dataclass(frozen=True)
+class Binding:
+    """Where a name was bound and by what (`constant`, `set`, `loop`, ...)."""
+
+    name: str
+    kind: str
+    line: int
+    column: int
+
+
+class ScopedMap:
+    """Persistent name -> value map: `bind` is O(1) and never mutates `self`.
+
+    Lookups walk the (short) chain of local bindings, then consult the root mapping.
+    Binding a name to None hides outer bindings (used for `UNSET`).
+    """
+
+    __slots__ = ("_key", "_value", "_parent", "_root")
+
+    def __init__(self, root: Optional[Mapping[str, Any]] = None) -> None:
+        self._key: Optional[str] = None
+        self._value: Any = None
+        self._parent: Optional[ScopedMap] = None
+        self._root: Mapping[str, Any] = root or {}
+
+    def bind(self, key: str, value: Any) -> "ScopedMap":
+        node = ScopedMap.__new__(ScopedMap)
+        node._key, node._value, node._parent, node._root = key, value, self, self._root
+        return node
+
+    def get(self, key: str) -> Any:
+        node: Optional[ScopedMap] = self
+        while node is not None and node._key is not None:
+            if node._key == key:
+                return node._value
+            node = node._parent
+        return self._root.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def flatten(self) -> dict[str, Any]:
+        """Visible bindings as a plain dict (innermost wins)."""
+        out = {k: v for k, v in self._root.items() if v is not None}
+        chain = []
+        node: Optional[ScopedMap] = self
+        while node is not None and node._key is not None:
+            chain.append(node)
+            node = node._parent
+        for n in reversed(chain):
+            if n._value is None:
+                out.pop(n._key, None)  # type: ignore[arg-type]
+            else:
+                out[n._key] = n._value  # type: ignore[index]
+        return out
+
+
+@dataclass(frozen=True)
+class SymbolUse:
+    """An UpperSym reference and the binding it resolved to (None: undefined)."""
+
+    ident: Ident
+    line: int
+    binding: Optional[Binding]
+
+
+@dataclass(frozen=True)
+class ScopeIssue:
+    """A problem found while building scopes, reported by the lint rules."""
+
+    code: str
+    message: str
+    line: int
+    column: int
+    length: int = 1
+
+
+@dataclass
+class ProcessScope:
+    """Resolution results for one process body."""
+
+    process: Process
+    uses: list[SymbolUse] = field(default_factory=list)
+    issues: list[ScopeIssue] = field(default_factory=list)
+    # Effective WITH defaults for each RUN/USE/CAPTURE statement, keyed by statement line.
+    defaults: dict[int, dict[str, Any]] = field(default_factory=dict)
+    # Set once a RUN targets a process outside this document: its RETURNs are unknown.
+    open_world_from: Optional[int] = None
+
+    def undefined(self) -> Iterator[SymbolUse]:
+        """Uses that resolved to nothing (before any RUN with unknown exports)."""
+        for use in self.uses:
+            if use.binding is None and (self.open_world_from is None or use.line < self.open_world_from):
+                yield use
+
+
+def value_symbols(text: str, column: int) -> list[Ident]:
+    """UpperSym references in a `Value` (outside strings, placeholders and `enum(...)`)."""
+    out: list[Ident] = []
+    blanked = ENUM_RE.sub(lambda m: " " * len(m.group()), text)
+    for start, end in code_spans(blanked):
+        for m in SYMBOL_TOKEN_RE.finditer(blanked, start, end):
+            if not NUMBER_RE.fullmatch(m.group()):
+                out.append(Ident(m.group(), column + m.start()))
+    return out
+
+
+def _value_column(param: Any) -> int:
+    return param.end_column - len(param.value)
+
+
+def process_exports(proc: Process, symbol_re: re.Pattern[str]) -> tuple[str, ...]:
+    """Symbols a process makes visible to its callers via `RETURN: A, B`."""
+    names: list[str] = []
+    for stmt in proc.statements:
+        if stmt.keyword == "RETURN" and not stmt.params:
+            names += [s.name for s in stmt.symbols if symbol_re.match(s.name)]
+    return tuple(dict.fromkeys(names))
+
+
+class SymbolTable:
+    """Document globals plus lazily resolved, cached per-process scopes."""
+
+    def __init__(
+        self, document: Document, symbol_re: re.Pattern[str], previous: Optional[SymbolTable] = None
+    ) -> None:
+        self.document = document
+        self.symbol_re = symbol_re
+        self.globals: dict[str, Binding] = {}
+        self.issues: list[ScopeIssue] = []
+        for const in document.constants:
+            kind = "constant" if const.section == "constants" else "runtime"
+            self._define_global(Binding(const.name, kind, const.line, const.column))
+        for fmt in document.formats:
+            if fmt.id and "id" in fmt.attr_columns:
+                self._define_global(Binding(fmt.id, "format", fmt.line, fmt.attr_columns["id"]))
+        self.processes: dict[str, Process] = {}
+        for proc in document.processes:
+            self.processes.setdefault(proc.id, proc)
+        self._exports: dict[str, tuple[str, ...]] = {}
+        self._scopes: dict[int, ProcessScope] = {}
+        # Scopes of `previous` that may be carried over, by process id and line.
+        self._carried: dict[tuple[str, int], ProcessScope] = {}
+        if previous is not None and self._same_environment(previous):
+            self._carried = {(s.process.id, s.process.line): s for s in previous._scopes.values()}
+
+    def _same_environment(self, previous: SymbolTable) -> bool:
+        """Whether every process would resolve against `previous` exactly as against `self`."""
+        if previous.symbol_re != self.symbol_re or previous.globals != self.globals:
+            return False
+        if previous.processes.keys() != self.processes.keys():
+            return False
+        return all(
+            proc is previous.processes[pid] or self.exports(pid) == previous.exports(pid)
+            for pid, proc in self.processes.items()
+        )
+
+    def _define_global(self, binding: Binding) -> None:
+        previous = self.globals.get(binding.name)
+        if previous is None:
+            self.globals[binding.name] = binding
+            return
+        self.issues.append(
+            ScopeIssue(
+                "AG-013",
+                f"Symbol '{binding.name}' is already defined as a {previous.kind} "
+                f"at line {previous.line}.",
+                binding.line,
+                binding.column,
+                len(binding.name),
+            )
+        )
+
+    def exports(self, process_id: str) -> Optional[tuple[str, ...]]:
+        """RETURNed symbols of a process in this document (None if it is not defined here)."""
+        proc = self.processes.get(process_id)
+        if proc is None:
+            return None
+        if process_id not in self._exports:
+            self._exports[process_id] = process_exports(proc, self.symbol_re)
+        return self._exports[process_id]
+
+    def resolve(self, proc: Process) -> ProcessScope:
+        """Resolve every symbol use in `proc` (cached per process)."""
+        key = id(proc)
+        if key not in self._scopes:
+            carried = self._carried.get((proc.id, proc.line))
+            if carried is not None and carried.process is proc:
+                self._scopes[key] = carried
+            elif carried is not None and _scope_key(carried.process) == _scope_key(proc):
+                self._scopes[key] = replace(carried, process=proc)
+            else:
+                self._scopes[key] = _Resolver(self, proc).run()
+        return self._scopes[key]
+
+
+def _scope_key(proc: Process) -> tuple[object, ...]:
+    # Statements are compared by text, column and line: a scope records absolute lines.
+    return (
+        tuple(proc.attrs.items()),
+        tuple(proc.attr_columns.items()),
+        tuple((stmt.text, stmt.column, stmt.line) for stmt in proc.statements),
+    )
+
+
+@dataclass
+class _Block:
+    indent: int
+    names: ScopedMap
+    defaults: ScopedMap
+
+
+class _Resolver:
+    def __init__(self, table: SymbolTable, proc: Process) -> None:
+        self.table = table
+        self.scope = ProcessScope(process=proc)
+        # Process-scope symbols persist across blocks (None: UNSET, hides a global);
+        # block-scoped names are pushed/popped.
+        self.symbols: dict[str, Optional[Binding]] = {}
+        self.stack: list[_Block] = [_Block(-1, ScopedMap(), ScopedMap())]
+        self.args: dict[str, Binding] = {}
+
+    # --- helpers -------------------------------------------------------------------
+
+    def issue(self, code: str, message: str, line: int, column: int, length: int = 1) -> None:
+        self.scope.issues.append(ScopeIssue(code, message, line, column, length))
+
+    def lookup(self, name: str) -> Optional[Binding]:
+        found = self.stack[-1].names.get(name)
+        if found is not None:
+            return found
+        if name in self.symbols:
+            return self.symbols[name]
+        return self.table.globals.get(name)
+
+    def use(self, ident: Ident, line: int) -> None:
+        self.scope.uses.append(SymbolUse(ident, line, self.lookup(ident.name)))
+
+    def use_value(self, text: str, column: int, line: int) -> None:
+        for ident in value_symbols(text, column):
+            self.use(ident, line)
+
+    def define(self, ident: Ident, kind: str, line: int) -> None:
+        if not self.table.symbol_re.match(ident.name):
+            return
+        previous = self.lookup(ident.name)
+        if previous is not None and previous.kind in READ_ONLY:
+            self.issue(
+                "AG-013",
+                f"Symbol '{ident.name}' redefines the {previous.kind} from line {previous.line}.",
+                line,
+                ident.column,
+                len(ident.name),
+            )
+        self.symbols[ident.name] = Binding(ident.name, kind, line, ident.column)
+
+    def bind_block(self, ident: Ident, kind: str, line: int) -> None:
+        top = self.stack[-1]
+        previous = top.names.get(ident.name) or self.args.get(ident.name)
+        if previous is not None:
+            self.issue(
+                "AG-013",
+                f"'{ident.name}' shadows the {previous.kind} bound at line {previous.line}.",
+                line,
+                ident.column,
+                len(ident.name),
+            )
+        top.names = top.names.bind(ident.name, Binding(ident.name, kind, line, ident.column))
+
+    # --- walk ----------------------------------------------------------------------
+
+    def run(self) -> ProcessScope:
+        proc = self.scope.process
+        if "args" in proc.attrs:
+            base = proc.attr_columns["args"]
+            for part, offset in split_top_level(proc.attrs["args"]):
+                name = part.split(":", 1)[0].strip()
+                if name in self.args:
+                    message = f"Duplicate argument '{name}'."
+                    self.issue("AG-013", message, proc.line, base + offset, len(name))
+                self.args.setdefault(name, Binding(name, "arg", proc.line, base + offset))
+
+        statements = [s for s in proc.statements if not s.text.startswith("//")]
+        for idx, stmt in enumerate(statements):
+            while len(self.stack) > 1 and self.stack[-1].indent >= stmt.indent:
+                self.stack.pop()
+            self.visit(stmt)
+            # A WITH line is always a block opener, so a missing `:` is reported as AG-023.
+            opens = stmt.text.endswith(":") or stmt.keyword == "WITH"
+            if stmt.keyword in BLOCK_KEYWORDS and opens:
+                nxt = statements[idx + 1] if idx + 1 < len(statements) else None
+                self.open_block(stmt, nxt)
+        return self.scope
+
+    def visit(self, stmt: Statement) -> None:
+        kw, line = stmt.keyword, stmt.line
+        if kw in ("RUN", "USE", "CAPTURE"):
+            self.scope.defaults[line] = self.stack[-1].defaults.flatten()
+        if kw in ("RUN", "USE"):
+            for p in stmt.params:
+                self.use_value(p.value, _value_column(p), line)
+        if kw == "RUN" and stmt.target is not None:
+            exports = self.table.exports(stmt.target.name)
+            if exports is None:
+                if self.scope.open_world_from is None:
+                    self.scope.open_world_from = line + 1
+            else:
+                for name in exports:
+                    previous = self.lookup(name)
+                    if previous is None or previous.kind not in READ_ONLY:
+                        self.define(Ident(name, stmt.target.column), "run", line)
+        elif kw == "CAPTURE":
+            for sym in stmt.symbols:
+                self.define(sym, "capture", line)
+        elif kw == "SET" and (m := SET_RE.match(stmt.text)):
+            self.use_value(m.group("value"), stmt.column + m.start("value"), line)
+            src = m.group("src")
+            if src and src.strip() not in SET_SOURCES and self.table.symbol_re.match(src.strip()):
+                self.use(Ident(src.strip(), stmt.column + m.start("src")), line)
+            self.define(stmt.symbols[0], "set", line)
+        elif kw == "UNSET" and stmt.symbols:
+            self.use(stmt.symbols[0], line)
+            self.symbols[stmt.symbols[0].name] = None
+        elif kw == "RETURN":
+            for p in stmt.params:
+                self.use_value(p.value, _value_column(p), line)
+            for sym in stmt.symbols:
+                if self.table.symbol_re.match(sym.name):
+                    self.use(sym, line)
+        elif kw == "SNAP":
+            for sym in stmt.symbols:
+                self.use(sym, line)
+        elif kw == "FOREACH" and len(stmt.symbols) == 2:
+            self.use(stmt.symbols[1], line)
+        elif kw == "TELL":
+            for m in WHY_RE.finditer(stmt.text):
+                self.use(Ident(m.group(1), stmt.column + m.start(1)), line)
+
+    def open_block(self, stmt: Statement, nxt: Optional[Statement]) -> None:
+        top = self.stack[-1]
+        block = _Block(stmt.indent, top.names, top.defaults)
+        self.stack.append(block)
+        if stmt.keyword == "FOREACH" and stmt.symbols:
+            self.bind_block(stmt.symbols[0], "loop variable", stmt.line)
+            block.names = block.names.bind(
+                INDEX_SYMBOL, Binding(INDEX_SYMBOL, "index", stmt.line, stmt.column)
+            )
+        elif stmt.keyword == "RECOVER" and stmt.symbols:
+            self.bind_block(stmt.symbols[0], "error variable", stmt.line)
+        elif stmt.keyword == "WITH":
+            self.open_with(stmt, block, nxt)
+
+    def open_with(self, stmt: Statement, block: _Block, nxt: Optional[Statement]) -> None:
+        if nxt is None or nxt.indent <= stmt.indent:
+            self.issue(
+                "AG-023",
+                "WITH block has no indented body; its defaults would leak to following statements.",
+                stmt.line,
+                stmt.column,
+                len("WITH"),
+            )
+        m = WITH_RE.match(stmt.text)
+        if m is None:
+            message = "Malformed WITH block; expected WITH {defaults}:"
+            self.issue("AG-023", message, stmt.line, stmt.column, len(stmt.text))
+            return
+        column = stmt.column + m.start("defaults")
+        try:
+            defaults = parse_json_value(m.group("defaults"))
+        except JsonValueError as e:
+            self.issue("AG-023", f"Malformed WITH defaults: {e}.", stmt.line, column + e.offset)
+            return
+        if not isinstance(defaults, dict):
+            self.issue("AG-023", "WITH defaults must be a JSON object.", stmt.line, column)
+            return
+        self.use_value(m.group("defaults"), column, stmt.line)
+        for key, value in defaults.items():
+            if not JSON_KEY_RE.match(key):
+                self.issue("AG-023", f"WITH default key '{key}' must be lowercase.", stmt.line, column)
+            block.defaults = block.defaults.bind(key, value)
@@ -0,0 +1,275 @@
+"""Platform tool registries (`platforms/*/tools-registry.json`) compiled into lookup indexes.
+
+Each adapter names its tools in several spellings: a qualified id (`search/codebase`), a
+short name (`codebase`), a legacy name and a chat mention (`#codebase`). `ToolIndex`
+maps every spelling of every tool and tool set to its canonical id with plain dicts, so
+resolving a `USE` target or a `tools:` frontmatter entry is one hash lookup per platform.
+A spelling other than the preferred name resolves with a rename suggestion; unknown
+names get a close-match suggestion.
+
+The compiled index is cached under the APS cache directory and reused while the registry
+files are unchanged (same paths, sizes and modification times).
+"""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Literal, Optional
+
+from .core import atomic_write_text, default_cache_dir, resolve_payload_skill_dir
+from .frontmatter import Frontmatter
+from .parser import Document
+
+REGISTRY_FILE = "tools-registry.json"
+INDEX_VERSION = 1
+# Host-provided MCP tools are not listed in registries (`mcp__<server>__<tool>`).
+MCP_PREFIX = "mcp__"
+
+Status = Literal["ok", "renamed", "unknown"]
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """A tool reference resolved against one platform's registry."""
+
+    name: str
+    platform: str
+    # Canonical tool or tool-set id; None when the platform does not know the name.
+    tool: Optional[str] = None
+    # The name to write instead (preferred name of a legacy/short/mention spelling, or
+    # the closest known name of an unknown one).
+    suggestion: Optional[str] = None
+
+    @property
+    def status(self) -> Status:
+        if self.tool is None:
+            return "unknown"
+        return "ok" if self.suggestion is None else "renamed"
+
+
+@dataclass
+class PlatformTools:
+    """Hash indexes over one platform's tools and tool sets."""
+
+    platform: str
+    # Every accepted spelling -> canonical id.
+    names: dict[str, str] = field(default_factory=dict)
+    # Canonical id -> preferred name.
+    preferred: dict[str, str] = field(default_factory=dict)
+    # Tool-set id -> member tool ids.
+    sets: dict[str, tuple[str, ...]] = field(default_factory=dict)
+
+    @classmethod
+    def compile(cls, platform: str, registry: dict) -> "PlatformTools":
+        """Index a parsed `tools-registry.json`.
+
+        Spellings are claimed in priority order (ids and preferred names, then legacy
+        names and mentions, then short names), so a short name never shadows a real id.
+        """
+        index = cls(platform)
+        entries = [*registry.get("toolSets", []), *registry.get("tools", [])]
+        for entry in entries:
+            index.preferred[entry["id"]] = entry.get("preferredName") or entry["id"]
+        for entry in registry.get("toolSets", []):
+            index.sets[entry["id"]] = tuple(entry.get("tools", ()))
+
+        def claim(spelling: Optional[str], tool_id: str) -> None:
+            if spelling:
+                index.names.setdefault(spelling.lstrip("#"), tool_id)
+
+        for entry in entries:
+            claim(entry["id"], entry["id"])
+            claim(entry.get("preferredName"), entry["id"])
+        for entry in entries:
+            claim(entry.get("legacyName"), entry["id"])
+            claim(entry.get("mention"), entry["id"])
+        shorts: dict[str, list[str]] = {}
+        for entry in entries:
+            if "/" in entry["id"]:
+                shorts.setdefault(entry["id"].rsplit("/", 1)[1], []).append(entry["id"])
+        for short, ids in shorts.items():
+            if len(ids) == 1:
+                claim(short, ids[0])
+        return index
+
+    def resolve(self, name: str) -> Resolution:
+        """Resolve one reference (with or without a leading `#`)."""
+        key = name.lstrip("#")
+        tool = self.names.get(key)
+        if tool is not None:
+            preferred = self.preferred.get(tool, tool)
+            return Resolution(name, self.platform, tool, None if key == preferred else preferred)
+        if key.startswith(MCP_PREFIX):
+            return Resolution(name, self.platform, key)
+        close = difflib.get_close_matches(key, list(self.preferred.values()), n=1)
+        return Resolution(name, self.platform, None, close[0] if close else None)
+
+    def expand(self, name: str) -> tuple[str, ...]:
+        """The tool ids a reference grants: a tool set's members, or the tool itself."""
+        tool = self.names.get(name.lstrip("#"))
+        if tool is None:
+            return ()
+        return self.sets.get(tool, (tool,))
+
+    def to_dict(self) -> dict:
+        return {
+            "names": self.names,
+            "preferred": self.preferred,
+            "sets": {k: list(v) for k, v in self.sets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, platform: str, data: dict) -> "PlatformTools":
+        return cls(
+            platform,
+            names=dict(data["names"]),
+            preferred=dict(data["preferred"]),
+            sets={k: tuple(v) for k, v in data["sets"].items()},
+        )
+
+
+@dataclass
+class ToolIndex:
+    """Compiled tool registries of every platform, keyed by platform id."""
+
+    platforms: dict[str, PlatformTools] = field(default_factory=dict)
+
+    def resolve(self, name: str, platforms: Optional[list[str]] = None) -> list[Resolution]:
+        """Resolve a reference on each selected platform that ships a non-empty registry.
+
+        Raises:
+            KeyError: A selected platform has no registry.
+        """
+        selected = self.platforms.keys() if platforms is None else platforms
+        return [
+            self.platforms[pid].resolve(name)
+            for pid in selected
+            if self.platforms[pid].names
+        ]
+
+
+def registry_files(skill_dir: Path) -> dict[str, Path]:
+    """Platform id -> registry file (`_`-prefixed directories are skipped)."""
+    found = {}
+    for path in sorted((skill_dir / "platforms").glob(f"*/{REGISTRY_FILE}")):
+        if not path.parent.name.startswith("_"):
+            found[path.parent.name] = path
+    return found
+
+
+def _signature(files: dict[str, Path]) -> list[list]:
+    out = []
+    for pid, path in files.items():
+        st = path.stat()
+        out.append([pid, str(path.resolve()), st.st_size, st.st_mtime_ns])
+    return out
+
+
+def compile_index(files: dict[str, Path]) -> ToolIndex:
+    """Parse and index registry files.
+
+    Raises:
+        ValueError: A registry is not valid JSON or lacks tool ids.
+    """
+    index = ToolIndex()
+    for pid, path in files.items():
+        try:
+            registry = json.loads(path.read_text(encoding="utf-8"))
+            platform = registry.get("platformId") or pid
+            index.platforms[platform] = PlatformTools.compile(platform, registry)
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"{path}: malformed tool registry ({e})") from None
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from None
+    return index
+
+
+def default_index_path(skill_dir: Path) -> Path:
+    """Per-skill-directory index location under the APS cache directory."""
+    digest = hashlib.sha256(str(skill_dir.resolve()).encode("utf-8")).hexdigest()[:16]
+    return default_cache_dir() / "tools" / f"index-{digest}.json"
+
+
+def load_tool_index(skill_dir: Optional[Path] = None, cache_path: Optional[Path] = None) -> ToolIndex:
+    """Load the compiled index, rebuilding (and re-caching) it when a registry changed.
+
+    A missing, corrupt or outdated cache file is ignored; an unwritable cache directory
+    only costs the rebuild on the next run.
+
+    Args:
+        skill_dir: Skill directory holding `platforms/` (defaults to the bundled payload).
+        cache_path: Cache file (defaults to `default_index_path(skill_dir)`).
+
+    Raises:
+        ValueError: A registry file is malformed.
+    """
+    skill_dir = skill_dir or resolve_payload_skill_dir()
+    cache_path = cache_path or default_index_path(skill_dir)
+    files = registry_files(skill_dir)
+    signature = _signature(files)
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        if data.get("version") == INDEX_VERSION and data.get("registries") == signature:
+            return ToolIndex(
+                {pid: PlatformTools.from_dict(pid, v) for pid, v in data["platforms"].items()}
+            )
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+    index = compile_index(files)
+    data = {
+        "version": INDEX_VERSION,
+        "registries": signature,
+        "platforms": {pid: index.platforms[pid].to_dict() for pid in sorted(index.platforms)},
+    }
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(cache_path, json.dumps(data, separators=(",", ":")) + "\n")
+    except OSError:
+        pass
+    return index
+
+
+@dataclass(frozen=True)
+class ToolReference:
+    """A `USE`/`CAPTURE` tool target in a prompt (1-based position of the name)."""
+
+    name: str
+    line: int
+    column: int
+
+
+def document_tool_references(doc: Document) -> Iterator[ToolReference]:
+    """Backticked `USE`/`CAPTURE` targets of a parsed prompt, in document order."""
+    for proc in doc.processes:
+        for stmt in proc.statements:
+            if stmt.keyword in ("USE", "CAPTURE") and stmt.target is not None:
+                yield ToolReference(stmt.target.name, stmt.line, stmt.target.column)
+
+
+def frontmatter_tool_references(fm: Frontmatter) -> Iterator[ToolReference]:
+    """Entries of the `tools:` frontmatter key (a list, or a comma-separated string)."""
+    tools = (fm.data or {}).get("tools")
+    if isinstance(tools, str):
+        names = [t.strip() for t in tools.split(",")]
+    elif isinstance(tools, list):
+        names = [t for t in tools if isinstance(t, str)]
+    else:
+        return
+    first = fm.key_lines.get("tools", 2)
+    end = min((line for line in fm.key_lines.values() if line > first), default=len(fm.lines) + 2)
+    for name in names:
+        if not name:
+            continue
+        # Header line i is file line i + 2; point at the entry when it is found verbatim.
+        line, column = first, 1
+        for i in range(first - 2, end - 2):
+            pos = fm.lines[i].find(name, fm.lines[i].index(":") + 1 if i == first - 2 else 0)
+            if pos >= 0:
+                line, column = i + 2, pos + 1
+                break
+        yield ToolReference(name, line, column)
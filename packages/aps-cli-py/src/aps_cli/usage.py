@@ -0,0 +1,210 @@
+"""Defined-but-unused constants, formats and processes (AG-W01).
+
+Every definition gets a dense integer id; uses set bits in a Python int bitmap, so the
+unused set is `defined & ~used`, one bit operation however large the document. Uses are
+collected in a single scan of the document text:
+
+- a `<constants>` name is used by any other occurrence of its UpperSym token (process
+  bodies, other constants, instructions prose);
+- a format is used by a `format:<ID>` reference or a `format="<ID>"` statement parameter
+  (`RETURN: format="<ID>", ...`);
+- a process is used by a `RUN` or a `<trigger target>`. Documents without triggers are
+  libraries or single entry points, so their processes are never reported.
+
+`<runtime>` values are supplied by the host and are not reported. Formats and processes
+can be shared between files: in workspace mode `drop_shared_uses` removes findings for
+definitions that any checked file uses, matched by kind and name.
+
+Tokens never span lines, so an editor can pass a `line_refs` cache that persists across
+edits: the scan then goes line by line and only reads lines it has not seen before.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .diagnostics import Diagnostic
+from .parser import FORMAT_REF_RE, Document, parse_document
+from .spec import load_token_catalog
+from .symbols import SYMBOL_TOKEN_RE
+
+# Definition kinds that may be used from other files.
+SHARED_KINDS = frozenset({"format", "process"})
+
+# Line text -> (UpperSym tokens, `format:` reference ids) on that line.
+LineRefsCache = dict[str, tuple[frozenset[str], frozenset[str]]]
+
+
+@dataclass(frozen=True)
+class Definition:
+    """A reportable definition and the position of its name."""
+
+    kind: str
+    name: str
+    line: int
+    column: int
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Indexes of the set bits of `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _line_references(
+    lines: list[str], definition_starts: dict[int, int], line_refs: LineRefsCache
+) -> tuple[set[str], set[str]]:
+    """UpperSym tokens and `format:` ids of `lines`, scanning only lines not in `line_refs`."""
+    if len(line_refs) > 2 * len(lines):
+        line_refs.clear()  # mostly lines of earlier versions
+    found = list(map(line_refs.get, lines))
+    for i in [i for i, refs in enumerate(found) if refs is None]:
+        line = lines[i]
+        found[i] = line_refs[line] = (
+            frozenset(SYMBOL_TOKEN_RE.findall(line)),
+            frozenset(FORMAT_REF_RE.findall(line)),
+        )
+    for lineno, start in definition_starts.items():
+        line = lines[lineno - 1]
+        tokens = (m.group() for m in SYMBOL_TOKEN_RE.finditer(line) if m.start() != start)
+        found[lineno - 1] = (frozenset(tokens), found[lineno - 1][1])
+    return set().union(*map(itemgetter(0), found)), set().union(*map(itemgetter(1), found))
+
+
+@dataclass
+class UsageIndex:
+    """Definitions of one document and the bitmap of those it uses."""
+
+    path: Optional[str] = None
+    definitions: list[Definition] = field(default_factory=list)
+    ids: dict[tuple[str, str], int] = field(default_factory=dict)
+    used: int = 0
+    # Uses of shared kinds (`format:ID`, `process:ID`), defined here or not.
+    references: set[str] = field(default_factory=set)
+    # Whether unused processes are reportable (the document declares entry points).
+    has_triggers: bool = False
+
+    @classmethod
+    def from_document(cls, doc: Document, line_refs: Optional[LineRefsCache] = None) -> "UsageIndex":
+        """Index `doc`; `line_refs` memoizes each line's references across calls."""
+        index = cls(path=doc.path, has_triggers=bool(doc.triggers))
+        # 0-based start of the defining token on each constant's line.
+        definition_starts: dict[int, int] = {}
+        constants: set[str] = set()
+        for const in doc.constants:
+            if const.section == "constants":
+                index._define("constant", const.name, const.line, const.column)
+                definition_starts[const.line] = const.column - 1
+                constants.add(const.name)
+        for fmt in doc.formats:
+            if fmt.id:
+                index._define("format", fmt.id, fmt.line, fmt.attr_columns.get("id", 1))
+        for proc in doc.processes:
+            if proc.id:
+                index._define("process", proc.id, proc.line, proc.attr_columns.get("id", 1))
+
+        if line_refs is None:
+            offsets = {doc.source_map.offset(line, start + 1) for line, start in definition_starts.items()}
+            tokens = {m.group() for m in SYMBOL_TOKEN_RE.finditer(doc.text) if m.start() not in offsets}
+            formats = set(FORMAT_REF_RE.findall(doc.text))
+        else:
+            tokens, formats = _line_references(doc.lines, definition_starts, line_refs)
+        for name in tokens & constants:
+            index._use("constant", name)
+        for name in formats:
+            index._use("format", name)
+        for proc in doc.processes:
+            for stmt in proc.statements:
+                if stmt.keyword == "RUN" and stmt.target is not None:
+                    index._use("process", stmt.target.name)
+                for param in stmt.params:
+                    if param.key == "format":
+                        index._use("format", param.value.strip('"'))
+        for trigger in doc.triggers:
+            if "target" in trigger.attrs:
+                index._use("process", trigger.attrs["target"])
+        return index
+
+    def _define(self, kind: str, name: str, line: int, column: int) -> None:
+        key = (kind, name)
+        if key not in self.ids:  # duplicates are AG-013, reported elsewhere
+            self.ids[key] = len(self.definitions)
+            self.definitions.append(Definition(kind, name, line, column))
+
+    def _use(self, kind: str, name: str) -> None:
+        if kind in SHARED_KINDS:
+            self.references.add(f"{kind}:{name}")
+        i = self.ids.get((kind, name))
+        if i is not None:
+            self.used |= 1 << i
+
+    def reportable(self) -> int:
+        """Bitmap of definitions that may be reported as unused."""
+        mask = (1 << len(self.definitions)) - 1
+        if not self.has_triggers:
+            for i, d in enumerate(self.definitions):
+                if d.kind == "process":
+                    mask &= ~(1 << i)
+        return mask
+
+    def unused(self) -> list[Definition]:
+        """Definitions nothing in this document uses, in definition order."""
+        mask = self.reportable() & ~self.used
+        return [self.definitions[i] for i in iter_bits(mask)]
+
+
+    def shared_definitions(self) -> dict[tuple[int, int], str]:
+        """Name positions of this document's formats/processes -> `kind:name`."""
+        return {
+            (d.line, d.column): f"{d.kind}:{d.name}"
+            for d in self.definitions
+            if d.kind in SHARED_KINDS
+        }
+
+
+@dataclass
+class WorkspaceUsage:
+    """Shared-kind uses of every checked file and where each file defines shared names."""
+
+    references: set[str] = field(default_factory=set)
+    # file -> {(line, column) of a format/process name: `kind:name`}
+    definitions: dict[Optional[str], dict[tuple[int, int], str]] = field(default_factory=dict)
+
+    def add(self, index: UsageIndex) -> None:
+        self.references |= index.references
+        self.definitions[index.path] = index.shared_definitions()
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[Path]) -> "WorkspaceUsage":
+        """Index every readable file in `paths`."""
+        tokens = load_token_catalog()
+        usage = cls()
+        for path in paths:
+            try:
+                text = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+            usage.add(UsageIndex.from_document(parse_document(text, str(path), tokens)))
+        return usage
+
+
+def drop_shared_uses(diagnostics: list[Diagnostic], usage: WorkspaceUsage) -> list[Diagnostic]:
+    """Remove AG-W01 findings for formats/processes another file uses.
+
+    A finding is matched to its definition by file and position, so this also works on
+    diagnostics replayed from a cache, and never drops an unused constant that merely
+    shares its name with a used format or process.
+    """
+    out = []
+    for d in diagnostics:
+        if d.code == "AG-W01":
+            key = usage.definitions.get(d.file, {}).get((d.line, d.column))
+            if key is not None and key in usage.references:
+                continue
+        out.append(d)
+    return out
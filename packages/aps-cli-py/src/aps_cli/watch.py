@@ -0,0 +1,200 @@
+"""`aps lint --watch`: a warm document store re-linted on save.
+
+The token catalog and rule registry are loaded once. Files are polled by
+`(mtime_ns, size)` stamp (stdlib only, works on every platform and on network
+filesystems); a burst of saves is debounced until the stamps stop changing, and only
+files whose stamp moved are re-read and re-analyzed. Like `aps lsp`, each file keeps
+its parsed `Document`, statement memo and `ProcessLintCache`, so a save re-parses only
+edited statements and re-runs process rules only for edited processes.
+
+A poll stats only the known targets and the directories they were found in. The
+workspace is scanned again when one of those directories changes (an entry was
+added, removed or renamed) and otherwise every `DEFAULT_RESCAN` seconds, which also
+picks up files in directories that held no target yet.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from .diagnostics import Diagnostic
+from .lint import ProcessLintCache, collect_lint_targets, lint_document
+from .parser import Document, StatementCache, parse_document
+from .spec import TokenCatalog, load_token_catalog
+
+Stamp = tuple[int, int]
+Scanner = Callable[[], list[Path]]
+
+DEFAULT_INTERVAL = 0.1
+DEFAULT_DEBOUNCE = 0.05
+DEFAULT_RESCAN = 2.0
+
+
+@dataclass
+class WatchedFile:
+    """Store entry for one file."""
+
+    stamp: Stamp
+    document: Document
+    diagnostics: list[Diagnostic]
+    statements: StatementCache = field(default_factory=dict)
+    lint_cache: ProcessLintCache = field(default_factory=ProcessLintCache)
+
+
+@dataclass
+class WatchUpdate:
+    """Result of one re-analysis pass."""
+
+    changed: list[Path] = field(default_factory=list)
+    removed: list[Path] = field(default_factory=list)
+    errors: list[tuple[Path, str]] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+def convention_scanner(root: Path, globs: list[str]) -> Scanner:
+    """Scanner over workspace files matching platform `fileConventions` globs."""
+
+    def scan() -> list[Path]:
+        seen: dict[Path, None] = {}
+        for pattern in globs:
+            for path in sorted(root.glob(pattern)):
+                if path.is_file():
+                    seen.setdefault(path, None)
+        return list(seen)
+
+    return scan
+
+
+def paths_scanner(paths: list[Path]) -> Scanner:
+    """Scanner over explicit files/directories (same expansion as `aps lint`)."""
+    return lambda: collect_lint_targets(paths)
+
+
+def _mtime(directory: Path) -> int:
+    try:
+        return directory.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+class LintWatcher:
+    """Keeps parsed documents and diagnostics in memory, refreshing changed files only."""
+
+    def __init__(
+        self, scan: Scanner, tokens: Optional[TokenCatalog] = None, rescan: float = DEFAULT_RESCAN
+    ) -> None:
+        self.scan = scan
+        self.tokens = tokens or load_token_catalog()
+        self.rescan = rescan
+        self.files: dict[Path, WatchedFile] = {}
+        # Unreadable files, remembered so they are retried only when they change again.
+        self.failed: dict[Path, Stamp] = {}
+        # Result of the last scan, and the mtime of each directory a target was found in.
+        self.targets: list[Path] = []
+        self.directories: dict[Path, int] = {}
+        self._scanned_at: Optional[float] = None
+
+    def _scan(self) -> None:
+        self.targets = self.scan()
+        self.directories = {d: _mtime(d) for d in dict.fromkeys(p.parent for p in self.targets)}
+        self._scanned_at = time.monotonic()
+
+    def _needs_scan(self) -> bool:
+        if self._scanned_at is None or time.monotonic() - self._scanned_at >= self.rescan:
+            return True
+        return any(_mtime(d) != mtime for d, mtime in self.directories.items())
+
+    def stamps(self) -> dict[Path, Stamp]:
+        """Stamps of the current targets; the workspace is scanned only when needed."""
+        if self._needs_scan():
+            self._scan()
+        out: dict[Path, Stamp] = {}
+        for path in self.targets:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            out[path] = (st.st_mtime_ns, st.st_size)
+        return out
+
+    def _known(self, path: Path) -> Optional[Stamp]:
+        entry = self.files.get(path)
+        return entry.stamp if entry is not None else self.failed.get(path)
+
+    def is_stale(self, stamps: dict[Path, Stamp]) -> bool:
+        if len(stamps) != len(self.files) + len(self.failed):
+            return True
+        return any(self._known(p) != s for p, s in stamps.items())
+
+    def refresh(self, stamps: Optional[dict[Path, Stamp]] = None) -> WatchUpdate:
+        """Re-analyze files whose stamp changed and drop files that disappeared."""
+        start = time.perf_counter()
+        stamps = self.stamps() if stamps is None else stamps
+        update = WatchUpdate()
+
+        for path in [p for p in self.files if p not in stamps]:
+            del self.files[path]
+            update.removed.append(path)
+        for path in [p for p in self.failed if p not in stamps]:
+            del self.failed[path]
+
+        for path, stamp in stamps.items():
+            if self._known(path) == stamp:
+                continue
+            try:
+                text = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                self.files.pop(path, None)
+                self.failed[path] = stamp
+                update.errors.append((path, str(e)))
+                continue
+            self.failed.pop(path, None)
+            self._analyze(path, stamp, text)
+            update.changed.append(path)
+
+        update.elapsed_ms = (time.perf_counter() - start) * 1000
+        return update
+
+    def _analyze(self, path: Path, stamp: Stamp, text: str) -> None:
+        entry = self.files.get(path)
+        statements = entry.statements if entry is not None else {}
+        lint_cache = entry.lint_cache if entry is not None else ProcessLintCache()
+        doc = parse_document(text, path=str(path), tokens=self.tokens, statement_cache=statements)
+        # Keep the memo bounded to the statements currently in the file.
+        statements = {(s.text, s.column): s for p in doc.processes for s in p.statements}
+        diagnostics = lint_document(doc, self.tokens, lint_cache)
+        self.files[path] = WatchedFile(stamp, doc, diagnostics, statements, lint_cache)
+
+    def diagnostics(self, paths: Optional[list[Path]] = None) -> list[Diagnostic]:
+        """Current diagnostics for `paths` (default: every watched file)."""
+        keys = self.files.keys() if paths is None else paths
+        return [d for p in keys if p in self.files for d in self.files[p].diagnostics]
+
+    def run(
+        self,
+        on_update: Callable[[WatchUpdate], None],
+        interval: float = DEFAULT_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+        stop: Callable[[], bool] = lambda: False,
+    ) -> None:
+        """Analyze everything once, then poll until `stop()` returns True.
+
+        A change is processed once the stamps have been stable for `debounce` seconds,
+        so editors that write a file in several steps trigger a single pass.
+        """
+        on_update(self.refresh())
+        while not stop():
+            time.sleep(interval)
+            stamps = self.stamps()
+            if not self.is_stale(stamps):
+                continue
+            while True:
+                time.sleep(debounce)
+                settled = self.stamps()
+                if settled == stamps:
+                    break
+                stamps = settled
+            on_update(self.refresh(stamps))
@@ -0,0 +1,95 @@
+"""Tests for lint baselines."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli.baseline import Baseline, file_fingerprints, logical_locations
+from aps_cli.cli import app
+from aps_cli.lint import lint_text
+
+DOC = """<instructions>
+Hello.
+</instructions>
+<processes>
+<process id="main" name="Main">
+  RUN collect
+</process>
+</processes>
+"""
+
+
+def test_logical_locations():
+    locations = logical_locations(DOC.split("\n"))
+    assert locations[1:4] == ["section:instructions"] * 3
+    assert locations[5:8] == ["process:main"] * 3
+    assert locations[8] == "section:processes"
+    assert locations[9] == "document"
+
+
+def test_fingerprints_ignore_line_numbers_and_spacing():
+    before = file_fingerprints(lint_text(DOC, "a.md"), DOC)
+    shifted = "\n\n" + DOC.replace("  RUN collect", "  RUN   collect")
+    after = file_fingerprints(lint_text(shifted, "a.md"), shifted)
+    assert before and set(before) < set(after)
+    assert file_fingerprints(lint_text(DOC, "b.md"), DOC) != before
+    moved = DOC.replace('id="main"', 'id="other"')
+    assert file_fingerprints(lint_text(moved, "a.md"), moved) != before
+
+
+def test_save_is_sorted_and_skips_unchanged(tmp_path: Path):
+    path = tmp_path / "baseline.json"
+    baseline = Baseline()
+    baseline.fingerprints.update(["AG-011:b", "AG-003:a", "AG-011:b"])
+    assert baseline.save(path)
+    assert not baseline.save(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert list(data["fingerprints"].items()) == [("AG-003:a", 1), ("AG-011:b", 2)]
+    assert Baseline.load(path) == baseline
+    assert Baseline.load(tmp_path / "missing.json") == Baseline()
+    path.write_text("[]", encoding="utf-8")
+    with pytest.raises(ValueError):
+        Baseline.load(path)
+
+
+def test_cli_baseline_reports_only_new_findings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("APS_NO_DAEMON", "1")
+    monkeypatch.chdir(tmp_path)
+    prompt = tmp_path / "a.md"
+    prompt.write_text(DOC, encoding="utf-8")
+    args = ["lint", "a.md", "--jobs", "1", "--baseline", "base.json"]
+
+    update = CliRunner().invoke(app, [*args, "--update-baseline"])
+    assert update.exit_code == 0
+    assert "Baseline updated: 1 finding(s)" in update.output
+
+    prompt.write_text("<!-- moved -->\n" + DOC, encoding="utf-8")
+    clean = CliRunner().invoke(app, args)
+    assert clean.exit_code == 0
+    assert "1 known finding(s) suppressed" in clean.output
+
+    prompt.write_text(DOC.replace("  RUN collect", "  RUN collect\n  RUN gather"), encoding="utf-8")
+    regressed = CliRunner().invoke(app, args)
+    assert regressed.exit_code == 1
+    assert "'gather'" in regressed.output and "'collect'" not in regressed.output
+
+
+def test_cli_baseline_paths_do_not_depend_on_cwd(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("APS_NO_DAEMON", "1")
+    (tmp_path / "prompts").mkdir()
+    (tmp_path / "prompts" / "a.md").write_text(DOC, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    update = CliRunner().invoke(
+        app, ["lint", "prompts/a.md", "--jobs", "1", "--baseline", "base.json", "--update-baseline"]
+    )
+    assert update.exit_code == 0
+
+    monkeypatch.chdir(tmp_path / "prompts")
+    for target in ("a.md", str(tmp_path / "prompts" / "a.md")):
+        result = CliRunner().invoke(app, ["lint", target, "--jobs", "1", "--baseline", "../base.json"])
+        assert result.exit_code == 0, result.output
+        assert "1 known finding(s) suppressed" in result.output
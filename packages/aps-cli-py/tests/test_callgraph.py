@@ -0,0 +1,119 @@
+"""Tests for the process call graph."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from aps_cli.callgraph import CallGraph, parse_signature
+from aps_cli.cli import app
+from aps_cli.lint import lint_text
+from aps_cli.parser import parse_document
+
+
+def _process(pid: str, body: str, args: str | None = None) -> str:
+    attr = f' args="{args}"' if args is not None else ""
+    return f'<process id="{pid}"{attr}>\n{body}\n</process>\n'
+
+
+def _doc(*processes: str, extra: str = "") -> str:
+    return f"{extra}<processes>\n{''.join(processes)}</processes>\n"
+
+
+def _graph(text: str) -> CallGraph:
+    return CallGraph.build([parse_document(text)])
+
+
+def test_signature_columns():
+    doc = parse_document(_doc(_process("a", 'TELL "x"', args="limit: Number, name: String")))
+    sig = parse_signature(doc.processes[0])
+    assert [(a.name, a.type, a.column) for a in sig] == [("limit", "Number", 23), ("name", "String", 38)]
+    assert parse_signature(parse_document(_doc(_process("a", 'TELL "x"'))).processes[0]) is None
+
+
+def test_cycles_unreachable_and_missing():
+    text = _doc(
+        _process("main", "RUN `a`\nRUN `ghost`"),
+        _process("a", "RUN `b`"),
+        _process("b", "RUN `a`"),
+        _process("self", "RUN `self`"),
+        _process("island", 'TELL "x"'),
+    )
+    graph = _graph(text)
+    assert graph.cycles() == [["a", "b"], ["self"]]
+    # Without triggers, every process nobody calls is an entry point.
+    assert [graph.nodes[v].id for v in graph.entry_points()] == ["main", "island"]
+    assert graph.unreachable() == ["self"]
+    assert [(s.target, s.line) for s in graph.missing()] == [("ghost", 4)]
+
+    triggered = "<triggers>\n<trigger event=\"e\" target=\"main\" />\n</triggers>\n"
+    graph = _graph(_doc(*[_process(p, "RUN `a`") for p in ("main", "a", "island")], extra=triggered))
+    assert graph.unreachable() == ["island"]
+
+
+def test_components_handle_deep_chains():
+    n = 5000
+    text = _doc(*[_process(f"p{i}", f"RUN `p{i + 1}`") for i in range(n)], _process(f"p{n}", "RUN `p0`"))
+    graph = _graph(text)
+    assert len(graph.cycles()) == 1 and len(graph.cycles()[0]) == n + 1
+
+
+def test_edges_are_unique_in_first_call_order():
+    leaves = [_process(p, 'TELL "x"') for p in ("a", "b")]
+    graph = _graph(_doc(_process("main", "RUN `b`\nRUN `a`\nRUN `b`\nRUN `a`"), *leaves))
+    assert [graph.nodes[w].id for w in graph.edges[graph.index["main"]]] == ["b", "a"]
+    assert len(graph.calls) == 4
+
+
+def test_export():
+    graph = _graph(_doc(_process("main", "RUN `a`\nRUN `ghost`"), _process("a", 'TELL "x"')))
+    data = graph.to_json()
+    assert data["processes"][0] == {"id": "main", "file": None, "line": 2, "calls": ["a"]}
+    assert data["missing"] == ["ghost"] and data["entryPoints"] == ["main"]
+    dot = graph.to_dot()
+    assert '"main" -> "a";' in dot and '"main" -> "ghost" [style=dashed];' in dot
+
+
+def test_ag044_signature_mismatches():
+    consts = "<constants>\nLIMIT: 5\nNAME: \"n\"\n</constants>\n"
+    callee = _process("collect", 'TELL "x"', args="limit: Number, name: String")
+
+    def codes(call: str) -> list[tuple[str, int, int]]:
+        found = lint_text(_doc(_process("main", call), callee, extra=consts))
+        return [(d.code, d.line, d.column) for d in found if d.code == "AG-044"]
+
+    assert codes('RUN `collect` where: limit=LIMIT, name=NAME') == []
+    assert codes('RUN `collect` where: limit="5", name=NAME') == [("AG-044", 7, 22)]
+    assert codes("RUN `collect` where: limit=1, name=LIMIT") == [("AG-044", 7, 31)]
+    assert codes('RUN `collect` where: limit=1, name="a", size=2') == [("AG-044", 7, 41)]
+    assert codes("RUN `collect` where: limit=1") == [("AG-044", 7, 6)]
+    # WITH defaults supply missing arguments.
+    assert codes('WITH {"name": "n"}:\n  RUN `collect` where: limit=1') == []
+    # Processes without `args` and processes in other files are not checked.
+    assert lint_text(_doc(_process("main", "RUN `aa` where: x=1\nRUN `bb`"), _process("aa", 'TELL "x"'))) == []
+
+
+def test_ag004_trigger_targets():
+    text = "<triggers>\n<trigger event=\"e\" target=\"nope\" />\n</triggers>\n" + _doc(
+        _process("main", 'TELL "x"')
+    )
+    assert [(d.code, d.line, d.column) for d in lint_text(text)] == [("AG-004", 2, 28), ("AG-W01", 5, 14)]
+
+
+def test_cli_graph_reports_missing_across_files(tmp_path: Path):
+    (tmp_path / "a.md").write_text(_doc(_process("main", "RUN `lib`\nRUN `gone`")), encoding="utf-8")
+    (tmp_path / "b.md").write_text(_doc(_process("lib", 'TELL "x"')), encoding="utf-8")
+
+    result = CliRunner().invoke(app, ["graph", str(tmp_path)])
+    assert result.exit_code == 1
+    data = json.loads(result.stdout)
+    assert [p["id"] for p in data["processes"]] == ["main", "lib"] and data["missing"] == ["gone"]
+    assert "AG-004 No process 'gone'" in result.output
+
+    (tmp_path / "a.md").write_text(_doc(_process("main", "RUN `lib`")), encoding="utf-8")
+    out = tmp_path / "graph.dot"
+    result = CliRunner().invoke(app, ["graph", str(tmp_path), "--format", "dot", "-o", str(out)])
+    assert result.exit_code == 0
+    assert '"main" -> "lib";' in out.read_text(encoding="utf-8")
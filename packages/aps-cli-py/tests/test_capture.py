@@ -0,0 +1,63 @@
+"""Tests for CAPTURE map path compilation and evaluation."""
+
+from __future__ import annotations
+
+import pytest
+
+from aps_cli.capture import (
+    CaptureProgram,
+    CapturePathError,
+    Segment,
+    compile_path,
+    parse_capture_map,
+)
+from aps_cli.lint import lint_text
+from aps_cli.parser import parse_document
+
+
+def test_compile_dotted_and_pointer_paths():
+    dotted = compile_path('$.items[0]["a.b"].name?')
+    assert dotted.optional
+    assert dotted.segments == (Segment("items"), Segment("0", 0), Segment("a.b"), Segment("name"))
+    pointer = compile_path("/items/0/a~1b/~0x")
+    assert pointer.segments == (Segment("items"), Segment("0", 0), Segment("a/b"), Segment("~x"))
+    assert compile_path("content") is compile_path("content")
+
+
+@pytest.mark.parametrize(
+    "path, offset",
+    [("", 0), ("a..b", 1), ("items[*]", 5), ("a[01]", 1), ("a b", 1), ("/a~2", 2), ("$x", 1), ("a.", 2)],
+)
+def test_invalid_paths(path: str, offset: int):
+    with pytest.raises(CapturePathError) as exc:
+        compile_path(path)
+    assert exc.value.offset == offset
+
+
+def test_program_evaluates_shared_prefixes_once():
+    entries = parse_capture_map('"data.user.name"→NAME, "/data/user/ids/1"→ID, "data.gone?"→GONE', 1)
+    program = CaptureProgram(entries)
+    assert list(program.root.children) == [Segment("data")]
+    output = {"data": {"user": {"name": "ada", "ids": [7, 8]}}}
+    assert program.evaluate(output) == {"NAME": "ada", "ID": 8}
+    with pytest.raises(CapturePathError, match="not found"):
+        program.evaluate({"data": {"user": "flat"}})
+
+
+def test_program_from_statement_is_cached():
+    text = '<processes>\n<process id="main">\n  CAPTURE OUT from `read` map: "content"→OUT\n</process>\n</processes>\n'
+    stmt = parse_document(text).processes[0].statements[0]
+    program = CaptureProgram.from_statement(stmt)
+    assert program is CaptureProgram.from_statement(stmt)
+    assert program.evaluate({"content": "x"}) == {"OUT": "x"}
+
+
+def test_lint_reports_ag028():
+    def diags(capture: str) -> list[tuple[str, int]]:
+        text = f'<processes>\n<process id="main">\n  {capture}\n  RETURN: OUT\n</process>\n</processes>\n'
+        return [(d.code, d.column) for d in lint_text(text) if d.code == "AG-028"]
+
+    assert diags('CAPTURE OUT from `read` map: "content"→OUT, "meta?"→OUT') == []
+    assert diags('CAPTURE OUT from `read` map: "items[*]"→OUT') == [("AG-028", 38)]
+    assert diags('CAPTURE OUT from `read` map: content→OUT') == [("AG-028", 32)]
+    assert diags('CAPTURE OUT from `read` map: "content"→OTHER') == [("AG-028", 32)]
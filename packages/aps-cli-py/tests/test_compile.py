@@ -0,0 +1,234 @@
+"""Tests for the APS compiler and build cache."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli import compile as compile_mod
+from aps_cli.cli import app
+from aps_cli.compile import BuildCache, CompileError, CompileOptions, compile_file, compile_text
+from aps_cli.fmt import format_text
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+VALID = sorted((REPO_ROOT / "conformance" / "cases" / "valid").glob("*.md"))
+
+PROMPT = (
+    "<constants>\n"
+    "CFG: JSON<<\n"
+    "{\n"
+    '  "zeta": 1,\n'
+    '  "alpha": [LIMIT, "x"]\n'
+    "}\n"
+    ">>\n"
+    "</constants>\n"
+)
+
+
+def test_compile_canonicalizes_json_blocks():
+    out = compile_text(PROMPT)
+    assert 'CFG: JSON<<\n{"alpha": [LIMIT, "x"], "zeta": 1}\n>>\n' in out
+    assert compile_text(out) == out
+
+
+@pytest.mark.parametrize("case", VALID, ids=lambda p: p.name)
+def test_compile_valid_corpus_is_formatted(case: Path):
+    out = compile_text(case.read_text(encoding="utf-8"))
+    assert format_text(out) == out
+
+
+def test_compile_normalizes_nfc():
+    assert compile_text("<instructions>\nCafé\n</instructions>\n") == (
+        "<instructions>\nCafé\n</instructions>\n"
+    )
+
+
+def test_compile_reports_bad_json_position():
+    src = '<constants>\nCFG: JSON<<\n{"a": 1,\n "b" 2}\n>>\n</constants>\n'
+    with pytest.raises(CompileError) as exc:
+        compile_text(src)
+    (d,) = exc.value.diagnostics
+    assert (d.code, d.line, d.column) == ("AG-007", 4, 6)
+
+
+def test_compile_rejects_lint_errors():
+    src = '<processes>\n<process id="run">\nTELL "x"\n</process>\n</processes>\n'
+    with pytest.raises(CompileError) as exc:
+        compile_text(src)
+    assert {d.code for d in exc.value.diagnostics} == {"AG-002"}
+
+
+def test_cache_hit_skips_parsing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    src = tmp_path / "a.prompt.md"
+    src.write_text(PROMPT, encoding="utf-8")
+    cache = BuildCache(tmp_path / "cache")
+
+    first = compile_file(src, tmp_path / "out" / "a.md", cache=cache)
+    assert first.ok and not first.cached and first.changed
+
+    def boom(*args, **kwargs):
+        raise AssertionError("source was re-parsed")
+
+    monkeypatch.setattr(compile_mod, "compile_text", boom)
+    second = compile_file(src, tmp_path / "out" / "a.md", cache=cache)
+    assert second.cached and not second.changed
+    assert second.output_hash == first.output_hash
+
+
+def test_cache_key_depends_on_source_and_options():
+    opts = CompileOptions()
+    assert compile_mod.cache_key(b"a", opts) == compile_mod.cache_key(b"a", opts)
+    assert compile_mod.cache_key(b"a", opts) != compile_mod.cache_key(b"b", opts)
+
+
+def test_cache_key_depends_on_signatures(tmp_path: Path):
+    (tmp_path / ".git").mkdir()
+    tools = tmp_path / "predefinedTools.json"
+    tools.write_text('{"tools": [{"name": "search", "params": {"query": {}}}]}\n', encoding="utf-8")
+    src = tmp_path / "p.prompt.md"
+    src.write_text(
+        '<processes>\n<process id="main">\n  USE `search` where: query="a"\n</process>\n</processes>\n',
+        encoding="utf-8",
+    )
+    cache = BuildCache(tmp_path / "cache")
+    assert compile_file(src, tmp_path / "out.md", cache=cache).ok
+
+    tools.write_text('{"tools": [{"name": "search", "params": {"limit": {}}}]}\n', encoding="utf-8")
+    result = compile_file(src, tmp_path / "out.md", cache=cache)
+    assert not result.ok and not result.cached
+    assert [d.code for d in result.diagnostics] == ["AG-044"]
+
+
+def test_cli_compile_directory_with_manifest(tmp_path: Path):
+    src = tmp_path / "src"
+    (src / "nested").mkdir(parents=True)
+    (src / "nested" / "a.prompt.md").write_text(PROMPT, encoding="utf-8")
+    (src / "b.prompt.md").write_text("<instructions>\nHi\n</instructions>\n", encoding="utf-8")
+    out = tmp_path / "out"
+    manifest = tmp_path / "manifest.json"
+    args = ["compile", str(src), "-o", str(out), "--manifest", str(manifest),
+            "--cache-dir", str(tmp_path / "cache")]
+
+    result = CliRunner().invoke(app, args)
+    assert result.exit_code == 0, result.output
+    assert (out / "nested" / "a.prompt.md").is_file()
+    data = json.loads(manifest.read_text(encoding="utf-8"))
+    assert [e["cached"] for e in data["entries"]] == [False, False]
+    assert all(len(e["outputHash"]) == 64 for e in data["entries"])
+
+    result = CliRunner().invoke(app, args)
+    data = json.loads(manifest.read_text(encoding="utf-8"))
+    assert [e["cached"] for e in data["entries"]] == [True, True]
+
+
+def test_cli_compile_fails_on_errors(tmp_path: Path):
+    src = tmp_path / "bad.prompt.md"
+    src.write_text('<constants>\nCFG: JSON<<\n{\n>>\n</constants>\n', encoding="utf-8")
+    result = CliRunner().invoke(app, ["compile", str(src), "-o", str(tmp_path / "o.md"), "--no-cache"])
+    assert result.exit_code == 1
+    assert "AG-007" in result.output
+    assert not (tmp_path / "o.md").exists()
+
+
+def test_compile_reports_non_utf8_source(tmp_path: Path):
+    src = tmp_path / "latin1.prompt.md"
+    src.write_bytes("<instructions>\ncaf\u00e9\n</instructions>\n".encode("latin-1"))
+    result = compile_file(src, tmp_path / "o.md")
+    assert not result.ok and result.error and not result.diagnostics
+    assert not (tmp_path / "o.md").exists()
+
+    cli = CliRunner().invoke(app, ["compile", str(src), "-o", str(tmp_path / "o.md"), "--no-cache"])
+    assert cli.exit_code == 1
+    assert f"error: cannot compile {src.as_posix()}: 'utf-8' codec" in cli.stderr
+
+
+MINIMAL = CompileOptions(profile="minimal")
+
+
+def test_minimal_profile_drops_comments_blanks_and_unreferenced_definitions():
+    src = (
+        "<constants>\n"
+        "// Unused below.\n"
+        "UNUSED: 1\n\n"
+        "TZ: \"Z\"\n"
+        "CFG: JSON<<\n{\"tz\": TZ}\n>>\n"
+        "ORPHAN: JSON<<\n{\"tz\": TZ}\n>>\n"
+        "</constants>\n"
+        "<formats>\n<format id=\"OLD_V1\" name=\"Old\">\nx\n</format>\n</formats>\n"
+        "<processes>\n<process id=\"main\">\n  USE `tool` where: cfg=CFG\n</process>\n</processes>\n"
+        "<input>\nline one\n\nline two\n</input>\n"
+    )
+    out = compile_text(src, options=MINIMAL)
+    assert out == (
+        "<constants>\n"
+        "TZ: \"Z\"\n"
+        "CFG: JSON<<\n{\"tz\": TZ}\n>>\n"
+        "</constants>\n"
+        "<processes>\n<process id=\"main\">\n  USE `tool` where: cfg=CFG\n</process>\n</processes>\n"
+        "<input>\nline one\n\nline two\n</input>\n"
+    )
+    assert compile_text(out, options=MINIMAL) == out
+
+
+def test_minimal_profile_keeps_format_bodies_and_paragraphs():
+    body = "## <CHANGE_TITLE>\n\n// literal\n<CHANGE_DESCRIPTION>\nWHERE:\n- <CHANGE_TITLE> is String.\n- <CHANGE_DESCRIPTION> is String.\n"
+    src = (
+        "<instructions>\nFirst paragraph.\n\n\n// note\nSecond paragraph, see NOTE.\n</instructions>\n\n"
+        "<constants>\n// mentions HIDDEN\nHIDDEN: 1\nNOTE: 2\n</constants>\n\n"
+        "<formats>\n<format id=\"CHANGE_V1\" name=\"Change\">\n" + body + "</format>\n</formats>\n\n"
+        "<processes>\n<process id=\"main\">\n  RETURN: format=\"CHANGE_V1\"\n</process>\n</processes>\n"
+    )
+    assert compile_text(src, options=MINIMAL) == (
+        "<instructions>\nFirst paragraph.\n\nSecond paragraph, see NOTE.\n</instructions>\n\n"
+        "<constants>\nNOTE: 2\n</constants>\n\n"
+        "<formats>\n<format id=\"CHANGE_V1\" name=\"Change\">\n" + body + "</format>\n</formats>\n\n"
+        "<processes>\n<process id=\"main\">\n  RETURN: format=\"CHANGE_V1\"\n</process>\n</processes>\n"
+    )
+
+
+@pytest.mark.parametrize("case", VALID, ids=lambda p: p.name)
+def test_minimal_profile_is_lint_clean_and_smaller(case: Path):
+    src = case.read_text(encoding="utf-8")
+    out = compile_text(src, options=MINIMAL)
+    assert compile_mod.estimate_tokens(out) <= compile_mod.estimate_tokens(src)
+    assert compile_text(out) == out
+
+
+def test_minimal_keeps_formats_referenced_generically():
+    src = (
+        "<instructions>\nConform to `<formats>`.\n</instructions>\n"
+        "<formats>\n<format id=\"A_V1\" name=\"A\">\nx\n</format>\n</formats>\n"
+    )
+    assert "A_V1" in compile_text(src, options=MINIMAL)
+
+
+def test_minimize_markdown_preserves_fences_and_blocks():
+    src = "# T\n\n\n// note\n<!-- hidden -->\ntext   \n```\n// kept\n\n\n```\nXY: TEXT<<\n// body\n>>\n\n"
+    assert compile_mod.minimize_markdown(src) == (
+        "# T\n\ntext\n```\n// kept\n\n\n```\nXY: TEXT<<\n// body\n>>\n"
+    )
+
+
+def test_cli_compile_minimal_reports_token_estimate(tmp_path: Path):
+    src = tmp_path / "a.prompt.md"
+    src.write_text("<constants>\n// c\nUNUSED: 1\n</constants>\n", encoding="utf-8")
+    result = CliRunner().invoke(
+        app, ["compile", str(src), "-o", str(tmp_path / "o.md"), "--profile", "minimal", "--no-cache"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "estimated tokens" in result.output
+    assert (tmp_path / "o.md").read_text(encoding="utf-8") == ""
+
+
+def test_cli_init_minimal_profile(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    result = CliRunner().invoke(
+        app, ["init", "--personal", "--yes", "--platform", "none", "--profile", "minimal"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "minimal profile" in result.output
+    example = next((tmp_path / ".copilot" / "skills").rglob("constants-json-block-*.md"))
+    assert "//" not in example.read_text(encoding="utf-8")
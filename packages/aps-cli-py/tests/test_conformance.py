@@ -0,0 +1,26 @@
+"""Run the repository conformance corpus through the linter."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from aps_cli.lint import lint_file
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+CASES_DIR = REPO_ROOT / "conformance" / "cases"
+
+VALID_CASES = sorted((CASES_DIR / "valid").glob("*.md"))
+INVALID_CASES = sorted((CASES_DIR / "invalid").glob("*.md"))
+
+
+@pytest.mark.parametrize("case", VALID_CASES, ids=lambda p: p.name)
+def test_valid_case_lints_clean(case: Path) -> None:
+    assert [d.format() for d in lint_file(case)] == []
+
+
+@pytest.mark.parametrize("case", INVALID_CASES, ids=lambda p: p.name)
+def test_invalid_case_raises_its_code(case: Path) -> None:
+    expected = "-".join(case.name.split("-", 2)[:2])
+    assert expected in {d.code for d in lint_file(case)}
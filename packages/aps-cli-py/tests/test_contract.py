@@ -0,0 +1,195 @@
+"""Tests for compiled format contracts (aps check-output)."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli import contract as contract_module
+from aps_cli.cli import app
+from aps_cli.contract import (
+    check_outputs,
+    compile_contract,
+    find_formats,
+    load_contract,
+    parse_where_line,
+    read_outputs,
+    read_records,
+    table_cells,
+)
+from aps_cli.core import resolve_payload_skill_dir
+
+FORMATS_DIR = resolve_payload_skill_dir() / "assets" / "formats"
+HEADER = "| ProcessId | Name | Status | StartedAt | EndedAt | DurationMs | Outcome | Artifacts | Errors |"
+GOOD_ROW = "| main | Main | OK | 2025-01-01T00:00:00Z | 2025-01-01T00:00:01Z | 1000 | done | - | - |"
+
+
+def _results(*rows: str) -> str:
+    return "\n".join(["```format:TABLE_PROCESS_RESULTS_V1", HEADER, "|---|---|---|---|---|---|---|---|---|", *rows, "```"])
+
+
+def _codes(found) -> list[tuple[str, int, int]]:
+    return [(d.code, d.line, d.column) for d in found]
+
+
+@pytest.fixture(scope="module")
+def results():
+    return load_contract("TABLE_PROCESS_RESULTS_V1", [FORMATS_DIR])
+
+
+def test_bundled_formats_compile_cleanly():
+    for f in sorted(FORMATS_DIR.glob("*.md")):
+        for fid, line, body in find_formats(f.read_text(encoding="utf-8")):
+            contract = compile_contract(fid, body, str(f), line)
+            assert contract.elements, fid
+            # CODE_MAP_V1 annotates its template with `<code line>` and `<LINE_FROM+1>`.
+            assert {d.code for d in contract.problems} <= {"AG-043"}, fid
+
+
+def test_where_lines():
+    (status,) = parse_where_line("- <STATUS> is one of: PENDING, OK, ERROR.")
+    assert status.choices == ("PENDING", "OK", "ERROR")
+    first, last = parse_where_line("- <LINE_FROM> and <LINE_TO> are integers; LINE_TO ≥ LINE_FROM.")
+    assert (first.name, first.type, last.name, last.type) == ("LINE_FROM", "Integer", "LINE_TO", "Integer")
+    (reason,) = parse_where_line("- <REASON> is ≤ 160 characters.")
+    assert reason.max_length == 160
+    (op,) = parse_where_line("- <OP> is the HTTP method, one of: `GET`, `POST`.")
+    assert op.choices == ("GET", "POST")
+    (ref,) = parse_where_line("- <REF> is one of: `OpenAPI: <PATH>` or `Swagger: <PATH>`.")
+    assert ref.choices is None
+    (code,) = parse_where_line("- <CODE> regex: ^[A-Z]{3}$")
+    assert code.violation("ABC") is None and code.violation("abc") is not None
+    assert parse_where_line("- … denotes repetition.") == []
+
+
+def test_iso8601_values():
+    (at,) = parse_where_line("- <AT> is ISO8601.")
+    for value in (
+        "2024-01-01",
+        "2024-01-01T00:00:00Z",
+        "2024-01-01T00:00:00.123+02:00",
+        "2024-01-01 12:30-05",
+        "20240101T123000Z",
+    ):
+        assert at.violation(value) is None, value
+    for value in ("yesterday", "2024-13-01", "2024-01-01T25:00Z", "2024-01-01T00:00+24:00", "2024-0101"):
+        assert at.violation(value) is not None, value
+
+
+def test_table_cells_offsets():
+    assert table_cells("| a | b\\|c | d |") == [("a", 2), ("b\\|c", 6), ("d", 13)]
+
+
+def test_valid_table(results):
+    assert results.check(_results(GOOD_ROW, GOOD_ROW.replace("OK", "WARN"))) == []
+
+
+def test_table_violations(results):
+    bad = "| main | Main | DONE | yesterday | 2025-01-01T00:00:01Z | 1s | done | <ARTIFACTS> | - |"
+    found = results.check(_results(bad, "| main | Main | OK |"))
+    assert _codes(found) == [
+        ("AG-036", 4, 17),
+        ("AG-036", 4, 24),
+        ("AG-036", 4, 59),
+        ("AG-036", 4, 71),
+        ("AG-036", 5, 1),
+    ]
+    assert found[-1].message == "Row has 3 column(s); expected 9."
+    assert found[3].message == "Placeholder <ARTIFACTS> is not resolved."
+
+    renamed = results.check(_results(GOOD_ROW).replace("| Status |", "| State |"))
+    assert _codes(renamed) == [("AG-036", 2, 1)]
+
+
+def test_fence_violations(results):
+    assert _codes(results.check(HEADER)) == [("AG-040", 1, 1)]
+    text = "Sure!\n" + _results(GOOD_ROW).replace("V1", "V2", 1) + "\n```format:ERROR\nx\n```"
+    assert [d.message for d in results.check(text)] == [
+        "Prose outside the format block.",
+        "Expected fence label format:TABLE_PROCESS_RESULTS_V1.",
+        "Output contains more than one format block.",
+    ]
+
+
+def test_line_templates_and_repeated_slots():
+    contract = load_contract("CODE_MAP_V1", [FORMATS_DIR])
+    good = (
+        "```format:CODE_MAP_V1\nParser\n> [Entry](../../../repo/src/p.py#L10-L12)\n"
+        "```python\n10: a\n11: b\n12: c\n```\n```"
+    )
+    assert contract.check(good) == []
+    found = contract.check(good.replace("#L10", "#Lten").replace("```python", "python"))
+    assert [d.message for d in found] == [
+        "<LINE_FROM> value 'ten' is not Integer.",
+        "Missing required line matching '```<LANG>'.",
+    ]
+
+
+def test_contract_problems():
+    body = [(2, "## <TITLE>"), (3, "WHERE:"), (4, "- <OTHER> is String.")]
+    contract = compile_contract("X_V1", body, "p.md", 1)
+    assert [(d.code, d.line, d.column) for d in contract.problems] == [("AG-042", 2, 4), ("AG-042", 4, 3)]
+    no_where = compile_contract("X_V1", body[:1], "p.md", 1)
+    assert [d.code for d in no_where.problems] == ["AG-041"]
+    with pytest.raises(ValueError):
+        load_contract("MISSING_V1", [FORMATS_DIR])
+
+
+def test_read_outputs_jsonl():
+    text = '{"id": "a", "output": "x"}\n\n"y"\n'
+    assert list(read_outputs("in", text, jsonl=True)) == [("a", "x"), ("in:3", "y")]
+    assert list(read_outputs("in", text, jsonl=False)) == [("in", text)]
+    with pytest.raises(ValueError, match="in:1"):
+        list(read_outputs("in", "[1]\n", jsonl=True))
+
+
+def test_read_records_streams_from_an_iterator(results):
+    def lines():
+        for i in range(3):
+            yield json.dumps({"id": f"r{i}", "output": _results(GOOD_ROW)}) + "\n"
+        raise AssertionError("read past the records that were consumed")
+
+    records = read_records("stdin", lines())
+    assert [next(records)[0] for _ in range(3)] == ["r0", "r1", "r2"]
+    checked = check_outputs(results, read_records("stdin", lines()), jobs=1)
+    assert [found for _, found in zip(range(3), checked)] == [[], [], []]
+
+
+def test_check_outputs_pool_keeps_order(results):
+    outputs = [(f"o{i}", _results(GOOD_ROW if i % 3 else "| x |")) for i in range(200)]
+    serial = list(check_outputs(results, outputs, jobs=1))
+    assert list(check_outputs(results, iter(outputs), jobs=2, batch_size=16)) == serial
+    assert [bool(found) for found in serial] == [i % 3 == 0 for i in range(200)]
+
+
+def test_check_outputs_runs_one_batch_in_process(results, monkeypatch: pytest.MonkeyPatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a worker pool was started for a single batch")
+
+    monkeypatch.setattr(contract_module, "ProcessPoolExecutor", no_pool)
+    outputs = [(f"o{i}", _results(GOOD_ROW)) for i in range(16)]
+    assert list(check_outputs(results, iter(outputs[:1]), jobs=8)) == [[]]
+    assert list(check_outputs(results, iter(outputs), jobs=8, batch_size=16)) == [[]] * 16
+
+
+def test_cli(tmp_path: Path):
+    (tmp_path / "ok.md").write_text(_results(GOOD_ROW), encoding="utf-8")
+    runner = CliRunner()
+    ok = runner.invoke(app, ["check-output", "--format", "TABLE_PROCESS_RESULTS_V1", str(tmp_path), "-j", "1"])
+    assert ok.exit_code == 0, ok.output
+
+    records = "\n".join(json.dumps({"id": f"r{i}", "output": _results("| x |")}) for i in range(2))
+    bad = runner.invoke(
+        app,
+        ["check-output", "--format", "TABLE_PROCESS_RESULTS_V1", "--jsonl", "--report", "jsonl", "-j", "1"],
+        input=records,
+    )
+    assert bad.exit_code == 1
+    lines = [json.loads(line) for line in bad.stdout.splitlines()]
+    assert [(d["file"], d["code"]) for d in lines] == [("r0", "AG-036"), ("r1", "AG-036")]
+
+    missing = runner.invoke(app, ["check-output", "--format", "NOPE_V1", str(tmp_path)])
+    assert missing.exit_code == 2
@@ -0,0 +1,107 @@
+"""Tests for the `aps serve` daemon and transparent client fallback."""
+
+from __future__ import annotations
+
+import json
+import socket
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli import daemon
+from aps_cli.cli import app
+from aps_cli.daemon import call_daemon, serve, stop_daemon
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+TABBED = "<instructions>\n\tHello.\n</instructions>\n"
+
+
+@pytest.fixture
+def running(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    sock = Path("/tmp") / f"aps-test-{tmp_path.name}.sock"
+    monkeypatch.setenv(daemon.SOCKET_ENV, str(sock))
+    monkeypatch.delenv(daemon.DISABLE_ENV, raising=False)
+    ready = threading.Event()
+    thread = threading.Thread(target=serve, args=(sock, lambda p: ready.set()), daemon=True)
+    thread.start()
+    assert ready.wait(10)
+    yield sock
+    stop_daemon(sock)
+    thread.join(5)
+    assert not sock.exists()
+
+
+def test_lint_and_fmt_over_socket(running: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / "a.md").write_text(TABBED, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    result = call_daemon("lint", {"cwd": str(tmp_path), "paths": ["a.md"]})
+    (found,) = result["results"]
+    assert [(d["code"], d["file"]) for d in found["diagnostics"]] == [("AG-011", "a.md")]
+    missing = call_daemon("lint", {"cwd": str(tmp_path), "paths": ["nope.md"]})
+    assert missing["results"][0]["error"] and not missing["results"][0]["diagnostics"]
+
+    fmt = call_daemon("fmt", {"cwd": str(tmp_path), "paths": ["a.md"], "mode": "check"})
+    assert fmt["results"][0]["changed"] and fmt["results"][0]["path"] == "a.md"
+
+    cli = CliRunner().invoke(app, ["lint", "a.md"])
+    assert cli.exit_code == 1
+    assert "a.md:2:1: AG-011" in cli.output
+
+
+def test_lint_cache_tracks_signatures(tmp_path: Path):
+    (tmp_path / ".git").mkdir()
+    tools = tmp_path / "predefinedTools.json"
+    tools.write_text('{"tools": [{"name": "search", "params": {"query": {}}}]}\n', encoding="utf-8")
+    prompt = tmp_path / "p.prompt.md"
+    prompt.write_text(
+        '<processes>\n<process id="main">\n  USE `search` where: query="a"\n</process>\n</processes>\n',
+        encoding="utf-8",
+    )
+    cache = daemon._LintCache()
+    assert cache.lint(prompt).diagnostics == []
+    tools.write_text('{"tools": [{"name": "search", "params": {"limit": {}}}]}\n', encoding="utf-8")
+    assert [d.code for d in cache.lint(prompt).diagnostics] == ["AG-044"]
+    # Another workspace or spec gets its own result.
+    found = cache.lint(prompt)
+    assert cache.lint(prompt) is found and cache.lint(prompt, ("other",)) is not found
+
+
+def test_doctor_matches_in_process(running: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    args = ["doctor", "--json", "--root", str(tmp_path)]
+    served = json.loads(CliRunner().invoke(app, args).output)
+    monkeypatch.setenv(daemon.DISABLE_ENV, "1")
+    local = json.loads(CliRunner().invoke(app, args).output)
+    assert served == local
+
+
+def test_errors_and_version_mismatch(running: Path):
+    assert call_daemon("nope") is None
+    response = daemon._send(
+        running,
+        {"jsonrpc": "2.0", "id": 7, "method": "ping", "params": {"clientVersion": "0.0.0"}},
+        5.0,
+    )
+    assert response["id"] == 7 and response["error"]["code"] == daemon.VERSION_MISMATCH
+
+
+def test_second_daemon_refuses_socket(running: Path):
+    with pytest.raises(daemon.DaemonError):
+        serve(running)
+
+
+def test_call_without_daemon_returns_none(tmp_path: Path):
+    assert call_daemon("ping", socket_path=tmp_path / "missing.sock") is None
+    assert not stop_daemon(tmp_path / "missing.sock")
+
+
+def test_cli_imports_subcommand_modules_lazily():
+    code = "import sys, aps_cli.cli; print(sorted(m for m in sys.modules if m.startswith('aps_cli.')))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    for module in ("compile", "contract", "daemon", "lint", "lsp", "redact"):
+        assert f"'aps_cli.{module}'" not in loaded.stdout
@@ -0,0 +1,215 @@
+"""Tests for the incremental-lint dependency graph."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli.cli import app
+from aps_cli.depgraph import (
+    DependencyGraph,
+    FileNode,
+    document_symbols,
+    git_changed_files,
+    lint_incremental,
+)
+from aps_cli.parser import parse_document
+
+SHARED = (
+    "<formats>\n"
+    '<format id="REPORT_V1" name="Report">\n- <BODY>\nWHERE:\n- <BODY> is String.\n</format>\n'
+    "</formats>\n"
+    "<processes>\n<process id=\"helper\">\n  TELL \"hi\"\n</process>\n</processes>\n"
+)
+USER = (
+    "<instructions>\nRender ```format:REPORT_V1```.\n</instructions>\n"
+    "<processes>\n<process id=\"main\">\n  RUN `helper`\n  USE `search`\n</process>\n</processes>\n"
+)
+LEAF = "<instructions>\nStandalone.\n</instructions>\n"
+
+
+def _workspace(tmp_path: Path) -> list[Path]:
+    files = []
+    for name, text in (("shared.md", SHARED), ("user.md", USER), ("leaf.md", LEAF)):
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        files.append(path)
+    return files
+
+
+def test_document_symbols():
+    defines, _ = document_symbols(parse_document(SHARED))
+    _, references = document_symbols(parse_document(USER))
+    assert defines == {"format:REPORT_V1", "process:helper"}
+    assert references == {"format:REPORT_V1", "process:helper", "tool:search"}
+
+
+def test_incremental_relints_changed_file_and_dependents(tmp_path: Path):
+    files = _workspace(tmp_path)
+    graph = tmp_path / "graph.json"
+
+    first = lint_incremental(files, [], graph)
+    assert len(first.linted) == 3 and not first.skipped
+
+    leaf = lint_incremental(files, [files[2]], graph)
+    assert leaf.linted == [files[2]] and len(leaf.skipped) == 2
+
+    files[0].write_text(SHARED.replace("helper", "helper2"), encoding="utf-8")
+    shared = lint_incremental(files, [files[0]], graph)
+    assert set(shared.linted) == {files[0], files[1]}
+    assert shared.skipped == [files[2]]
+
+
+def test_incremental_detects_unlisted_edits_and_replays_diagnostics(tmp_path: Path):
+    files = _workspace(tmp_path)
+    graph = tmp_path / "graph.json"
+    files[2].write_text("<instructions>\n\tx\n</instructions>\n", encoding="utf-8")
+    lint_incremental(files, [], graph, workspace=True)
+
+    replay = lint_incremental(files, [], graph, workspace=True)
+    assert not replay.linted
+    assert [d.code for d in replay.diagnostics] == ["AG-011"]
+    assert replay.diagnostics[0].file == str(files[2])
+
+    files[2].write_text(LEAF, encoding="utf-8")
+    fixed = lint_incremental(files, [], graph, workspace=True)
+    assert fixed.linted == [files[2]] and not fixed.diagnostics
+
+
+def test_dependents_are_transitive():
+    graph = DependencyGraph(
+        nodes={
+            "a": FileNode("", defines=frozenset({"format:A_V1"})),
+            "b": FileNode("", defines=frozenset({"process:b"}), references=frozenset({"format:A_V1"})),
+            "c": FileNode("", defines=frozenset({"process:c"}), references=frozenset({"process:b"})),
+            "d": FileNode("", references=frozenset({"process:c", "format:A_V1"})),
+            "e": FileNode("", references=frozenset({"process:x"})),
+        }
+    )
+    assert graph.dependents({"format:A_V1"}) == {"b", "c", "d"}
+    assert graph.dependents({"process:c"}) == {"d"}
+
+
+def test_incremental_only_reads_files_whose_stat_changed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    files = _workspace(tmp_path)
+    graph = tmp_path / "graph.json"
+    for path in files:
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    lint_incremental(files, [], graph)
+
+    reads: list[str] = []
+    read_bytes = Path.read_bytes
+    monkeypatch.setattr(Path, "read_bytes", lambda self: reads.append(self.name) or read_bytes(self))
+    assert not lint_incremental(files, [], graph).linted and reads == []
+
+    # Same content, new mtime: hashed once, not re-linted.
+    os.utime(files[2], ns=(2_000_000_000, 2_000_000_000))
+    assert not lint_incremental(files, [], graph).linted and reads == ["leaf.md"]
+    assert not lint_incremental(files, [], graph).linted and reads == ["leaf.md"]
+
+
+def test_git_changed_files(tmp_path: Path):
+    def git(*args: str) -> None:
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    files = _workspace(tmp_path)
+    git("init", "-q")
+    git("add", ".")
+    git("-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "-m", "init")
+    files[0].write_text(SHARED + "\n", encoding="utf-8")
+    (tmp_path / "new.md").write_text(LEAF, encoding="utf-8")
+
+    changed = git_changed_files("HEAD", tmp_path)
+    assert [p.name for p in changed] == ["new.md", "shared.md"]
+
+
+def test_cli_lint_changed_prints_skipped(tmp_path: Path):
+    files = _workspace(tmp_path)
+    graph = tmp_path / "graph.json"
+    args = ["lint", str(tmp_path), "--graph", str(graph), "--changed", str(files[2])]
+    CliRunner().invoke(app, args)
+    result = CliRunner().invoke(app, args)
+    assert result.exit_code == 0, result.output
+    assert "1 file(s) re-linted, 2 skipped (unaffected)" in result.output
+
+
+def test_incremental_reports_unreadable_files(tmp_path: Path):
+    files = _workspace(tmp_path)
+    graph = tmp_path / "graph.json"
+    lint_incremental(files, [], graph)
+
+    files[0].write_bytes(b"\xff" + SHARED.encode())
+    missing = tmp_path / "gone.md"
+    result = lint_incremental([*files, missing], [files[0]], graph)
+    assert [r.path for r in result.failed] == [str(missing), str(files[0])]
+    assert all(r.error for r in result.failed)
+    # The dependent of the now-unreadable file is re-linted.
+    assert result.linted == [files[1]] and result.skipped == [files[2]]
+
+
+def test_signatures_change_relints_consumers(tmp_path: Path):
+    (tmp_path / ".git").mkdir()
+    tools = tmp_path / "predefinedTools.json"
+    tools.write_text('{"tools": [{"name": "search", "params": {"query": {}}}]}\n', encoding="utf-8")
+    prompt = tmp_path / "p.prompt.md"
+    prompt.write_text(
+        '<processes>\n<process id="main">\n  USE `search` where: query="a"\n</process>\n</processes>\n',
+        encoding="utf-8",
+    )
+    graph = tmp_path / "graph.json"
+    args = ["lint", str(prompt), "--graph", str(graph)]
+    assert CliRunner().invoke(app, [*args, "--changed", str(prompt)]).exit_code == 0
+
+    tools.write_text('{"tools": [{"name": "search", "params": {"limit": {}}}]}\n', encoding="utf-8")
+    # Not listed as changed: the recorded signatures hash still gives it away.
+    assert [d.code for d in lint_incremental([prompt], [], graph).diagnostics] == ["AG-044"]
+
+    tools.write_text('{"tools": [{"name": "search", "params": {"other": {}}}]}\n', encoding="utf-8")
+    result = CliRunner().invoke(app, [*args, "--changed", str(tools)])
+    assert result.exit_code == 1
+    assert "AG-044" in result.stdout and "1 file(s) re-linted, 0 skipped" in result.stderr
+
+    result = CliRunner().invoke(app, [*args, "--changed", str(tmp_path / "notes.txt")])
+    assert "warning: --changed" in result.stderr and "notes.txt" in result.stderr
+
+
+@pytest.mark.parametrize("workspace", [False, True])
+def test_incremental_matches_full_lint_for_unused_definitions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, workspace: bool
+):
+    monkeypatch.setenv("APS_NO_DAEMON", "1")
+    files = _workspace(tmp_path)
+    flags = ["--json", "--jobs", "1", *(["--workspace"] if workspace else [])]
+
+    def findings(*extra: str) -> list[tuple[str, str, int]]:
+        result = CliRunner().invoke(app, ["lint", str(tmp_path), *flags, *extra])
+        return sorted((d["file"], d["code"], d["range"]["start"]["line"]) for d in json.loads(result.stdout))
+
+    full = findings()
+    assert any(code == "AG-W01" for _, code, _ in full) != workspace
+    graph = ["--graph", str(tmp_path / "graph.json")]
+    assert findings(*graph, "--changed", str(files[0])) == full
+    assert findings(*graph, "--changed", str(files[2])) == full  # replayed from the graph
+
+
+def test_incremental_reports_dependents_that_stop_decoding(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    files = _workspace(tmp_path)
+    graph = tmp_path / "graph.json"
+    lint_incremental(files, [], graph)
+    # user.md turns invalid between the stat and the read: only the dependent pass reads it.
+    real = Path.read_bytes
+    monkeypatch.setattr(
+        Path, "read_bytes", lambda self: b"\xff" if self == files[1] else real(self)
+    )
+    result = lint_incremental(files, [files[0]], graph)
+    assert [r.path for r in result.failed] == [str(files[1])]
+    assert result.linted == [files[0]]
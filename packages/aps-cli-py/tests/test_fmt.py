@@ -0,0 +1,111 @@
+"""Tests for the APS formatter."""
+
+from __future__ import annotations
+
+import os
+import random
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli.cli import app
+from aps_cli.fmt import format_file, format_paths, format_text
+from aps_cli.lint import lint_text
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+CORPUS = sorted((REPO_ROOT / "conformance" / "cases").rglob("*.md")) + sorted(
+    (REPO_ROOT / "skill" / "agnostic-prompt-standard" / "assets").rglob("*.md")
+)
+
+FIXABLE = {"AG-011", "AG-012", "AG-030", "AG-031"}
+
+
+def _perturb(text: str, rng: random.Random) -> str:
+    """Inject formatting noise the formatter must remove."""
+    out = []
+    for line in text.split("\n"):
+        roll = rng.random()
+        if roll < 0.2:
+            line = line + " " * rng.randint(1, 3)
+        elif roll < 0.3 and line.startswith("  "):
+            line = "\t" + line[2:]
+        elif roll < 0.4 and line.strip().startswith(("RUN ", "USE ")):
+            line = line.replace(" ", "  ", 1)
+        out.append(line)
+    joined = "\n".join(out)
+    return joined.replace("\n", "\r\n") if rng.random() < 0.3 else joined
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=lambda p: p.name)
+def test_format_is_idempotent_over_corpus(case: Path) -> None:
+    rng = random.Random(case.name)
+    source = case.read_text(encoding="utf-8")
+    for text in [source] + [_perturb(source, rng) for _ in range(20)]:
+        once = format_text(text)
+        assert format_text(once) == once
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=lambda p: p.name)
+def test_formatted_corpus_has_no_fixable_diagnostics(case: Path) -> None:
+    formatted = format_text(case.read_text(encoding="utf-8"))
+    assert not FIXABLE & {d.code for d in lint_text(formatted)}
+
+
+def test_format_statement_rules():
+    src = (
+        "<processes>\n\n<process id=\"main\">\n"
+        "  USE  `t`  where: zeta=\"a  b\", alpha=1 (atomic)\n"
+        "\tTELL \"x; y\"; MILESTONE \"done\"   \n"
+        "\n</process>\n</processes>"
+    )
+    assert format_text(src) == (
+        "<processes>\n<process id=\"main\">\n"
+        "  USE `t` where: alpha=1, zeta=\"a  b\" (atomic)\n"
+        "  TELL \"x; y\"\n"
+        "  MILESTONE \"done\"\n"
+        "</process>\n</processes>\n"
+    )
+
+
+def test_block_constant_bodies_are_verbatim():
+    src = "<constants>\nTREE: TEXT<<\n\tkeep  this   \n\n>>\n</constants>\n"
+    assert format_text(src) == src
+
+
+def test_format_file_skips_unchanged(tmp_path: Path):
+    path = tmp_path / "a.prompt.md"
+    path.write_text("<instructions>\nDo it.\n</instructions>\n", encoding="utf-8")
+    os.utime(path, (1, 1))
+    result = format_file(path)
+    assert not result.changed
+    assert path.stat().st_mtime == 1
+
+
+def test_format_paths_parallel_writes(tmp_path: Path):
+    paths = []
+    for i in range(4):
+        p = tmp_path / f"{i}.prompt.md"
+        p.write_text("<instructions>  \nDo it.\n</instructions>", encoding="utf-8")
+        paths.append(p)
+    results = format_paths(paths, "write", jobs=2)
+    assert all(r.changed for r in results)
+    assert all(p.read_text() == "<instructions>\nDo it.\n</instructions>\n" for p in paths)
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_fmt_check_and_diff_do_not_write(tmp_path: Path):
+    path = tmp_path / "a.prompt.md"
+    path.write_text("<instructions>\nDo it.   \n</instructions>\n", encoding="utf-8")
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["fmt", "--check", str(path)])
+    assert result.exit_code == 1
+    result = runner.invoke(app, ["fmt", "--diff", str(path)])
+    assert result.exit_code == 1
+    assert "+Do it." in result.output
+    assert path.read_text() == "<instructions>\nDo it.   \n</instructions>\n"
+
+    result = runner.invoke(app, ["fmt", str(path)])
+    assert result.exit_code == 0
+    assert runner.invoke(app, ["fmt", "--check", str(path)]).exit_code == 0
@@ -0,0 +1,145 @@
+"""Tests for the header-only frontmatter reader (aps check-frontmatter)."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli import frontmatter
+from aps_cli.cli import app
+from aps_cli.frontmatter import (
+    FrontmatterError,
+    parse_yaml_subset,
+    read_frontmatter,
+    read_frontmatters,
+    read_header,
+    split_header,
+)
+from aps_cli.schemas import AgentFrontmatter
+from aps_cli.tools import frontmatter_tool_references
+
+AGENT = """---
+name: Researcher
+description: "Finds \\"relevant\\" files."
+tools:
+  ['read/readFile', 'search']
+infer: true
+---
+<instructions>
+You MUST read the file.
+</instructions>
+"""
+
+
+def test_header_is_read_without_the_body(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "a.agent.md"
+    # The body is not UTF-8: decoding it would fail.
+    path.write_bytes(AGENT.encode() + b"\xff" * 100_000)
+    monkeypatch.setattr(frontmatter, "READ_SIZE", 7)  # closing line straddles reads
+    assert read_header(path) == AGENT.split("---\n")[1]
+    assert split_header(AGENT) == read_header(path)
+
+    fm = read_frontmatter(path)
+    assert fm.kind == "agent" and fm.issues == []
+    assert isinstance(fm.model, AgentFrontmatter)
+    assert fm.model.description == 'Finds "relevant" files.'
+    assert fm.model.tools == ["read/readFile", "search"]
+    assert [(r.name, r.line, r.column) for r in frontmatter_tool_references(fm)] == [
+        ("read/readFile", 5, 5),
+        ("search", 5, 22),
+    ]
+
+
+def test_missing_and_unterminated_headers(tmp_path: Path):
+    plain = tmp_path / "plain.agent.md"
+    plain.write_text("<instructions>\n</instructions>\n")
+    assert read_header(plain) is None
+    assert [i.message for i in read_frontmatter(plain).issues] == ["description: Field required"]
+
+    open_ended = tmp_path / "open.prompt.md"
+    open_ended.write_text("---\nname: x\n" + "y: 1\n" * 30_000)
+    (issue,) = read_frontmatter(open_ended).issues
+    assert "not closed" in issue.message
+
+
+def test_yaml_subset():
+    text = """# comment
+name: my-subagent  # trailing comment
+count: 3
+ratio: 0.5
+empty:
+none: ~
+flags: {}
+paths:
+- "src/**/*.ts"
+- 'it''s'
+hooks:
+  PreToolUse:
+    - matcher: "Bash"
+      hooks:
+        - type: command
+          command: "./validate.sh"
+notes: |
+  line one
+
+  line two
+folded: >-
+  a
+  b
+"""
+    data, lines = parse_yaml_subset(text)
+    assert data == {
+        "name": "my-subagent",
+        "count": 3,
+        "ratio": 0.5,
+        "empty": None,
+        "none": None,
+        "flags": {},
+        "paths": ["src/**/*.ts", "it's"],
+        "hooks": {"PreToolUse": [{"matcher": "Bash", "hooks": [{"type": "command", "command": "./validate.sh"}]}]},
+        "notes": "line one\n\nline two\n",
+        "folded": "a b",
+    }
+    assert lines["paths"] == 8 and lines["hooks"] == 11
+
+
+@pytest.mark.parametrize(
+    ("text", "line", "message"),
+    [
+        ("a: 1\na: 2\n", 2, "duplicate key"),
+        ("a: &x 1\n", 1, "anchors"),
+        ("tools: ['a',\n  'b']\n", 1, "unterminated flow"),
+        ("a: 1\n   b: 2\n", 2, "unexpected indentation"),
+        ('a: "x" y\n', 1, "unexpected text"),
+    ],
+)
+def test_yaml_subset_errors(text: str, line: int, message: str):
+    with pytest.raises(FrontmatterError, match=message) as info:
+        parse_yaml_subset(text)
+    assert info.value.line == line
+
+
+def test_bulk_read_keeps_input_order(tmp_path: Path):
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"p{i}.prompt.md"
+        path.write_text(f"---\nname: p{i}\n---\n")
+        paths.append(path)
+    assert [fm.data["name"] for fm in read_frontmatters(paths, jobs=4)] == [f"p{i}" for i in range(20)]
+
+
+def test_cli_check_frontmatter(tmp_path: Path):
+    (tmp_path / "ok.agent.md").write_text(AGENT)
+    (tmp_path / "notes.md").write_text("---\nnot: [closed\n---\n")  # no convention: skipped
+    claude = tmp_path / ".claude" / "agents"
+    claude.mkdir(parents=True)
+    (claude / "bad.md").write_text("---\nname: x\npermissionMode: sometimes\n---\n")
+
+    result = CliRunner().invoke(app, ["check-frontmatter", str(tmp_path)])
+    assert result.exit_code == 1
+    lines = result.stdout.splitlines()
+    assert lines[0].endswith("bad.md:1:1: agent: description: Field required")
+    assert "bad.md:3:1: agent: permissionMode:" in lines[1]
+    assert "2 file(s) checked: 2 problem(s)" in result.stderr
@@ -0,0 +1,75 @@
+"""Tests for APS JSON value parsing and canonical emission."""
+
+from __future__ import annotations
+
+import pytest
+
+from aps_cli.jsonvalue import (
+    JsonValueError,
+    Number,
+    SymbolRef,
+    dump_canonical,
+    parse_json_value,
+    scan_json_value,
+    validate_json_value,
+)
+
+
+def test_parse_accepts_symbols_and_keeps_number_lexemes():
+    value = parse_json_value('{"b": [1.50, MAX_FILES], "a": {"x": null, "y": true}}')
+    assert value == {
+        "b": [Number("1.50"), SymbolRef("MAX_FILES")],
+        "a": {"x": None, "y": True},
+    }
+
+
+def test_digit_runs_are_numbers_unless_symbol_chars_follow():
+    assert parse_json_value("[10, 2_X, 1.5e3]") == [Number("10"), SymbolRef("2_X"), Number("1.5e3")]
+
+
+def test_dump_canonical_sorts_keys_and_normalizes_spacing():
+    src = '{\n  "z": 1,\n  "a": ["x" ,  LIMIT],\n  "m": {"k":"é"}\n}'
+    assert dump_canonical(parse_json_value(src)) == '{"a": ["x", LIMIT], "m": {"k": "é"}, "z": 1}'
+
+
+@pytest.mark.parametrize(
+    "src",
+    ['{"a": 1,}', '{"a" 1}', "[1 2]", "'x'", '{"a": 1, "a": 2}', "1 2", "", "tru"],
+)
+def test_invalid_json_raises_with_offset(src):
+    with pytest.raises(JsonValueError) as exc:
+        parse_json_value(src)
+    assert exc.value.offset >= 0
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        '{"a": 1,}', '{"a" 1}', "[1 2]", "'x'", '{"a": 1, "a": 2}', '{"a": 1, "\\u0061": 2}',
+        "1 2", "", "tru", "NaN", "[1, LIMIT, {\"k\": [true, null]}]", " {} ", "01", "[[[]]]",
+        '{"a": {"b": X}}', '{"a": [1, 2', "-", '"\\x"',
+    ],
+)
+def test_validators_agree_with_the_parser(src):
+    try:
+        parse_json_value(src)
+        expected = None
+    except JsonValueError as e:
+        expected = (str(e), e.offset)
+    for validate in (scan_json_value, validate_json_value):
+        try:
+            validate(src)
+            got = None
+        except JsonValueError as e:
+            got = (str(e), e.offset)
+        if validate is scan_json_value:
+            assert got == expected
+        else:
+            assert (got is None) == (expected is None)
+
+
+def test_scanner_handles_deep_nesting():
+    scan_json_value("[" * 5000 + "]" * 5000)
+    validate_json_value("[" * 5000 + "]" * 5000)
+    with pytest.raises(JsonValueError):
+        validate_json_value("[" * 5000)
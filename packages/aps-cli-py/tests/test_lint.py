@@ -0,0 +1,111 @@
+"""Tests for the APS linter rules."""
+
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli.cli import app
+from aps_cli.lint import collect_lint_targets, lint_paths, lint_text
+
+
+def _prompt(body: str, header: str = '<process id="main">') -> str:
+    return f"<processes>\n{header}\n{body}\n</process>\n</processes>\n"
+
+
+def _codes(text: str) -> list[str]:
+    return [d.code for d in lint_text(text)]
+
+
+def test_valid_process_has_no_diagnostics():
+    text = _prompt(
+        "RUN `helper` where: alpha=1, beta=\"x\"\n"
+        "USE `search` where: query=\"a\" (atomic, timeout_ms=100)\n"
+        "CAPTURE RESULT from `search`\n"
+        "SET COUNT := 1 (from INP)\n"
+        "RETURN: COUNT, RESULT"
+    )
+    assert lint_text(text) == []
+
+
+def test_reserved_symbol_is_ag002():
+    diags = lint_text(_prompt("SET WITH := 1"))
+    assert [d.code for d in diags] == ["AG-002"]
+    assert (diags[0].line, diags[0].column) == (3, 5)
+
+
+def test_reserved_process_id_and_key_are_ag002():
+    assert _codes(_prompt("RUN `join`")) == ["AG-002"]
+    assert _codes(_prompt("", header='<process id="run">')) == ["AG-002"]
+    assert _codes(_prompt("USE `tool` where: if=1")) == ["AG-002"]
+
+
+def test_reserved_capture_and_foreach_bindings_are_ag002():
+    assert _codes(_prompt("CAPTURE TRY from `tool`")) == ["AG-002"]
+    assert _codes(_prompt("SET ITEMS := []\nFOREACH when IN ITEMS:")) == ["AG-002"]
+
+
+def test_unbackticked_id_is_ag003():
+    diags = lint_text(_prompt("RUN helper"))
+    assert [d.code for d in diags] == ["AG-003"]
+    assert "backticks" in diags[0].message
+
+
+def test_invalid_ids_and_keys_are_ag003():
+    assert _codes(_prompt("USE `Bad_Tool`")) == ["AG-003"]
+    assert _codes(_prompt("RUN `xy` where: Key=1")) == ["AG-003"]
+    assert _codes(_prompt("", header='<process id="Main">')) == ["AG-003"]
+    assert _codes(_prompt("", header='<process id="main" args="Amount: Number">')) == ["AG-003"]
+
+
+def test_text_outside_processes_is_ignored():
+    text = "<instructions>\nSET WITH := 1\n</instructions>\n"
+    assert lint_text(text) == []
+
+
+def test_collect_lint_targets_expands_directories(tmp_path: Path):
+    (tmp_path / "a.prompt.md").write_text("x")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.agent.md").write_text("x")
+    (tmp_path / "c.txt").write_text("x")
+    targets = collect_lint_targets([tmp_path, tmp_path / "a.prompt.md"])
+    assert [t.name for t in targets] == ["a.prompt.md", "b.agent.md"]
+
+
+def test_unreadable_files_are_reported_and_others_linted(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("APS_NO_DAEMON", "1")
+    (tmp_path / "a.md").write_text("<instructions>\n\tx\n</instructions>\n")
+    (tmp_path / "b.md").write_bytes(b"\xff\xfe<instructions>\n")
+    results = list(lint_paths(collect_lint_targets([tmp_path, tmp_path / "nope.md"]), jobs=1))
+    assert [(r.error is None, len(r.diagnostics)) for r in results] == [
+        (True, 1),
+        (False, 0),
+        (False, 0),
+    ]
+
+    result = CliRunner().invoke(app, ["lint", str(tmp_path), str(tmp_path / "nope.md")])
+    assert result.exit_code == 1
+    assert "a.md:2:1: AG-011" in result.stdout
+    assert f"error: cannot lint {tmp_path / 'b.md'}: 'utf-8' codec" in result.stderr
+    assert f"error: cannot lint {tmp_path / 'nope.md'}: " in result.stderr
+
+
+def test_block_constant_delimiters_are_ag045_and_ag046():
+    used = '<processes>\n<process id="main">\n  RETURN: CFG\n</process>\n</processes>\n'
+    diags = lint_text("<constants>\nCFG: YAML<<\na: 1\n>>\n</constants>\n" + used)
+    assert [(d.code, d.line, d.column, d.end_column) for d in diags] == [("AG-046", 2, 6, 12)]
+    diags = lint_text(used + "<constants>\nCFG: JSON<<\n{}\n</constants>\n")
+    assert [(d.code, d.line, d.column) for d in diags] == [("AG-045", 7, 1)]
+
+
+def test_invalid_inline_and_block_json_is_ag007():
+    diags = lint_text(_prompt('RUN `helper` where: cfg={"a": 1,}\nSET ITEMS := [1 2]\nRETURN: ITEMS'))
+    assert [(d.code, d.line, d.column) for d in diags] == [("AG-007", 3, 33), ("AG-007", 4, 17)]
+    consts = '<constants>\nCFG: {"a" 1}\nBLOCK: JSON<<\n[\n  1,\n]\n>>\n</constants>\n'
+    used = _prompt("RETURN: CFG, BLOCK")
+    assert [(d.code, d.line, d.column) for d in lint_text(consts + used)] == [
+        ("AG-007", 2, 11),
+        ("AG-007", 6, 1),
+    ]
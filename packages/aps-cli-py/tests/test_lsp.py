@@ -0,0 +1,263 @@
+"""Tests for the `aps lsp` language server."""
+
+from __future__ import annotations
+
+import io
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from aps_cli.lint import DocumentLintCache, ProcessLintCache, lint_document
+from aps_cli.lsp import LanguageServer, TextDocument, read_message, write_message
+from aps_cli.parser import parse_document, patch_document
+
+LIB = """<formats>
+<format id="REPORT_V1">
+# Report
+</format>
+</formats>
+<processes>
+<process id="collect" name="Collect">
+  RETURN: format=REPORT_V1
+</process>
+</processes>
+"""
+
+MAIN = """<processes>
+<process id="main" name="Main">
+  RUN `collect`
+  RETURN: format:REPORT_V1
+</process>
+</processes>
+"""
+
+
+def _frame(*messages: dict) -> io.BytesIO:
+    out = io.BytesIO()
+    for m in messages:
+        write_message(out, m)
+    out.seek(0)
+    return out
+
+
+def _responses(raw: bytes) -> list[dict]:
+    stream = io.BytesIO(raw)
+    out = []
+    while (m := read_message(stream)) is not None:
+        out.append(m)
+    return out
+
+
+def _session(root: Path, *messages: dict) -> tuple[int, list[dict]]:
+    init = {"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {"rootUri": root.as_uri()}}
+    writer = io.BytesIO()
+    code = LanguageServer(_frame(init, *messages), writer).run()
+    return code, _responses(writer.getvalue())
+
+
+def _open(uri: str, text: str) -> dict:
+    params = {"textDocument": {"uri": uri, "languageId": "markdown", "version": 1, "text": text}}
+    return {"jsonrpc": "2.0", "method": "textDocument/didOpen", "params": params}
+
+
+def _change(uri: str, version: int, *changes: dict) -> dict:
+    params = {"textDocument": {"uri": uri, "version": version}, "contentChanges": list(changes)}
+    return {"jsonrpc": "2.0", "method": "textDocument/didChange", "params": params}
+
+
+def _edit(line: int, start: int, end: int, text: str) -> dict:
+    rng = {"start": {"line": line, "character": start}, "end": {"line": line, "character": end}}
+    return {"range": rng, "text": text}
+
+
+def _published(messages: list[dict]) -> list[list[str]]:
+    return [
+        [d["code"] for d in m["params"]["diagnostics"]]
+        for m in messages
+        if m.get("method") == "textDocument/publishDiagnostics"
+    ]
+
+
+def test_text_document_applies_utf16_ranges():
+    doc = TextDocument.from_text("file:///x.md", "a\U0001F600b\nsecond\nthird")
+    # The emoji is two UTF-16 code units: character 3 is just before "b".
+    doc.apply(_edit(0, 3, 3, "!"))
+    assert doc.lines[0] == "a\U0001F600!b"
+    doc.apply({"range": {"start": {"line": 0, "character": 1}, "end": {"line": 2, "character": 2}}, "text": "-"})
+    assert doc.lines == ["a-ird"]
+    doc.apply({"text": "new\ntext"})
+    assert doc.text == "new\ntext"
+
+
+def test_process_cache_reuses_unchanged_processes():
+    cache = ProcessLintCache()
+    statements: dict = {}
+    first = parse_document(MAIN.replace("RUN `collect`", "RUN collect"), statement_cache=statements)
+    assert [d.code for d in lint_document(first, cache=cache)] == ["AG-003"]
+
+    moved = parse_document("\n\n" + first.text, statement_cache=statements)
+    assert moved.processes[0].statements[0] is not first.processes[0].statements[0]
+    found = lint_document(moved, cache=cache)
+    assert [(d.code, d.line) for d in found] == [("AG-003", 5)]
+    assert found == lint_document(moved)
+
+
+def test_document_cache_relints_edits_like_a_full_lint():
+    cache = DocumentLintCache()
+    text = MAIN.replace("</processes>", '<process id="collect">\n  SET OUT := 1\n</process>\n</processes>')
+    doc = parse_document(text)
+    assert lint_document(doc, cache=cache) == []
+    for edited in (
+        text.replace("RUN `collect`", "RUN `collect`\t"),
+        text.replace("SET OUT := 1", "SET OUT := MISSING"),
+        text.replace("SET OUT := 1", "SET OUT := 1\n  RETURN: OUT"),
+    ):
+        doc = patch_document(doc, edited) or parse_document(edited)
+        assert lint_document(doc, cache=cache) == lint_document(parse_document(edited))
+
+
+def test_diagnostics_follow_incremental_edits(tmp_path: Path):
+    uri = (tmp_path / "main.md").as_uri()
+    code, messages = _session(
+        tmp_path,
+        _open(uri, MAIN),
+        _change(uri, 2, _edit(2, 2, 2, "\t")),
+        _change(uri, 3, _edit(2, 2, 3, "")),
+        {"jsonrpc": "2.0", "id": 1, "method": "shutdown"},
+        {"jsonrpc": "2.0", "method": "exit"},
+    )
+    assert code == 0
+    assert messages[0]["result"]["capabilities"]["textDocumentSync"]["change"] == 2
+    assert _published(messages) == [[], ["AG-011"], []]
+    tab = next(m for m in messages if m.get("method") and m["params"]["diagnostics"])
+    assert tab["params"]["diagnostics"][0]["range"]["start"] == {"line": 2, "character": 2}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="select() cannot poll pipes on Windows")
+def test_changes_queued_together_are_analyzed_once(tmp_path: Path):
+    uri = (tmp_path / "main.md").as_uri()
+    init = {"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {"rootUri": tmp_path.as_uri()}}
+    script = _frame(
+        init,
+        _open(uri, MAIN),
+        _change(uri, 2, _edit(2, 2, 2, "\t")),
+        _change(uri, 3, _edit(2, 2, 3, "")),
+        _change(uri, 4, _edit(3, 2, 2, "\t")),
+        {"jsonrpc": "2.0", "id": 1, "method": "shutdown"},
+        {"jsonrpc": "2.0", "method": "exit"},
+    ).getvalue()
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, script)  # the whole burst is waiting before the server starts
+    os.close(write_fd)
+    writer = io.BytesIO()
+    with os.fdopen(read_fd, "rb", buffering=0) as reader:
+        assert LanguageServer(reader, writer).run() == 0
+    messages = _responses(writer.getvalue())
+    published = [m["params"] for m in messages if m.get("method") == "textDocument/publishDiagnostics"]
+    assert [(p["version"], [d["code"] for d in p["diagnostics"]]) for p in published] == [(4, ["AG-011"])]
+    assert messages[-1] == {"jsonrpc": "2.0", "id": 1, "result": None}
+
+
+def test_definition_uses_workspace_index(tmp_path: Path):
+    (tmp_path / "lib.md").write_text(LIB, encoding="utf-8")
+    uri = (tmp_path / "main.md").as_uri()
+    lib_uri = (tmp_path / "lib.md").as_uri()
+
+    def definition(rid: int, line: int, character: int) -> dict:
+        params = {"textDocument": {"uri": uri}, "position": {"line": line, "character": character}}
+        return {"jsonrpc": "2.0", "id": rid, "method": "textDocument/definition", "params": params}
+
+    _, messages = _session(
+        tmp_path,
+        _open(uri, MAIN),
+        definition(1, 2, 9),  # inside `collect`
+        definition(2, 3, 20),  # inside format:REPORT_V1
+        definition(3, 3, 4),  # on RETURN
+        {"jsonrpc": "2.0", "id": 4, "method": "workspace/symbol", "params": {"query": "co"}},
+        {"jsonrpc": "2.0", "id": 5, "method": "unknown/method"},
+    )
+    results = {m["id"]: m for m in messages if "id" in m}
+    assert results[1]["result"] == [
+        {
+            "uri": lib_uri,
+            "range": {"start": {"line": 6, "character": 13}, "end": {"line": 6, "character": 20}},
+        }
+    ]
+    assert results[2]["result"][0]["range"]["start"] == {"line": 1, "character": 12}
+    assert results[3]["result"] == []
+    assert [s["name"] for s in results[4]["result"]] == ["collect"]
+    assert results[5]["error"]["code"] == -32601
+
+
+def test_scripted_client_over_stdio(tmp_path: Path):
+    uri = (tmp_path / "main.md").as_uri()
+    init = {"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {"rootUri": tmp_path.as_uri()}}
+    script = _frame(
+        init,
+        _open(uri, MAIN.replace("RUN `collect`", "RUN collect")),
+        {"jsonrpc": "2.0", "id": 1, "method": "shutdown"},
+        {"jsonrpc": "2.0", "method": "exit"},
+    ).getvalue()
+    proc = subprocess.run(
+        [sys.executable, "-m", "aps_cli", "lsp", "--stdio"],
+        input=script,
+        capture_output=True,
+        timeout=60,
+        check=False,
+    )
+    assert proc.returncode == 0, proc.stderr.decode()
+    messages = _responses(proc.stdout)
+    assert _published(messages) == [["AG-003"]]
+    assert messages[-1] == {"jsonrpc": "2.0", "id": 1, "result": None}
+
+
+def test_placeholder_references(tmp_path: Path):
+    uri = (tmp_path / "fmt.md").as_uri()
+    text = (
+        '<formats>\n<format id="R_V1">\n## <TITLE>\nWHERE:\n- <TITLE> is String.\n</format>\n</formats>\n'
+        '<processes>\n<process id="main">\n  RETURN: title=<TITLE>\n</process>\n</processes>\n'
+    )
+
+    def references(rid: int, line: int, character: int, declaration: bool) -> dict:
+        params = {
+            "textDocument": {"uri": uri},
+            "position": {"line": line, "character": character},
+            "context": {"includeDeclaration": declaration},
+        }
+        return {"jsonrpc": "2.0", "id": rid, "method": "textDocument/references", "params": params}
+
+    _, messages = _session(
+        tmp_path,
+        _open(uri, text),
+        references(1, 9, 18, True),  # inside <TITLE> in RETURN
+        references(2, 2, 3, False),  # on the `<` in the format body
+        references(3, 0, 1, True),
+    )
+    results = {m["id"]: m["result"] for m in messages if "id" in m}
+    starts = [(r["range"]["start"]["line"], r["range"]["start"]["character"]) for r in results[1]]
+    assert starts == [(2, 3), (4, 2), (9, 16)]
+    assert results[1][0]["range"]["end"] == {"line": 2, "character": 10}
+    assert [r["range"]["start"]["line"] for r in results[2]] == [2, 9]
+    assert results[3] == []
+
+
+def test_failing_notification_is_logged_and_clears_diagnostics(tmp_path: Path):
+    uri = (tmp_path / "main.md").as_uri()
+    bad_edit = {"range": {"start": {"line": 0}}, "text": "x"}  # no character/end
+    code, messages = _session(
+        tmp_path,
+        _open(uri, MAIN.replace("RUN `collect`", "RUN `collect`\t")),
+        _change(uri, 2, bad_edit),
+        {"jsonrpc": "2.0", "id": 1, "method": "workspace/symbol", "params": {"query": "main"}},
+        {"jsonrpc": "2.0", "id": 2, "method": "shutdown"},
+        {"jsonrpc": "2.0", "method": "exit"},
+    )
+    assert code == 0
+    (log,) = [m for m in messages if m.get("method") == "window/logMessage"]
+    assert log["params"]["type"] == 1
+    assert log["params"]["message"].startswith("textDocument/didChange failed: KeyError")
+    assert _published(messages) == [["AG-011"], []]
+    assert [m["result"][0]["name"] for m in messages if m.get("id") == 1] == ["main"]
@@ -0,0 +1,95 @@
+"""Tests for the APS envelope/DSL parser."""
+
+from aps_cli.parser import parse_document, patch_document, split_top_level
+
+PROMPT = """---
+name: demo
+---
+<instructions>
+Do the thing.
+</instructions>
+<triggers>
+<trigger event="user_message" target="main" />
+</triggers>
+<processes>
+<process id="main" name="Main">
+  RUN `helper` where: a=1, b={"k": [1, 2]}
+  ELSE IF X:
+</process>
+<process id="helper">
+  TELL "hi"
+</process>
+</processes>
+"""
+
+
+def test_parse_document_sections_and_processes():
+    doc = parse_document(PROMPT)
+    assert [s.name for s in doc.sections] == ["instructions", "triggers", "processes"]
+    assert [p.id for p in doc.processes] == ["main", "helper"]
+    assert doc.processes[0].end_line == 14
+    assert doc.triggers[0].attrs["target"] == "main"
+
+
+def test_parse_statement_fields():
+    stmt = parse_document(PROMPT).processes[0].statements[0]
+    assert stmt.keyword == "RUN"
+    assert stmt.target is not None and stmt.target.name == "helper"
+    assert stmt.target_backticked
+    assert [(p.key, p.value) for p in stmt.params] == [("a", "1"), ("b", '{"k": [1, 2]}')]
+    assert stmt.params[1].column == 28
+    assert parse_document(PROMPT).processes[0].statements[1].keyword == "ELSE IF"
+
+
+def test_split_top_level_respects_nesting_and_strings():
+    parts = split_top_level('a=1, b="x, y", c=[1, 2]')
+    assert [p for p, _ in parts] == ["a=1", 'b="x, y"', "c=[1, 2]"]
+    assert [o for _, o in parts] == [0, 5, 15]
+
+
+def test_parse_constants_and_formats():
+    doc = parse_document(
+        "<constants>\nLIMIT: 3\nCFG: JSON<<\n{\n>>\n</constants>\n"
+        '<formats>\n<format id="OUT_V1" name="Out">\nbody\n</format>\n</formats>\n'
+        '<runtime>\nQUERY: ""\n</runtime>\n'
+    )
+    assert [(c.name, c.section, c.block_type) for c in doc.constants] == [
+        ("LIMIT", "constants", None),
+        ("CFG", "constants", "JSON"),
+        ("QUERY", "runtime", None),
+    ]
+    assert (doc.constants[1].line, doc.constants[1].end_line) == (3, 5)
+    assert [(f.id, f.line, f.end_line) for f in doc.formats] == [("OUT_V1", 8, 10)]
+
+
+def test_block_constant_bodies_are_offset_slices():
+    body = "\n".join(f'  "k{i}": ">> not a close {i}",' for i in range(20000))
+    text = f"<constants>\nBIG: TEXT<<\n{body}\n>>\nEMPTY: JSON<<\n>>\nAFTER: 1\n</constants>\n"
+    doc = parse_document(text)
+    big, empty, after = doc.constants
+    assert big.body(doc.text) == body and big.end_line == 20003
+    assert (empty.line, empty.end_line, empty.body(doc.text)) == (20004, 20005, "")
+    assert (after.name, after.line) == ("AFTER", 20006)
+
+    unterminated = parse_document("<constants>\nCFG: JSON<<\n{}\n</constants>\n")
+    cfg = unterminated.constants[0]
+    assert cfg.end_line is None and cfg.body(unterminated.text) == "{}\n</constants>\n"
+    assert unterminated.sections[0].end_line is None
+
+
+def test_patch_document_reparses_only_the_edited_process():
+    doc = parse_document(PROMPT, path="p.md")
+    memo: dict = {}
+    text = PROMPT.replace('TELL "hi"', 'TELL "<NAME>"')
+    patched = patch_document(doc, text, statement_cache=memo)
+    assert patched is not None
+    assert patched == parse_document(text, path="p.md")
+    assert patched.processes[0] is doc.processes[0] and patched.sections is doc.sections
+    assert list(memo) == [('TELL "<NAME>"', 3)]
+    assert [(o.line, o.column) for o in patched.placeholders.occurrences["NAME"]] == [(16, 9)]
+    assert patch_document(doc, PROMPT) is doc
+
+    # Tag lines, added lines and edits outside process bodies need a full parse.
+    assert patch_document(doc, PROMPT.replace('<process id="helper">', '<process id="help">')) is None
+    assert patch_document(doc, PROMPT.replace('TELL "hi"', 'TELL "hi"\n  TELL "again"')) is None
+    assert patch_document(doc, PROMPT.replace("Do the thing.", "Do it.")) is None
@@ -0,0 +1,96 @@
+"""Tests for the placeholder index (AG-006, AG-041, AG-042, AG-043)."""
+
+from __future__ import annotations
+
+from aps_cli.lint import lint_text
+from aps_cli.parser import parse_document
+
+FORMATS = """<formats>
+<format id="LIST_V1" name="List">
+## <TITLE>
+[<ITEM_NUMBER>] <ITEM> <br>
+WHERE:
+- <TITLE> is String.
+- <ITEM_NUMBER> is Integer; from 1 to <ITEM_COUNT>.
+- <ITEM_COUNT> is Integer.
+- <ITEM> is String; a List<String> is not allowed.
+</format>
+</formats>
+"""
+
+
+def _problems(text: str) -> list[tuple[str, int, int]]:
+    return [
+        (code, line, column)
+        for fmt in parse_document(text).placeholders.formats.values()
+        for code, _, line, column, _ in fmt.problems()
+    ]
+
+
+def test_index_roles_and_lookup():
+    text = FORMATS + '<processes>\n<process id="main">\n  RETURN: title=<TITLE>\n</process>\n</processes>\n'
+    index = parse_document(text).placeholders
+    fmt = index.formats["LIST_V1"]
+    assert set(fmt.body) == {"TITLE", "ITEM_NUMBER", "ITEM"}
+    assert set(fmt.definitions) == {"TITLE", "ITEM_NUMBER", "ITEM_COUNT", "ITEM"}
+    assert fmt.referenced == {"ITEM_COUNT"}
+    assert [(o.line, o.role) for o in index.occurrences["TITLE"]] == [
+        (3, "body"),
+        (6, "definition"),
+        (14, "text"),
+    ]
+    occ = index.at(14, 18)
+    assert occ is not None and occ.name == "TITLE" and occ.section == "processes"
+    assert index.at(14, 16) is None
+    assert _problems(text) == []
+
+
+def test_where_mismatches():
+    body = (
+        '<formats>\n<format id="R_V1">\n## <TITLE>\n<BODY>\n'
+        "WHERE:\n- <TITLE> is String.\n- <EXTRA> is String.\n</format>\n</formats>\n"
+    )
+    assert _problems(body) == [("AG-042", 4, 1), ("AG-042", 7, 3)]
+    assert _problems(body.replace("WHERE:\n", "where:\n")) == [
+        ("AG-041", 5, 1),
+        ("AG-042", 4, 1),
+        ("AG-042", 7, 3),
+    ]
+    inline = '<formats>\n<format id="R_V1">\n## <TITLE>\nWHERE: - <TITLE> is String.\n</format>\n</formats>\n'
+    assert _problems(inline) == [("AG-041", 4, 1)]
+    missing = '<formats>\n<format id="R_V1">\n## <TITLE>\n</format>\n</formats>\n'
+    assert _problems(missing) == [("AG-041", 2, 13)]
+    # Without placeholders, WHERE is optional.
+    assert _problems('<formats>\n<format id="R_V1">\n## Report\n</format>\n</formats>\n') == []
+
+
+def test_style_errors():
+    text = (
+        '<formats>\n<format id="R_V1">\n'
+        "## {title} ${NAME} <Title Case> <snake_case> <br/> <https://example.com> <TITLE>\n"
+        "<intent>\n<TITLE>\n</intent> <lower case> <Div>\n"
+        "WHERE:\n- <TITLE> is List<String>; {not checked here}.\n</format>\n</formats>\n"
+    )
+    assert _problems(text) == [
+        ("AG-043", 3, 4),
+        ("AG-043", 3, 12),
+        ("AG-043", 3, 20),
+        ("AG-043", 3, 33),
+    ]
+
+
+def test_unresolved_placeholders_in_processes():
+    procs = (
+        "<constants>\nLIMIT: 5\n</constants>\n<runtime>\nUSER: 1\n</runtime>\n"
+        '<processes>\n<process id="main">\n'
+        "  SET Q := <QUERY> (from INP)\n"
+        "  SET R := <RAW>\n"
+        "  RETURN: q=Q, r=R, limit=<LIMIT>, user=<USER>, title=<TITLE>\n"
+        "</process>\n</processes>\n"
+    )
+    def unresolved(text: str) -> list[tuple[int, int]]:
+        return [(d.line, d.column) for d in lint_text(text) if d.code == "AG-006"]
+
+    # <TITLE> is defined by LIST_V1's WHERE; <QUERY> is bound by its SET source.
+    assert unresolved(FORMATS + procs) == [(21, 12)]
+    assert unresolved(procs) == [(10, 12), (11, 55)]
@@ -0,0 +1,94 @@
+"""Tests for the streaming diagnostic reporters."""
+
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli.cli import app
+from aps_cli.diagnostics import make_diagnostic
+from aps_cli.lint import lint_file, lint_paths
+from aps_cli.report import make_reporter
+
+TAB = make_diagnostic("AG-011", "Tab character detected.", 2, 3, file="a.md")
+ODD = make_diagnostic("AG-999", "100%, done:\nreally", 1, 1, file="dir,1/b.md")
+
+
+def _render(fmt: str, *diagnostics, interrupt: bool = False) -> str:
+    out = io.StringIO()
+    try:
+        with make_reporter(fmt, out) as reporter:
+            for d in diagnostics:
+                reporter.emit(d)
+            if interrupt:
+                raise KeyboardInterrupt
+    except KeyboardInterrupt:
+        pass
+    return out.getvalue()
+
+
+def test_json_matches_array_dump():
+    for items in ([], [TAB], [TAB, ODD]):
+        expected = json.dumps([d.to_dict() for d in items], indent=2) + "\n"
+        assert _render("json", *items) == expected
+
+
+def test_jsonl_and_text():
+    lines = _render("jsonl", TAB, ODD).splitlines()
+    assert [json.loads(line)["code"] for line in lines] == ["AG-011", "AG-999"]
+    assert _render("text", TAB) == "a.md:2:3: AG-011 Tab character detected.\n"
+
+
+def test_github_annotations_escape_values():
+    out = _render("github", TAB, ODD).splitlines()
+    assert out[0] == (
+        "::error file=a.md,line=2,endLine=2,col=3,endColumn=4,title=AG-011::Tab character detected."
+    )
+    assert out[1].startswith("::error file=dir%2C1/b.md,")
+    assert out[1].endswith("::100%25, done:%0Areally")
+
+
+@pytest.mark.parametrize("interrupt", [False, True])
+def test_sarif_is_valid_even_when_interrupted(interrupt: bool):
+    log = json.loads(_render("sarif", TAB, ODD, interrupt=interrupt))
+    assert log["version"] == "2.1.0"
+    run = log["runs"][0]
+    rules = run["tool"]["driver"]["rules"]
+    first = run["results"][0]
+    assert rules[first["ruleIndex"]]["id"] == "AG-011"
+    assert first["locations"][0]["physicalLocation"]["region"]["startColumn"] == 3
+    assert "ruleIndex" not in run["results"][1]
+    assert run["invocations"] == [{"executionSuccessful": not interrupt}]
+
+
+def test_sarif_artifact_uris_are_valid():
+    stdin = make_diagnostic("AG-011", "Tab character detected.", 1, 1)
+    record = make_diagnostic("AG-011", "Tab character detected.", 1, 1, file="<stdin>:3")
+    run = json.loads(_render("sarif", stdin, record, ODD))["runs"][0]
+    uris = [r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] for r in run["results"]]
+    assert uris == ["stdin", "%3Cstdin%3E%3A3", "dir%2C1/b.md"]
+
+
+def test_lint_paths_parallel_preserves_order(tmp_path: Path):
+    paths = []
+    for i in range(9):
+        p = tmp_path / f"p{i}.md"
+        p.write_text("<instructions>\n" + "\tx\n" * i + "</instructions>\n", encoding="utf-8")
+        paths.append(p)
+    assert [r.diagnostics for r in lint_paths(paths, jobs=3)] == [lint_file(p) for p in paths]
+
+
+def test_cli_lint_sarif(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("APS_NO_DAEMON", "1")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.md").write_text("<instructions>\n\tx\n</instructions>\n", encoding="utf-8")
+    result = CliRunner().invoke(app, ["lint", "a.md", "--format", "sarif"])
+    assert result.exit_code == 1
+    log = json.loads(result.stdout)
+    assert [r["ruleId"] for r in log["runs"][0]["results"]] == ["AG-011"]
+    bad = CliRunner().invoke(app, ["lint", "a.md", "--format", "xml"])
+    assert bad.exit_code == 2
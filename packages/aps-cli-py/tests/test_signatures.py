@@ -0,0 +1,94 @@
+"""Tests for predefinedTools.json signatures (AG-012/AG-034/AG-044 on USE)."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from aps_cli.lint import lint_file
+from aps_cli.signatures import load_signatures, signature_files
+
+SEARCH = {
+    "name": "search",
+    "params": {
+        "limit": {"type": "Integer"},
+        "mode": {"enum": ["fast", "deep"]},
+        "query": {"type": "String", "required": True},
+    },
+}
+PROMPT = (
+    "<constants>\nMAX: 5\nRATIO: 0.5\n</constants>\n"
+    '<processes>\n<process id="main">\n'
+    '  USE `search` where: limit=MAX, mode="fast", query="a"\n'
+    '  USE `search` where: query="a", limit=RATIO\n'
+    '  USE `search` where: limit=2, mode="slow", scope="x"\n'
+    "  USE `other` where: b=1, a=2\n"
+    "</process>\n</processes>\n"
+)
+
+
+def _write_tools(directory: Path, *tools: dict) -> Path:
+    path = directory / "predefinedTools.json"
+    lines = ",\n".join("    " + json.dumps(t) for t in tools)
+    path.write_text('{\n  "tools": [\n' + lines + "\n  ]\n}\n", encoding="utf-8")
+    return path
+
+
+def _found(path: Path) -> list[tuple[str, int, int, str]]:
+    return [
+        (d.code, d.line, d.column, d.message)
+        for d in lint_file(path)
+        if d.code in ("AG-012", "AG-034", "AG-044")
+    ]
+
+
+def test_where_checked_against_signatures(tmp_path: Path):
+    (tmp_path / ".git").mkdir()
+    _write_tools(tmp_path, SEARCH)
+    prompt = tmp_path / "p.prompt.md"
+    prompt.write_text(PROMPT, encoding="utf-8")
+    assert _found(prompt) == [
+        ("AG-012", 8, 34, "where: keys must be lexicographic (expected limit, query)."),
+        ("AG-044", 8, 34, "Tool 'search': 'limit' expects Integer, got Number."),
+        ("AG-044", 9, 8, "USE `search` is missing parameter(s): query."),
+        ("AG-044", 9, 32, "Tool 'search': 'mode' must be one of: \"fast\", \"deep\"."),
+        ("AG-044", 9, 45, "Tool 'search' has no parameter 'scope'."),
+        ("AG-012", 10, 27, "where: keys must be lexicographic (expected a, b)."),
+    ]
+
+
+def test_without_signatures_only_key_order(tmp_path: Path):
+    prompt = tmp_path / "p.prompt.md"
+    prompt.write_text(PROMPT, encoding="utf-8")
+    (tmp_path / ".git").mkdir()
+    assert [code for code, *_ in _found(prompt)] == ["AG-012", "AG-012"]
+
+
+def test_collisions_across_files(tmp_path: Path):
+    (tmp_path / ".git").mkdir()
+    inner = tmp_path / "agents"
+    inner.mkdir()
+    outer_file = _write_tools(tmp_path, SEARCH)
+    inner_file = _write_tools(inner, {**SEARCH, "params": {"query": {"type": "Number"}}})
+    prompt = inner / "p.prompt.md"
+    prompt.write_text(PROMPT, encoding="utf-8")
+    assert signature_files(prompt) == [outer_file.resolve(), inner_file.resolve()]
+    found = [d for d in _found(prompt) if d[0] == "AG-034"]
+    assert [(code, line) for code, line, *_ in found] == [("AG-034", 7), ("AG-034", 8), ("AG-034", 9)]
+    assert str(inner_file.resolve()) in found[0][3]
+    # The same signature twice is not a collision.
+    _write_tools(inner, {**SEARCH, "description": "Search the workspace."})
+    assert not [d for d in _found(prompt) if d[0] == "AG-034"]
+
+
+def test_compiled_sets_are_cached_by_hash(tmp_path: Path):
+    path = _write_tools(tmp_path, SEARCH)
+    first = load_signatures([path])
+    assert first is not None and load_signatures([path]) is first
+    _write_tools(tmp_path, {"name": "search"})
+    changed = load_signatures([path])
+    assert changed is not first and changed.tools["search"].required == ()
+
+    path.write_text('{"tools": [{"name": "x", "params": {"a": {"type": "String", "bogus": 1}}}]}')
+    broken = load_signatures([path])
+    assert broken.tools == {} and len(broken.errors) == 1
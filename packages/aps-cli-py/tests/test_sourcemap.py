@@ -0,0 +1,36 @@
+"""Tests for offset <-> line/column conversion."""
+
+from __future__ import annotations
+
+from aps_cli.lint import lint_text
+from aps_cli.parser import parse_document
+from aps_cli.sourcemap import SourceMap, utf16_length, utf16_to_index
+
+TEXT = "ab\n\nc\U0001F600d\n"
+
+
+def test_offsets_round_trip_through_positions():
+    sm = SourceMap.from_text(TEXT)
+    assert sm.starts == [0, 3, 4, 8]
+    for offset in range(len(TEXT) + 1):
+        line, column = sm.position(offset)
+        assert sm.offset(line, column) == offset
+        assert TEXT.count("\n", 0, offset) + 1 == line
+    assert sm.position(4) == (3, 1)
+    assert sm.line_text(9) == ""
+
+
+def test_utf16_conversion():
+    sm = SourceMap.from_text(TEXT)
+    assert utf16_length("c\U0001F600d") == 4
+    assert sm.utf16_column(3, 3) == 3  # after the astral character
+    assert sm.column_from_utf16(3, 3) == 3
+    assert utf16_to_index("abc", 10) == 3
+    assert utf16_to_index("c\U0001F600d", 1) == 1
+
+
+def test_document_carries_source_map_used_by_rules():
+    doc = parse_document("<instructions>\nx\ty\t\n\t</instructions>\n")
+    assert doc.source_map.position(doc.text.index("\t")) == (2, 2)
+    found = [(d.line, d.column) for d in lint_text(doc.text)]
+    assert found == [(2, 2), (3, 1)]
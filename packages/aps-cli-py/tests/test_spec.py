@@ -0,0 +1,92 @@
+"""Tests for the compiled spec atoms (token catalog, error table)."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from aps_cli.parser import SECTION_ORDER
+from aps_cli.spec import (
+    SpecTable,
+    compile_token_catalog,
+    load_spec_table,
+    load_token_catalog,
+    load_token_catalog_json,
+    spec_dir,
+)
+
+
+def test_token_catalog_loads_from_payload():
+    tokens = load_token_catalog()
+    assert "RUN" in tokens.reserved
+    assert "FOREACH" in tokens.keywords
+    assert "atomic" in tokens.modifiers
+    assert "atomic" not in tokens.keywords
+
+
+def test_is_reserved_is_case_insensitive():
+    tokens = load_token_catalog()
+    assert tokens.is_reserved("WITH")
+    assert tokens.is_reserved("with")
+    assert not tokens.is_reserved("without")
+
+
+def test_match_keyword_prefers_multiword_phrases():
+    tokens = load_token_catalog()
+    assert tokens.match_keyword("ELSE IF X:") == "ELSE IF"
+    assert tokens.match_keyword("ELSE:") == "ELSE"
+    assert tokens.match_keyword("RUN `a`") == "RUN"
+    assert tokens.match_keyword("RUNNER `a`") is None
+    assert tokens.match_keyword("lowercase text") is None
+
+
+def test_scan_reserved_finds_tokens_with_offsets():
+    tokens = load_token_catalog()
+    hits = list(tokens.scan_reserved("x = run_fast or join"))
+    assert hits == [(13, "or"), (16, "join")]
+
+
+def test_compile_token_catalog_from_minimal_data():
+    tokens = compile_token_catalog(
+        {
+            "keywords": {"control": ["IF", "ELSE IF"], "modifiers": ["atomic"]},
+            "reserved": ["IF"],
+            "identifiers": {
+                "symbol": "^[A-Z]+$",
+                "process_id": "^[a-z]+$",
+                "tool_name": "^[a-z]+$",
+            },
+        }
+    )
+    assert tokens.phrases == {"ELSE": ("ELSE IF",)}
+    assert tokens.symbol_re.match("ABC")
+
+
+def test_spec_table_matches_json_atoms():
+    table = load_spec_table()
+    assert table.tokens.reserved == load_token_catalog_json().reserved
+    assert table.tokens.keywords == load_token_catalog_json().keywords
+    assert table.section_order == SECTION_ORDER
+
+
+def test_spec_table_error_lookup():
+    table = load_spec_table()
+    info = table.error("AG-045")
+    assert info is not None
+    assert info.name == "BlockConstantUnterminated"
+    assert info.severity == "error"
+    assert table.error("AG-W01").severity == "warning"
+    assert table.error("AG-999") is None
+    assert [e.code for e in table.errors] == sorted(e.code for e in table.errors)
+
+
+def test_spec_table_is_cached_by_revision(tmp_path: Path):
+    copy = tmp_path / "skill"
+    shutil.copytree(spec_dir(), copy / "spec")
+    assert load_spec_table(copy) is load_spec_table()
+    assert len(load_spec_table().revision) == 64
+
+
+def test_spec_table_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        SpecTable(b"XXXX" + bytes(40))
@@ -0,0 +1,45 @@
+"""Tests for Simplified Technical English checks (AG-021)."""
+
+from __future__ import annotations
+
+from aps_cli.lint import lint_text
+from aps_cli.parser import parse_document
+from aps_cli.ste import SteChecker, load_ste_checker, parse_words
+
+
+def _checker() -> SteChecker:
+    return SteChecker(parse_words("# comment\nstop\nfile\nread\ncopy\nthe\na\nto\nbig\n"), max_words=6)
+
+
+def test_dictionary_and_inflections():
+    checker = _checker()
+    assert all(checker.approved(w) for w in ("stop", "stops", "stopped", "files", "copies", "copied"))
+    assert checker.approved("bigger") and checker.approved("read-file")
+    assert not checker.approved("utilize")
+    bundled = load_ste_checker()
+    assert bundled.approved("remove") and not bundled.approved("utilize")
+
+
+def test_exempt_tokens_count_but_are_not_looked_up():
+    checker = SteChecker(_checker().words)
+    line = '- Read `some_code` "quoted words" <TASK> MUST 3 src/app.py Claude'
+    assert list(checker.check_line(line)) == []
+    findings = list(checker.check_line("Utilize the file, then stop."))
+    assert [(f.column, f.length) for f in findings] == [(0, 7), (18, 4)]
+
+
+def test_sentence_length():
+    checker = _checker()
+    assert list(checker.check_line("1. read the file")) == []
+    (finding,) = checker.check_line("read the file to a file to the file")
+    assert "9 words" in finding.message
+    assert (finding.column, finding.length) == (0, 35)
+
+
+def test_lint_checks_only_ste_instructions():
+    plain = "<instructions>\nUtilize the tool.\n</instructions>\n"
+    flagged = '<instructions ste="true">\nUtilize the tool.\nRead the file.\n</instructions>\n'
+    assert parse_document(flagged).sections[0].attrs == {"ste": "true"}
+    assert [d.code for d in lint_text(plain)] == []
+    diags = lint_text(flagged)
+    assert [(d.code, d.line, d.column) for d in diags] == [("AG-021", 2, 1)]
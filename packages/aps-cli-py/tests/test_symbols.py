@@ -0,0 +1,138 @@
+"""Tests for scope-aware symbol resolution."""
+
+from __future__ import annotations
+
+import time
+
+from aps_cli.jsonvalue import Number
+from aps_cli.lint import lint_text
+from aps_cli.parser import parse_document
+from aps_cli.spec import load_token_catalog
+from aps_cli.symbols import ScopedMap, SymbolTable, value_symbols
+
+
+def _prompt(body: str, extra: str = "", header: str = '<process id="main">') -> str:
+    return f"{extra}<processes>\n{header}\n{body}\n</process>\n</processes>\n"
+
+
+def _diags(text: str) -> list[tuple[str, int, int]]:
+    return [(d.code, d.line, d.column) for d in lint_text(text)]
+
+
+def test_scoped_map_is_persistent():
+    root = ScopedMap({"A": 1})
+    inner = root.bind("B", 2).bind("A", 3)
+    hidden = inner.bind("B", None)
+    assert (root.get("A"), root.get("B")) == (1, None)
+    assert (inner.get("A"), inner.get("B")) == (3, 2)
+    assert "B" not in hidden and hidden.flatten() == {"A": 3}
+
+
+def test_value_symbols_skip_strings_numbers_placeholders_and_enums():
+    found = value_symbols('{"a": LIMIT, "b": "NOT_ME"} 1000 <INPUT> enum(RED,BLUE) 1E5', 10)
+    assert [(i.name, i.column) for i in found] == [("LIMIT", 16)]
+
+
+def test_uses_resolve_in_lexical_order():
+    text = _prompt(
+        "RETURN: EARLY\n"
+        "SET EARLY := LIMIT (from INP)\n"
+        "UNSET EARLY\n"
+        "SNAP [EARLY]\n"
+        "TELL \"x\" why:MISSING",
+        extra="<constants>\nLIMIT: 1\n</constants>\n",
+    )
+    assert _diags(text) == [("AG-001", 6, 9), ("AG-001", 9, 7), ("AG-001", 10, 14)]
+
+
+def test_foreach_scope_and_run_exports():
+    text = _prompt(
+        "SET ITEMS := []\n"
+        "FOREACH item IN ITEMS:\n"
+        "  SET LAST := _INDEX\n"
+        "RETURN: LAST, _INDEX",
+        extra="",
+    )
+    assert _diags(text) == [("AG-001", 6, 15)]
+
+    helper = '<process id="helper">\n  SET OUT := 1\n  RETURN: OUT\n</process>\n'
+    text = _prompt("RUN `helper`\nRETURN: OUT").replace("</processes>", helper + "</processes>")
+    assert lint_text(text) == []
+    # RETURNs of processes defined elsewhere are unknown: later uses are not flagged.
+    assert [d.line for d in lint_text(_prompt("RETURN: A1\nRUN `elsewhere`\nRETURN: OUT"))] == [3]
+
+
+def test_duplicate_symbols_are_ag013():
+    consts = "<constants>\nLIMIT: 1\n</constants>\n<runtime>\nLIMIT: 2\n</runtime>\n"
+    assert [c for c, *_ in _diags(_prompt("RETURN: LIMIT", extra=consts))] == ["AG-013"]
+    assert _diags(_prompt("CAPTURE LIMIT from `tool`", extra="<constants>\nLIMIT: 1\n</constants>\n")) == [
+        ("AG-013", 6, 9)
+    ]
+    nested = _prompt(
+        "SET ITEMS := []\nFOREACH item IN ITEMS:\n  FOREACH item IN ITEMS:\n    TELL \"x\"",
+    )
+    assert _diags(nested) == [("AG-013", 5, 11)]
+    args = _prompt("TELL \"x\"", header='<process id="main" args="a: Number, a: String">')
+    assert [c for c, *_ in _diags(args)] == ["AG-013"]
+
+
+def test_with_blocks():
+    assert _diags(_prompt('WITH {"endpoint": "a"}:\nUSE `tool`')) == [("AG-023", 3, 1)]
+    assert [c for c, *_ in _diags(_prompt('WITH {"endpoint": }:\n  USE `tool`'))] == ["AG-023"]
+    assert [c for c, *_ in _diags(_prompt('WITH ["a"]:\n  USE `tool`'))] == ["AG-023"]
+
+    text = _prompt(
+        'WITH {"endpoint": "a", "retries": 1}:\n'
+        '  WITH {"endpoint": "b"}:\n'
+        "    USE `tool`\n"
+        "  USE `other`\n"
+        "USE `last`"
+    )
+    assert lint_text(text) == []
+    doc = parse_document(text)
+    table = SymbolTable(doc, load_token_catalog().symbol_re)
+    scope = table.resolve(doc.processes[0])
+    assert table.resolve(doc.processes[0]) is scope
+    assert scope.defaults[5] == {"endpoint": "b", "retries": Number("1")}
+    assert scope.defaults[6] == {"endpoint": "a", "retries": Number("1")}
+    assert scope.defaults[7] == {}
+
+
+def test_resolution_scales_linearly_with_statements():
+    symbol_re = load_token_catalog().symbol_re
+
+    def resolve_seconds(n: int) -> float:
+        # Every SET looks up a new name and reads the first one: a chain walk per lookup
+        # makes this quadratic.
+        doc = parse_document(_prompt("".join(f"SET V{i} := V0\n" for i in range(n))))
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            scope = SymbolTable(doc, symbol_re).resolve(doc.processes[0])
+            best = min(best, time.perf_counter() - start)
+        assert len(scope.uses) == n
+        return best
+
+    small, large = resolve_seconds(1000), resolve_seconds(4000)
+    assert large < small * 8  # linear: ~4x; quadratic: ~16x
+
+
+def test_previous_table_carries_over_unchanged_scopes():
+    symbol_re = load_token_catalog().symbol_re
+    helper = '<process id="helper">\n  SET OUT := 1\n  RETURN: OUT\n</process>\n'
+    text = _prompt("RUN `helper`\nRETURN: OUT").replace("</processes>", helper + "</processes>")
+    doc = parse_document(text)
+    table = SymbolTable(doc, symbol_re)
+    main, helper_scope = (table.resolve(p) for p in doc.processes)
+
+    edited = parse_document(text.replace("SET OUT := 1", "SET OUT := 2"))
+    carried = SymbolTable(edited, symbol_re, table)
+    assert carried.resolve(edited.processes[0]).uses == main.uses
+    assert carried.resolve(edited.processes[0]).process is edited.processes[0]
+    assert carried.resolve(edited.processes[1]) is not helper_scope
+
+    # A changed RETURN changes what RUN binds in the caller: nothing is carried over.
+    tail = "\n</process>\n</processes>"
+    renamed = parse_document(text.replace("RETURN: OUT" + tail, "RETURN: RES" + tail))
+    fresh = SymbolTable(renamed, symbol_re, table)
+    assert [u.ident.name for u in fresh.resolve(renamed.processes[0]).undefined()] == ["OUT"]
@@ -0,0 +1,101 @@
+"""Tests for the compiled tool-registry index (aps check-tools)."""
+
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from aps_cli.cli import app
+from aps_cli.core import resolve_payload_skill_dir
+from aps_cli.parser import parse_document
+from aps_cli.tools import PlatformTools, document_tool_references, load_tool_index
+
+
+def _copy_skill(tmp_path: Path) -> Path:
+    skill = tmp_path / "skill"
+    shutil.copytree(resolve_payload_skill_dir() / "platforms", skill / "platforms")
+    return skill
+
+
+def test_spellings_and_suggestions(tmp_path: Path):
+    index = load_tool_index(cache_path=tmp_path / "tools.json")
+    vscode = index.platforms["vscode-copilot"]
+    assert vscode.resolve("search/codebase").status == "ok"
+    legacy = vscode.resolve("codebase")
+    assert (legacy.status, legacy.tool, legacy.suggestion) == ("renamed", "search/codebase", "search/codebase")
+    assert vscode.resolve("#codebase").tool == "search/codebase"
+    assert "search/codebase" in vscode.expand("search")
+    typo = vscode.resolve("search/codebse")
+    assert (typo.status, typo.suggestion) == ("unknown", "search/codebase")
+
+    claude = index.platforms["claude-code"]
+    assert claude.resolve("Read").status == "ok"
+    assert claude.resolve("mcp__github__list_issues").status == "ok"
+    assert [r.platform for r in index.resolve("Read")] == ["claude-code", "vscode-copilot"]
+
+
+def test_short_names_never_shadow_ids():
+    registry = {
+        "toolSets": [{"id": "web", "tools": ["web/fetch"]}],
+        "tools": [
+            {"id": "web/fetch", "preferredName": "web/fetch"},
+            {"id": "fetch", "preferredName": "fetch"},
+            {"id": "a/open"},
+            {"id": "b/open"},
+        ],
+    }
+    tools = PlatformTools.compile("p", registry)
+    assert tools.names["fetch"] == "fetch"
+    assert "open" not in tools.names
+    assert tools.expand("web") == ("web/fetch",)
+    assert tools.expand("fetch") == ("fetch",)
+
+
+def test_index_cache_tracks_registry_changes(tmp_path: Path):
+    skill = _copy_skill(tmp_path)
+    cache = tmp_path / "cache" / "tools.json"
+    first = load_tool_index(skill, cache)
+    assert json.loads(cache.read_text(encoding="utf-8"))["platforms"].keys() == first.platforms.keys()
+    assert load_tool_index(skill, cache) == first
+
+    registry = skill / "platforms" / "claude-code" / "tools-registry.json"
+    data = json.loads(registry.read_text(encoding="utf-8"))
+    data["tools"].append({"id": "Fly", "preferredName": "Fly"})
+    registry.write_text(json.dumps(data), encoding="utf-8")
+    assert load_tool_index(skill, cache).platforms["claude-code"].resolve("Fly").status == "ok"
+
+    cache.write_text("{not json", encoding="utf-8")
+    assert load_tool_index(skill, cache).platforms["claude-code"].resolve("Fly").status == "ok"
+
+
+def test_check_tools_cli(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("APS_CACHE_DIR", str(tmp_path / "cache"))
+    prompt = tmp_path / "p.prompt.md"
+    prompt.write_text(
+        '<processes>\n<process id="main">\n'
+        "  USE `codebase` where: query=Q\n"
+        "  USE `Raed` where: path=P\n"
+        "</process>\n</processes>\n",
+        encoding="utf-8",
+    )
+    refs = list(document_tool_references(parse_document(prompt.read_text(encoding="utf-8"))))
+    assert [(r.name, r.line, r.column) for r in refs] == [("codebase", 3, 8), ("Raed", 4, 8)]
+
+    runner = CliRunner()
+    vscode = runner.invoke(app, ["check-tools", str(prompt), "--platform", "vscode-copilot"])
+    assert vscode.exit_code == 1
+    assert "tool 'codebase' is now 'search/codebase'" in vscode.stdout
+    claude = runner.invoke(app, ["check-tools", str(prompt), "--platform", "claude-code"])
+    assert "unknown tool 'Raed' (did you mean 'Read'?)" in claude.stdout
+    missing = runner.invoke(app, ["check-tools", str(prompt), "--platform", "nope"])
+    assert missing.exit_code == 2
+
+    bad = tmp_path / "bad.prompt.md"
+    bad.write_bytes(b"\xff")
+    both = runner.invoke(app, ["check-tools", str(bad), str(prompt), "--platform", "claude-code"])
+    assert both.exit_code == 2
+    assert f"error: cannot check {bad}:" in both.stderr
+    assert "unknown tool 'Raed'" in both.stdout  # later files are still checked
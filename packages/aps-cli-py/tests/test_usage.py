@@ -0,0 +1,123 @@
+"""Tests for defined-but-unused analysis (AG-W01)."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aps_cli.cli import app
+from aps_cli.lint import lint_file, lint_text
+from aps_cli.parser import parse_document
+from aps_cli.usage import UsageIndex, WorkspaceUsage, drop_shared_uses, iter_bits
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+AGENT_TEMPLATE = (
+    REPO_ROOT
+    / "skill/agnostic-prompt-standard/platforms/vscode-copilot/templates/.github/agents"
+    / "aps-prompt-protocol.agent.md"
+)
+
+CONSTANTS = "<constants>\nUSED: 1\nIN_PROSE: 2\nUNUSED: 3\nNESTED: USED\n</constants>\n"
+FORMATS = (
+    "<formats>\n"
+    '<format id="REPORT_V1" name="Report">\n- <BODY>\nWHERE:\n- <BODY> is String.\n</format>\n'
+    "</formats>\n"
+)
+
+
+def _unused(text: str) -> list[tuple[str, str, int, int]]:
+    return [(d.kind, d.name, d.line, d.column) for d in UsageIndex.from_document(parse_document(text)).unused()]
+
+
+def test_iter_bits():
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(1 << 200)) == [200]
+
+
+def test_constants_and_formats():
+    text = (
+        "<instructions>\nNever exceed IN_PROSE.\n</instructions>\n"
+        + CONSTANTS
+        + FORMATS
+        + '<processes>\n<process id="main">\n  RETURN: NESTED\n</process>\n</processes>\n'
+    )
+    assert _unused(text) == [("constant", "UNUSED", 7, 1), ("format", "REPORT_V1", 11, 13)]
+    assert _unused(text.replace("IN_PROSE.", "IN_PROSE in format:REPORT_V1.")) == [
+        ("constant", "UNUSED", 7, 1)
+    ]
+    returned = text.replace("RETURN: NESTED", 'RETURN: format="REPORT_V1", body=NESTED')
+    assert _unused(returned) == [("constant", "UNUSED", 7, 1)]
+    # Runtime values come from the host and are never reported.
+    assert _unused("<runtime>\nQUERY: 1\n</runtime>\n") == []
+
+
+def test_line_cache_matches_a_full_scan():
+    text = (
+        "<instructions>\nNever exceed IN_PROSE.\n</instructions>\n"
+        + CONSTANTS
+        + FORMATS
+        + '<processes>\n<process id="main">\n  RETURN: NESTED\n</process>\n</processes>\n'
+    )
+    line_refs: dict = {}
+    for edit in (text, text.replace("NESTED\n</process>", "USED, format:REPORT_V1\n</process>"), text):
+        doc = parse_document(edit)
+        assert UsageIndex.from_document(doc, line_refs) == UsageIndex.from_document(doc)
+    assert "  RETURN: NESTED" in line_refs
+
+
+def test_processes_only_reported_with_triggers():
+    procs = (
+        '<processes>\n<process id="main">\n  RUN `helper`\n</process>\n'
+        '<process id="helper">\n  TELL "x"\n</process>\n'
+        '<process id="orphan">\n  TELL "x"\n</process>\n</processes>\n'
+    )
+    assert _unused(procs) == []
+    triggers = '<triggers>\n<trigger event="e" target="main" />\n</triggers>\n'
+    assert _unused(triggers + procs) == [("process", "orphan", 11, 14)]
+    found = lint_text(triggers + procs)
+    assert [(d.code, d.severity, d.message) for d in found] == [
+        ("AG-W01", "warning", "Process 'orphan' is defined but never used.")
+    ]
+
+
+def test_workspace_mode_keeps_formats_used_by_other_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    shared = tmp_path / "shared.md"
+    user = tmp_path / "user.md"
+    shared.write_text(FORMATS, encoding="utf-8")
+    user.write_text("<instructions>\nRender ```format:REPORT_V1```.\n</instructions>\n", encoding="utf-8")
+
+    per_file = lint_text(FORMATS, str(shared))
+    assert [d.code for d in per_file] == ["AG-W01"]
+    usage = WorkspaceUsage.from_paths([shared, user])
+    assert "format:REPORT_V1" in usage.references
+    assert drop_shared_uses(per_file, usage) == []
+
+    monkeypatch.setenv("APS_NO_DAEMON", "1")
+    args = ["lint", str(tmp_path), "--jobs", "1", "--format", "jsonl"]
+    assert "AG-W01" in CliRunner().invoke(app, args).output
+    assert "AG-W01" not in CliRunner().invoke(app, [*args, "--workspace"]).output
+
+
+def test_workspace_mode_matches_kind_and_name(tmp_path: Path):
+    consts = tmp_path / "consts.md"
+    shared = tmp_path / "shared.md"
+    user = tmp_path / "user.md"
+    # A constant named like a format used elsewhere is still unused.
+    consts.write_text("<constants>\nREPORT_V1: 1\n</constants>\n", encoding="utf-8")
+    shared.write_text(FORMATS, encoding="utf-8")
+    user.write_text("<instructions>\nRender ```format:REPORT_V1```.\n</instructions>\n", encoding="utf-8")
+    per_file = [d for p in (consts, shared) for d in lint_file(p)]
+    assert [d.code for d in per_file] == ["AG-W01", "AG-W01"]
+    kept = drop_shared_uses(per_file, WorkspaceUsage.from_paths([consts, shared, user]))
+    assert [(d.file, d.message) for d in kept] == [
+        (str(consts), "Constant 'REPORT_V1' is defined but never used.")
+    ]
+
+
+def test_bundled_agent_template_is_lint_clean():
+    # Formats are used through `RETURN: format="ASK_V1", ...`. The template calls VS Code's
+    # namespaced tools (`read/readFile`), which the spec's tool_name pattern rejects (AG-003).
+    found = [d.format() for d in lint_file(AGENT_TEMPLATE) if d.code != "AG-003"]
+    assert found == []
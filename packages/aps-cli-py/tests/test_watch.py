@@ -0,0 +1,144 @@
+"""Tests for the lint watch mode."""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+from aps_cli.core import Platform, convention_globs
+from aps_cli.watch import LintWatcher, WatchUpdate, convention_scanner, paths_scanner
+
+CLEAN = "<instructions>\nHello.\n</instructions>\n"
+TABBED = "<instructions>\n\tHello.\n</instructions>\n"
+
+
+def _touch(path: Path, text: str) -> None:
+    path.write_text(text, encoding="utf-8")
+    st = path.stat()
+    # Force a distinct stamp even on coarse-mtime filesystems.
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_refresh_reanalyzes_only_changed_files(tmp_path: Path):
+    a, b = tmp_path / "a.md", tmp_path / "b.md"
+    a.write_text(CLEAN, encoding="utf-8")
+    b.write_text(CLEAN, encoding="utf-8")
+    watcher = LintWatcher(paths_scanner([tmp_path]))
+
+    assert watcher.refresh().changed == [a, b]
+    assert not watcher.is_stale(watcher.stamps())
+    doc_b = watcher.files[b].document
+
+    _touch(a, TABBED)
+    assert watcher.is_stale(watcher.stamps())
+    update = watcher.refresh()
+    assert update.changed == [a]
+    assert watcher.files[b].document is doc_b
+    assert [d.code for d in watcher.diagnostics()] == ["AG-011"]
+
+    a.unlink()
+    update = watcher.refresh()
+    assert update.removed == [a] and not watcher.diagnostics()
+
+
+def test_saves_reuse_unchanged_statements(tmp_path: Path):
+    path = tmp_path / "p.md"
+    text = (
+        '<processes>\n<process id="a">\n  TELL "one"\n</process>\n'
+        '<process id="b">\n  TELL "two"\n</process>\n</processes>\n'
+    )
+    path.write_text(text, encoding="utf-8")
+    watcher = LintWatcher(paths_scanner([path]))
+    watcher.refresh()
+    before = watcher.files[path].document.processes[1].statements[0]
+
+    _touch(path, text.replace('"one"', '"uno"'))
+    assert watcher.refresh().changed == [path]
+    doc = watcher.files[path].document
+    assert doc.processes[1].statements[0] is before
+    assert doc.processes[0].statements[0].text == 'TELL "uno"'
+    assert set(watcher.files[path].statements) == {('TELL "uno"', 3), ('TELL "two"', 3)}
+
+
+def test_polls_stat_targets_and_rescan_on_directory_changes(tmp_path: Path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "a.md").write_text(CLEAN, encoding="utf-8")
+    scans = 0
+
+    def scan() -> list[Path]:
+        nonlocal scans
+        scans += 1
+        return paths_scanner([tmp_path])()
+
+    watcher = LintWatcher(scan, rescan=3600)
+    watcher.refresh()
+    _touch(sub / "a.md", TABBED)
+    assert watcher.is_stale(watcher.stamps())
+    watcher.refresh()
+    assert scans == 1
+
+    (sub / "b.md").write_text(CLEAN, encoding="utf-8")
+    st = sub.stat()  # coarse-mtime filesystems: make the directory change visible
+    os.utime(sub, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert watcher.refresh().changed == [sub / "b.md"] and scans == 2
+
+    (tmp_path / "c.md").write_text(CLEAN, encoding="utf-8")  # no target was in tmp_path
+    assert watcher.refresh().changed == [] and scans == 2
+    watcher.rescan = 0
+    assert watcher.refresh().changed == [tmp_path / "c.md"] and scans == 3
+
+
+def test_unreadable_file_is_not_retried_until_it_changes(tmp_path: Path):
+    bad = tmp_path / "bad.md"
+    bad.write_bytes(b"\xff\xfe")
+    watcher = LintWatcher(paths_scanner([tmp_path]))
+    assert len(watcher.refresh().errors) == 1
+    assert not watcher.is_stale(watcher.stamps())
+
+
+def test_run_debounces_and_reports(tmp_path: Path):
+    a = tmp_path / "a.md"
+    a.write_text(CLEAN, encoding="utf-8")
+    watcher = LintWatcher(paths_scanner([a]))
+    updates: list[WatchUpdate] = []
+    started, done = threading.Event(), threading.Event()
+
+    def on_update(update: WatchUpdate) -> None:
+        updates.append(update)
+        (started if len(updates) == 1 else done).set()
+
+    thread = threading.Thread(
+        target=watcher.run, args=(on_update, 0.01, 0.02, done.is_set), daemon=True
+    )
+    thread.start()
+    assert started.wait(5)
+    _touch(a, TABBED)
+    assert done.wait(5)
+    thread.join(5)
+    assert updates[1].changed == [a]
+
+
+def test_convention_globs_and_scanner(tmp_path: Path):
+    platform = Platform(
+        platform_id="x",
+        display_name="X",
+        adapter_version=None,
+        file_conventions=(
+            ".github/prompts/*.prompt.md",
+            "./CLAUDE.md",
+            "~/.claude/CLAUDE.md",
+            ".github/skills/<skill-id>/SKILL.md (legacy)",
+            "CLAUDE.md / GEMINI.md (alternates)",
+        ),
+    )
+    globs = convention_globs([platform])
+    assert globs == [".github/prompts/*.prompt.md", "CLAUDE.md", ".github/skills/*/SKILL.md", "GEMINI.md"]
+
+    (tmp_path / ".github" / "prompts").mkdir(parents=True)
+    (tmp_path / ".github" / "prompts" / "a.prompt.md").write_text(CLEAN, encoding="utf-8")
+    (tmp_path / "CLAUDE.md").write_text(CLEAN, encoding="utf-8")
+    (tmp_path / "other.md").write_text(CLEAN, encoding="utf-8")
+    names = [p.name for p in convention_scanner(tmp_path, globs)()]
+    assert names == ["a.prompt.md", "CLAUDE.md"]
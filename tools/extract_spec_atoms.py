@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Extract machine-readable "spec atoms" from the APS normative references.
+
+Why this exists:
+- Tooling (the CLI linter) must not scrape Markdown at runtime.
+- The normative text in `references/` stays the single source of truth; this script
+  regenerates the artifacts under `skill/agnostic-prompt-standard/spec/` from it.
+
+Outputs:
+- spec/aps-v1.0.tokens.json    keyword catalogs, reserved words, identifier regexes
+- spec/aps-v1.0.sections.json  ordered top-level section model
+- spec/aps-v1.0.errors.json    AG-* error/warning catalog with severity
+- spec/aps-v1.0.atoms.bin      compact precompiled form of the three files above
+
+The `.bin` table is what the CLI loads: a string pool plus fixed-width, sorted records
+that can be memory-mapped and binary-searched without parsing the JSON files.
+
+Usage:
+    python tools/extract_spec_atoms.py           # regenerate artifacts
+    python tools/extract_spec_atoms.py --check   # fail if artifacts are stale
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import struct
+from pathlib import Path
+
+SKILL_ID = "agnostic-prompt-standard"
+SPEC_VERSION = "1.0"
+
+YAML_BLOCK_RE = re.compile(r"^```yaml\n(.*?)^```", re.S | re.M)
+ERROR_RE = re.compile(r"^\s+-\s+\{\s*code:\s*(\S+),\s*name:\s*(\S+),\s*desc:\s*(.*?)\s*\}\s*$")
+
+# Binary table layout (little-endian). Must match aps_cli.spec.
+BIN_MAGIC = b"APSA"
+BIN_FORMAT = 1
+HEADER = struct.Struct("<4sHH32s")  # magic, format, table count, sha256(revision)
+DIR_ENTRY = struct.Struct("<4sII")  # table tag, absolute offset, record count (bytes for STRS)
+STR_REC = struct.Struct("<IH")  # string pool offset, length
+PAIR_REC = struct.Struct("<IHIH")  # name, value
+ERR_REC = struct.Struct("<IHIHIHB")  # code, name, desc, severity (0=error, 1=warning)
+
+
+def yaml_blocks(md_path: Path) -> list[str]:
+    return YAML_BLOCK_RE.findall(md_path.read_text(encoding="utf-8"))
+
+
+def find_block(blocks: list[str], top_key: str) -> str:
+    for block in blocks:
+        if block.startswith(f"{top_key}:"):
+            return block
+    raise SystemExit(f"YAML block '{top_key}:' not found")
+
+
+def parse_flow_list(raw: str) -> list[str]:
+    # Very small parser: "[A, B, ELSE IF]" -> ["A", "B", "ELSE IF"]
+    inner = raw.strip()
+    if not (inner.startswith("[") and inner.endswith("]")):
+        raise SystemExit(f"Expected flow list, got: {raw!r}")
+    return [v.strip() for v in inner[1:-1].split(",") if v.strip()]
+
+
+def extract_keywords(block: str) -> dict[str, list[str]]:
+    out: dict[str, list[str]] = {}
+    for line in block.splitlines()[1:]:
+        m = re.match(r"^\s+([a-z_]+):\s*(\[.*\])\s*$", line)
+        if m:
+            out[m.group(1)] = parse_flow_list(m.group(2))
+    return out
+
+
+def extract_identifiers(block: str) -> tuple[dict[str, str], list[str]]:
+    regexes: dict[str, str] = {}
+    reserved: list[str] = []
+    current: str | None = None
+    for line in block.splitlines()[1:]:
+        m = re.match(r"^  ([a-z_]+):\s*$", line)
+        if m:
+            current = m.group(1)
+            continue
+        if current is None:
+            continue
+        m = re.match(r'^\s+regex:\s*"(.*)"\s*$', line)
+        if m:
+            regexes[current] = m.group(1)
+            continue
+        m = re.match(r"^\s+-\s+([A-Z_ ]+)\s*$", line)
+        if m and current == "reserved":
+            reserved.append(m.group(1).strip())
+    return regexes, reserved
+
+
+def build_tokens(skill_dir: Path) -> dict:
+    blocks = yaml_blocks(skill_dir / "references" / "03-agentic-control.md")
+    keywords = extract_keywords(find_block(blocks, "keywords"))
+    regexes, reserved = extract_identifiers(find_block(blocks, "identifiers"))
+    return {
+        "specVersion": SPEC_VERSION,
+        "source": "references/03-agentic-control.md",
+        "keywords": keywords,
+        "reserved": sorted(set(reserved)),
+        "identifiers": dict(sorted(regexes.items())),
+    }
+
+
+def build_sections(skill_dir: Path) -> dict:
+    blocks = yaml_blocks(skill_dir / "references" / "00-structure.md")
+    block = find_block(blocks, "prompt_sections")
+    m = re.search(r"^\s+order:\s*(\[.*\])\s*$", block, re.M)
+    if not m:
+        raise SystemExit("prompt_sections.order not found")
+    return {
+        "specVersion": SPEC_VERSION,
+        "source": "references/00-structure.md",
+        "order": parse_flow_list(m.group(1)),
+        "executable": ["triggers", "processes"],
+    }
+
+
+def build_errors(skill_dir: Path) -> dict:
+    block = find_block(yaml_blocks(skill_dir / "references" / "07-error-taxonomy.md"), "errors")
+    errors: list[dict] = []
+    severity: str | None = None
+    for line in block.splitlines()[1:]:
+        if line.strip() == "hard:":
+            severity = "error"
+        elif line.strip() == "warnings:":
+            severity = "warning"
+        elif m := ERROR_RE.match(line):
+            if severity is None:
+                raise SystemExit(f"Error entry outside hard/warnings: {line!r}")
+            errors.append({"code": m.group(1), "name": m.group(2), "severity": severity, "desc": m.group(3)})
+    return {
+        "specVersion": SPEC_VERSION,
+        "source": "references/07-error-taxonomy.md",
+        "errors": sorted(errors, key=lambda e: e["code"]),
+    }
+
+
+def build_table(tokens: dict, sections: dict, errors: dict, revision: bytes) -> bytes:
+    pool = bytearray()
+    interned: dict[str, tuple[int, int]] = {}
+
+    def ref(s: str) -> tuple[int, int]:
+        if s not in interned:
+            raw = s.encode("utf-8")
+            interned[s] = (len(pool), len(raw))
+            pool.extend(raw)
+        return interned[s]
+
+    def str_table(values: list[str]) -> tuple[bytes, int]:
+        return b"".join(STR_REC.pack(*ref(v)) for v in values), len(values)
+
+    keywords = sorted({kw for name, kws in tokens["keywords"].items() if name != "modifiers" for kw in kws})
+    tables: list[tuple[bytes, bytes, int]] = [
+        (b"KWDS", *str_table(keywords)),
+        (b"MODS", *str_table(sorted(tokens["keywords"].get("modifiers", [])))),
+        (b"RSVD", *str_table(tokens["reserved"])),
+        (b"SECT", *str_table(sections["order"])),
+        (b"EXEC", *str_table(sections["executable"])),
+        (
+            b"IDNT",
+            b"".join(PAIR_REC.pack(*ref(k), *ref(v)) for k, v in sorted(tokens["identifiers"].items())),
+            len(tokens["identifiers"]),
+        ),
+        (
+            b"ERRS",
+            b"".join(
+                ERR_REC.pack(*ref(e["code"]), *ref(e["name"]), *ref(e["desc"]), e["severity"] == "warning")
+                for e in errors["errors"]
+            ),
+            len(errors["errors"]),
+        ),
+    ]
+
+    offset = HEADER.size + DIR_ENTRY.size * (len(tables) + 1)
+    directory = bytearray()
+    body = bytearray()
+    for tag, payload, count in tables:
+        directory += DIR_ENTRY.pack(tag, offset + len(body), count)
+        body += payload
+    directory += DIR_ENTRY.pack(b"STRS", offset + len(body), len(pool))
+    body += pool
+
+    return HEADER.pack(BIN_MAGIC, BIN_FORMAT, len(tables) + 1, revision) + bytes(directory) + bytes(body)
+
+
+def render(data: dict) -> str:
+    return json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repo-root", default=None, help="Repo root (defaults to this file's parent)")
+    ap.add_argument("--check", action="store_true", help="Verify artifacts are up to date")
+    args = ap.parse_args()
+
+    repo_root = Path(args.repo_root).expanduser().resolve() if args.repo_root else Path(__file__).resolve().parents[1]
+    skill_dir = repo_root / "skill" / SKILL_ID
+    spec_dir = skill_dir / "spec"
+
+    tokens = build_tokens(skill_dir)
+    sections = build_sections(skill_dir)
+    errors = build_errors(skill_dir)
+
+    artifacts: dict[str, bytes] = {
+        f"aps-v{SPEC_VERSION}.tokens.json": render(tokens).encode("utf-8"),
+        f"aps-v{SPEC_VERSION}.sections.json": render(sections).encode("utf-8"),
+        f"aps-v{SPEC_VERSION}.errors.json": render(errors).encode("utf-8"),
+    }
+    revision = hashlib.sha256(b"".join(artifacts.values())).digest()
+    artifacts[f"aps-v{SPEC_VERSION}.atoms.bin"] = build_table(tokens, sections, errors, revision)
+
+    stale: list[str] = []
+    for name, content in artifacts.items():
+        dst = spec_dir / name
+        current = dst.read_bytes() if dst.exists() else None
+        if current == content:
+            continue
+        if args.check:
+            stale.append(name)
+            continue
+        spec_dir.mkdir(parents=True, exist_ok=True)
+        dst.write_bytes(content)
+        print(f"Wrote {dst.relative_to(repo_root)}")
+
+    if stale:
+        raise SystemExit(f"Stale spec atoms (run tools/extract_spec_atoms.py): {', '.join(stale)}")
+
+    if args.check:
+        print("OK: spec atoms up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())